@@ -129,7 +129,7 @@ async def start_crawler(payload: Dict[str, Any], request: Request, _auth=Depends
         async def _run_once():
             loop = asyncio.get_running_loop()
             try:
-                await asyncio.to_thread(kernel.run, name, **params)
+                await kernel.run_async(name, **params)
                 api_logger.info("crawler.start finished: %s", name)
                 monitoring_service.record_script_execution(name, "success")
             except Exception as e:
@@ -376,7 +376,7 @@ async def post_demo_run(payload: Dict[str, Any], request: Request, _auth=Depends
             return {"code": 1, "error": "kernel not initialized"}
 
         # 异步执行脚本
-        result = await asyncio.to_thread(kernel.run, "demo_run", message=message)
+        result = await kernel.run_async("demo_run", message=message)
 
         api_logger.info("POST /demo/run completed: %s", result)
 
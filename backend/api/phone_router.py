@@ -62,6 +62,7 @@ async def analyze_phone(
                 method="POST",
                 user_id=user.get('id'),
                 status_code=200,
+                response_time=duration,
                 response_size=len(json.dumps(cached_result)),
                 cache_hit=True
             )
@@ -88,6 +89,7 @@ async def analyze_phone(
             method="POST",
             user_id=user.get('id'),
             status_code=200,
+            response_time=time.time() - start_time,
             response_size=len(json.dumps(result)),
             cache_hit=False
         )
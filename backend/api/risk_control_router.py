@@ -80,7 +80,7 @@ async def run_captcha_solver(
         解决结果
     """
     try:
-        result = captcha_solver.run_captcha_solver(
+        result = await captcha_solver.run_captcha_solver(
             request.image,
             engine=request.engine
         )
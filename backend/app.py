@@ -17,11 +17,12 @@ from prometheus_client import CONTENT_TYPE_LATEST
 import time
 
 from backend.core.kernel import Kernel
-from backend.core.logger import ws_logger, register_ws_sender
+from backend.core.logger import ws_logger, register_ws_sender, unregister_ws_sender
 from backend.api.auth import get_current, require_perm
 from backend.core.pipeline import DAGPipeline
 from backend.core.task import Node
 from backend.ws.manager import ws_manager
+from backend.ws.event_bus import event_bus
 from backend.ws.task_manager import task_manager
 from backend.core.pipeline_ws import WSDAGPipeline
 from backend.services.plugin_manager import plugin_manager
@@ -97,6 +98,13 @@ if RequestContextMiddleware:
 
 kernel = Kernel()
 kernel.load_scripts()
+
+# OCR 引擎预加载（OCR_WARMUP）：在执行推理的进程内加载（ocr 路由为进程池时由工作进程初始化函数加载）
+try:
+    from backend.services.ocr_engines import warmup_from_env
+    warmup_from_env()
+except Exception as e:
+    ws_logger.error(f"OCR warmup failed: {e}")
 app.state.kernel = kernel
 app.state.health_history = []
 
@@ -361,11 +369,17 @@ async def _boot_auto_probe():
     except Exception as e:
         ws_logger.error(f"Monitoring service initialization failed: {e}")
 
+    # 启动 WS 事件总线（多 worker 扇出）
+    try:
+        await event_bus.start()
+    except Exception as e:
+        ws_logger.error(f"Event bus start failed: {e}")
+
 @app.on_event("shutdown")
 async def _shutdown_services():
     # 关闭缓存服务
     try:
-        cache_service.close()
+        await cache_service.aclose()
         ws_logger.info("Cache service closed successfully")
     except Exception as e:
         ws_logger.error(f"Cache service shutdown failed: {e}")
@@ -377,6 +391,26 @@ async def _shutdown_services():
     except Exception as e:
         ws_logger.error(f"Database service shutdown failed: {e}")
 
+    # 关闭 WS 事件总线
+    try:
+        await event_bus.close()
+    except Exception as e:
+        ws_logger.error(f"Event bus shutdown failed: {e}")
+
+    # 关闭命名执行池
+    try:
+        from backend.core.executors import executor_pools
+        executor_pools.shutdown()
+    except Exception as e:
+        ws_logger.error(f"Executor pools shutdown failed: {e}")
+
+    # 落盘并关闭任务状态存储
+    try:
+        task_manager.store.close()
+        ws_logger.info("Task store closed successfully")
+    except Exception as e:
+        ws_logger.error(f"Task store shutdown failed: {e}")
+
     # 关闭监控服务
     try:
         # 监控服务没有异步关闭方法，使用同步方式
@@ -490,6 +524,7 @@ async def log_ws(ws: WebSocket):
             ws_logger.error("UI-BUBBLE: %s", data)
             await ws.send_text("ACK")
     except Exception:
+        unregister_ws_sender(sender)
         ws_logger.info("WS /ws/logs disconnected")
         try:
             WS_CONNECTIONS.labels(endpoint="/ws/monitor").dec()  # type: ignore
@@ -511,10 +546,7 @@ async def log_ws(ws: WebSocket):
 @app.websocket("/ws/pipeline/{task_id}")
 async def ws_pipeline(websocket: WebSocket, task_id: str):
     await ws_manager.connect(task_id, websocket)
-    state = task_manager.get_task_state(task_id)
-    if state:
-        for node_id in state["nodes"].keys():
-            await ws_manager.broadcast_node_update(task_id, node_id)
+    await ws_manager.send_snapshot(task_id, websocket)
     try:
         while True:
             await websocket.receive_text()
@@ -562,6 +594,7 @@ class DAGPayload(BaseModel):
     max_concurrency: int = 4
     node_timeout: int | None = None
     priority: int = 100
+    rerun_from: str | None = None  # 上一次的 task_id：仅重跑变化节点及其下游
 
 
 @app.post("/api/pipeline/validate")
@@ -580,8 +613,11 @@ async def run_pipeline(payload: DAGPayload, _auth=Depends(require_perm("run"))):
         PIPELINE_RUNS_TOTAL.inc()
     except Exception:
         pass
+    if payload.rerun_from and not task_manager.get_task_state(payload.rerun_from):
+        return {"code": 1, "error": f"rerun_from task not found: {payload.rerun_from}"}
     nodes = [Node(id=n.id, script=n.script, params=n.params, depends_on=n.depends_on, condition=n.condition) for n in payload.nodes]
-    task_id = await pipeline_ws.run(nodes, payload.max_concurrency, priority=payload.priority)
+    task_id = await pipeline_ws.run(nodes, payload.max_concurrency, priority=payload.priority,
+                                    rerun_from=payload.rerun_from)
     return {
         "code": 0,
         "task_id": task_id,
@@ -663,6 +699,7 @@ async def ws_monitor(ws: WebSocket):
             _ = await ws.receive_text()
             await ws.send_text("ACK")
     except Exception:
+        unregister_ws_sender(sender)
         ws_logger.info("WS /ws/monitor disconnected")
         try:
             WS_CONNECTIONS.labels(endpoint="/ws/monitor").dec()  # type: ignore
@@ -15,6 +15,8 @@ import time
 from typing import Optional, Callable, Any
 from datetime import timedelta
 
+from backend.core import codec
+
 # ==================== 缓存配置 ====================
 
 class CacheConfig:
@@ -61,17 +63,20 @@ def cache(expire: Optional[int] = None, key_prefix: str = ""):
             # 生成缓存键
             cache_key = f"{key_prefix or func.__name__}:{args}:{kwargs}"
             
-            # 尝试从缓存获取
+            # 尝试从缓存获取（经 codec 解码；旧版以 str() 写入的值无法解析，按未命中处理）
             cached = redis_client.get(cache_key)
             if cached:
-                return eval(cached)
+                try:
+                    return codec.loads(cached)
+                except ValueError:
+                    pass
             
             # 执行函数
             result = await func(*args, **kwargs)
             
             # 存储到缓存
             ttl = expire or CacheConfig.CACHE_TTL.get("default", 3600)
-            redis_client.setex(cache_key, ttl, str(result))
+            redis_client.set(cache_key, codec.dumps(result), ex=ttl)
             
             return result
         
@@ -4,9 +4,17 @@ import asyncio
 import time
 import logging
 from contextlib import asynccontextmanager
+from contextvars import ContextVar
 
 logger = logging.getLogger(__name__)
 
+# 每次调用的计时与资源状态 {id(脚本实例): {...}}：同一注册实例被并发节点复用时互不覆盖
+_CALL_STATE: ContextVar[Optional[Dict[int, Dict[str, Any]]]] = ContextVar("script_call_state", default=None)
+
+
+def _new_state() -> Dict[str, Any]:
+    return {"start_time": None, "end_time": None, "resources": []}
+
 class BaseScript(ABC):
     """脚本基类 - 提供统一的脚本执行框架"""
 
@@ -14,14 +22,39 @@ class BaseScript(ABC):
     description = "基础脚本"
     version = "1.0.0"
     timeout = 30  # 默认30秒超时
+    blocking = False  # run 内含阻塞调用（requests/time.sleep 等）时置 True，由执行池线程运行而非直接占用事件循环
 
     def __init__(self):
-        self.start_time = None
-        self.end_time = None
         self.execution_id = None
-        self.resources = []
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
 
+    # --- 调用内状态（invoke 期间取本次调用的副本，否则取实例级默认值） ---
+    def _state(self) -> Dict[str, Any]:
+        calls = _CALL_STATE.get()
+        if calls and id(self) in calls:
+            return calls[id(self)]
+        return self.__dict__.setdefault("_default_state", _new_state())
+
+    @property
+    def start_time(self) -> Optional[float]:
+        return self._state()["start_time"]
+
+    @start_time.setter
+    def start_time(self, value: Optional[float]):
+        self._state()["start_time"] = value
+
+    @property
+    def end_time(self) -> Optional[float]:
+        return self._state()["end_time"]
+
+    @end_time.setter
+    def end_time(self, value: Optional[float]):
+        self._state()["end_time"] = value
+
+    @property
+    def resources(self) -> list:
+        return self._state()["resources"]
+
     @abstractmethod
     async def run(self, **kwargs) -> Dict[str, Any]:
         """执行脚本的主要逻辑"""
@@ -71,31 +104,33 @@ class BaseScript(ABC):
         finally:
             await self.cleanup()
 
-    async def execute(self, **kwargs) -> Dict[str, Any]:
-        """统一的执行入口"""
-        # 参数验证
+    async def invoke(self, **kwargs) -> Dict[str, Any]:
+        """内核 / 执行池的执行入口：参数验证、生命周期钩子与超时控制，异常与超时（TimeoutError）原样抛出"""
         validated_kwargs = self.validate_params(**kwargs)
-
-        # 执行超时控制
+        token = _CALL_STATE.set({**(_CALL_STATE.get() or {}), id(self): _new_state()})
         try:
             async with self.execution_context(**validated_kwargs):
-                result = await asyncio.wait_for(
-                    self.run(**validated_kwargs),
-                    timeout=self.timeout
-                )
+                try:
+                    result = await asyncio.wait_for(self.run(**validated_kwargs), timeout=self.timeout)
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"脚本 {self.name} 执行超时 ({self.timeout}秒)") from None
                 await self.post_run(result)
                 return result
-        except asyncio.TimeoutError:
-            error_msg = f"脚本 {self.name} 执行超时 ({self.timeout}秒)"
-            logger.error(error_msg)
-            await self.on_error(TimeoutError(error_msg))
+        finally:
+            _CALL_STATE.reset(token)
+
+    async def execute(self, **kwargs) -> Dict[str, Any]:
+        """统一的执行入口（直接调用方使用）：异常与超时转为 {"success": False, ...} 返回"""
+        try:
+            return await self.invoke(**kwargs)
+        except TimeoutError as e:
+            logger.error(str(e))
             return {
                 "success": False,
-                "error": error_msg,
+                "error": str(e),
                 "timeout": self.timeout
             }
         except Exception as e:
-            await self.on_error(e)
             return {
                 "success": False,
                 "error": str(e)
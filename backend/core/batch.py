@@ -0,0 +1,69 @@
+"""
+批量执行工具
+
+- 有界并发：同时执行的条目数不超过 concurrency（默认取环境变量 BATCH_CONCURRENCY，8）
+- 单条超时 / 异常转为错误结果，不中断整批
+- iter_batch 流式产出 (index, result)：默认按输入顺序，前缀完成即产出；ordered=False 时按完成顺序
+- run_batch 收集为与输入等长、顺序一致的结果列表
+
+CPU 密集的单条处理（OCR、正则扫描等）应在 worker 内通过 executor_pools.run(...) 交给进程池，
+此处只负责调度。
+"""
+import asyncio
+import os
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+DEFAULT_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "8"))
+
+
+def _default_error(item: Any, error: BaseException) -> dict:
+    return {"status": "error", "error": str(error) or error.__class__.__name__}
+
+
+async def iter_batch(items: Iterable[Any], worker: Callable[[Any], Awaitable[Any]], *,
+                     concurrency: Optional[int] = None, timeout: Optional[float] = None,
+                     on_error: Optional[Callable[[Any, BaseException], Any]] = None,
+                     ordered: bool = True) -> AsyncIterator[Tuple[int, Any]]:
+    """并发执行 worker(item)，流式产出 (输入下标, 结果)"""
+    items = list(items)
+    on_error = on_error or _default_error
+    sem = asyncio.Semaphore(max(1, concurrency or DEFAULT_CONCURRENCY))
+
+    async def _one(index: int, item: Any):
+        async with sem:
+            try:
+                if timeout:
+                    result = await asyncio.wait_for(worker(item), timeout=timeout)
+                else:
+                    result = await worker(item)
+            except asyncio.TimeoutError:
+                result = on_error(item, TimeoutError(f"执行超时 ({timeout}秒)"))
+            except Exception as e:
+                result = on_error(item, e)
+        return index, result
+
+    tasks = [asyncio.create_task(_one(i, item)) for i, item in enumerate(items)]
+    try:
+        if not ordered:
+            for fut in asyncio.as_completed(tasks):
+                yield await fut
+            return
+        done, next_index = {}, 0
+        for fut in asyncio.as_completed(tasks):
+            index, result = await fut
+            done[index] = result
+            while next_index in done:
+                yield next_index, done.pop(next_index)
+                next_index += 1
+    finally:
+        # 调用方提前结束迭代时取消剩余条目
+        for task in tasks:
+            task.cancel()
+
+
+async def run_batch(items: Iterable[Any], worker: Callable[[Any], Awaitable[Any]], *,
+                    concurrency: Optional[int] = None, timeout: Optional[float] = None,
+                    on_error: Optional[Callable[[Any, BaseException], Any]] = None) -> List[Any]:
+    """并发执行并按输入顺序返回全部结果"""
+    return [result async for _, result in iter_batch(items, worker, concurrency=concurrency,
+                                                     timeout=timeout, on_error=on_error)]
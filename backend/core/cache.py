@@ -0,0 +1,216 @@
+"""
+内核结果缓存引擎
+
+Kernel.try_cache / save_cache 的存储后端。默认 LRUCacheEngine：
+- 条目数与字节数双预算，超出时按 LRU 淘汰
+- 按脚本设置 TTL（global_policy.yaml 的 cache.script_ttl），过期惰性清理
+- 命中/未命中/淘汰计数导出到 backend/core/metrics.py
+
+自定义引擎只需实现 CacheEngine 接口，并通过 Kernel(cache=...) 注入。
+"""
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+try:
+    from backend.core.metrics import (
+        RESULT_CACHE_HITS,
+        RESULT_CACHE_MISSES,
+        RESULT_CACHE_EVICTIONS,
+        RESULT_CACHE_ENTRIES,
+        RESULT_CACHE_BYTES,
+    )  # type: ignore
+except Exception:
+    class _No:
+        def labels(self, *_, **__):
+            return self
+        def inc(self, *_):
+            pass
+        def set(self, *_):
+            pass
+    RESULT_CACHE_HITS = RESULT_CACHE_MISSES = RESULT_CACHE_EVICTIONS = RESULT_CACHE_ENTRIES = RESULT_CACHE_BYTES = _No()
+
+
+def approx_size(obj: Any, _depth: int = 0) -> int:
+    """
+    近似估算结果对象占用的字节数（用于字节预算，不追求精确）。
+    字符串/字节按长度计，容器递归累加，嵌套过深时按浅层大小截断。
+    """
+    if obj is None or isinstance(obj, (bool, int, float)):
+        return 16
+    if isinstance(obj, (str, bytes, bytearray)):
+        return 48 + len(obj)
+    if _depth >= 8:
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        return 64 + sum(approx_size(k, _depth + 1) + approx_size(v, _depth + 1) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return 56 + sum(approx_size(v, _depth + 1) for v in obj)
+    try:
+        return sys.getsizeof(obj)
+    except Exception:
+        return 64
+
+
+class CacheEngine(ABC):
+    """缓存引擎接口"""
+
+    name = "base"
+
+    @abstractmethod
+    def get(self, key: str, script: str = "") -> Optional[Any]:
+        """读取缓存；未命中或已过期返回 None"""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, script: str = "", ttl: Optional[float] = None) -> None:
+        """写入缓存；ttl 为秒，None/0 表示使用默认策略"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """删除单个条目"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """清空全部条目"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class LRUCacheEngine(CacheEngine):
+    """
+    线程安全的 LRU + TTL 缓存，带条目数与字节数预算。
+    - max_entries: 最大条目数（<=0 表示不限）
+    - max_bytes: 近似字节预算（<=0 表示不限）
+    - default_ttl: 默认过期秒数（<=0 表示不过期）
+    - script_ttl: {script: ttl} 按脚本覆盖默认 TTL
+    - name: 指标标签 cache=<name>
+    """
+
+    name = "kernel"
+
+    def __init__(self, max_entries: int = 2048, max_bytes: int = 256 * 1024 * 1024,
+                 default_ttl: float = 3600, script_ttl: Optional[Dict[str, float]] = None,
+                 name: str = "kernel"):
+        self.name = name
+        self.max_entries = int(max_entries or 0)
+        self.max_bytes = int(max_bytes or 0)
+        self.default_ttl = float(default_ttl or 0)
+        self.script_ttl = dict(script_ttl or {})
+        # key -> (value, expires_at, size, script)
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @classmethod
+    def from_policy(cls) -> "LRUCacheEngine":
+        from backend.core.policy import GlobalPolicy
+        cfg = GlobalPolicy.cache()
+        return cls(
+            max_entries=cfg.get("max_entries", 2048),
+            max_bytes=cfg.get("max_bytes", 256 * 1024 * 1024),
+            default_ttl=cfg.get("default_ttl", 3600),
+            script_ttl=cfg.get("script_ttl") or {},
+        )
+
+    def ttl_for(self, script: str) -> float:
+        return float(self.script_ttl.get(script, self.default_ttl) or 0)
+
+    def get(self, key: str, script: str = "") -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[1] and item[1] <= time.monotonic():
+                self._remove(key, reason="ttl")
+                item = None
+            if item is None:
+                self._misses += 1
+                RESULT_CACHE_MISSES.labels(cache=self.name).inc()
+                return None
+            self._data.move_to_end(key)
+            self._hits += 1
+        RESULT_CACHE_HITS.labels(cache=self.name).inc()
+        return item[0]
+
+    def set(self, key: str, value: Any, script: str = "", ttl: Optional[float] = None) -> None:
+        ttl = float(ttl) if ttl else self.ttl_for(script)
+        expires_at = time.monotonic() + ttl if ttl > 0 else 0.0
+        size = approx_size(value)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            # 单条超过字节预算则不缓存
+            if self.max_bytes and size > self.max_bytes:
+                return
+            self._data[key] = (value, expires_at, size, script)
+            self._bytes += size
+            self._evict()
+            self._export()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+                self._export()
+
+    def delete_prefix(self, prefix: str) -> int:
+        """删除以 prefix 开头的条目，返回删除数"""
+        with self._lock:
+            keys = [k for k in self._data if k.startswith(prefix)]
+            for key in keys:
+                self._remove(key)
+            if keys:
+                self._export()
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self._export()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "engine": self.name,
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    # --- 内部方法（调用方需持有锁） ---
+    def _remove(self, key: str, reason: Optional[str] = None):
+        _value, _exp, size, _script = self._data.pop(key)
+        self._bytes -= size
+        if reason:
+            self._evictions += 1
+            RESULT_CACHE_EVICTIONS.labels(cache=self.name, reason=reason).inc()
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._data and (
+            (self.max_entries and len(self._data) > self.max_entries)
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            oldest, item = next(iter(self._data.items()))
+            if item[1] and item[1] <= now:
+                reason = "ttl"
+            else:
+                reason = "entries" if self.max_entries and len(self._data) > self.max_entries else "bytes"
+            self._remove(oldest, reason=reason)
+
+    def _export(self):
+        RESULT_CACHE_ENTRIES.labels(cache=self.name).set(len(self._data))
+        RESULT_CACHE_BYTES.labels(cache=self.name).set(self._bytes)
@@ -0,0 +1,309 @@
+"""
+序列化编解码层（CacheService、任务持久化、快照共用）
+
+- Codec：对象 <-> 字节。内置 json（标准库，始终可用）与 msgpack（可选依赖，体积更小、编解码更快，
+  并通过扩展类型保留 bytes / tuple / set / datetime / date / Decimal 的类型；json 下这些类型退化为
+  字符串 / 列表）。其他未知类型两者都按 str() 编码
+- 压缩：编码结果达到阈值时压缩，zstd / lz4（可选依赖）或 zlib（标准库）；压缩后没有变小则保留原文
+- 帧格式：b"\\x00Y" + 编解码器标记(1 字节) + 压缩标记(1 字节) + 数据。解码按帧头自描述，
+  与当前配置无关，切换编解码器后旧数据仍可读；不带帧头的数据按旧版 JSON 文本解码
+- register_codec / register_compressor 注册自定义实现
+- fingerprint(obj)：参数等结构的稳定哈希（键排序），orjson 可用时使用 orjson
+
+环境变量：
+  CODEC                      json|msgpack，默认 msgpack（未安装时回退 json）
+  CODEC_COMPRESSION          zstd|lz4|zlib|none，默认 zstd（未安装时依次回退 lz4、zlib）
+  CODEC_COMPRESS_MIN_BYTES   压缩阈值（字节），默认 1024
+"""
+import datetime
+import decimal
+import hashlib
+import json
+import os
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional, Union
+
+from backend.core.logger import logger
+
+try:
+    import msgpack  # type: ignore
+except Exception:  # pragma: no cover - 可选依赖
+    msgpack = None
+
+try:
+    import zstandard  # type: ignore
+except Exception:  # pragma: no cover - 可选依赖
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame  # type: ignore
+except Exception:  # pragma: no cover - 可选依赖
+    lz4_frame = None
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - 可选依赖
+    orjson = None
+
+MAGIC = b"\x00Y"
+HEADER_SIZE = len(MAGIC) + 2
+
+
+class CodecError(ValueError):
+    """数据无法解码（帧头损坏或编解码器 / 压缩算法在本进程不可用）"""
+
+
+def _json_default(obj: Any):
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", "replace")
+    return str(obj)
+
+
+class Codec(ABC):
+    """编解码器：name 供配置选择，tag 为帧头中的 1 字节标记"""
+
+    name = ""
+    tag = b""
+
+    @abstractmethod
+    def encode(self, obj: Any) -> bytes:
+        """对象 -> 字节"""
+
+    @abstractmethod
+    def decode(self, data: bytes) -> Any:
+        """字节（或 memoryview）-> 对象"""
+
+
+class JsonCodec(Codec):
+    """标准库 JSON（紧凑分隔符，非 ASCII 原样输出）"""
+
+    name = "json"
+    tag = b"j"
+
+    def encode(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"),
+                          default=_json_default).encode("utf-8")
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(bytes(data))
+
+
+# msgpack 扩展类型编号
+_EXT_TUPLE, _EXT_SET, _EXT_DATETIME, _EXT_DATE, _EXT_DECIMAL, _EXT_FROZENSET = range(1, 7)
+
+
+class MsgpackCodec(Codec):
+    """msgpack（strict_types：tuple 与各类容器子类经 default 处理，保证 tuple 往返不变成 list）"""
+
+    name = "msgpack"
+    tag = b"m"
+
+    def __init__(self):
+        self._packer_kwargs = {"default": self._default, "strict_types": True, "use_bin_type": True}
+        self._unpacker_kwargs = {"ext_hook": self._ext_hook, "raw": False, "strict_map_key": False}
+
+    def _pack(self, obj: Any) -> bytes:
+        return msgpack.packb(obj, **self._packer_kwargs)
+
+    def _default(self, obj: Any):
+        if isinstance(obj, tuple):
+            return msgpack.ExtType(_EXT_TUPLE, self._pack(list(obj)))
+        if isinstance(obj, frozenset):
+            return msgpack.ExtType(_EXT_FROZENSET, self._pack(list(obj)))
+        if isinstance(obj, set):
+            return msgpack.ExtType(_EXT_SET, self._pack(list(obj)))
+        if isinstance(obj, datetime.datetime):
+            return msgpack.ExtType(_EXT_DATETIME, obj.isoformat().encode())
+        if isinstance(obj, datetime.date):
+            return msgpack.ExtType(_EXT_DATE, obj.isoformat().encode())
+        if isinstance(obj, decimal.Decimal):
+            return msgpack.ExtType(_EXT_DECIMAL, str(obj).encode())
+        if isinstance(obj, (bytearray, memoryview)):
+            return bytes(obj)
+        # strict_types 下基础类型的子类（OrderedDict、IntEnum、str 子类等）也会走到这里
+        for base in (dict, list, str, bool, int, float, bytes):
+            if isinstance(obj, base):
+                return base(obj)
+        return str(obj)
+
+    def _ext_hook(self, code: int, data: bytes):
+        if code == _EXT_TUPLE:
+            return tuple(self.decode(data))
+        if code == _EXT_SET:
+            return set(self.decode(data))
+        if code == _EXT_FROZENSET:
+            return frozenset(self.decode(data))
+        if code == _EXT_DATETIME:
+            return datetime.datetime.fromisoformat(data.decode())
+        if code == _EXT_DATE:
+            return datetime.date.fromisoformat(data.decode())
+        if code == _EXT_DECIMAL:
+            return decimal.Decimal(data.decode())
+        return msgpack.ExtType(code, data)
+
+    def encode(self, obj: Any) -> bytes:
+        return self._pack(obj)
+
+    def decode(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, **self._unpacker_kwargs)
+
+
+class Compressor:
+    """压缩算法：name 供配置选择，tag 为帧头中的 1 字节标记"""
+
+    def __init__(self, name: str, tag: bytes, compress: Callable[[bytes], bytes],
+                 decompress: Callable[[bytes], bytes]):
+        self.name = name
+        self.tag = tag
+        self.compress = compress
+        self.decompress = decompress
+
+
+_CODECS: Dict[str, Codec] = {}
+_CODEC_TAGS: Dict[bytes, Codec] = {}
+_COMPRESSORS: Dict[str, Compressor] = {}
+_COMPRESSOR_TAGS: Dict[bytes, Compressor] = {}
+_NO_COMPRESSION = b"0"
+
+
+def register_codec(codec: Codec) -> None:
+    """注册编解码器（tag 全局唯一，写入后不可更改其含义）"""
+    existing = _CODEC_TAGS.get(codec.tag)
+    if len(codec.tag) != 1 or (existing is not None and existing.name != codec.name):
+        raise ValueError(f"codec tag 冲突或非法: {codec.tag!r}")
+    _CODECS[codec.name] = codec
+    _CODEC_TAGS[codec.tag] = codec
+
+
+def register_compressor(compressor: Compressor) -> None:
+    """注册压缩算法（tag 全局唯一，b"0" 保留为不压缩）"""
+    existing = _COMPRESSOR_TAGS.get(compressor.tag)
+    if (len(compressor.tag) != 1 or compressor.tag == _NO_COMPRESSION
+            or (existing is not None and existing.name != compressor.name)):
+        raise ValueError(f"compressor tag 冲突或非法: {compressor.tag!r}")
+    _COMPRESSORS[compressor.name] = compressor
+    _COMPRESSOR_TAGS[compressor.tag] = compressor
+
+
+register_codec(JsonCodec())
+if msgpack is not None:
+    register_codec(MsgpackCodec())
+register_compressor(Compressor("zlib", b"d", lambda b: zlib.compress(b, 6), zlib.decompress))
+if zstandard is not None:
+    register_compressor(Compressor("zstd", b"z", lambda b: zstandard.compress(b, 3), zstandard.decompress))
+if lz4_frame is not None:
+    register_compressor(Compressor("lz4", b"4", lz4_frame.compress, lz4_frame.decompress))
+
+
+def _pick(kind: str, requested: str, available: Dict[str, Any], fallbacks: tuple) -> Optional[Any]:
+    for name in (requested,) + fallbacks:
+        if name in available:
+            if name != requested:
+                logger.warning(f"{kind} {requested} 不可用，使用 {name}")
+            return available[name]
+    return None
+
+
+class Serializer:
+    """编解码器 + 阈值压缩 + 帧头；线程安全、无状态，可在多个调用方间共享"""
+
+    def __init__(self, codec: Optional[str] = None, compression: Optional[str] = None,
+                 compress_min_bytes: Optional[int] = None):
+        codec = (codec or os.getenv("CODEC", "msgpack")).lower()
+        compression = (compression or os.getenv("CODEC_COMPRESSION", "zstd")).lower()
+        self.codec: Codec = _pick("codec", codec, _CODECS, ("msgpack", "json"))
+        self.compressor: Optional[Compressor] = (
+            None if compression == "none" else _pick("compression", compression, _COMPRESSORS, ("lz4", "zlib")))
+        self.compress_min_bytes = int(compress_min_bytes if compress_min_bytes is not None
+                                      else os.getenv("CODEC_COMPRESS_MIN_BYTES", "1024"))
+        self._plain_header = MAGIC + self.codec.tag + _NO_COMPRESSION
+
+    @property
+    def name(self) -> str:
+        return f"{self.codec.name}+{self.compressor.name if self.compressor else 'none'}"
+
+    def dumps(self, obj: Any) -> bytes:
+        """对象 -> 带帧头的字节（当前编解码器无法表示的值，如超出 64 位的整数，改用 json 编码）"""
+        codec = self.codec
+        try:
+            body = codec.encode(obj)
+        except (OverflowError, ValueError, TypeError):
+            if codec.name == "json":
+                raise
+            codec = _CODECS["json"]
+            body = codec.encode(obj)
+        if self.compressor is not None and len(body) >= self.compress_min_bytes:
+            packed = self.compressor.compress(body)
+            if len(packed) < len(body):
+                return MAGIC + codec.tag + self.compressor.tag + packed
+        if codec is self.codec:
+            return self._plain_header + body
+        return MAGIC + codec.tag + _NO_COMPRESSION + body
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """带帧头的字节 -> 对象；无帧头的数据按旧版 JSON 文本解码（非 JSON 时抛出 ValueError）"""
+        if isinstance(data, str):
+            return json.loads(data)
+        data = bytes(data)
+        if not data.startswith(MAGIC):
+            return json.loads(data)
+        if len(data) < HEADER_SIZE:
+            raise CodecError("帧头不完整")
+        codec = _CODEC_TAGS.get(data[2:3])
+        if codec is None:
+            raise CodecError(f"未知或不可用的编解码器: {data[2:3]!r}")
+        body = memoryview(data)[HEADER_SIZE:]  # 不复制正文
+        ctag = data[3:4]
+        if ctag != _NO_COMPRESSION:
+            compressor = _COMPRESSOR_TAGS.get(ctag)
+            if compressor is None:
+                raise CodecError(f"未知或不可用的压缩算法: {ctag!r}")
+            body = compressor.decompress(body)
+        return codec.decode(body)
+
+
+_default: Optional[Serializer] = None
+
+
+def get_serializer() -> Serializer:
+    """按环境变量构建的默认序列化器（首次调用时创建）"""
+    global _default
+    if _default is None:
+        _default = Serializer()
+    return _default
+
+
+def dumps(obj: Any) -> bytes:
+    return get_serializer().dumps(obj)
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    return get_serializer().loads(data)
+
+
+if orjson is not None:
+    _ORJSON_OPTS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+
+    def canonical_bytes(obj: Any) -> bytes:
+        """键排序的紧凑 JSON 字节（用于哈希，不用于存储）"""
+        try:
+            return orjson.dumps(obj, option=_ORJSON_OPTS, default=_json_default)
+        except TypeError:
+            # orjson 不支持的输入（如超出 64 位的整数）
+            return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+                              default=_json_default).encode("utf-8")
+else:
+    def canonical_bytes(obj: Any) -> bytes:
+        """键排序的紧凑 JSON 字节（用于哈希，不用于存储）"""
+        return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+                          default=_json_default).encode("utf-8")
+
+
+def fingerprint(obj: Any) -> str:
+    """结构的 sha256 十六进制摘要（dict 键顺序无关）"""
+    return hashlib.sha256(canonical_bytes(obj)).hexdigest()
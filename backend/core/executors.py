@@ -0,0 +1,183 @@
+"""
+命名执行池
+
+Kernel.run 等同步调用不再共用事件循环的默认线程池，而是按脚本路由到独立的有界池，
+慢脚本（如 spider）只会占满自己的池，不会饿死 page_probe、健康探测等。
+
+配置见 global_policy.yaml 的 executors 段：
+  executors:
+    pools:
+      default: {workers: 8}
+      probe:   {workers: 2}
+      cpu:     {workers: 2, kind: process}   # kind=process 为进程池，用于 CPU 密集脚本
+    routes:
+      page_probe: probe
+      model_evaluator: cpu
+      ocr: cpu            # 也可路由协程脚本内卸载的 CPU 计算核（脚本本身留在事件循环）
+
+未配置路由的脚本进入 default 池。进程池在子进程内独立初始化 Kernel 并加载脚本，
+参数与结果需可 pickle；add_initializer 注册的函数在每个工作进程启动时执行（如预加载模型）。卸载只做一层：整脚本进入进程池时，脚本内部直接调用计算核，
+不应再向进程池提交任务。
+"""
+import asyncio
+import functools
+import inspect
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from backend.core.logger import logger
+from backend.core.policy import GlobalPolicy
+
+try:
+    from backend.core.metrics import EXECUTOR_QUEUE_WAIT, EXECUTOR_UTILIZATION, EXECUTOR_QUEUED  # type: ignore
+except Exception:
+    class _No:
+        def labels(self, *_, **__):
+            return self
+        def observe(self, *_):
+            pass
+        def set(self, *_):
+            pass
+    EXECUTOR_QUEUE_WAIT = EXECUTOR_UTILIZATION = EXECUTOR_QUEUED = _No()
+
+DEFAULT_POOL = "default"
+
+
+def _init_worker(initializers: tuple):
+    """进程池工作进程启动钩子：依次执行注册的初始化函数，单个失败不影响其余"""
+    for fn, args in initializers:
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.error(f"执行池工作进程初始化失败: {getattr(fn, '__name__', fn)} | {e}")
+
+
+def _timed_call(submitted_at: float, fn: Callable, args: tuple, kwargs: dict):
+    """在工作线程/进程内执行，返回 (排队等待秒数, 结果)"""
+    wait = max(0.0, time.time() - submitted_at)
+    return wait, fn(*args, **kwargs)
+
+
+_process_kernel = None
+
+
+def _run_script_in_process(name: str, params: dict):
+    """进程池入口：子进程内懒加载 Kernel 与脚本"""
+    global _process_kernel
+    if _process_kernel is None:
+        from backend.core.kernel import Kernel
+        _process_kernel = Kernel()
+        _process_kernel.load_scripts()
+    script = _process_kernel.registry.get(name)
+    if inspect.iscoroutinefunction(getattr(script, "run", None)) and hasattr(script, "invoke"):
+        # 协程脚本在子进程内起事件循环，经 BaseScript.invoke 套用超时；异常经进程池传回调用方
+        return asyncio.run(script.invoke(**_process_kernel._policy_params(params)))
+    return _process_kernel.run(name, **params)
+
+
+class _Pool:
+    def __init__(self, name: str, workers: int, kind: str = "thread"):
+        self.name = name
+        self.workers = max(1, int(workers))
+        self.kind = kind
+        self.inflight = 0
+        self.initializers: list = []
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                # spawn 避免在多线程的事件循环进程中 fork
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"),
+                                                     initializer=_init_worker, initargs=(tuple(self.initializers),))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"pool-{self.name}")
+        return self._executor
+
+    def _track(self, delta: int):
+        with self._lock:
+            self.inflight += delta
+            inflight = self.inflight
+        EXECUTOR_UTILIZATION.labels(pool=self.name).set(min(inflight, self.workers) / self.workers)
+        EXECUTOR_QUEUED.labels(pool=self.name).set(max(0, inflight - self.workers))
+
+    def stats(self) -> dict:
+        inflight = self.inflight
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "running": min(inflight, self.workers),
+            "queued": max(0, inflight - self.workers),
+        }
+
+
+class ExecutorPools:
+    """按名称管理的有界执行池 + 脚本路由表"""
+
+    def __init__(self, config: dict | None = None):
+        config = config if config is not None else GlobalPolicy.executors()
+        pools = dict(config.get("pools") or {})
+        pools.setdefault(DEFAULT_POOL, {"workers": 8})
+        self.pools: Dict[str, _Pool] = {
+            name: _Pool(name, (spec or {}).get("workers", 4), (spec or {}).get("kind", "thread"))
+            for name, spec in pools.items()
+        }
+        self.routes: Dict[str, str] = {}
+        for script, pool in (config.get("routes") or {}).items():
+            if pool in self.pools:
+                self.routes[script] = pool
+            else:
+                logger.warning(f"⚠️ 执行池路由指向不存在的池: {script} -> {pool}")
+
+    def pool_for(self, script: str) -> str:
+        return self.routes.get(script, DEFAULT_POOL)
+
+    def is_process(self, script: str) -> bool:
+        return self.pools[self.pool_for(script)].kind == "process"
+
+    def add_initializer(self, pool_name: str, fn: Callable, *args) -> None:
+        """注册进程池工作进程的启动函数（fn 与参数需可 pickle）；须在该池首次使用前调用"""
+        pool = self.pools.get(pool_name) or self.pools[DEFAULT_POOL]
+        if pool.kind != "process":
+            return
+        if pool._executor is not None:
+            logger.warning(f"⚠️ 执行池 {pool.name} 已启动，初始化函数将在重建后生效")
+        pool.initializers.append((fn, args))
+
+    async def run(self, pool_name: str, fn: Callable, *args, **kwargs) -> Any:
+        """在指定池中执行 fn(*args, **kwargs)，记录排队等待与利用率"""
+        pool = self.pools.get(pool_name) or self.pools[DEFAULT_POOL]
+        loop = asyncio.get_running_loop()
+        pool._track(1)
+        try:
+            wait, result = await loop.run_in_executor(
+                pool.executor, functools.partial(_timed_call, time.time(), fn, args, kwargs))
+        finally:
+            pool._track(-1)
+        EXECUTOR_QUEUE_WAIT.labels(pool=pool.name).observe(wait)
+        return result
+
+    async def run_script(self, kernel, name: str, params: dict) -> Any:
+        """按路由表执行脚本：进程池走子进程内的 Kernel，线程池直接调用 kernel.run"""
+        pool = self.pools[self.pool_for(name)]
+        if pool.kind == "process":
+            return await self.run(pool.name, _run_script_in_process, name, params)
+        return await self.run(pool.name, kernel.run, name, **params)
+
+    def stats(self) -> dict:
+        return {name: pool.stats() for name, pool in self.pools.items()}
+
+    def shutdown(self, wait: bool = False):
+        for pool in self.pools.values():
+            if pool._executor is not None:
+                pool._executor.shutdown(wait=wait, cancel_futures=True)
+                pool._executor = None
+
+
+executor_pools = ExecutorPools()
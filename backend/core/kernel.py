@@ -1,6 +1,9 @@
 import asyncio
 import importlib
+import inspect
+import queue
 import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
 import json
@@ -11,6 +14,10 @@ from .logger import logger
 from backend.core.pipeline import Pipeline
 from backend.core.task import Task
 from backend.core.policy import GlobalPolicy
+from backend.core.cache import CacheEngine, LRUCacheEngine
+from backend.core.codec import fingerprint
+from backend.core.executors import executor_pools
+from backend.core.base import BaseScript
 import importlib
 import time
 
@@ -47,11 +54,17 @@ def execute_node(node, ws_send=None):
             ws_send(node_id, {"status":"failed","error":str(e)})
 
 
+def _execute_blocking(script, params: dict):
+    coro = script.invoke(**params) if isinstance(script, BaseScript) else script.run(**params)
+    return asyncio.run(coro)
+
+
 class Kernel:
-    def __init__(self):
+    def __init__(self, cache: CacheEngine | None = None):
         self.registry = registry
         logger.info("🚀 后端内核初始化...")
-        self._cache: dict[str, dict] = {}
+        # 结果缓存引擎：默认按 global_policy.yaml 的 cache 段构建有界 LRU
+        self._cache: CacheEngine = cache if cache is not None else LRUCacheEngine.from_policy()
 
     def load_scripts(self):
         self.registry.auto_register("backend.scripts")
@@ -59,6 +72,11 @@ class Kernel:
 
     def run(self, name: str, **kwargs):
         logger.info(f"▶️ 启动脚本: {name}")
+        script = self.registry.get(name)
+        return script.run(**self._policy_params(kwargs))
+
+    @staticmethod
+    def _policy_params(kwargs: dict) -> dict:
         # 全局策略接入：根据等级调整参数与安全行为
         level = GlobalPolicy.level()
         params = dict(kwargs)
@@ -72,15 +90,26 @@ class Kernel:
             params["concurrency"] = GlobalPolicy.max_concurrency()
         if not GlobalPolicy.allow_ai_fix():
             params["_ai_fix"] = False
-        script = self.registry.get(name)
-        return script.run(**params)
+        return params
 
     async def run_async(self, name: str, **kwargs):
         """
-        异步封装：在线程池中执行同步的 run，便于并发场景使用。
-        用于 DAG 并发引擎或需要 asyncio 兼容时。
+        异步执行入口，用于 DAG 并发引擎或需要 asyncio 兼容时。
+        - 协程脚本（BaseScript 子类）直接在事件循环上 await，经 BaseScript.invoke 执行以套用超时；
+          异常与超时原样抛出，由 DAG 记为节点失败并按 is_retryable_error 重试
+        - 同步脚本与路由到进程池的脚本，按 global_policy.yaml 的 executors 路由表进入命名执行池
         """
-        return await asyncio.to_thread(self.run, name, **kwargs)
+        script = self.registry.get(name)
+        if not inspect.iscoroutinefunction(getattr(script, "run", None)) or executor_pools.is_process(name):
+            return await executor_pools.run_script(self, name, kwargs)
+        logger.info(f"▶️ 启动脚本: {name}")
+        params = self._policy_params(kwargs)
+        if getattr(script, "blocking", False):
+            # 协程体内含阻塞调用的脚本：在执行池线程内以独立事件循环运行
+            return await executor_pools.run(executor_pools.pool_for(name), _execute_blocking, script, params)
+        if isinstance(script, BaseScript):
+            return await script.invoke(**params)
+        return await script.run(**params)
 
     def list_scripts(self):
         return self.registry.list_all()
@@ -143,27 +172,64 @@ class Kernel:
             logger.error(f"AI 生成参数失败: {e}")
             return {}
 
-    # === 内存缓存（最小实现） ===
+    # === 结果缓存（LRU + TTL，见 backend/core/cache.py） ===
     @staticmethod
     def _hash_params(script: str, params: dict) -> str:
+        # 键排序的紧凑编码（orjson 可用时走 orjson），避免每次查缓存都走 json.dumps(sort_keys=True)
         try:
-            dump = json.dumps({"script": script, "params": params}, ensure_ascii=False, sort_keys=True)
+            return fingerprint({"script": script, "params": params})
         except Exception:
-            dump = f"{script}:{str(params)}"
-        return hashlib.sha256(dump.encode("utf-8")).hexdigest()
+            return hashlib.sha256(f"{script}:{str(params)}".encode("utf-8")).hexdigest()
+
+    def node_fingerprint(self, script: str, params: dict, upstream: dict[str, str] | None = None) -> str:
+        """
+        Merkle 式节点指纹：sha256(脚本名, 脚本版本, 参数哈希, 按 id 排序的上游指纹)。
+        - 以 _ 开头的运行时参数（如 _upstream_results）不参与计算
+        - 上游只贡献其指纹字符串，不序列化上游结果，代价与结果大小无关
+        """
+        script_obj = self.registry.get(script)
+        version = str(getattr(script_obj, "version", "") or "")
+        params_hash = self._hash_params(script, {k: v for k, v in params.items() if not k.startswith("_")})
+        h = hashlib.sha256()
+        for part in (script, version, params_hash):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        for dep in sorted(upstream or {}):
+            h.update(f"{dep}={upstream[dep]}".encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
 
-    def try_cache(self, script: str, params: dict) -> dict | None:
+    def _cache_key(self, script: str, params: dict, fingerprint: str | None) -> str | None:
+        if fingerprint:
+            return fingerprint
+        # 无指纹时上游结果无法进入键，为避免串用不同上游数据的结果，不走缓存
+        if params.get("_upstream_results"):
+            return None
+        return self._hash_params(script, {k: v for k, v in params.items() if not k.startswith("_")})
+
+    def try_cache(self, script: str, params: dict, fingerprint: str | None = None) -> dict | None:
         # 可通过 params._cache = False 关闭缓存
         if params.get("_cache") is False:
             return None
-        key = self._hash_params(script, {k: v for k, v in params.items() if not k.startswith("_")})
-        return self._cache.get(key)
+        key = self._cache_key(script, params, fingerprint)
+        if key is None:
+            return None
+        return self._cache.get(key, script=script)
 
-    def save_cache(self, script: str, params: dict, result: dict):
+    def save_cache(self, script: str, params: dict, result: dict, fingerprint: str | None = None):
         if params.get("_cache") is False:
             return
-        key = self._hash_params(script, {k: v for k, v in params.items() if not k.startswith("_")})
-        self._cache[key] = result
+        # 脚本自行捕获异常后返回的失败结果不缓存
+        if isinstance(result, dict) and result.get("success") is False:
+            return
+        key = self._cache_key(script, params, fingerprint)
+        if key is None:
+            return
+        self._cache.set(key, result, script=script, ttl=params.get("_cache_ttl"))
+
+    def cache_stats(self) -> dict:
+        return self._cache.stats()
+
     def run_pipeline(self, task_list: list):
         pipeline = Pipeline(self)
 
@@ -202,48 +268,53 @@ def execute_node(node: dict, ws_send=None):
             ws_send(node_id, {"status": "failed", "error": str(e)})
 
 
-def run_pipeline(nodes: list[dict], max_workers: int = 4, ws_send=None):
+def run_pipeline(nodes: list[dict], max_workers: int = 4, ws_send=None, node_fn=None):
     """
-    简易并行 DAG 执行（不处理循环依赖），在可运行时调度节点到线程池。
+    并行 DAG 执行（事件驱动，不处理循环依赖）。
+    - 维护入度计数与下游邻接表，节点完成时只递减其下游的入度（O(出度)）
+    - 线程池 future 完成回调把 node_id 投递到完成队列，主线程阻塞等待，无轮询空转
+    - 依赖了不存在节点的节点永远不会就绪，执行结束时保持原状态返回
+    node_fn: 节点执行函数，默认 execute_node(node, ws_send)
     """
-    # 跟踪依赖与状态
-    depends = {n["id"]: set(n.get("depends_on", [])) for n in nodes}
+    node_fn = node_fn or execute_node
     node_map = {n["id"]: n for n in nodes}
+    indegree: dict[str, int] = {}
+    dependents: dict[str, list[str]] = {nid: [] for nid in node_map}
+    for n in nodes:
+        deps = set(n.get("depends_on", []))
+        indegree[n["id"]] = len(deps)
+        for dep in deps:
+            if dep in dependents:
+                dependents[dep].append(n["id"])
+
+    # 初始标记等待状态
+    if ws_send:
+        for nid, cnt in indegree.items():
+            if cnt:
+                ws_send(nid, {"status": "waiting"})
+
+    ready = deque(nid for nid, cnt in indegree.items() if cnt == 0)
+    completed: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+    in_flight = 0
 
     executor = ThreadPoolExecutor(max_workers=max_workers)
-    in_progress = {}
-    finished = set()
-
-    def submit_ready():
-        for nid, deps in list(depends.items()):
-            if nid in finished or nid in in_progress:
-                continue
-            if not deps:  # 无依赖，或依赖已完成
+    try:
+        while ready or in_flight:
+            while ready:
+                nid = ready.popleft()
                 if ws_send:
                     ws_send(nid, {"status": "queued"})
-                future = executor.submit(execute_node, node_map[nid], ws_send)
-                in_progress[nid] = future
+                future = executor.submit(node_fn, node_map[nid], ws_send)
+                future.add_done_callback(lambda _f, nid=nid: completed.put(nid))
+                in_flight += 1
 
-    # 初始标记等待状态
-    for nid, d in depends.items():
-        if d and ws_send:
-            ws_send(nid, {"status": "waiting"})
-
-    submit_ready()
-
-    while len(finished) < len(nodes):
-        done = [nid for nid, fut in in_progress.items() if fut.done()]
-        for nid in done:
-            _ = in_progress.pop(nid)
-            finished.add(nid)
-            # 解除其他节点对它的依赖
-            for dn in depends.values():
-                dn.discard(nid)
-        if done:
-            submit_ready()
-        else:
-            # 避免空转占用 CPU
-            time.sleep(0.05)
-
-    executor.shutdown(wait=True)
+            # 阻塞等待任一节点完成，解除其下游依赖
+            nid = completed.get()
+            in_flight -= 1
+            for dn in dependents[nid]:
+                indegree[dn] -= 1
+                if indegree[dn] == 0:
+                    ready.append(dn)
+    finally:
+        executor.shutdown(wait=True)
     return nodes
@@ -77,7 +77,15 @@ def register_ws_sender(sender):
     _ws_subscribers.append(sender)
 
 
-async def emit_ws(text: str):
+def unregister_ws_sender(sender):
+    try:
+        _ws_subscribers.remove(sender)
+    except ValueError:
+        pass
+
+
+async def _deliver_ws(text: str):
+    """向本 worker 注册的订阅者发送（由事件总线回调）"""
     for send in list(_ws_subscribers):
         try:
             await send(text)
@@ -85,6 +93,12 @@ async def emit_ws(text: str):
             # 失败的订阅者忽略；由 WS 端自行移除
             pass
 
+
+async def emit_ws(text: str):
+    """发布到事件总线，由各 worker 向自己的订阅者扇出"""
+    from backend.ws.event_bus import event_bus
+    await event_bus.publish("logs", text)
+
 async def emit_event(level: str, name: str, message: str, **kwargs):
     """封装事件生成与发送。"""
     await emit_ws(make_event(level, name, message, **kwargs))
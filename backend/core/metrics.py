@@ -45,3 +45,54 @@ WS_CONNECTIONS = Gauge("ws_connections", "Current active websocket connections",
 SCHEDULER_QUEUE_DEPTH = Gauge("scheduler_queue_depth", "Number of queued pipeline tasks")  # type: ignore
 SCHEDULER_RUNNING = Gauge("scheduler_running_pipelines", "Number of running pipeline tasks")  # type: ignore
 SCHEDULER_TASKS_TOTAL = Counter("scheduler_tasks_total", "Scheduler task state transitions", ["status"])  # type: ignore
+
+# Result cache metrics (Kernel.try_cache/save_cache 等缓存引擎)
+RESULT_CACHE_HITS = Counter("result_cache_hits_total", "Result cache hits", ["cache"])  # type: ignore
+RESULT_CACHE_MISSES = Counter("result_cache_misses_total", "Result cache misses", ["cache"])  # type: ignore
+RESULT_CACHE_EVICTIONS = Counter(
+    "result_cache_evictions_total", "Result cache evictions by reason", ["cache", "reason"]
+)  # type: ignore
+RESULT_CACHE_ENTRIES = Gauge("result_cache_entries", "Current result cache entries", ["cache"])  # type: ignore
+RESULT_CACHE_BYTES = Gauge("result_cache_bytes", "Approximate result cache size in bytes", ["cache"])  # type: ignore
+
+# Two-tier cache (backend/services/cache_service.CacheService)
+CACHE_SERVICE_LOOKUPS = Counter(
+    "cache_service_lookups_total", "CacheService lookups by result (l1, l2, negative, stale, miss)", ["result"]
+)  # type: ignore
+CACHE_SERVICE_LOADS = Counter(
+    "cache_service_loads_total", "get_or_set loader outcomes (loaded, coalesced, refreshed, error)", ["outcome"]
+)  # type: ignore
+CACHE_SERVICE_L2_ERRORS = Counter("cache_service_l2_errors_total", "Redis (L2) operation failures", ["op"])  # type: ignore
+
+# WebSocket outbound queue metrics (backend/ws/manager.WSManager)
+WS_FRAMES_COALESCED = Counter("ws_frames_coalesced_total", "Outbound frames merged into a pending frame", ["type"])  # type: ignore
+WS_SLOW_CLIENT_DISCONNECTS = Counter("ws_slow_client_disconnects_total", "Connections closed because the outbound queue overflowed")  # type: ignore
+
+# Executor pool metrics (backend/core/executors.ExecutorPools)
+EXECUTOR_QUEUE_WAIT = Histogram(
+    "executor_queue_wait_seconds", "Time a job waits in a named executor pool before starting", ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30)
+)  # type: ignore
+EXECUTOR_UTILIZATION = Gauge("executor_utilization_ratio", "Busy workers / pool size", ["pool"])  # type: ignore
+EXECUTOR_QUEUED = Gauge("executor_queued_jobs", "Jobs waiting for a worker in a named executor pool", ["pool"])  # type: ignore
+
+# Proxy health metrics (backend/scripts/proxy_manager.ProxyManager)
+PROXY_RESULTS = Counter("proxy_results_total", "Proxy usage results reported to ProxyManager", ["outcome"])  # type: ignore
+PROXY_HEALTH_SCORE = Histogram(
+    "proxy_health_score", "Proxy health score after each reported result",
+    buckets=(10, 20, 30, 40, 50, 60, 70, 80, 90, 100)
+)  # type: ignore
+PROXY_POOL_LATENCY = Gauge(
+    "proxy_pool_latency_seconds", "Time-decayed pool-wide proxy latency quantiles", ["quantile"]
+)  # type: ignore
+PROXY_DEMOTIONS = Counter(
+    "proxy_demotions_total", "Proxies removed from selection after a reported result", ["reason"]
+)  # type: ignore
+
+# Database write-behind metrics (backend/services/sqlite_engine.WriteBehindQueue)
+DB_WRITE_QUEUE = Gauge("db_write_queue_depth", "Rows waiting in the database write-behind queue")  # type: ignore
+DB_WRITE_BATCH_ROWS = Histogram(
+    "db_write_batch_rows", "Rows committed per write-behind transaction",
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 5000)
+)  # type: ignore
+DB_WRITE_DROPPED = Counter("db_write_dropped_total", "Rows dropped because the write-behind queue was full")  # type: ignore
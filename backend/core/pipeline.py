@@ -151,11 +151,11 @@ class DAGPipeline:
                 dependents[dep].append(n.id)
 
         semaphore = asyncio.Semaphore(max_concurrency)
-        loop = asyncio.get_event_loop()
 
         results: Dict[str, Dict[str, Any]] = {}
         completed_order: List[str] = []
         running_tasks: Dict[str, asyncio.Task] = {}
+        fingerprints: Dict[str, str] = {}
 
         # upstream aggregation helper
         def gather_upstream_results(node_id: str) -> Dict[str, Any]:
@@ -166,6 +166,15 @@ class DAGPipeline:
                 data[dep] = results.get(dep, {}).get("result")
             return data
 
+        def upstream_fingerprints(node_id: str) -> Dict[str, str]:
+            # 非 success 的上游（如条件跳过）把状态混入指纹，避免与其成功时的下游结果混用
+            fps: Dict[str, str] = {}
+            for dep in id_to_node[node_id].depends_on:
+                status = results.get(dep, {}).get("status")
+                fp = fingerprints.get(dep, "")
+                fps[dep] = fp if status == "success" else f"{fp}:{status}"
+            return fps
+
         def eval_condition(expr: Any, context: Dict[str, Any]) -> bool:
             if expr in (None, "", True):
                 return True
@@ -186,6 +195,8 @@ class DAGPipeline:
                 # prepare params copy and inject upstream results
                 params = dict(node.params or {})
                 params["_upstream_results"] = gather_upstream_results(node_id)
+                fingerprint = self.kernel.node_fingerprint(node.script, params, upstream_fingerprints(node_id))
+                fingerprints[node_id] = fingerprint
 
                 # 条件判定：不满足则跳过
                 cond_ok = eval_condition(getattr(node, "condition", None), {"up": params["_upstream_results"], "params": params})
@@ -195,7 +206,7 @@ class DAGPipeline:
                     logger.info(f"节点 {node_id} 条件不满足，跳过执行")
                 else:
                     # 缓存命中则直接返回
-                    cached = self.kernel.try_cache(node.script, params)
+                    cached = self.kernel.try_cache(node.script, params, fingerprint)
                     if cached is not None:
                         duration = time.time() - start
                         results[node_id] = {"status": "success", "result": cached, "error": None, "duration": duration, "cached": True}
@@ -205,8 +216,8 @@ class DAGPipeline:
                         except Exception:
                             pass
                     else:
-                    # run kernel.run in threadpool (kernel.run 是同步)
-                        coro = loop.run_in_executor(None, self.kernel.run, node.script, **params)
+                    # 按脚本路由到命名执行池运行 kernel.run
+                        coro = self.kernel.run_async(node.script, **params)
                         if node_timeout:
                             res = await asyncio.wait_for(coro, timeout=node_timeout)
                         else:
@@ -214,7 +225,7 @@ class DAGPipeline:
 
                         duration = time.time() - start
                         results[node_id] = {"status": "success", "result": res, "error": None, "duration": duration}
-                        self.kernel.save_cache(node.script, params, res)
+                        self.kernel.save_cache(node.script, params, res, fingerprint)
                         logger.info(f"节点 {node_id} 执行成功 (t={duration:.2f}s)")
                         try:
                             PIPELINE_NODE_SECONDS.labels(mode="async", script=node.script).observe(duration)
@@ -266,9 +277,12 @@ class DAGPipeline:
             if cnt == 0:
                 running_tasks[nid] = asyncio.create_task(exec_node(nid))
 
-        # wait for all running tasks to complete
-        if running_tasks:
-            await asyncio.gather(*running_tasks.values())
+        # wait for all running tasks to complete（下游节点在上游完成时才被创建，需循环等待）
+        while True:
+            pending = [t for t in running_tasks.values() if not t.done()]
+            if not pending:
+                break
+            await asyncio.gather(*pending)
 
         # determine overall status
         overall = "success"
@@ -26,6 +26,7 @@ except Exception:
 from backend.ws.manager import ws_manager
 from backend.ws.task_manager import task_manager
 from backend.ws.scheduler import scheduler
+from backend.ws.progress import progress_ticker
 
 MAX_RETRY = 2  # AI 自动重试次数
 BASE_BACKOFF = 0.5  # 秒，指数退避基础值
@@ -38,13 +39,58 @@ def is_retryable_error(err: Exception) -> bool:
             return True
     return False
 
+def plan_incremental(prev_state: dict, nodes: List[Node]) -> Dict[str, dict]:
+    """
+    增量重跑计划：对比新节点定义与上一次任务保存的图，返回可复用的 {node_id: 旧节点状态}。
+    - 定义（script/params/depends_on/condition）变化、新增、或上次未成功完成的节点为脏节点
+    - 脏节点的所有下游同样为脏
+    - 其余节点直接复用上次的结果与指纹
+    """
+    prev_graph = prev_state.get("graph") or {}
+    prev_nodes = prev_state.get("nodes") or {}
+    children: Dict[str, List[str]] = {n.id: [] for n in nodes}
+    for n in nodes:
+        for dep in n.depends_on:
+            if dep in children:
+                children[dep].append(n.id)
+
+    dirty = set()
+    for n in nodes:
+        old_def = prev_graph.get(n.id)
+        old_state = prev_nodes.get(n.id) or {}
+        if old_def != n.to_dict() or old_state.get("status") not in ("success", "skipped"):
+            dirty.add(n.id)
+
+    stack = list(dirty)
+    while stack:
+        for child in children[stack.pop()]:
+            if child not in dirty:
+                dirty.add(child)
+                stack.append(child)
+
+    return {n.id: prev_nodes[n.id] for n in nodes if n.id not in dirty}
+
+
 class WSDAGPipeline:
     def __init__(self, kernel):
         self.kernel = kernel
 
-    async def run(self, nodes: List[Node], max_concurrency=4, priority: int = 100):
+    async def run(self, nodes: List[Node], max_concurrency=4, priority: int = 100, rerun_from: str | None = None):
+        """
+        提交 DAG 执行。rerun_from 为上一次的 task_id 时进入增量模式：
+        仅重跑定义变化的节点及其下游，其余节点复用上次结果。
+        """
         task_id = str(uuid.uuid4())
+        reuse: Dict[str, dict] = {}
+        if rerun_from:
+            prev_state = task_manager.get_task_state(rerun_from)
+            if prev_state:
+                reuse = plan_incremental(prev_state, nodes)
         task_manager.init_task(task_id, nodes, priority=priority)
+        for nid, old in reuse.items():
+            task_manager.update_node(task_id, nid, old["status"], result=old.get("result"),
+                                     start=old.get("start"), end=old.get("end"), elapsed=old.get("elapsed"),
+                                     fingerprint=old.get("fingerprint"), cached=True, reused=True)
         # 将执行函数注册给 scheduler
         task_manager.set_task_coro(task_id, lambda: self._execute(task_id, nodes, max_concurrency))
         # 入队，按优先级调度
@@ -59,10 +105,16 @@ class WSDAGPipeline:
             pass
         await ws_manager.broadcast(task_id, {"type": "pipeline_start", "task_id": task_id})
         sem = asyncio.Semaphore(max_concurrency)
-        loop = asyncio.get_event_loop()
         id_map = {n.id: n for n in nodes}
         deps = {n.id: set(n.depends_on) for n in nodes}
 
+        # 增量模式：复用节点视为已完成，直接解除其对下游的依赖
+        reused = {nid for nid, ns in task_manager.get_task_state(task_id)["nodes"].items() if ns.get("reused")}
+        for nid in reused:
+            await ws_manager.broadcast_node_update(task_id, nid)
+        for d in deps.values():
+            d -= reused
+
         # 初始化：有依赖的标记为 waiting，无依赖的稍后入队
         for nid, d in deps.items():
             if d:
@@ -76,6 +128,16 @@ class WSDAGPipeline:
                 data[dep] = st["nodes"][dep]["result"]
             return data
 
+        def upstream_fingerprints(node_id: str) -> Dict[str, str]:
+            # 非 success 的上游把状态混入指纹，避免与其成功时的下游结果混用
+            st = task_manager.get_task_state(task_id)
+            fps: Dict[str, str] = {}
+            for dep in id_map[node_id].depends_on:
+                dep_state = st["nodes"][dep]
+                fp = dep_state.get("fingerprint") or ""
+                fps[dep] = fp if dep_state["status"] == "success" else f"{fp}:{dep_state['status']}"
+            return fps
+
         def eval_condition(expr: Any, context: Dict[str, Any]) -> bool:
             if expr in (None, "", True):
                 return True
@@ -105,20 +167,20 @@ class WSDAGPipeline:
                 async with sem:
                     start_time = datetime.datetime.now()
                     task_manager.update_node(task_id, node_id, "running", start=start_time)
-                    asyncio.create_task(track_progress(task_id, node_id, start_time))
+                    progress_ticker.start(task_id, node_id, start_time)
+                fingerprint = None
                 try:
                     # 注入上游结果
                     params = dict(node.params)
                     params["_upstream_results"] = up
+                    fingerprint = self.kernel.node_fingerprint(node.script, params, upstream_fingerprints(node_id))
                     # 缓存命中：直接返回
-                    cached_result = _try_cache("ws", node.script, params)
+                    cached_result = self.kernel.try_cache(node.script, params, fingerprint)
                     if cached_result is not None:
                         end_time = datetime.datetime.now()
                         task_manager.update_node(task_id, node_id, "success", result=cached_result, end=end_time,
-                                                 elapsed=(end_time - start_time).total_seconds())
-                        # 标记 cached
-                        st = task_manager.get_task_state(task_id)
-                        st["nodes"][node_id]["cached"] = True
+                                                 elapsed=(end_time - start_time).total_seconds(),
+                                                 fingerprint=fingerprint, cached=True)
                         await ws_manager.broadcast_node_update(task_id, node_id)
                         try:
                             PIPELINE_NODE_SECONDS.labels(mode="ws", script=node.script).observe((end_time - start_time).total_seconds())
@@ -127,11 +189,11 @@ class WSDAGPipeline:
                         break
 
                     # 执行节点
-                    result = await loop.run_in_executor(None, self.kernel.run, node.script, **params)
+                    result = await self.kernel.run_async(node.script, **params)
                     end_time = datetime.datetime.now()
                     task_manager.update_node(task_id, node_id, "success", result=result, end=end_time,
-                                             elapsed=(end_time - start_time).total_seconds())
-                    _save_cache("ws", node.script, params, result)
+                                             elapsed=(end_time - start_time).total_seconds(), fingerprint=fingerprint)
+                    self.kernel.save_cache(node.script, params, result, fingerprint)
                     await ws_manager.broadcast_node_update(task_id, node_id)
                     try:
                         PIPELINE_NODE_SECONDS.labels(mode="ws", script=node.script).observe((end_time - start_time).total_seconds())
@@ -141,7 +203,7 @@ class WSDAGPipeline:
                 except Exception as e:
                     end_time = datetime.datetime.now()
                     task_manager.update_node(task_id, node_id, "failed", error=str(e), end=end_time,
-                                             elapsed=(end_time - start_time).total_seconds())
+                                             elapsed=(end_time - start_time).total_seconds(), fingerprint=fingerprint)
                     await ws_manager.broadcast_node_update(task_id, node_id)
                     try:
                         PIPELINE_NODE_FAILURES.labels(mode="ws", script=node.script).inc()
@@ -171,23 +233,34 @@ class WSDAGPipeline:
                     else:
                         break
 
-            # 触发依赖节点
+            progress_ticker.stop(task_id, node_id)
+
+            # 触发依赖节点（scheduled 防止多个上游同时完成时重复启动）
             for nid in deps:
                 deps[nid].discard(node_id)
-                if not deps[nid] and task_manager.get_task_state(task_id)["nodes"][nid]["status"] == "pending":
-                    asyncio.create_task(exec_node(nid))
+                if not deps[nid] and nid not in scheduled:
+                    launch(nid)
+
+        def launch(node_id):
+            scheduled.add(node_id)
+            running.add(node_id)
+            asyncio.create_task(exec_node(node_id)).add_done_callback(lambda _: node_done(node_id))
+
+        def node_done(node_id):
+            # 下游在上游协程结束前已启动，running 为空即全部节点结束
+            running.discard(node_id)
+            if not running:
+                finished.set()
 
         # 启动无依赖节点
+        scheduled = set(reused)
+        running: set = set()
+        finished = asyncio.Event()
         for nid, d in deps.items():
-            if not d:
-                asyncio.create_task(exec_node(nid))
-
-async def track_progress(task_id, node_id, start_time):
-    while True:
-        node_state = task_manager.get_task_state(task_id)["nodes"][node_id]
-        if node_state["status"] in ["success", "failed", "skipped"]:
-            break
-        elapsed = (datetime.datetime.now() - start_time).total_seconds()
-        task_manager.update_node(task_id, node_id, None, elapsed=elapsed)
-        await ws_manager.broadcast_node_update(task_id, node_id)
-        await asyncio.sleep(1)
+            if not d and nid not in scheduled:
+                launch(nid)
+
+        # 等待所有节点（含退避重试）结束后才标记任务完成，之后才允许从内存淘汰
+        if running:
+            await finished.wait()
+        task_manager.finish_task(task_id)
@@ -31,6 +31,14 @@ class GlobalPolicy:
     def request_interval_ms(cls) -> int:
         return int(cls.load().get("network", {}).get("request_interval_ms", 1000))
 
+    @classmethod
+    def cache(cls) -> dict:
+        return dict(cls.load().get("cache", {}) or {})
+
+    @classmethod
+    def executors(cls) -> dict:
+        return dict(cls.load().get("executors", {}) or {})
+
     @classmethod
     def obey_robots(cls) -> bool:
         return bool(cls.load().get("crawler", {}).get("obey_robots", True))
@@ -15,7 +15,11 @@ from pathlib import Path
 import logging
 
 from backend.core.base import BaseScript
+from backend.core.batch import run_batch
+from backend.core.executors import executor_pools
 from backend.services.ai_service import AIService
+from backend.services.ocr_engines import ocr_pool, run_ocr
+from backend.services.recognition_cache import recognition_cache
 
 
 class AIRecognizer(BaseScript):
@@ -40,8 +44,8 @@ class AIRecognizer(BaseScript):
             'cache_results': True
         }
 
-        # OCR引擎
-        self.ddddocr = None
+        # OCR引擎（模型由进程级引擎池加载并共享，这里只记录是否可用）
+        self.ocr_available = False
         self._init_ocr()
 
         # 统计信息
@@ -55,19 +59,13 @@ class AIRecognizer(BaseScript):
             'cache_misses': 0
         }
 
-        # 缓存
-        self.cache: Dict[str, Dict[str, Any]] = {}
-
     def _init_ocr(self):
-        """初始化OCR引擎"""
-        try:
-            if self.config['ddddocr_enabled']:
-                import ddddocr
-                self.ddddocr = ddddocr.DdddOcr()
-                self.logger.info("ddddocr OCR引擎初始化成功")
-        except ImportError:
+        """检查OCR引擎是否可用"""
+        if self.config['ddddocr_enabled'] and ocr_pool.available("text"):
+            self.ocr_available = True
+        else:
             self.logger.warning("ddddocr未安装，将使用备用方法")
-            self.ddddocr = None
+            self.ocr_available = False
 
     async def run(self, action: str, **kwargs) -> Dict[str, Any]:
         """执行AI识别操作"""
@@ -116,11 +114,10 @@ class AIRecognizer(BaseScript):
             if not image_bytes:
                 return {"status": "error", "error": "无法获取图像数据"}
 
-            # 缓存检查
-            cache_key = self._get_image_cache_key(image_bytes)
-            if self.config['cache_results'] and cache_key in self.cache:
-                cached_result = self.cache[cache_key]
-                if time.time() - cached_result['timestamp'] < 3600:  # 1小时缓存
+            # 缓存检查（按图片哈希，跨实例 / 跨 worker 共享）
+            if self.config['cache_results']:
+                cached_result = await recognition_cache.get("ai:text", image_bytes)
+                if cached_result is not None:
                     self.stats['cache_hits'] += 1
                     return {
                         "status": "success",
@@ -133,6 +130,7 @@ class AIRecognizer(BaseScript):
             self.stats['cache_misses'] += 1
 
             # 图像预处理
+            raw_bytes = image_bytes
             if self.config['image_preprocessing']:
                 image_bytes = self._preprocess_image(image_bytes)
 
@@ -145,12 +143,8 @@ class AIRecognizer(BaseScript):
             self._update_stats('captcha', processing_time, confidence > self.config['confidence_threshold'])
 
             # 缓存结果
-            if self.config['cache_results']:
-                self.cache[cache_key] = {
-                    'text': text,
-                    'confidence': confidence,
-                    'timestamp': time.time()
-                }
+            if self.config['cache_results'] and confidence > 0:
+                await recognition_cache.set("ai:text", raw_bytes, {'text': text, 'confidence': confidence})
 
             return {
                 "status": "success",
@@ -372,32 +366,24 @@ class AIRecognizer(BaseScript):
             self.logger.error(f"情感分析失败: {e}")
             return {"status": "error", "error": f"情感分析失败: {e}"}
 
-    async def _batch_recognize(self, items: List[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
-        """批量识别"""
-        results = []
-        successful = 0
-        failed = 0
-
-        for item in items:
+    async def _batch_recognize(self, items: List[Dict[str, Any]], concurrency: Optional[int] = None,
+                               timeout: Optional[float] = None, **kwargs) -> Dict[str, Any]:
+        """批量识别（有界并发，结果顺序与输入一致，单项超时/异常计为失败）"""
+        async def recognize(item: Dict[str, Any]) -> Dict[str, Any]:
             if 'image_path' in item or 'image_data' in item or 'image_base64' in item:
-                result = await self._recognize_captcha(**item)
+                return await self._recognize_captcha(**item)
             elif 'text' in item:
-                result = await self._analyze_text(**item)
-            else:
-                result = {"status": "error", "error": "无效的项目数据"}
-
-            results.append(result)
+                return await self._analyze_text(**item)
+            return {"status": "error", "error": "无效的项目数据"}
 
-            if result['status'] == 'success':
-                successful += 1
-            else:
-                failed += 1
+        results = await run_batch(items, recognize, concurrency=concurrency, timeout=timeout)
+        successful = sum(1 for result in results if result['status'] == 'success')
 
         return {
             "status": "success",
             "total_items": len(items),
             "successful": successful,
-            "failed": failed,
+            "failed": len(results) - successful,
             "results": results
         }
 
@@ -458,9 +444,11 @@ class AIRecognizer(BaseScript):
     async def _perform_ocr(self, image_bytes: bytes) -> tuple[str, float]:
         """执行OCR识别"""
         try:
-            if self.ddddocr:
+            if self.ocr_available:
                 # 使用ddddocr进行识别
-                result = self.ddddocr.classification(image_bytes)
+                # 推理按 ocr 路由放到 CPU 进程池，避免阻塞事件循环
+                result = await executor_pools.run(
+                    executor_pools.pool_for("ocr"), run_ocr, "text", "classification", image_bytes)
                 confidence = 0.9  # ddddocr不提供置信度，这里给个默认值
                 return result, confidence
             else:
@@ -471,11 +459,6 @@ class AIRecognizer(BaseScript):
             self.logger.error(f"OCR识别失败: {e}")
             return "OCR识别错误", 0.0
 
-    def _get_image_cache_key(self, image_bytes: bytes) -> str:
-        """生成图像缓存键"""
-        import hashlib
-        return hashlib.md5(image_bytes).hexdigest()
-
     def _update_stats(self, recognition_type: str, processing_time: float, success: bool):
         """更新统计信息"""
         self.stats['total_recognitions'] += 1
@@ -4,20 +4,22 @@
 支持多种验证码类型的识别
 """
 
-import asyncio
 import base64
 import time
 from typing import Dict, Any, Optional, List
 from io import BytesIO
 from pathlib import Path
 
-import ddddocr
 import requests
 from PIL import Image
 import cv2
 import numpy as np
 
 from backend.core.base import BaseScript
+from backend.core.batch import run_batch
+from backend.core.executors import executor_pools
+from backend.services.ocr_engines import run_ocr
+from backend.services.recognition_cache import recognition_cache
 
 
 class CaptchaSolver(BaseScript):
@@ -25,9 +27,7 @@ class CaptchaSolver(BaseScript):
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.ocr = ddddocr.DdddOcr()
-        self.slide_ocr = ddddocr.DdddOcr(det=False, ocr=False)  # 滑动验证码专用
-        self.detect_ocr = ddddocr.DdddOcr(det=True, ocr=False)  # 目标检测专用
+        # ddddocr 引擎（文字 / 滑动 / 目标检测）由进程池中的工作进程各自加载，见 _ocr
 
         # 缓存配置
         self.cache_ttl = 300  # 5分钟缓存
@@ -68,6 +68,13 @@ class CaptchaSolver(BaseScript):
                 "captcha_type": captcha_type
             }
 
+        # 按原始图片哈希查识别缓存（滑块附带目标图，点选附带提示词）
+        cache_parts = self._cache_parts(captcha_type, image_data, captcha_data)
+        if cache_parts:
+            cached = await recognition_cache.get(f"captcha:{captcha_type}", *cache_parts)
+            if cached is not None:
+                return {**cached, "cached": True}
+
         # 预处理图片
         processed_image = await self._preprocess_image(image_data)
 
@@ -90,8 +97,38 @@ class CaptchaSolver(BaseScript):
             "confidence": self._calculate_confidence(result)
         })
 
+        if cache_parts and result.get('status') == 'success':
+            await recognition_cache.set(f"captcha:{captcha_type}", cache_parts[0], result, *cache_parts[1:])
+
         return result
 
+    @staticmethod
+    def _raw_bytes(image_data: Any) -> Optional[bytes]:
+        """缓存键使用的原始图片字节；文件对象等不可重复读取的输入返回 None（不缓存）"""
+        if isinstance(image_data, bytes):
+            return image_data
+        if isinstance(image_data, str):
+            try:
+                return base64.b64decode(image_data.split(',')[1] if image_data.startswith('data:image') else image_data)
+            except Exception:
+                return None
+        return None
+
+    def _cache_parts(self, captcha_type: str, image_data: Any, captcha_data: Dict[str, Any]) -> Optional[List[bytes]]:
+        image = self._raw_bytes(image_data)
+        if image is None:
+            return None
+        if captcha_type == 'slide':
+            target = self._raw_bytes(captcha_data.get('target_image'))
+            return [image, target] if target is not None else None
+        if captcha_type == 'click':
+            return [image, str(captcha_data.get('prompt', '')).encode()]
+        return [image]
+
+    async def _ocr(self, kind: str, method: str, *args):
+        """按 ocr 路由（默认 CPU 进程池）执行 ddddocr 推理，避免阻塞事件循环；脚本本身留在事件循环"""
+        return await executor_pools.run(executor_pools.pool_for("ocr"), run_ocr, kind, method, *args)
+
     async def _preprocess_image(self, image_data: Any) -> bytes:
         """预处理验证码图片"""
         try:
@@ -142,7 +179,7 @@ class CaptchaSolver(BaseScript):
             start_time = time.time()
 
             # 使用ddddocr识别
-            result = self.ocr.classification(image_bytes)
+            result = await self._ocr("text", "classification", image_bytes)
 
             processing_time = time.time() - start_time
 
@@ -176,7 +213,7 @@ class CaptchaSolver(BaseScript):
             target_bytes = await self._preprocess_image(target_image)
 
             # 使用ddddocr的滑动验证码识别
-            result = self.slide_ocr.slide_match(target_bytes, image_bytes)
+            result = await self._ocr("slide", "slide_match", target_bytes, image_bytes)
 
             return {
                 "status": "success",
@@ -198,7 +235,7 @@ class CaptchaSolver(BaseScript):
             prompt = captcha_data.get('prompt', '')
 
             # 使用目标检测识别可点击区域
-            positions = self.detect_ocr.detection(image_bytes)
+            positions = await self._ocr("detect", "detection", image_bytes)
 
             return {
                 "status": "success",
@@ -250,7 +287,7 @@ class CaptchaSolver(BaseScript):
 
         # 尝试目标检测
         try:
-            positions = self.detect_ocr.detection(image_bytes)
+            positions = await self._ocr("detect", "detection", image_bytes)
             return {
                 "status": "success",
                 "result": positions,
@@ -318,14 +355,17 @@ class CaptchaSolver(BaseScript):
         except:
             return 0.0
 
-    async def batch_solve(self, captcha_list: List[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
-        """批量识别验证码"""
-        results = []
-        for captcha_data in captcha_list:
-            result = await self.run(captcha_data, **kwargs)
-            results.append(result)
-
-            # 添加小延迟避免过快请求
-            await asyncio.sleep(0.1)
-
-        return results
\ No newline at end of file
+    async def batch_solve(self, captcha_list: List[Dict[str, Any]], concurrency: Optional[int] = None,
+                          timeout: Optional[float] = None, **kwargs) -> List[Dict[str, Any]]:
+        """批量识别验证码（有界并发，结果顺序与输入一致，单个超时/异常不影响其他验证码）"""
+        return await run_batch(
+            captcha_list,
+            lambda captcha_data: self.run(captcha_data, **kwargs),
+            concurrency=concurrency,
+            timeout=timeout,
+            on_error=lambda captcha_data, e: {
+                "status": "error",
+                "error": str(e),
+                "captcha_type": captcha_data.get('type', 'unknown')
+            },
+        )
\ No newline at end of file
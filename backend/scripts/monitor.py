@@ -13,6 +13,7 @@ class MonitorScript(BaseScript):
     """系统监控脚本"""
     
     name = "monitor"
+    blocking = True  # 使用 time.sleep 轮询
     
     async def run(self, **kwargs):
         """
@@ -20,6 +20,7 @@ _running = False
 @registry.register("page_probe")
 class PageProbeScript(BaseScript):
     name = "page_probe"
+    blocking = True  # 使用 requests/time.sleep，同步阻塞
 
     async def run(self, **kwargs) -> Dict:
         """
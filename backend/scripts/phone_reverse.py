@@ -45,17 +45,17 @@ class PhoneReverseScript(BaseScript):
 
         # 尝试从缓存获取
         cache_key = f"phone_analysis:{phone}"
-        cached_result = cache_service.get(cache_key)
+        cached_result = await cache_service.get(cache_key)
         if cached_result:
             logger.info(f"✅ 从缓存获取号码分析结果: {phone}")
             return {"status": "success", "data": cached_result, "cached": True}
 
         # 尝试从数据库获取
-        db_result = db_service.get_phone_cache(phone)
+        db_result = await db_service.get_phone_cache(phone)
         if db_result:
             logger.info(f"✅ 从数据库获取号码分析结果: {phone}")
             # 存入缓存
-            cache_service.set(cache_key, db_result, ttl=86400)  # 24小时
+            await cache_service.set(cache_key, db_result, ttl=86400)  # 24小时
             return {"status": "success", "data": db_result, "cached": True}
 
         try:
@@ -75,7 +75,7 @@ class PhoneReverseScript(BaseScript):
             db_service.set_phone_cache(phone, result)
 
             # 存入缓存
-            cache_service.set(cache_key, result, ttl=86400)  # 24小时
+            await cache_service.set(cache_key, result, ttl=86400)  # 24小时
 
             logger.info(f"✅ 分析完成并缓存: {phone}")
             return {"status": "success", "data": result}
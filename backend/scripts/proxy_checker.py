@@ -5,13 +5,18 @@
 """
 
 import asyncio
+import errno
 import time
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Dict, Any, List, Optional
 from concurrent.futures import ThreadPoolExecutor
 import aiohttp
 import requests
 
 from backend.core.base import BaseScript
+from backend.services.proxy_check_engine import LOCAL_OVERLOAD, ProxyCheckEngine
+
+# 本机资源耗尽类错误（而非代理不可用），触发自适应并发收缩
+_LOCAL_ERRNOS = {errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.EADDRNOTAVAIL}
 
 
 class ProxyChecker(BaseScript):
@@ -22,8 +27,9 @@ class ProxyChecker(BaseScript):
 
         # 检测配置
         self.check_config = {
-            'timeout': 10,  # 连接超时时间
-            'max_workers': 50,  # 最大并发数
+            'timeout': 10,  # 单次请求超时时间
+            'proxy_timeout': None,  # 单个代理总超时（含重试），None 时按 timeout 与重试次数推算
+            'max_workers': 200,  # 最大并发数（自适应并发的上限）
             'test_url': 'http://httpbin.org/ip',  # 测试URL
             'test_urls': [
                 'http://httpbin.org/ip',
@@ -32,9 +38,11 @@ class ProxyChecker(BaseScript):
                 'https://api.ipify.org?format=json'
             ],
             'retry_count': 2,  # 重试次数
-            'batch_size': 100  # 批处理大小
         }
 
+        # 长生命周期检测引擎：共享会话与连接池、自适应并发
+        self.engine = ProxyCheckEngine(max_concurrency=500)
+
         # 检测统计
         self.stats = {
             'total_checked': 0,
@@ -74,19 +82,7 @@ class ProxyChecker(BaseScript):
         config = self.check_config.copy()
         config.update(kwargs)
 
-        # 分批处理
-        batch_size = config['batch_size']
-        all_results = []
-
-        for i in range(0, len(proxies), batch_size):
-            batch = proxies[i:i + batch_size]
-            self.logger.info(f"处理第 {i//batch_size + 1} 批代理 ({len(batch)} 个)")
-
-            batch_results = await self._check_batch(batch, config)
-            all_results.extend(batch_results)
-
-            # 小延迟避免过载
-            await asyncio.sleep(0.1)
+        all_results = [result async for result in self.iter_check(proxies, **kwargs)]
 
         # 计算统计信息
         self._calculate_stats(all_results)
@@ -107,39 +103,44 @@ class ProxyChecker(BaseScript):
 
         return result
 
-    async def _check_batch(self, proxies: List[Dict[str, Any]], config: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """检测一批代理"""
-        semaphore = asyncio.Semaphore(config['max_workers'])
-
-        async def check_single(proxy: Dict[str, Any]) -> Dict[str, Any]:
-            async with semaphore:
-                return await self._check_single_proxy(proxy, config)
-
-        tasks = [check_single(proxy) for proxy in proxies]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        # 处理异常结果
-        processed_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                self.logger.warning(f"检测代理 {proxies[i].get('ip', 'unknown')} 出错: {result}")
-                # 创建失败结果
-                failed_result = proxies[i].copy()
-                failed_result.update({
-                    'working': False,
-                    'error': str(result),
-                    'response_time': -1,
-                    'score': 0,
-                    'checked_at': time.time()
-                })
-                processed_results.append(failed_result)
-            else:
-                processed_results.append(result)
+    async def iter_check(self, proxies: List[Dict[str, Any]], **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """流式检测：按完成顺序逐个产出检测结果，调用方可边检测边入池"""
+        config = self.check_config.copy()
+        config.update(kwargs)
+        proxy_timeout = config.get('proxy_timeout') or (
+            config['timeout'] * (config['retry_count'] + 1) + 0.5 * config['retry_count'])
+
+        async def check(session: aiohttp.ClientSession, proxy: Dict[str, Any]) -> Dict[str, Any]:
+            return await self._check_single_proxy(proxy, config, session)
+
+        async for result in self.engine.iter_results(proxies, check, self._failed_result,
+                                                     timeout=proxy_timeout,
+                                                     max_concurrency=config['max_workers']):
+            if result.get('error') and not result.get('working'):
+                self.logger.debug(f"代理 {result.get('ip', 'unknown')} 不可用: {result['error']}")
+            yield result
+
+    def _failed_result(self, proxy: Dict[str, Any], error: str) -> Dict[str, Any]:
+        """检测出错（超时 / 异常）时的失败结果"""
+        failed_result = proxy.copy()
+        failed_result.update({
+            'working': False,
+            'error': error,
+            'response_time': -1,
+            'score': 0,
+            'checked_at': time.time()
+        })
+        return failed_result
 
-        return processed_results
+    async def close(self):
+        """关闭共享会话"""
+        await self.engine.close()
 
-    async def _check_single_proxy(self, proxy: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
-        """检测单个代理"""
+    async def _check_single_proxy(self, proxy: Dict[str, Any], config: Dict[str, Any],
+                                  session: Optional[aiohttp.ClientSession] = None) -> Dict[str, Any]:
+        """检测单个代理（复用引擎的共享会话）"""
+        if session is None:
+            session = await self.engine.session()
         ip = proxy.get('ip')
         port = proxy.get('port')
         protocol = proxy.get('protocol', 'http')
@@ -162,53 +163,48 @@ class ProxyChecker(BaseScript):
             try:
                 start_time = time.time()
 
-                # 使用aiohttp进行异步测试
-                connector = aiohttp.TCPConnector(limit=1, ttl_dns_cache=30)
+                # 使用共享会话进行异步测试（连接池与 DNS 缓存复用）
                 timeout = aiohttp.ClientTimeout(total=config['timeout'])
 
-                proxy_dict = {protocol: proxy_url}
-
-                async with aiohttp.ClientSession(
-                    connector=connector,
-                    timeout=timeout
-                ) as session:
-                    async with session.get(
-                        config['test_url'],
-                        proxy=proxy_dict[protocol] if protocol in proxy_dict else None
-                    ) as response:
-                        response_time = time.time() - start_time
-
-                        if response.status == 200:
-                            # 解析响应
-                            try:
-                                data = await response.json()
-                                real_ip = self._extract_ip_from_response(data, config['test_url'])
-                            except:
-                                real_ip = None
-
-                            # 计算匿名等级
-                            anonymity = self._calculate_anonymity(ip, real_ip)
-
-                            # 计算评分
-                            score = self._calculate_score(response_time, anonymity, response.status)
-
-                            result.update({
-                                'working': True,
-                                'response_time': round(response_time, 3),
-                                'real_ip': real_ip,
-                                'anonymity_level': anonymity,
-                                'speed_rating': self._get_speed_rating(response_time),
-                                'score': score,
-                                'last_success': time.time()
-                            })
-
-                            self.logger.debug(f"代理 {ip}:{port} 工作正常 - 响应时间: {response_time:.3f}s, 评分: {score}")
-                            break
-                        else:
-                            result['error'] = f"HTTP {response.status}"
+                async with session.get(config['test_url'], proxy=proxy_url, timeout=timeout) as response:
+                    response_time = time.time() - start_time
+
+                    if response.status == 200:
+                        # 解析响应
+                        try:
+                            data = await response.json()
+                            real_ip = self._extract_ip_from_response(data, config['test_url'])
+                        except:
+                            real_ip = None
+
+                        # 计算匿名等级
+                        anonymity = self._calculate_anonymity(ip, real_ip)
+
+                        # 计算评分
+                        score = self._calculate_score(response_time, anonymity, response.status)
+
+                        result.update({
+                            'working': True,
+                            'response_time': round(response_time, 3),
+                            'real_ip': real_ip,
+                            'anonymity_level': anonymity,
+                            'speed_rating': self._get_speed_rating(response_time),
+                            'score': score,
+                            'last_success': time.time()
+                        })
+
+                        self.logger.debug(f"代理 {ip}:{port} 工作正常 - 响应时间: {response_time:.3f}s, 评分: {score}")
+                        break
+                    else:
+                        result['error'] = f"HTTP {response.status}"
 
             except asyncio.TimeoutError:
                 result['error'] = "timeout"
+            except aiohttp.ClientOSError as e:
+                if e.errno in _LOCAL_ERRNOS:
+                    result['error'] = LOCAL_OVERLOAD
+                else:
+                    result['error'] = f"connection_error: {str(e)}"
             except aiohttp.ClientError as e:
                 result['error'] = f"connection_error: {str(e)}"
             except Exception as e:
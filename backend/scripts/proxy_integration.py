@@ -98,16 +98,10 @@ class ProxyPoolIntegration(BaseScript):
                 proxies = collect_result['proxies']
                 self.logger.info(f"收集到 {len(proxies)} 个代理")
 
-                # 检测代理
+                # 边检测边添加到管理器
                 if self.config['auto_check'] and proxies:
-                    check_result = await self.checker.run(proxies)
-                    if check_result['status'] == 'success':
-                        working_proxies = check_result['working_proxies']
-                        self.logger.info(f"检测出 {len(working_proxies)} 个工作代理")
-
-                        # 添加到管理器
-                        add_result = await self.manager.run('add_proxies', proxies=working_proxies)
-                        self.logger.info(f"添加到代理池: {add_result.get('added_count', 0)} 个")
+                    added = await self._ingest_checked(proxies)
+                    self.logger.info(f"添加到代理池: {added} 个")
 
         return {
             "status": "success",
@@ -115,6 +109,34 @@ class ProxyPoolIntegration(BaseScript):
             "config": self.config
         }
 
+    async def _ingest_checked(self, proxies: List[Dict[str, Any]], stop_after: Optional[int] = None,
+                              chunk_size: int = 20) -> int:
+        """流式检测代理，工作代理按小批次即时加入管理器；stop_after 个入池后停止检测，返回入池数量"""
+        added = 0
+        pending: List[Dict[str, Any]] = []
+
+        async def flush():
+            nonlocal added
+            if pending:
+                add_result = await self.manager.run('add_proxies', proxies=list(pending))
+                added += add_result.get('added_count', 0)
+                pending.clear()
+
+        stream = self.checker.iter_check(proxies)
+        try:
+            async for result in stream:
+                if not result.get('working'):
+                    continue
+                pending.append(result)
+                if len(pending) >= chunk_size or (stop_after and added + len(pending) >= stop_after):
+                    await flush()
+                    if stop_after and added >= stop_after:
+                        break
+        finally:
+            await stream.aclose()
+        await flush()
+        return added
+
     async def _get_proxy_for_crawler(self, **kwargs) -> Dict[str, Any]:
         """为爬虫获取代理"""
         strategy = kwargs.get('strategy', self.config['rotation_strategy'].value)
@@ -132,12 +154,9 @@ class ProxyPoolIntegration(BaseScript):
                 if collect_result['status'] == 'success':
                     proxies = collect_result['proxies']
                     if proxies:
-                        # 快速检测
-                        check_result = await self.checker.run(proxies[:50])  # 只检测前50个
-                        if check_result['status'] == 'success':
-                            working_proxies = check_result['working_proxies']
-                            if working_proxies:
-                                await self.manager.run('add_proxies', proxies=working_proxies)
+                        # 快速检测：只检测前50个，补足最小池大小即停止
+                        await self._ingest_checked(proxies[:50],
+                                                   stop_after=self.config['min_pool_size'] - active_count)
 
         # 获取代理
         proxy_result = await self.manager.run('get_proxy', strategy=strategy)
@@ -220,6 +239,9 @@ class ProxyPoolIntegration(BaseScript):
             pass
 
         self.tasks = []
+
+        # 关闭检测器的共享会话
+        await self.checker.close()
         self.logger.info("代理池后台任务已停止")
 
         return {
@@ -237,13 +259,10 @@ class ProxyPoolIntegration(BaseScript):
                 if collect_result['status'] == 'success':
                     proxies = collect_result['proxies']
                     if proxies:
-                        # 检测新代理
-                        check_result = await self.checker.run(proxies)
-                        if check_result['status'] == 'success':
-                            working_proxies = check_result['working_proxies']
-                            if working_proxies:
-                                await self.manager.run('add_proxies', proxies=working_proxies)
-                                self.logger.info(f"后台收集: 添加 {len(working_proxies)} 个工作代理")
+                        # 检测新代理，边检测边入池
+                        added = await self._ingest_checked(proxies)
+                        if added:
+                            self.logger.info(f"后台收集: 添加 {added} 个工作代理")
 
                 # 等待下次收集
                 await asyncio.sleep(self.config['collect_interval'])
@@ -6,14 +6,31 @@
 
 import asyncio
 import json
-import random
 import time
 from typing import Dict, Any, List, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
 import heapq
 
 from backend.core.base import BaseScript
+from backend.services.proxy_health import ProxyHealth, ProxyHealthScorer
+from backend.services.proxy_index import ProxyIndex
+
+try:
+    from backend.core.metrics import (  # type: ignore
+        PROXY_RESULTS, PROXY_HEALTH_SCORE, PROXY_POOL_LATENCY, PROXY_DEMOTIONS,
+    )
+except Exception:
+    class _No:
+        def labels(self, *_, **__):
+            return self
+        def inc(self, *_):
+            pass
+        def observe(self, *_):
+            pass
+        def set(self, *_):
+            pass
+    PROXY_RESULTS = PROXY_HEALTH_SCORE = PROXY_POOL_LATENCY = PROXY_DEMOTIONS = _No()
 
 
 class RotationStrategy(Enum):
@@ -46,6 +63,7 @@ class ProxyRecord:
     consecutive_failures: int
     created_at: float
     updated_at: float
+    health: ProxyHealth = field(default_factory=ProxyHealth)
 
 
 class ProxyManager(BaseScript):
@@ -80,11 +98,14 @@ class ProxyManager(BaseScript):
             'avg_response_time': 0.0
         }
 
-        # 轮询索引
-        self.round_robin_index = 0
+        # 可用代理索引（按策略 / 国家增量维护，选择无需扫描全池）
+        self._index = ProxyIndex()
+        self._index_config: Optional[Tuple[Any, Any]] = None
+        self._geo_cache: Tuple[Any, Optional[Tuple[str, ...]]] = (None, None)
 
-        # 响应时间历史
-        self.response_times: List[float] = []
+        # 评分引擎与全池响应时间统计（时间衰减，常数内存）
+        self.health_scorer = ProxyHealthScorer()
+        self.pool_health = ProxyHealth()
 
     async def run(self, action: str, **kwargs) -> Dict[str, Any]:
         """执行代理管理操作"""
@@ -148,6 +169,7 @@ class ProxyManager(BaseScript):
                 )
 
                 self.proxy_pool[proxy_key] = record
+                self._index.update(proxy_key, record, self._is_available(record, record.created_at))
                 added_count += 1
 
         self._update_stats()
@@ -175,99 +197,60 @@ class ProxyManager(BaseScript):
         else:
             rotation_strategy = self.config['rotation_strategy']
 
-        # 获取可用代理
-        available_proxies = self._get_available_proxies()
+        # 从索引中按策略选择可用代理
+        self._sync_index()
+        now = time.time()
+        proxy_key = self._index.select(rotation_strategy.value, self._geo_countries(),
+                                       lambda record: self._is_available(record, now))
 
-        if not available_proxies:
+        if proxy_key is None:
             return {
                 "status": "error",
                 "error": "没有可用的代理"
             }
 
-        # 根据策略选择代理
-        selected_record = self._select_proxy_by_strategy(available_proxies, rotation_strategy)
-
-        if not selected_record:
-            return {
-                "status": "error",
-                "error": "无法选择代理"
-            }
-
         # 更新使用统计
+        selected_record = self.proxy_pool[proxy_key]
         selected_record.use_count += 1
-        selected_record.last_used = time.time()
-        selected_record.updated_at = time.time()
+        selected_record.last_used = now
+        selected_record.updated_at = now
+        self._index.update(proxy_key, selected_record, True)
 
         self.stats['total_requests'] += 1
 
         return {
             "status": "success",
             "proxy": selected_record.proxy,
-            "proxy_key": self._get_proxy_key(selected_record.proxy),
+            "proxy_key": proxy_key,
             "strategy": rotation_strategy.value
         }
 
-    def _get_available_proxies(self) -> List[ProxyRecord]:
-        """获取可用代理列表"""
-        available = []
-
-        for record in self.proxy_pool.values():
-            # 检查状态
-            if record.status != ProxyStatus.ACTIVE:
-                continue
-
-            # 检查评分
-            if record.score < self.config['min_score']:
-                continue
-
-            # 检查年龄
-            age = time.time() - record.created_at
-            if age > self.config['max_age']:
-                continue
-
-            # 检查地理位置过滤
-            if self.config['geo_filter']:
-                proxy_country = record.proxy.get('country', '').lower()
-                filter_countries = [c.lower() for c in self.config['geo_filter']]
-                if proxy_country not in filter_countries:
-                    continue
-
-            available.append(record)
-
-        return available
+    def _is_available(self, record: ProxyRecord, now: float) -> bool:
+        """代理是否可用（状态、评分阈值、年龄；地理过滤由索引按国家分桶处理）"""
+        return (record.status == ProxyStatus.ACTIVE
+                and record.score >= self.config['min_score']
+                and now - record.created_at <= self.config['max_age'])
 
-    def _select_proxy_by_strategy(self, available_proxies: List[ProxyRecord],
-                                strategy: RotationStrategy) -> Optional[ProxyRecord]:
-        """根据策略选择代理"""
-        if not available_proxies:
+    def _geo_countries(self) -> Optional[Tuple[str, ...]]:
+        """小写后的地理过滤国家，随 geo_filter 变化才重新计算"""
+        geo_filter = self.config['geo_filter']
+        if not geo_filter:
             return None
-
-        if strategy == RotationStrategy.RANDOM:
-            return random.choice(available_proxies)
-
-        elif strategy == RotationStrategy.ROUND_ROBIN:
-            if self.round_robin_index >= len(available_proxies):
-                self.round_robin_index = 0
-            selected = available_proxies[self.round_robin_index]
-            self.round_robin_index += 1
-            return selected
-
-        elif strategy == RotationStrategy.SCORE_BASED:
-            # 按评分排序，选择最高评分
-            return max(available_proxies, key=lambda x: x.score)
-
-        elif strategy == RotationStrategy.LEAST_USED:
-            # 选择使用次数最少的
-            return min(available_proxies, key=lambda x: x.use_count)
-
-        elif strategy == RotationStrategy.FASTEST:
-            # 选择响应时间最快的（基于历史数据）
-            fastest = min(available_proxies,
-                         key=lambda x: x.proxy.get('response_time', float('inf')))
-            return fastest
-
-        else:
-            return random.choice(available_proxies)
+        source = tuple(geo_filter)
+        if self._geo_cache[0] != source:
+            self._geo_cache = (source, tuple(c.lower() for c in source))
+        return self._geo_cache[1]
+
+    def _sync_index(self):
+        """评分阈值或最大年龄配置变化时重建索引"""
+        index_config = (self.config['min_score'], self.config['max_age'])
+        if self._index_config == index_config:
+            return
+        self._index_config = index_config
+        self._index.clear()
+        now = time.time()
+        for proxy_key, record in self.proxy_pool.items():
+            self._index.update(proxy_key, record, self._is_available(record, now))
 
     async def _report_result(self, proxy_key: str, success: bool,
                            response_time: float = 0) -> Dict[str, Any]:
@@ -279,23 +262,24 @@ class ProxyManager(BaseScript):
             }
 
         record = self.proxy_pool[proxy_key]
+        now = time.time()
+        was_available = self._is_available(record, now)
+        self.health_scorer.observe(record.health, success, response_time, now)
+        self.health_scorer.observe(self.pool_health, success, response_time, now)
 
         if success:
-            record.last_success = time.time()
+            record.last_success = now
             record.consecutive_failures = 0
             self.stats['successful_requests'] += 1
 
-            # 更新响应时间
+            # 更新响应时间：代理的 response_time 取衰减 p50，fastest 策略不再被单次快响应误导
             if response_time > 0:
-                self.response_times.append(response_time)
-                if len(self.response_times) > 100:  # 保持最近100个记录
-                    self.response_times.pop(0)
-
-                # 更新代理的平均响应时间
-                record.proxy['response_time'] = response_time
+                PROXY_POOL_LATENCY.labels(quantile="0.5").set(self.pool_health.p50())
+                PROXY_POOL_LATENCY.labels(quantile="0.95").set(self.pool_health.p95())
+                record.proxy['response_time'] = round(record.health.p50(), 3)
 
         else:
-            record.last_failure = time.time()
+            record.last_failure = now
             record.consecutive_failures += 1
             self.stats['failed_requests'] += 1
 
@@ -306,7 +290,15 @@ class ProxyManager(BaseScript):
 
         # 更新评分
         record.score = self._calculate_proxy_score(record)
-        record.updated_at = time.time()
+        record.updated_at = now
+        available = self._is_available(record, now)
+        self._index.update(proxy_key, record, available)
+
+        PROXY_RESULTS.labels(outcome="success" if success else "failure").inc()
+        PROXY_HEALTH_SCORE.observe(record.score)
+        if was_available and not available:
+            reason = "banned" if record.status == ProxyStatus.BANNED else ("slow" if success else "score")
+            PROXY_DEMOTIONS.labels(reason=reason).inc()
 
         self._update_stats()
 
@@ -318,29 +310,8 @@ class ProxyManager(BaseScript):
         }
 
     def _calculate_proxy_score(self, record: ProxyRecord) -> float:
-        """计算代理评分"""
-        base_score = record.proxy.get('score', 50)
-
-        # 连续失败惩罚
-        failure_penalty = record.consecutive_failures * 10
-
-        # 使用频率奖励（避免过度使用）
-        usage_bonus = min(record.use_count * 0.1, 10)
-
-        # 时间衰减（较旧的代理评分降低）
-        age_hours = (time.time() - record.created_at) / 3600
-        age_penalty = age_hours * 0.5
-
-        # 成功率奖励
-        total_uses = record.use_count
-        if total_uses > 0:
-            success_rate = (total_uses - record.consecutive_failures) / total_uses
-            success_bonus = (success_rate - 0.5) * 20  # 50%为基准
-        else:
-            success_bonus = 0
-
-        new_score = base_score - failure_penalty + usage_bonus - age_penalty + success_bonus
-        return max(0, min(100, round(new_score, 2)))
+        """计算代理评分（衰减成功率、延迟分位数、连续失败、使用次数与年龄，见 ProxyHealthScorer）"""
+        return self.health_scorer.score(record)
 
     async def _health_check(self) -> Dict[str, Any]:
         """执行健康检查"""
@@ -353,12 +324,14 @@ class ProxyManager(BaseScript):
             age = current_time - record.created_at
             if age > self.config['max_age']:
                 record.status = ProxyStatus.EXPIRED
+                self._index.update(proxy_key, record, False)
                 checked_count += 1
                 continue
 
             # 检查长时间未使用的代理
             if current_time - record.last_used > 3600:  # 1小时
                 record.status = ProxyStatus.INACTIVE
+                self._index.update(proxy_key, record, False)
 
             checked_count += 1
 
@@ -391,10 +364,12 @@ class ProxyManager(BaseScript):
                     # 解封代理
                     record.status = ProxyStatus.ACTIVE
                     record.consecutive_failures = 0
+                    self._index.update(proxy_key, record, self._is_available(record, current_time))
 
         # 移除过期代理
         for key in expired_keys:
             del self.proxy_pool[key]
+            self._index.remove(key)
             removed_count += 1
 
         self._update_stats()
@@ -417,7 +392,9 @@ class ProxyManager(BaseScript):
             "stats": {
                 **self.stats,
                 "success_rate": round(success_rate, 2),
-                "avg_response_time": round(sum(self.response_times) / len(self.response_times), 3) if self.response_times else 0
+                "avg_response_time": round(self.pool_health.latency.mean() or 0, 3),
+                "p50_response_time": round(self.pool_health.p50() or 0, 3),
+                "p95_response_time": round(self.pool_health.p95() or 0, 3)
             },
             "pool_size": len(self.proxy_pool),
             "config": self.config
@@ -431,10 +408,10 @@ class ProxyManager(BaseScript):
         return f"{protocol}://{ip}:{port}"
 
     def _update_stats(self):
-        """更新统计信息"""
+        """更新统计信息（状态计数由索引增量维护）"""
         total = len(self.proxy_pool)
-        active = len([r for r in self.proxy_pool.values() if r.status == ProxyStatus.ACTIVE])
-        banned = len([r for r in self.proxy_pool.values() if r.status == ProxyStatus.BANNED])
+        active = self._index.status_counts[ProxyStatus.ACTIVE]
+        banned = self._index.status_counts[ProxyStatus.BANNED]
 
         self.stats.update({
             'total_proxies': total,
@@ -469,7 +446,10 @@ class ProxyManager(BaseScript):
                 "score": record.score,
                 "use_count": record.use_count,
                 "last_used": record.last_used,
-                "consecutive_failures": record.consecutive_failures
+                "consecutive_failures": record.consecutive_failures,
+                "success_rate": round(record.health.success_rate(), 3),
+                "p50_response_time": record.health.p50(),
+                "p95_response_time": record.health.p95()
             }
             snapshot["proxies"].append(proxy_info)
 
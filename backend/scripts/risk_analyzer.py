@@ -5,7 +5,6 @@
 """
 
 import asyncio
-import re
 import time
 from typing import Dict, Any, List, Optional
 from urllib.parse import urlparse
@@ -14,11 +13,27 @@ import requests
 from bs4 import BeautifulSoup
 
 from backend.core.base import BaseScript
+from backend.core.batch import run_batch
+from backend.core.executors import executor_pools
+from backend.services.risk_control.matcher import PatternMatcher, normalize
+
+_process_analyzer = None
+
+
+def _analyze_html_in_process(html_content: str) -> Dict[str, Any]:
+    """进程池入口：子进程内懒加载分析器，对大页面执行特征匹配"""
+    global _process_analyzer
+    if _process_analyzer is None:
+        _process_analyzer = RiskAnalyzer()
+    return _process_analyzer._analyze_html_content(html_content)
 
 
 class RiskAnalyzer(BaseScript):
     """风控类型分析器"""
 
+    # 超过该字符数的页面交给进程池匹配，避免大页面阻塞事件循环
+    offload_chars = 256 * 1024
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
@@ -115,6 +130,15 @@ class RiskAnalyzer(BaseScript):
             ]
         }
 
+        # 预编译 HTML 特征匹配器：waf/captcha 按子类型分组，其余按类别分组
+        groups = []
+        for category, patterns in self.risk_patterns.items():
+            if isinstance(patterns, dict):
+                groups.extend((f"{category}_{sub}", sub_patterns) for sub, sub_patterns in patterns.items())
+            else:
+                groups.append((category, patterns))
+        self._html_matcher = PatternMatcher(groups)
+
     async def run(self, page_data: Dict[str, Any], **kwargs) -> Dict[str, Any]:
         """执行风控类型分析"""
         try:
@@ -162,7 +186,11 @@ class RiskAnalyzer(BaseScript):
         analysis_result['details']['http'] = http_analysis
 
         # 2. 基于HTML内容的分析
-        html_analysis = self._analyze_html_content(html_content)
+        if len(html_content) >= self.offload_chars:
+            html_analysis = await executor_pools.run(
+                executor_pools.pool_for("html_analysis"), _analyze_html_in_process, html_content)
+        else:
+            html_analysis = self._analyze_html_content(html_content)
         analysis_result['details']['html'] = html_analysis
 
         # 3. 基于页面特征的分析
@@ -253,31 +281,10 @@ class RiskAnalyzer(BaseScript):
         if not html_content:
             return result
 
-        html_lower = html_content.lower()
-
-        # 检查各种风控特征
-        for category, patterns in self.risk_patterns.items():
-            if category == 'waf':
-                for waf_type, waf_patterns in patterns.items():
-                    for pattern in waf_patterns:
-                        if re.search(pattern, html_lower, re.IGNORECASE):
-                            result["risk_types"].append(f"{category}_{waf_type}")
-                            result["indicators"][f"{category}_{waf_type}"] = True
-                            break
-            elif category == 'captcha':
-                for captcha_type, captcha_patterns in patterns.items():
-                    for pattern in captcha_patterns:
-                        if re.search(pattern, html_lower, re.IGNORECASE):
-                            result["risk_types"].append(f"{category}_{captcha_type}")
-                            result["indicators"][f"{category}_{captcha_type}"] = True
-                            break
-            else:
-                # 其他类型的模式
-                for pattern in patterns:
-                    if re.search(pattern, html_lower, re.IGNORECASE):
-                        result["risk_types"].append(category)
-                        result["indicators"][category] = True
-                        break
+        # 各类风控特征：每个分组取首个命中模式
+        for label, _ in self._html_matcher.all(normalize(html_content)):
+            result["risk_types"].append(label)
+            result["indicators"][label] = True
 
         # 检查JavaScript挑战
         if 'challenge-platform' in html_content or 'challenge' in html_content:
@@ -437,11 +444,13 @@ class RiskAnalyzer(BaseScript):
         recommendations = list(set(recommendations))
         return recommendations
 
-    async def analyze_batch(self, pages_data: List[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
-        """批量分析风控类型"""
-        results = []
-        for page_data in pages_data:
-            result = await self.run(page_data, **kwargs)
-            results.append(result)
-
-        return results
\ No newline at end of file
+    async def analyze_batch(self, pages_data: List[Dict[str, Any]], concurrency: Optional[int] = None,
+                            timeout: Optional[float] = None, **kwargs) -> List[Dict[str, Any]]:
+        """批量分析风控类型（有界并发，结果顺序与输入一致，单页超时/异常不影响其他页面）"""
+        return await run_batch(
+            pages_data,
+            lambda page_data: self.run(page_data, **kwargs),
+            concurrency=concurrency,
+            timeout=timeout,
+            on_error=lambda page_data, e: {"status": "error", "error": str(e), "url": page_data.get('url', '')},
+        )
\ No newline at end of file
@@ -7,9 +7,10 @@
 import json
 import time
 import uuid
-from typing import Dict, Any, List, Optional, Callable
+from typing import Dict, Any, Iterator, List, Optional, Callable
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
+from itertools import islice
 import asyncio
 
 from celery import Celery
@@ -18,6 +19,7 @@ from redis import Redis
 import redis
 
 from backend.core.base import BaseScript
+from backend.core.executors import executor_pools
 
 
 @dataclass
@@ -426,28 +428,24 @@ class TaskQueue(BaseScript):
             self.logger.error(f"获取队列统计失败: {e}")
             return {"status": "error", "error": f"获取队列统计失败: {e}"}
 
-    async def _cleanup_completed(self, max_age: int = 3600, **kwargs) -> Dict[str, Any]:
-        """清理已完成的任务"""
+    async def _cleanup_completed(self, max_age: int = 3600, batch_size: int = 500,
+                                 **kwargs) -> Dict[str, Any]:
+        """清理已完成的任务
+
+        以 SCAN 游标分页遍历 task:* 键（不使用会阻塞 Redis 的 KEYS），每页一次 MGET 取回、
+        一次 UNLINK 删除过期任务；同步 Redis 调用逐页交给执行池线程，不阻塞事件循环
+        """
         try:
             cleaned_count = 0
+            cutoff = time.time() - max_age
+            pool = executor_pools.pool_for("task_queue")
+            task_keys = self.redis_client.scan_iter(match="task:*", count=batch_size)
 
-            # 扫描所有任务键
-            task_keys = self.redis_client.keys("task:*")
-
-            for task_key in task_keys:
-                try:
-                    task_data = self.redis_client.get(task_key)
-                    if task_data:
-                        task = Task(**json.loads(task_data))
-
-                        # 检查是否可以清理
-                        if (task.status in ['completed', 'failed', 'cancelled'] and
-                            time.time() - task.updated_at > max_age):
-                            self.redis_client.delete(task_key)
-                            cleaned_count += 1
-
-                except Exception as e:
-                    self.logger.warning(f"清理任务失败: {e}")
+            while True:
+                cleaned = await executor_pools.run(pool, self._cleanup_page, task_keys, batch_size, cutoff)
+                if cleaned is None:
+                    break
+                cleaned_count += cleaned
 
             return {
                 "status": "success",
@@ -459,6 +457,35 @@ class TaskQueue(BaseScript):
             self.logger.error(f"清理任务失败: {e}")
             return {"status": "error", "error": f"清理任务失败: {e}"}
 
+    def _cleanup_page(self, task_keys: Iterator[Any], batch_size: int, cutoff: float) -> Optional[int]:
+        """在执行池线程内取下一页键并清理，返回删除数；键已遍历完时返回 None"""
+        batch = list(islice(task_keys, batch_size))
+        if not batch:
+            return None
+        return self._cleanup_batch(batch, cutoff)
+
+    def _cleanup_batch(self, task_keys: List[Any], cutoff: float) -> int:
+        """清理一批任务键中已结束且早于 cutoff 的任务，返回删除数"""
+        expired = []
+        for task_key, task_data in zip(task_keys, self.redis_client.mget(task_keys)):
+            if not task_data:
+                continue
+            try:
+                task = Task(**json.loads(task_data))
+                # 检查是否可以清理
+                if task.status in ['completed', 'failed', 'cancelled'] and task.updated_at < cutoff:
+                    expired.append(task_key)
+            except Exception as e:
+                self.logger.warning(f"清理任务失败: {e}")
+        if not expired:
+            return 0
+        try:
+            # UNLINK 在 Redis 后台线程回收内存，不阻塞其他客户端
+            self.redis_client.unlink(*expired)
+        except redis.exceptions.ResponseError:
+            self.redis_client.delete(*expired)
+        return len(expired)
+
     def _estimate_wait_time(self, queue_name: str) -> float:
         """估算等待时间"""
         try:
@@ -26,12 +26,8 @@ async def _probe_once(
         if pages:
             kwargs["pages"] = pages
 
-        # kernel.run 是同步方法，放入线程避免阻塞事件循环
-        await asyncio.to_thread(
-            app.state.kernel.run,
-            "page_probe",
-            **kwargs,
-        )
+        # kernel.run 是同步方法，放入 probe 执行池，避免与流水线节点争抢线程
+        await app.state.kernel.run_async("page_probe", **kwargs)
     except Exception as e:
         logger.error(f"auto_probe run failed: {e}")
 
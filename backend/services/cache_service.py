@@ -1,25 +1,93 @@
 """
 缓存服务模块
-提供Redis缓存和内存缓存功能
+提供两级缓存：L1 进程内 LRU（条目上限 + TTL）与 L2 Redis（异步客户端 + 连接池）
+
+- get / set / delete / exists / clear / get_or_set 为协程；L2 未配置或不可用时只用 L1
+- get_or_set：同一 key 并发未命中时只执行一次加载（single-flight），其余协程等待同一结果；
+  加载结果为 None 时按 negative_ttl 缓存空结果；stale_ttl > 0 时，过期后 stale_ttl 秒内
+  先返回旧值并在后台刷新（stale-while-revalidate）
+- L1 条目的 TTL 不超过 CACHE_L1_TTL，限制其他 worker 删除 / 更新后的不一致窗口
+- mget / mset 批量读写：L1 未命中的键按批一次 MGET；写入按批走 pipeline（SET EX 无法用 MSET 表达）
+- delete_prefix / clear 以 SCAN 游标分页 + UNLINK 批量删除，不使用会阻塞 Redis 的 KEYS
+- get_sync / set_sync 供线程池中的同步调用方（如识别缓存）使用，L2 走同步 Redis 客户端
+- L2 值经 backend/core/codec.py 编码（默认 msgpack，超过阈值压缩），保留 bytes / tuple / datetime 等类型；
+  旧版写入的 JSON 文本仍可读取
+
+环境变量：
+  CACHE_L1_SIZE                L1 最大条目数，默认 10000
+  CACHE_L1_TTL                 L1 最长保留秒数，默认 60
+  CACHE_NEGATIVE_TTL           空结果缓存秒数，默认 30（0 关闭）
+  CACHE_REDIS_URL              L2 Redis 地址；未设置时使用 performance.yaml 的 redis 配置
+  CACHE_REDIS_MAX_CONNECTIONS  L2 连接池上限，默认 32
+  CACHE_BATCH_SIZE             SCAN 每页 COUNT 及 MGET / pipeline / UNLINK 每批键数，默认 500
 """
-import json
-import hashlib
-from typing import Any, Optional, Union
-import redis
-import yaml
+import asyncio
+import functools
+import inspect
+import os
+import re
+import time
 from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import yaml
+
+from backend.core.cache import LRUCacheEngine
+from backend.core.codec import CodecError, Serializer, get_serializer
+from backend.core.logger import logger
+
+try:
+    from backend.core.metrics import (
+        CACHE_SERVICE_LOOKUPS,
+        CACHE_SERVICE_LOADS,
+        CACHE_SERVICE_L2_ERRORS,
+    )  # type: ignore
+except Exception:
+    class _No:
+        def labels(self, *_, **__):
+            return self
+        def inc(self, *_):
+            pass
+    CACHE_SERVICE_LOOKUPS = CACHE_SERVICE_LOADS = CACHE_SERVICE_L2_ERRORS = _No()
+
+# 空结果标记（L1 中的值；L2 中编码为 {"__neg__": 1}）
+_NEGATIVE = object()
+
+# 缓存条目：(值, 新鲜截止时间, 可陈旧截止时间)；后两者为 None 表示在 TTL 内始终新鲜
+Entry = Tuple[Any, Optional[float], Optional[float]]
 
 
 class CacheService:
-    """缓存服务类"""
+    """缓存服务类（L1 内存 LRU + L2 Redis）"""
 
-    def __init__(self):
-        self.redis_client = None
-        self.memory_cache = {}
+    def __init__(self, client: Any = None, sync_client: Any = None, l1_size: Optional[int] = None,
+                 l1_ttl: Optional[float] = None, negative_ttl: Optional[float] = None,
+                 serializer: Optional[Serializer] = None):
         self.config = self._load_config()
+        self.serializer = serializer or get_serializer()
+        self.default_ttl = self.config.get('cache', {}).get('default_ttl', 3600)
+        self.l1_ttl = float(l1_ttl if l1_ttl is not None else os.getenv("CACHE_L1_TTL", "60"))
+        self.negative_ttl = float(negative_ttl if negative_ttl is not None
+                                  else os.getenv("CACHE_NEGATIVE_TTL", "30"))
+        self.memory_cache = LRUCacheEngine(
+            max_entries=l1_size or int(os.getenv("CACHE_L1_SIZE", "10000")),
+            max_bytes=64 * 1024 * 1024,
+            default_ttl=self.l1_ttl,
+            name="service",
+        )
+        self.redis_client = client
+        self._sync_client = sync_client
+        # 注入的客户端（测试 / 自定义连接）不自动派生同步客户端
+        self._derive_sync = client is None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refreshing: Set[asyncio.Task] = set()
+        self._l2_errors = 0
+        self.batch_size = max(1, int(os.getenv("CACHE_BATCH_SIZE", "500")))
+        # 服务端不支持 UNLINK（Redis < 4.0）时退回 DEL
+        self._unlink_supported = True
 
         # 初始化Redis连接
-        if self.config.get('redis', {}).get('enabled', True):
+        if client is None:
             self._init_redis()
 
     async def initialize(self):
@@ -27,8 +95,9 @@ class CacheService:
         # 确保Redis连接可用
         if self.redis_client:
             try:
-                self.redis_client.ping()
-            except Exception:
+                await self.redis_client.ping()
+            except Exception as e:
+                logger.warning(f"Redis连接失败，仅使用进程内缓存: {e}")
                 self.redis_client = None
         return True
 
@@ -52,142 +121,443 @@ class CacheService:
                 }
             }
 
-    def _init_redis(self):
-        """初始化Redis连接"""
+    def _redis_kwargs(self) -> Dict[str, Any]:
         redis_config = self.config.get('redis', {})
+        return {
+            'host': redis_config.get('host', '127.0.0.1'),
+            'port': redis_config.get('port', 6379),
+            'db': redis_config.get('db', 0),
+            'password': redis_config.get('password'),
+            'decode_responses': False,
+        }
+
+    def _init_redis(self):
+        """初始化异步Redis客户端（阻塞式连接池：连接用尽时等待归还而不是报错；首次使用时才建立连接）"""
+        url = os.getenv("CACHE_REDIS_URL")
+        if not url and not self.config.get('redis', {}).get('enabled', True):
+            return
         try:
-            self.redis_client = redis.Redis(
-                host=redis_config.get('host', '127.0.0.1'),
-                port=redis_config.get('port', 6379),
-                db=redis_config.get('db', 0),
-                password=redis_config.get('password'),
-                decode_responses=True
-            )
-            # 测试连接
-            self.redis_client.ping()
+            import redis.asyncio as aioredis  # type: ignore
+            max_connections = int(os.getenv("CACHE_REDIS_MAX_CONNECTIONS", "32"))
+            if url:
+                pool = aioredis.BlockingConnectionPool.from_url(
+                    url, max_connections=max_connections, timeout=5, decode_responses=False)
+            else:
+                pool = aioredis.BlockingConnectionPool(max_connections=max_connections, timeout=5,
+                                                       **self._redis_kwargs())
+            self.redis_client = aioredis.Redis(connection_pool=pool)
         except Exception as e:
-            print(f"Redis连接失败，使用内存缓存: {e}")
+            logger.warning(f"Redis客户端初始化失败，仅使用进程内缓存: {e}")
             self.redis_client = None
 
+    @property
+    def sync_client(self):
+        """同步Redis客户端（仅 get_sync / set_sync 使用，首次调用时创建）"""
+        if self._sync_client is None and self._derive_sync and self.redis_client is not None:
+            try:
+                import redis  # type: ignore
+                url = os.getenv("CACHE_REDIS_URL")
+                self._sync_client = (redis.Redis.from_url(url, decode_responses=False) if url
+                                     else redis.Redis(**self._redis_kwargs()))
+            except Exception as e:
+                logger.warning(f"同步Redis客户端初始化失败: {e}")
+                self._sync_client = False
+        return self._sync_client or None
+
+    @property
+    def key_prefix(self) -> str:
+        return self.config.get('redis', {}).get('key_prefix', 'ylai:')
+
     def _make_key(self, key: str) -> str:
         """生成缓存键"""
-        prefix = self.config.get('redis', {}).get('key_prefix', 'ylai:')
-        return f"{prefix}{key}"
+        return f"{self.key_prefix}{key}"
 
-    def _serialize_value(self, value: Any) -> str:
-        """序列化值"""
-        if isinstance(value, (dict, list)):
-            return json.dumps(value, ensure_ascii=False)
-        return str(value)
+    def _serialize_value(self, value: Any) -> bytes:
+        """序列化值（见 backend/core/codec.py）"""
+        return self.serializer.dumps(value)
 
-    def _deserialize_value(self, value: str) -> Any:
-        """反序列化值"""
+    def _deserialize_value(self, value: Any) -> Any:
+        """反序列化值；旧版直接写入的非 JSON 文本原样返回"""
         try:
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError):
-            return value
+            return self.serializer.loads(value)
+        except CodecError:
+            raise
+        except (ValueError, TypeError):
+            return value.decode('utf-8', 'replace') if isinstance(value, bytes) else value
 
-    def get(self, key: str) -> Optional[Any]:
-        """获取缓存值"""
-        cache_key = self._make_key(key)
+    def _decode(self, raw: Any) -> Entry:
+        """L2 原始值 -> 缓存条目（兼容旧版直接写入的字符串 / JSON；无法解码的帧视为已过期）"""
+        try:
+            value = self._deserialize_value(raw)
+        except CodecError as e:
+            self._l2_error("decode", e)
+            return None, 0.0, 0.0
+        if isinstance(value, dict):
+            if value.get("__neg__") == 1 and len(value) == 1:
+                return _NEGATIVE, None, None
+            if "__swr__" in value and "v" in value and len(value) == 2:
+                fresh_until, stale_until = value["__swr__"]
+                return value["v"], fresh_until, stale_until
+        return value, None, None
 
-        # 优先从Redis获取
+    def _l2_error(self, op: str, e: Exception):
+        self._l2_errors += 1
+        CACHE_SERVICE_L2_ERRORS.labels(op=op).inc()
+        logger.debug(f"Redis {op} 失败: {e}")
+
+    # --- 读写原语 ---
+    async def _lookup(self, key: str) -> Tuple[Optional[Entry], str]:
+        cache_key = self._make_key(key)
+        entry = self.memory_cache.get(cache_key)
+        if entry is not None:
+            return entry, "l1"
         if self.redis_client:
             try:
-                value = self.redis_client.get(cache_key)
-                if value:
-                    return self._deserialize_value(value)
-            except Exception:
-                pass
+                raw = await self.redis_client.get(cache_key)
+            except Exception as e:
+                self._l2_error("get", e)
+                raw = None
+            if raw is not None:
+                return self._fill_l1(cache_key, raw), "l2"
+        return None, "miss"
 
-        # 从内存缓存获取
-        return self.memory_cache.get(cache_key)
+    def _fill_l1(self, cache_key: str, raw: Any) -> Entry:
+        """解码 L2 原始值并回填 L1"""
+        entry = self._decode(raw)
+        ttl = self.negative_ttl if entry[0] is _NEGATIVE else self.l1_ttl
+        self.memory_cache.set(cache_key, entry, ttl=min(ttl, self.l1_ttl))
+        return entry
 
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
-        """设置缓存值"""
+    async def _put(self, key: str, entry: Entry, ttl: float, payload: Any) -> bool:
         cache_key = self._make_key(key)
-        serialized_value = self._serialize_value(value)
+        self.memory_cache.set(cache_key, entry, ttl=min(ttl, self.l1_ttl))
+        if self.redis_client:
+            try:
+                return bool(await self.redis_client.set(
+                    cache_key, self._serialize_value(payload), ex=max(1, int(ttl))))
+            except Exception as e:
+                self._l2_error("set", e)
+        return True
+
+    def _resolve(self, entry: Entry, tier: str) -> Tuple[Any, bool]:
+        """返回 (值, 是否陈旧)；陈旧窗口之外的条目视为未命中"""
+        value, fresh_until, stale_until = entry
+        stale = False
+        if fresh_until is not None:
+            now = time.time()
+            if now >= stale_until:
+                CACHE_SERVICE_LOOKUPS.labels(result="miss").inc()
+                return None, False
+            stale = now >= fresh_until
+        if value is _NEGATIVE:
+            CACHE_SERVICE_LOOKUPS.labels(result="negative").inc()
+            return None, stale
+        CACHE_SERVICE_LOOKUPS.labels(result="stale" if stale else tier).inc()
+        return value, stale
+
+    # --- 公共接口 ---
+    async def get(self, key: str) -> Optional[Any]:
+        """获取缓存值（陈旧窗口内的值照常返回；空结果返回 None）"""
+        entry, tier = await self._lookup(key)
+        if entry is None:
+            CACHE_SERVICE_LOOKUPS.labels(result="miss").inc()
+            return None
+        return self._resolve(entry, tier)[0]
 
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """设置缓存值"""
         if ttl is None:
-            ttl = self.config.get('cache', {}).get('default_ttl', 3600)
+            ttl = self.default_ttl
+        return await self._put(key, (value, None, None), ttl, value)
 
-        # 设置到Redis
+    async def delete(self, key: str) -> bool:
+        """删除缓存（其他 worker 的 L1 副本在 CACHE_L1_TTL 内过期）"""
+        cache_key = self._make_key(key)
+        self.memory_cache.delete(cache_key)
         if self.redis_client:
             try:
-                return bool(self.redis_client.setex(cache_key, ttl, serialized_value))
-            except Exception:
-                pass
-
-        # 设置到内存缓存
-        self.memory_cache[cache_key] = value
+                await self.redis_client.delete(cache_key)
+            except Exception as e:
+                self._l2_error("delete", e)
         return True
 
-    def delete(self, key: str) -> bool:
-        """删除缓存"""
-        cache_key = self._make_key(key)
-
-        # 从Redis删除
+    async def exists(self, key: str) -> bool:
+        """检查缓存是否存在（空结果缓存不计）"""
+        entry = self.memory_cache.get(self._make_key(key))
+        if entry is not None:
+            return entry[0] is not _NEGATIVE
         if self.redis_client:
             try:
-                self.redis_client.delete(cache_key)
-            except Exception:
-                pass
+                raw = await self.redis_client.get(self._make_key(key))
+                if raw is None:
+                    return False
+                value, _fresh_until, stale_until = self._decode(raw)
+                return value is not _NEGATIVE and (stale_until is None or time.time() < stale_until)
+            except Exception as e:
+                self._l2_error("exists", e)
+        return False
 
-        # 从内存缓存删除
-        if cache_key in self.memory_cache:
-            del self.memory_cache[cache_key]
+    async def mget(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """批量获取缓存值，返回 {key: 值}（未命中 / 空结果为 None）
 
-        return True
+        L1 命中的键不访问 L2，其余键每批一次 MGET 取回并回填 L1
+        """
+        keys = list(keys)
+        found: Dict[str, Any] = {}
+        missing: List[str] = []
+        for key in keys:
+            entry = self.memory_cache.get(self._make_key(key))
+            if entry is None:
+                missing.append(key)
+            else:
+                found[key] = self._resolve(entry, "l1")[0]
+        if missing and self.redis_client:
+            for i in range(0, len(missing), self.batch_size):
+                chunk = missing[i:i + self.batch_size]
+                cache_keys = [self._make_key(k) for k in chunk]
+                try:
+                    raws = await self.redis_client.mget(cache_keys)
+                except Exception as e:
+                    self._l2_error("mget", e)
+                    continue
+                for key, cache_key, raw in zip(chunk, cache_keys, raws):
+                    if raw is not None:
+                        found[key] = self._resolve(self._fill_l1(cache_key, raw), "l2")[0]
+        for key in missing:
+            if key not in found:
+                CACHE_SERVICE_LOOKUPS.labels(result="miss").inc()
+        return {key: found.get(key) for key in keys}
 
-    def exists(self, key: str) -> bool:
-        """检查缓存是否存在"""
-        cache_key = self._make_key(key)
+    async def mset(self, mapping: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        """批量设置缓存值（L2 每批一个 pipeline 往返；MSET 不支持 TTL，故逐键 SET EX）"""
+        if ttl is None:
+            ttl = self.default_ttl
+        items = list(mapping.items())
+        for key, value in items:
+            self.memory_cache.set(self._make_key(key), (value, None, None), ttl=min(ttl, self.l1_ttl))
+        if not self.redis_client:
+            return True
+        try:
+            for i in range(0, len(items), self.batch_size):
+                pipe = self.redis_client.pipeline(transaction=False)
+                for key, value in items[i:i + self.batch_size]:
+                    pipe.set(self._make_key(key), self._serialize_value(value), ex=max(1, int(ttl)))
+                await pipe.execute()
+            return True
+        except Exception as e:
+            self._l2_error("mset", e)
+            return False
 
-        # 检查Redis
-        if self.redis_client:
+    async def scan_keys(self, pattern: str, count: Optional[int] = None) -> AsyncIterator[List[str]]:
+        """以 SCAN 游标分页遍历匹配 pattern 的 L2 键（完整键名），每页产出一批
+
+        每次 SCAN 只检查 count 个槽位，不会像 KEYS 那样阻塞 Redis；遍历期间写入的键可能漏掉或重复
+        """
+        if not self.redis_client:
+            return
+        cursor = 0
+        while True:
+            cursor, keys = await self.redis_client.scan(cursor=cursor, match=pattern,
+                                                        count=count or self.batch_size)
+            if keys:
+                yield list(keys)
+            if not int(cursor):
+                break
+
+    async def _unlink(self, keys: List[str]) -> int:
+        """批量删除 L2 键：优先 UNLINK（值在 Redis 后台线程回收），不支持时退回 DEL"""
+        if self._unlink_supported:
             try:
-                return bool(self.redis_client.exists(cache_key))
-            except Exception:
-                pass
+                return await self.redis_client.unlink(*keys)
+            except Exception as e:
+                if "unknown command" not in str(e).lower():
+                    raise
+                self._unlink_supported = False
+        return await self.redis_client.delete(*keys)
 
-        # 检查内存缓存
-        return cache_key in self.memory_cache
+    async def _delete_matching(self, prefix: str) -> int:
+        pattern = re.sub(r"([*?\[\]\\])", r"\\\1", prefix) + "*"
+        deleted = 0
+        async for keys in self.scan_keys(pattern):
+            deleted += await self._unlink(keys)
+        return deleted
 
-    def clear(self) -> bool:
-        """清空所有缓存"""
+    async def delete_prefix(self, prefix: str) -> int:
+        """删除以 prefix 开头的所有缓存，返回 L2 删除数（L2 出错时中止并返回 0，计入 l2_errors）"""
+        cache_prefix = self._make_key(prefix)
+        self.memory_cache.delete_prefix(cache_prefix)
+        if not self.redis_client:
+            return 0
         try:
-            # 清空Redis
-            if self.redis_client:
-                prefix = self.config.get('redis', {}).get('key_prefix', 'ylai:')
-                keys = self.redis_client.keys(f"{prefix}*")
-                if keys:
-                    self.redis_client.delete(*keys)
-
-            # 清空内存缓存
-            self.memory_cache.clear()
+            return await self._delete_matching(cache_prefix)
+        except Exception as e:
+            self._l2_error("delete_prefix", e)
+            return 0
+
+    async def clear(self) -> bool:
+        """清空所有缓存（L2 清理失败时返回 False，L1 照常清空）"""
+        self.memory_cache.clear()
+        if not self.redis_client:
             return True
-        except Exception:
+        try:
+            await self._delete_matching(self.key_prefix)
+            return True
+        except Exception as e:
+            self._l2_error("clear", e)
             return False
 
-    def get_or_set(self, key: str, func, ttl: Optional[int] = None):
-        """获取缓存，如果不存在则设置"""
-        value = self.get(key)
-        if value is not None:
-            return value
+    async def get_or_set(self, key: str, func: Callable[[], Any], ttl: Optional[int] = None,
+                         negative_ttl: Optional[float] = None, stale_ttl: float = 0):
+        """获取缓存，不存在时调用 func（同步函数或协程函数）加载并写入
+
+        - 同一 key 的并发未命中只调用一次 func，其余调用等待同一结果（func 异常同样共享，不缓存）
+        - func 返回 None 时缓存空结果 negative_ttl 秒（默认 CACHE_NEGATIVE_TTL）
+        - stale_ttl > 0：条目过期后 stale_ttl 秒内返回旧值，并在后台刷新
+        """
+        entry, tier = await self._lookup(key)
+        if entry is not None:
+            value, fresh_until, stale_until = entry
+            if fresh_until is None or time.time() < stale_until:
+                value, stale = self._resolve(entry, tier)
+                if stale:
+                    self._refresh_in_background(key, func, ttl, negative_ttl, stale_ttl)
+                return value
+        CACHE_SERVICE_LOOKUPS.labels(result="miss").inc()
+        return await self._load(key, func, ttl, negative_ttl, stale_ttl)
+
+    # --- 加载与刷新 ---
+    async def _load(self, key: str, func: Callable[[], Any], ttl: Optional[int],
+                    negative_ttl: Optional[float], stale_ttl: float):
+        # 加载在独立任务中执行，所有调用方（含发起方）经 shield 等待：
+        # 任一调用方被取消只影响其自身，加载继续完成并写入缓存，其余等待方照常拿到结果
+        task = self._inflight.get(key)
+        if task is not None:
+            CACHE_SERVICE_LOADS.labels(outcome="coalesced").inc()
+        else:
+            task = asyncio.ensure_future(self._run_load(key, func, ttl, negative_ttl, stale_ttl))
+            self._inflight[key] = task
+            task.add_done_callback(functools.partial(self._load_done, key))
+        return await asyncio.shield(task)
+
+    def _load_done(self, key: str, task: asyncio.Future):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # 无等待方时不再告警
 
-        value = func()
-        self.set(key, value, ttl)
+    async def _run_load(self, key: str, func: Callable[[], Any], ttl: Optional[int],
+                        negative_ttl: Optional[float], stale_ttl: float):
+        try:
+            value = func()
+            if inspect.isawaitable(value):
+                value = await value
+            await self._store(key, value, ttl, negative_ttl, stale_ttl)
+        except Exception:
+            CACHE_SERVICE_LOADS.labels(outcome="error").inc()
+            raise
+        CACHE_SERVICE_LOADS.labels(outcome="loaded").inc()
         return value
 
+    async def _store(self, key: str, value: Any, ttl: Optional[int], negative_ttl: Optional[float],
+                     stale_ttl: float):
+        ttl = self.default_ttl if ttl is None else ttl
+        if value is None:
+            negative_ttl = self.negative_ttl if negative_ttl is None else negative_ttl
+            if negative_ttl > 0:
+                await self._put(key, (_NEGATIVE, None, None), negative_ttl, {"__neg__": 1})
+            return
+        if stale_ttl > 0:
+            now = time.time()
+            entry = (value, now + ttl, now + ttl + stale_ttl)
+            await self._put(key, entry, ttl + stale_ttl, {"__swr__": [entry[1], entry[2]], "v": value})
+            return
+        await self._put(key, (value, None, None), ttl, value)
+
+    def _refresh_in_background(self, key: str, func: Callable[[], Any], ttl: Optional[int],
+                               negative_ttl: Optional[float], stale_ttl: float):
+        if key in self._inflight:
+            return
+        task = asyncio.ensure_future(self._refresh(key, func, ttl, negative_ttl, stale_ttl))
+        self._refreshing.add(task)
+        task.add_done_callback(self._refreshing.discard)
+
+    async def _refresh(self, key: str, func: Callable[[], Any], ttl: Optional[int],
+                       negative_ttl: Optional[float], stale_ttl: float):
+        try:
+            await self._load(key, func, ttl, negative_ttl, stale_ttl)
+            CACHE_SERVICE_LOADS.labels(outcome="refreshed").inc()
+        except Exception as e:
+            logger.warning(f"缓存后台刷新失败 key={key}: {e}")
+
+    # --- 同步接口（线程池调用方） ---
+    def get_sync(self, key: str) -> Optional[Any]:
+        """同步获取缓存值（不参与 single-flight）"""
+        cache_key = self._make_key(key)
+        entry = self.memory_cache.get(cache_key)
+        tier = "l1"
+        if entry is None:
+            client = self.sync_client
+            if client is None:
+                CACHE_SERVICE_LOOKUPS.labels(result="miss").inc()
+                return None
+            try:
+                raw = client.get(cache_key)
+            except Exception as e:
+                self._l2_error("get", e)
+                raw = None
+            if raw is None:
+                CACHE_SERVICE_LOOKUPS.labels(result="miss").inc()
+                return None
+            entry, tier = self._decode(raw), "l2"
+            self.memory_cache.set(cache_key, entry, ttl=self.l1_ttl)
+        return self._resolve(entry, tier)[0]
+
+    def set_sync(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """同步设置缓存值"""
+        if ttl is None:
+            ttl = self.default_ttl
+        cache_key = self._make_key(key)
+        self.memory_cache.set(cache_key, (value, None, None), ttl=min(ttl, self.l1_ttl))
+        client = self.sync_client
+        if client is not None:
+            try:
+                return bool(client.set(cache_key, self._serialize_value(value), ex=max(1, int(ttl))))
+            except Exception as e:
+                self._l2_error("set", e)
+        return True
+
+    def health_check(self) -> Dict[str, Any]:
+        """健康检查（L1 始终可用；L2 状态以最近的错误计数反映）"""
+        return {
+            'available': True,
+            'l1': self.memory_cache.stats(),
+            'l2': 'redis' if self.redis_client else None,
+            'l2_errors': self._l2_errors,
+            'inflight': len(self._inflight),
+            'codec': self.serializer.name,
+        }
+
+    async def aclose(self):
+        """关闭缓存服务（含异步Redis连接池）"""
+        client, self.redis_client = self.redis_client, None
+        if client is not None:
+            try:
+                close = getattr(client, "aclose", None) or client.close
+                await close()
+            except Exception:
+                pass
+        self.close()
+
     def close(self):
-        """关闭缓存服务"""
+        """关闭同步客户端并清空进程内缓存"""
         try:
-            if self.redis_client:
-                self.redis_client.close()
+            if self._sync_client:
+                self._sync_client.close()
+            self._sync_client = None
             self.memory_cache.clear()
         except Exception:
             pass
 
 
 # 全局缓存服务实例
-cache_service = CacheService()
\ No newline at end of file
+cache_service = CacheService()
@@ -2,32 +2,76 @@
 数据库服务模块
 提供SQLite/PostgreSQL/MySQL数据库集成
 """
+import os
 import sqlite3
 import json
-from typing import Any, Dict, List, Optional, Tuple
-from datetime import datetime
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 import yaml
 from contextlib import contextmanager
 
+from backend.core.executors import executor_pools
+from backend.services.sqlite_engine import SQLitePool, WriteBehindQueue
+from backend.services.telemetry_partitions import (
+    DAY, ROLLUP_TABLES, ApiRollup, DailyPartitions, rollup_ddl, sql_timestamp,
+)
+
+# 写后队列使用的固定 SQL（sqlite3 语句缓存按 SQL 文本复用预编译语句）
+_INSERT_PIPELINE_RUN = 'INSERT INTO pipeline_runs (task_id, user_id, nodes_count, status) VALUES (?, ?, ?, ?)'
+_UPDATE_PIPELINE_STATUS = (
+    'UPDATE pipeline_runs SET status = ?, updated_at = CURRENT_TIMESTAMP '
+    'WHERE id = (SELECT MAX(id) FROM pipeline_runs WHERE task_id = ?)'
+)
+_UPSERT_PHONE_CACHE = (
+    'INSERT OR REPLACE INTO phone_cache '
+    '(phone, carrier, province, city, area_code, post_code, analysis_time, updated_at) '
+    'VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)'
+)
+
+# 按天分区的遥测表：列定义（id / timestamp 由 DailyPartitions 补充）与索引
+_USER_LOG_COLUMNS = (
+    'user_id TEXT NOT NULL', 'action TEXT NOT NULL', 'resource TEXT', 'ip_address TEXT',
+    'user_agent TEXT', 'details TEXT',
+)
+_API_STATS_COLUMNS = (
+    'endpoint TEXT NOT NULL', 'method TEXT NOT NULL', 'status_code INTEGER', 'response_time REAL',
+    'user_id TEXT', 'ip_address TEXT', 'response_size INTEGER', 'cache_hit INTEGER',
+)
+_SCRIPT_RUN_COLUMNS = (
+    'script_name TEXT NOT NULL', 'user_id TEXT', 'parameters TEXT', 'result TEXT',
+    'execution_time REAL', 'status TEXT', 'error_message TEXT',
+)
+
 
 class DatabaseService:
-    """数据库服务类"""
+    """数据库服务类
+
+    SQLite 使用持久连接池（WAL）；遥测写入（log_* / 缓存写入 / 流水线状态）经写后队列异步批量提交，
+    调用方只承担入队开销。读取走连接池，异步调用方可用 run() 在 db 执行池中执行。
+    user_logs / api_stats / script_runs 按天分区，API 调用另维护分钟 / 小时汇总表供看板查询。
+    """
 
-    def __init__(self):
+    def __init__(self, db_path: Optional[str] = None):
         self.config = self._load_config()
         self.connection = None
         self.db_type = self.config.get('database', {}).get('type', 'sqlite')
+        self.db_path = db_path
+        self._pool: Optional[SQLitePool] = None
+        self._writer: Optional[WriteBehindQueue] = None
+        self._lock = threading.Lock()
+        self.user_logs = DailyPartitions('user_logs', _USER_LOG_COLUMNS, ('timestamp', 'user_id, timestamp'))
+        self.api_stats = DailyPartitions('api_stats', _API_STATS_COLUMNS, ('timestamp', 'endpoint, timestamp'))
+        self.script_runs = DailyPartitions('script_runs', _SCRIPT_RUN_COLUMNS, ('timestamp', 'script_name, timestamp'))
+        self.api_rollup = ApiRollup()
 
     async def initialize(self):
         """初始化数据库服务"""
         try:
-            # 测试连接
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("SELECT 1")
+            await self.run(lambda conn: conn.execute("SELECT 1").fetchone())
             # 初始化表结构
-            self.init_tables()
+            await executor_pools.run(executor_pools.pool_for("database_service"), self.init_tables)
             return True
         except Exception as e:
             print(f"Database initialization failed: {e}")
@@ -55,7 +99,7 @@ class DatabaseService:
 
         if self.db_type == 'sqlite':
             sqlite_config = db_config.get('sqlite', {})
-            db_path = sqlite_config.get('path', 'data/ylai.db')
+            db_path = self.db_path or sqlite_config.get('path', 'data/ylai.db')
             # 确保目录存在
             Path(db_path).parent.mkdir(parents=True, exist_ok=True)
             return f"sqlite:///{db_path}"
@@ -70,67 +114,70 @@ class DatabaseService:
 
         return "sqlite:///data/ylai.db"
 
+    @property
+    def pool(self) -> SQLitePool:
+        """连接池（首次使用时创建）"""
+        if self._pool is None:
+            if self.db_type != 'sqlite':
+                # 对于其他数据库类型，需要安装相应的驱动
+                raise NotImplementedError(f"Database type {self.db_type} not implemented yet")
+            with self._lock:
+                if self._pool is None:
+                    self._pool = SQLitePool(self._get_connection_string().replace('sqlite:///', ''),
+                                            size=int(os.getenv("DB_POOL_SIZE", "4")))
+        return self._pool
+
+    @property
+    def writer(self) -> WriteBehindQueue:
+        """写后队列（首次写入时启动后台写线程）"""
+        if self._writer is None:
+            pool = self.pool
+            with self._lock:
+                if self._writer is None:
+                    self._writer = WriteBehindQueue(
+                        pool.connect,
+                        batch_size=int(os.getenv("DB_WRITE_BATCH", "500")),
+                        interval=float(os.getenv("DB_WRITE_INTERVAL_MS", "50")) / 1000,
+                        max_pending=int(os.getenv("DB_WRITE_QUEUE_MAX", "100000")),
+                        # 流量停止后汇总增量由写线程按汇总间隔定时落盘
+                        tick=self.api_rollup.drain,
+                        tick_interval=self.api_rollup.interval,
+                    )
+        return self._writer
+
     @contextmanager
     def get_connection(self):
-        """获取数据库连接的上下文管理器"""
-        if self.db_type == 'sqlite':
-            conn = sqlite3.connect(self._get_connection_string().replace('sqlite:///', ''))
-            conn.row_factory = sqlite3.Row
-            try:
-                yield conn
-            finally:
-                conn.close()
-        else:
-            # 对于其他数据库类型，需要安装相应的驱动
-            raise NotImplementedError(f"Database type {self.db_type} not implemented yet")
+        """获取数据库连接的上下文管理器（从连接池借用，退出时归还）"""
+        with self.pool.connection() as conn:
+            yield conn
+
+    async def run(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """在 db 执行池中以池化连接执行 fn(conn)，供异步调用方读取使用"""
+        def call():
+            with self.get_connection() as conn:
+                return fn(conn)
+        return await executor_pools.run(executor_pools.pool_for("database_service"), call)
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """合并汇总增量并等待已入队的写入全部提交"""
+        self._drain_rollups()
+        if self._writer is None:
+            return True
+        return await executor_pools.run(executor_pools.pool_for("database_service"), self._writer.flush, timeout)
 
     def init_tables(self):
         """初始化数据库表"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
 
-            # 用户操作日志表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS user_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT NOT NULL,
-                    action TEXT NOT NULL,
-                    resource TEXT,
-                    ip_address TEXT,
-                    user_agent TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    details TEXT
-                )
-            ''')
-
-            # API调用统计表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS api_stats (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    endpoint TEXT NOT NULL,
-                    method TEXT NOT NULL,
-                    status_code INTEGER,
-                    response_time REAL,
-                    user_id TEXT,
-                    ip_address TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            # 遥测表按天分区，分区在首次写入当天数据时创建；这里只加载已有分区并补建旧表索引
+            for family in (self.user_logs, self.api_stats, self.script_runs):
+                family.load(conn)
 
-            # 脚本执行记录表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS script_runs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    script_name TEXT NOT NULL,
-                    user_id TEXT,
-                    parameters TEXT,
-                    result TEXT,
-                    execution_time REAL,
-                    status TEXT,
-                    error_message TEXT,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+            # API 调用分钟 / 小时汇总表
+            for table, _ in ROLLUP_TABLES:
+                for stmt in rollup_ddl(table):
+                    cursor.execute(stmt)
 
             # 号码分析缓存表
             cursor.execute('''
@@ -147,61 +194,87 @@ class DatabaseService:
                 )
             ''')
 
-            conn.commit()
-
-    def log_user_action(self, user_id: str, action: str, resource: str = None,
-                       ip_address: str = None, user_agent: str = None, details: dict = None):
-        """记录用户操作"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
+            # 流水线运行记录表
             cursor.execute('''
-                INSERT INTO user_logs (user_id, action, resource, ip_address, user_agent, details)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                user_id, action, resource, ip_address, user_agent,
-                json.dumps(details) if details else None
-            ))
-            conn.commit()
-
-    def log_api_call(self, endpoint: str, method: str, status_code: int,
-                    response_time: float, user_id: str = None, ip_address: str = None):
-        """记录API调用"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO api_stats (endpoint, method, status_code, response_time, user_id, ip_address)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (endpoint, method, status_code, response_time, user_id, ip_address))
-            conn.commit()
+                CREATE TABLE IF NOT EXISTS pipeline_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    task_id TEXT NOT NULL,
+                    user_id TEXT,
+                    nodes_count INTEGER,
+                    status TEXT,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_pipeline_runs_task ON pipeline_runs (task_id)')
 
-    def log_script_run(self, script_name: str, user_id: str = None, parameters: dict = None,
-                      result: Any = None, execution_time: float = None, status: str = "success",
-                      error_message: str = None):
-        """记录脚本执行"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO script_runs (script_name, user_id, parameters, result, execution_time, status, error_message)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                script_name, user_id,
-                json.dumps(parameters) if parameters else None,
-                json.dumps(result) if result else None,
-                execution_time, status, error_message
-            ))
             conn.commit()
 
-    def get_phone_cache(self, phone: str) -> Optional[Dict]:
-        """获取号码分析缓存"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+    def _submit_partitioned(self, family: DailyPartitions, ts: float, params: Tuple) -> bool:
+        table = family.ensure(ts, self.writer.submit)
+        if table is None:
+            return False
+        return self.writer.submit(family.insert_sql(table), (sql_timestamp(ts),) + params)
+
+    def _drain_rollups(self):
+        for sql, params in self.api_rollup.drain():
+            self.writer.submit(sql, params)
+
+    async def log_user_action(self, user_id: str, action: str, resource: str = None,
+                              ip_address: str = None, user_agent: str = None, details: dict = None) -> bool:
+        """记录用户操作（写后队列）"""
+        return self._submit_partitioned(self.user_logs, time.time(), (
+            user_id, action, resource, ip_address, user_agent,
+            json.dumps(details) if details else None
+        ))
+
+    async def log_api_call(self, endpoint: str, method: str, status_code: int,
+                           response_time: float = None, user_id: str = None, ip_address: str = None,
+                           response_size: int = None, cache_hit: bool = None,
+                           timestamp: Optional[float] = None) -> bool:
+        """记录API调用（写后队列），同时累积分钟 / 小时汇总；timestamp 供回填历史数据"""
+        ts = time.time() if timestamp is None else timestamp
+        ok = self._submit_partitioned(self.api_stats, ts, (
+            endpoint, method, status_code, response_time, user_id, ip_address, response_size,
+            None if cache_hit is None else int(cache_hit)
+        ))
+        if self.api_rollup.add(ts, endpoint, method, status_code, response_time, cache_hit, response_size):
+            self._drain_rollups()
+        return ok
+
+    async def log_script_run(self, script_name: str, user_id: str = None, parameters: dict = None,
+                             result: Any = None, execution_time: float = None, status: str = "success",
+                             error_message: str = None) -> bool:
+        """记录脚本执行（写后队列）"""
+        return self._submit_partitioned(self.script_runs, time.time(), (
+            script_name, user_id,
+            json.dumps(parameters) if parameters else None,
+            json.dumps(result) if result else None,
+            execution_time, status, error_message
+        ))
+
+    async def log_pipeline_run(self, task_id: str, user_id: str = None, nodes_count: int = 0,
+                               status: str = "started") -> bool:
+        """记录流水线运行（写后队列）"""
+        return self.writer.submit(_INSERT_PIPELINE_RUN, (task_id, user_id, nodes_count, status))
+
+    async def update_pipeline_status(self, task_id: str, status: str) -> bool:
+        """更新该任务最近一次运行的状态（写后队列，与 log_pipeline_run 保持入队顺序）"""
+        return self.writer.submit(_UPDATE_PIPELINE_STATUS, (status, task_id))
+
+    async def cache_phone_analysis(self, phone: str, result: Dict) -> bool:
+        """存储号码分析结果（脚本返回 {"status", "data"} 时取 data）"""
+        data = result.get('data') if isinstance(result.get('data'), dict) else result
+        return self.set_phone_cache(phone, data)
+
+    async def get_phone_cache(self, phone: str) -> Optional[Dict]:
+        """获取号码分析缓存（在 db 执行池中读取，不占用事件循环）"""
+        def read(conn: sqlite3.Connection) -> Optional[Dict]:
+            row = conn.execute('''
                 SELECT carrier, province, city, area_code, post_code, analysis_time
                 FROM phone_cache
                 WHERE phone = ?
-            ''', (phone,))
-
-            row = cursor.fetchone()
+            ''', (phone,)).fetchone()
             if row:
                 return {
                     'carrier': row[0],
@@ -211,72 +284,112 @@ class DatabaseService:
                     'post_code': row[4],
                     'analysis_time': row[5]
                 }
-        return None
+            return None
+        return await self.run(read)
+
+    def set_phone_cache(self, phone: str, data: Dict) -> bool:
+        """设置号码分析缓存（写后队列）"""
+        return self.writer.submit(_UPSERT_PHONE_CACHE, (
+            phone,
+            data.get('carrier'),
+            data.get('province'),
+            data.get('city'),
+            data.get('area_code'),
+            data.get('post_code'),
+            data.get('analysis_time')
+        ))
 
-    def set_phone_cache(self, phone: str, data: Dict):
-        """设置号码分析缓存"""
+    def get_api_stats(self, limit: int = 100) -> List[Dict]:
+        """获取最近的API调用记录（按分区从新到旧读取，每个分区走时间索引）"""
+        rows: List[Dict] = []
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO phone_cache
-                (phone, carrier, province, city, area_code, post_code, analysis_time, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            ''', (
-                phone,
-                data.get('carrier'),
-                data.get('province'),
-                data.get('city'),
-                data.get('area_code'),
-                data.get('post_code'),
-                data.get('analysis_time')
-            ))
-            conn.commit()
+            for table in self.api_stats.tables(conn):
+                cursor = conn.execute(f'''
+                    SELECT endpoint, method, status_code, response_time, user_id, timestamp
+                    FROM {table}
+                    ORDER BY timestamp DESC
+                    LIMIT ?
+                ''', (limit - len(rows),))
+                rows.extend(dict(row) for row in cursor.fetchall())
+                if len(rows) >= limit:
+                    break
+        return rows
+
+    def get_api_timeseries(self, hours: float = 24, endpoint: str = None,
+                           resolution: str = "auto") -> List[Dict]:
+        """按时间桶汇总API调用（读汇总表）；resolution 为 1m / 1h，auto 时 6 小时以内用分钟粒度"""
+        if resolution == "auto":
+            resolution = "1m" if hours <= 6 else "1h"
+        table = {"1m": "api_rollup_1m", "1h": "api_rollup_1h"}[resolution]
+        where, params = "bucket >= ?", [int(time.time() - hours * 3600)]
+        if endpoint:
+            where += " AND endpoint = ?"
+            params.append(endpoint)
+        with self.get_connection() as conn:
+            cursor = conn.execute(f'''
+                SELECT bucket, SUM(requests) AS requests, SUM(client_errors) AS client_errors,
+                       SUM(server_errors) AS server_errors, SUM(total_time) / NULLIF(SUM(timed), 0) AS avg_time,
+                       MAX(max_time) AS max_time, SUM(cache_hits) AS cache_hits, SUM(bytes) AS bytes
+                FROM {table}
+                WHERE {where}
+                GROUP BY bucket
+                ORDER BY bucket
+            ''', params)
+            return [dict(row) for row in cursor.fetchall()]
 
-    def get_api_stats(self, limit: int = 100) -> List[Dict]:
-        """获取API统计数据"""
+    def get_endpoint_summary(self, hours: float = 24, limit: int = 20) -> List[Dict]:
+        """按接口汇总最近 hours 小时的调用量、错误数与耗时（读小时汇总表）"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT endpoint, method, status_code, response_time, user_id, timestamp
-                FROM api_stats
-                ORDER BY timestamp DESC
+            cursor = conn.execute('''
+                SELECT endpoint, method, SUM(requests) AS requests, SUM(client_errors) AS client_errors,
+                       SUM(server_errors) AS server_errors, SUM(total_time) / NULLIF(SUM(timed), 0) AS avg_time,
+                       MAX(max_time) AS max_time, SUM(cache_hits) AS cache_hits
+                FROM api_rollup_1h
+                WHERE bucket >= ?
+                GROUP BY endpoint, method
+                ORDER BY requests DESC
                 LIMIT ?
-            ''', (limit,))
-
+            ''', (int(time.time() - hours * 3600) // 3600 * 3600, limit))
             return [dict(row) for row in cursor.fetchall()]
 
-    def cleanup_old_data(self, days: int = 30):
-        """清理旧数据"""
+    def cleanup_old_data(self, days: int = 30, rollup_minute_days: int = 7) -> Dict[str, int]:
+        """清理旧数据：整表删除过期分区，汇总表按 bucket 主键范围删除（分钟汇总保留更短）"""
+        now = time.time()
+        cutoff = now - days * DAY
+        dropped = {}
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cutoff_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-            # 删除旧的用户日志
-            cursor.execute('''
-                DELETE FROM user_logs
-                WHERE timestamp < datetime('now', '-{} days')
-            '''.format(days))
-
-            # 删除旧的API统计
-            cursor.execute('''
-                DELETE FROM api_stats
-                WHERE timestamp < datetime('now', '-{} days')
-            '''.format(days))
-
-            # 删除旧的脚本执行记录
-            cursor.execute('''
-                DELETE FROM script_runs
-                WHERE timestamp < datetime('now', '-{} days')
-            '''.format(days))
-
+            for family in (self.user_logs, self.api_stats, self.script_runs):
+                dropped[family.base] = family.drop_before(conn, cutoff)
+            conn.execute('DELETE FROM api_rollup_1h WHERE bucket < ?', (int(cutoff),))
+            conn.execute('DELETE FROM api_rollup_1m WHERE bucket < ?',
+                         (int(now - min(days, rollup_minute_days) * DAY),))
             conn.commit()
+        return dropped
+
+    def health_check(self) -> Dict[str, Any]:
+        """健康检查"""
+        info: Dict[str, Any] = {'type': self.db_type, 'available': False}
+        try:
+            with self.get_connection() as conn:
+                conn.execute("SELECT 1").fetchone()
+            info['available'] = True
+            info['path'] = self.pool.path
+        except Exception as e:
+            info['error'] = str(e)
+        if self._writer is not None:
+            info['write_behind'] = self._writer.stats()
+        return info
 
     def close(self):
-        """关闭数据库连接"""
+        """提交剩余写入并关闭数据库连接"""
         try:
-            if self.connection:
-                self.connection.close()
-                self.connection = None
+            if self._writer is not None:
+                self._drain_rollups()
+                self._writer.close()
+                self._writer = None
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
         except Exception:
             pass
 
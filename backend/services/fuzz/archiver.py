@@ -1,7 +1,8 @@
 import os
 import json
+import uuid
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 BASE_DIR = os.path.join(os.path.dirname(__file__), '../../storage/anomalies')
 
@@ -17,3 +18,16 @@ def archive(result: Dict[str, Any], tag: str = 'default') -> str:
     with open(fname, 'w', encoding='utf-8') as f:
         json.dump(result, f, ensure_ascii=False, indent=2)
     return fname
+
+
+def archive_batch(results: List[Dict[str, Any]], tag: str = 'default') -> str:
+    """批量归档：一批异常写入一个 JSONL 文件（文件名带随机后缀，同一秒内多批不会互相覆盖）"""
+    ts = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    out_dir = os.path.abspath(os.path.join(BASE_DIR, tag))
+    ensure_dir(out_dir)
+    fname = os.path.join(out_dir, f'anomalies_{ts}_{uuid.uuid4().hex[:8]}.jsonl')
+    with open(fname, 'w', encoding='utf-8') as f:
+        for result in results:
+            f.write(json.dumps(result, ensure_ascii=False, default=str))
+            f.write('\n')
+    return fname
@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
 import argparse
+import itertools
 import json
-from .generators import generate_cases
-from .runner import run_case
-from .archiver import archive
+from .generators import FeedbackGenerator, iter_campaign, iter_covering
+from .engine import run_campaign
 from .report import to_markdown
 from .metrics_exporter import start_exporter
 import sys
@@ -16,19 +16,47 @@ def main():
     ap.add_argument('--tag', default='default', help='Archive tag')
     ap.add_argument('--metrics-port', type=int, default=9108, help='Prometheus exporter port')
     ap.add_argument('--output', default=None, help='Write markdown report to file path')
+    ap.add_argument('--concurrency', type=int, default=64, help='Concurrent in-flight requests')
+    ap.add_argument('--rate', type=float, default=None, help='Max requests per second per target')
+    ap.add_argument('--rounds', type=int, default=1, help='Repeat the case set N times (0 = until --max-cases)')
+    ap.add_argument('--max-cases', type=int, default=None, help='Stop after this many cases')
+    ap.add_argument('--strategy', default='single', choices=['single', 'covering', 'feedback'],
+                    help='single: one parameter at a time; covering: n-wise covering array; '
+                         'feedback: prioritize mutations that produce new response classes')
+    ap.add_argument('--strength', type=int, default=2, help='Interaction strength for --strategy covering')
+    ap.add_argument('--seed', type=int, default=None, help='Random seed for covering/feedback generation')
+    ap.add_argument('--report-limit', type=int, default=1000, help='Max results kept for the markdown report')
     args = ap.parse_args()
     # start metrics exporter
     start_exporter(args.metrics_port)
 
     base_params = json.loads(args.params)
-    cases = generate_cases(args.endpoint, args.method, base_params)
+    feedback = None
+    if args.strategy == 'covering':
+        cases = iter_covering(base_params, strength=args.strength, seed=args.seed)
+        if args.max_cases is not None:
+            cases = itertools.islice(cases, args.max_cases)
+    elif args.strategy == 'feedback':
+        if args.max_cases is None:
+            ap.error('--strategy feedback requires --max-cases')
+        cases = feedback = FeedbackGenerator(base_params, seed=args.seed, max_cases=args.max_cases)
+    else:
+        if args.rounds <= 0 and args.max_cases is None:
+            ap.error('--rounds 0 requires --max-cases')
+        cases = iter_campaign(args.endpoint, args.method, base_params, rounds=args.rounds, max_cases=args.max_cases)
     results = []
-    for p in cases:
-        r = run_case(args.endpoint, args.method, p)
-        rd = r.__dict__
-        results.append(rd)
-        if not r.ok:
-            archive(rd, tag=args.tag)
+
+    def keep(rd):
+        if feedback is not None:
+            feedback.observe(rd)
+        if len(results) < args.report_limit:
+            results.append(rd)
+
+    summary = run_campaign(args.endpoint, args.method, cases, concurrency=args.concurrency,
+                           rate_per_target=args.rate, tag=args.tag, on_result=keep)
+    if feedback is not None:
+        summary['feedback'] = feedback.stats()
+    print(json.dumps(summary, ensure_ascii=False), file=sys.stderr)
     md = to_markdown(results)
     if args.output:
         try:
@@ -0,0 +1,193 @@
+"""
+异步 Fuzz 引擎
+
+runner.run_case 每个用例一次 requests 调用（无会话、无连接复用），且逐个串行执行。
+FuzzEngine：
+- 从惰性用例迭代器中按需取用例（不预先生成列表），内存与用例总数无关
+- 共享一个 aiohttp 会话（keep-alive 连接池），固定数量的 worker 并发发送
+- 按目标（scheme://host:port）令牌桶限速
+- 异常结果经有界队列交给单个归档协程，按批写入 archiver.archive_batch（文件 IO 在线程池执行）
+- 记录到 runner 中已有的 FUZZ_REQUESTS / FUZZ_ERRORS / FUZZ_LATENCY 指标
+"""
+import asyncio
+import json
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from .archiver import archive_batch
+from .models import FuzzResult
+from .runner import DEFAULT_TIMEOUT, FUZZ_ERRORS, FUZZ_LATENCY, FUZZ_REQUESTS
+
+SNAPSHOT_CHARS = 4096
+
+
+class TokenBucket:
+    """令牌桶：预约式扣减，令牌不足时按欠额睡眠（单事件循环内无需加锁）"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate / 10)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+class TargetRateLimiter:
+    """按目标限速；rate 为每个目标每秒请求数，None 表示不限速"""
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    async def acquire(self, url: str):
+        if not self.rate:
+            return
+        parts = urlsplit(url)
+        target = f"{parts.scheme}://{parts.netloc}"
+        bucket = self._buckets.get(target)
+        if bucket is None:
+            bucket = self._buckets[target] = TokenBucket(self.rate, self.burst)
+        await bucket.acquire()
+
+
+def _form_value(value: Any) -> Any:
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+class FuzzEngine:
+    def __init__(self, concurrency: int = 64, rate_per_target: Optional[float] = None,
+                 timeout: float = DEFAULT_TIMEOUT, tag: str = 'default', archive_batch_size: int = 200,
+                 keepalive_timeout: float = 30):
+        self.concurrency = max(1, concurrency)
+        self.limiter = TargetRateLimiter(rate_per_target)
+        self.timeout = timeout
+        self.tag = tag
+        self.archive_batch_size = max(1, archive_batch_size)
+        self.keepalive_timeout = keepalive_timeout
+
+    async def run(self, endpoint: str, method: str, cases: Iterable[Dict[str, Any]],
+                  headers: Optional[Dict[str, str]] = None, body: Any = None,
+                  on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """执行用例并返回汇总；on_result 为每个结果的回调（例如收集报告），结果本身不在引擎内保留"""
+        method = method.upper()
+        case_iter = iter(cases)
+        summary: Dict[str, Any] = {'total': 0, 'ok': 0, 'anomalies': 0, 'errors': 0,
+                                   'status': Counter(), 'latency_ms_sum': 0.0, 'latency_ms_max': 0.0,
+                                   'archives': [], 'archive_errors': 0}
+        anomalies: asyncio.Queue = asyncio.Queue(maxsize=self.archive_batch_size * 4)
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=self.keepalive_timeout)
+        started = time.perf_counter()
+
+        async with aiohttp.ClientSession(connector=connector,
+                                         timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+            archiver = asyncio.create_task(self._archiver(anomalies, summary))
+
+            async def worker():
+                for params in case_iter:
+                    await self.limiter.acquire(endpoint)
+                    result = await self._run_one(session, endpoint, method, params, headers or {}, body)
+                    summary['total'] += 1
+                    summary['status'][result.status] += 1
+                    summary['latency_ms_sum'] += result.elapsed_ms
+                    summary['latency_ms_max'] = max(summary['latency_ms_max'], result.elapsed_ms)
+                    if result.error is not None:
+                        summary['errors'] += 1
+                    rd = result.__dict__
+                    if result.ok:
+                        summary['ok'] += 1
+                    else:
+                        summary['anomalies'] += 1
+                        await anomalies.put(rd)
+                    if on_result is not None:
+                        on_result(rd)
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+                await anomalies.put(None)
+                await archiver
+
+        elapsed = time.perf_counter() - started
+        total = summary['total']
+        summary['status'] = dict(summary['status'])
+        summary['elapsed_s'] = round(elapsed, 3)
+        summary['rps'] = round(total / elapsed, 1) if elapsed > 0 else 0.0
+        summary['latency_ms_avg'] = round(summary.pop('latency_ms_sum') / total, 2) if total else 0.0
+        summary['latency_ms_max'] = round(summary['latency_ms_max'], 2)
+        return summary
+
+    async def _run_one(self, session: aiohttp.ClientSession, endpoint: str, method: str,
+                       params: Dict[str, Any], headers: Dict[str, str], body: Any) -> FuzzResult:
+        request_snapshot = {'endpoint': endpoint, 'method': method, 'params': params, 'headers': headers}
+        query = {k: _form_value(v) for k, v in params.items()}
+        if method == 'POST':
+            kwargs = {'json': body} if isinstance(body, dict) else {'data': query}
+        else:
+            kwargs = {'params': query}
+        t0 = time.perf_counter()
+        try:
+            async with session.request(method, endpoint, headers=headers, **kwargs) as resp:
+                content = await resp.read()
+                elapsed = (time.perf_counter() - t0) * 1000
+                ct = resp.headers.get('Content-Type', '')
+                snap = {
+                    'status': resp.status,
+                    'headers': dict(resp.headers),
+                    'text': content[:SNAPSHOT_CHARS].decode(resp.charset or 'utf-8', errors='replace'),
+                    'content_type': ct,
+                    'length': len(content),
+                }
+        except Exception as e:
+            elapsed = (time.perf_counter() - t0) * 1000
+            FUZZ_ERRORS.labels(method=method).inc()
+            return FuzzResult(ok=False, status=-1, elapsed_ms=elapsed, length=0, content_type='',
+                              keywords=['exception'], error=str(e) or type(e).__name__,
+                              request_snapshot=request_snapshot, response_snapshot={})
+        FUZZ_REQUESTS.labels(method=method, status=str(snap['status'])).inc()
+        FUZZ_LATENCY.observe(elapsed)
+        return FuzzResult(ok=200 <= snap['status'] < 300, status=snap['status'], elapsed_ms=elapsed,
+                          length=snap['length'], content_type=snap['content_type'], keywords=[], error=None,
+                          request_snapshot=request_snapshot, response_snapshot=snap)
+
+    async def _archiver(self, queue: asyncio.Queue, summary: Dict[str, Any]):
+        loop = asyncio.get_running_loop()
+        batch: List[Dict[str, Any]] = []
+        while True:
+            item = await queue.get()
+            if item is not None:
+                batch.append(item)
+            if batch and (item is None or len(batch) >= self.archive_batch_size):
+                try:
+                    summary['archives'].append(await loop.run_in_executor(None, archive_batch, batch, self.tag))
+                except Exception:
+                    # 归档失败不阻塞 worker（队列有界），仅计数
+                    summary['archive_errors'] += len(batch)
+                batch = []
+            if item is None:
+                return
+
+
+def run_campaign(endpoint: str, method: str, cases: Iterable[Dict[str, Any]], **kwargs) -> Dict[str, Any]:
+    """同步入口（CLI 使用）"""
+    on_result = kwargs.pop('on_result', None)
+    headers = kwargs.pop('headers', None)
+    body = kwargs.pop('body', None)
+    engine = FuzzEngine(**kwargs)
+    return asyncio.run(engine.run(endpoint, method, cases, headers=headers, body=body, on_result=on_result))
@@ -1,7 +1,9 @@
 import itertools
+import json
 import random
 import string
-from typing import Iterable, Dict, Any, List
+from collections import Counter
+from typing import Iterable, Iterator, Dict, Any, List, Optional, Tuple
 
 SPECIALS = ['"', "'", '<', '>', '&', '\\', '/', '\n', '\r', '\t', '%', '#', '?']
 BOUNDARIES_INT = [-1, 0, 1, 2**31-1, -2**31]
@@ -36,19 +38,194 @@ def mutate_json(seed: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
         m[key] = '"'  # force wrong type
         yield m
 
-def generate_cases(endpoint: str, method: str, base_params: Dict[str, Any]) -> List[Dict[str, Any]]:
-    cases = []
+def mutate_value(v: Any) -> Iterable[Any]:
+    if isinstance(v, str):
+        return mutate_strings(v)
+    if isinstance(v, (int, float)):
+        return mutate_numbers(int(v))
+    if isinstance(v, dict):
+        return mutate_json(v)
+    return [v]
+
+def iter_cases(endpoint: str, method: str, base_params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
     for k, v in base_params.items():
-        if isinstance(v, str):
-            variants = list(mutate_strings(v))
-        elif isinstance(v, (int, float)):
-            variants = list(mutate_numbers(int(v)))
-        elif isinstance(v, dict):
-            variants = list(mutate_json(v))
-        else:
-            variants = [v]
-        for alt in variants:
+        for alt in mutate_value(v):
             case = dict(base_params)
             case[k] = alt
-            cases.append(case)
-    return cases
+            yield case
+
+def generate_cases(endpoint: str, method: str, base_params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return list(iter_cases(endpoint, method, base_params))
+
+def iter_campaign(endpoint: str, method: str, base_params: Dict[str, Any],
+                  rounds: int = 1, max_cases: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """按轮次惰性重复用例集（rounds<=0 为无限轮），可用 max_cases 截断；不缓存已产出的用例"""
+    loop = itertools.count() if rounds <= 0 else range(rounds)
+    cases = itertools.chain.from_iterable(iter_cases(endpoint, method, base_params) for _ in loop)
+    return itertools.islice(cases, max_cases) if max_cases is not None else cases
+
+
+def param_domains(base_params: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """每个参数的去重变体列表（首个为原值）"""
+    domains = {}
+    for k, v in base_params.items():
+        seen = set()
+        values = []
+        for alt in mutate_value(v):
+            key = json.dumps(alt, sort_keys=True, default=str)
+            if key not in seen:
+                seen.add(key)
+                values.append(alt)
+        domains[k] = values
+    return domains
+
+def iter_covering(base_params: Dict[str, Any], strength: int = 2, seed: Optional[int] = None,
+                  candidates: int = 4) -> Iterator[Dict[str, Any]]:
+    """n-wise 覆盖数组（AETG 式贪心）：每个用例尽量覆盖最多尚未覆盖的 strength 元参数取值组合，
+    全部组合覆盖后结束。用例数约为最大的 strength 个取值域之积，远小于全组合。
+    相同 seed 产出相同序列。"""
+    rng = random.Random(seed)
+    names = list(base_params)
+    domains = param_domains(base_params)
+    sizes = [len(domains[k]) for k in names]
+    n = len(names)
+    if n == 0:
+        yield dict(base_params)
+        return
+    t = max(1, min(strength, n))
+    combos = list(itertools.combinations(range(n), t))
+    uncovered = set()
+    for combo in combos:
+        for values in itertools.product(*(range(sizes[i]) for i in combo)):
+            uncovered.add(tuple(zip(combo, values)))
+
+    def gain(row: Dict[int, int], p: int, v: int) -> int:
+        count = 0
+        for others in itertools.combinations(sorted(row), t - 1):
+            if tuple(sorted([(q, row[q]) for q in others] + [(p, v)])) in uncovered:
+                count += 1
+        return count
+
+    def candidate() -> Tuple[List[int], int]:
+        row = dict(next(iter(uncovered)))
+        rest = [i for i in range(n) if i not in row]
+        rng.shuffle(rest)
+        for p in rest:
+            best, best_gain = [], -1
+            for v in range(sizes[p]):
+                g = gain(row, p, v)
+                if g > best_gain:
+                    best, best_gain = [v], g
+                elif g == best_gain:
+                    best.append(v)
+            row[p] = rng.choice(best)
+        values = [row[i] for i in range(n)]
+        covered = sum(tuple((i, values[i]) for i in combo) in uncovered for combo in combos)
+        return values, covered
+
+    while uncovered:
+        values, _ = max((candidate() for _ in range(max(1, candidates))), key=lambda c: c[1])
+        for combo in combos:
+            uncovered.discard(tuple((i, values[i]) for i in combo))
+        yield {k: domains[k][values[i]] for i, k in enumerate(names)}
+
+def response_class(result: Dict[str, Any]) -> Tuple[Any, ...]:
+    """响应类别：状态码、长度量级（log2 桶）、延迟量级（log2 毫秒桶）、异常类型"""
+    error = result.get('error')
+    return (
+        result.get('status'),
+        int(result.get('length') or 0).bit_length(),
+        int(result.get('elapsed_ms') or 0).bit_length(),
+        error.split(':', 1)[0][:40] if error else None,
+    )
+
+class FeedbackGenerator:
+    """反馈驱动的用例生成：从语料中选父用例，叠加 1~几个参数变异（个数按几何分布）。
+    父用例按其响应类别的稀有度加权（类别命中次数越少权重越高），产生新响应类别的变异
+    （参数, 取值）获得更高的选中权重，新类别用例加入语料，从而沿着「部分条件已改变响应」的
+    用例逐步组合出多参数交互。
+
+    用法：for case in gen 产出用例，结果（FuzzResult.__dict__）回传 gen.observe(result)；
+    可直接作为 FuzzEngine.run 的 cases 与 on_result。相同 seed 且反馈顺序相同时序列可复现。"""
+
+    MAX_PENDING = 4096
+
+    def __init__(self, base_params: Dict[str, Any], seed: Optional[int] = None,
+                 max_cases: Optional[int] = None, max_corpus: int = 256, explore: float = 0.2,
+                 stack: float = 0.3):
+        self.rng = random.Random(seed)
+        self.domains = param_domains(base_params)
+        self.arms = [(k, i) for k, values in self.domains.items() for i in range(len(values))]
+        self.max_cases = max_cases
+        self.max_corpus = max_corpus
+        self.explore = explore
+        self.stack = stack
+        self.corpus: List[List[Any]] = [[dict(base_params), None]]  # [用例, 响应类别]
+        self.class_hits: Counter = Counter()
+        self.tries: Dict[Tuple[str, int], int] = {}
+        self.wins: Dict[Tuple[str, int], int] = {}
+        self.generated = 0
+        self._untried = list(self.arms)
+        self.rng.shuffle(self._untried)
+        self._pending: Dict[int, Tuple[Dict[str, Any], List[Any], List[Tuple[str, int]]]] = {}
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        if (self.max_cases is not None and self.generated >= self.max_cases) or not self.arms:
+            raise StopIteration
+        entry = self._pick_parent()
+        case = dict(entry[0])
+        arms = []
+        while True:
+            arm = self._pick_arm()
+            case[arm[0]] = self.domains[arm[0]][arm[1]]
+            arms.append(arm)
+            if len(arms) >= len(self.domains) or self.rng.random() >= self.stack:
+                break
+        self.generated += 1
+        self._pending[id(case)] = (case, entry, arms)
+        if len(self._pending) > self.MAX_PENDING:
+            # 未回传结果的用例不无限堆积
+            self._pending.pop(next(iter(self._pending)))
+        return case
+
+    def observe(self, result: Dict[str, Any]):
+        params = (result.get('request_snapshot') or {}).get('params')
+        pending = self._pending.pop(id(params), None)
+        if pending is None or pending[0] is not params:
+            return
+        case, entry, arms = pending
+        for arm in arms:
+            self.tries[arm] = self.tries.get(arm, 0) + 1
+        cls = response_class(result)
+        new = cls not in self.class_hits
+        self.class_hits[cls] += 1
+        if entry[1] is None:
+            entry[1] = cls  # 基线用例以首个观测到的类别计
+        if not new:
+            return
+        for arm in arms:
+            self.wins[arm] = self.wins.get(arm, 0) + 1
+        self.corpus.append([case, cls])
+        if len(self.corpus) > self.max_corpus:
+            # 保留原始基线（下标 0），淘汰类别最常见的用例
+            commonest = max(range(1, len(self.corpus)), key=lambda i: self.class_hits[self.corpus[i][1]])
+            self.corpus.pop(commonest)
+
+    def stats(self) -> Dict[str, Any]:
+        return {'generated': self.generated, 'classes': len(self.class_hits), 'corpus': len(self.corpus)}
+
+    def _pick_parent(self) -> List[Any]:
+        weights = [1 / self.class_hits[cls] if cls is not None and self.class_hits[cls] else 1.0
+                   for _, cls in self.corpus]
+        return self.rng.choices(self.corpus, weights=weights)[0]
+
+    def _pick_arm(self) -> Tuple[str, int]:
+        if self._untried:
+            return self._untried.pop()
+        if self.rng.random() < self.explore:
+            return self.rng.choice(self.arms)
+        weights = [(1 + 4 * self.wins.get(a, 0)) / (1 + self.tries.get(a, 0)) for a in self.arms]
+        return self.rng.choices(self.arms, weights=weights)[0]
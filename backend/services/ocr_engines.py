@@ -0,0 +1,174 @@
+"""
+OCR 引擎池
+
+ddddocr / easyocr 模型加载一次需数百毫秒、占用数十 MB，此前每个 CaptchaSolver / AIRecognizer
+实例各自构造引擎。这里改为进程级共享池：
+
+- 每种引擎首次使用时懒加载，同一进程内所有调用方复用
+- checkout(kind) 线程安全地借出引擎、用完归还；单个引擎同一时刻只被一个线程使用，
+  每种引擎最多 OCR_POOL_SIZE 个实例（默认 1），借满时等待归还
+- warmup() 为预加载钩子；app 导入时按环境变量 OCR_WARMUP 调用 warmup_from_env()，
+  在实际执行推理的进程里加载：ocr 路由指向进程池时注册为该池工作进程的初始化函数，
+  指向线程池时在当前进程加载（pre-fork 部署下 master 加载，worker 写时复制共享）
+
+引擎种类：
+  text     ddddocr 文字识别（classification）
+  slide    ddddocr 滑块匹配（slide_match）
+  detect   ddddocr 目标检测（detection）
+  easyocr  easyocr.Reader(['en', 'ch_sim'])
+
+ddddocr 推理是 CPU 密集的同步调用，协程中应通过 executor_pools.pool_for("ocr") 提交 run_ocr，
+进程池的工作进程各自持有一份引擎池。
+"""
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from backend.core.logger import logger
+
+
+def _ddddocr(**options) -> Callable[[], Any]:
+    def factory():
+        import ddddocr
+        return ddddocr.DdddOcr(**options)
+    return factory
+
+
+def _easyocr() -> Any:
+    import easyocr
+    return easyocr.Reader(['en', 'ch_sim'])
+
+
+ENGINE_FACTORIES: Dict[str, Callable[[], Any]] = {
+    "text": _ddddocr(),
+    "slide": _ddddocr(det=False, ocr=False),
+    "detect": _ddddocr(det=True, ocr=False),
+    "easyocr": _easyocr,
+}
+
+# 引擎依赖的模块，用于不加载模型的可用性检查
+_ENGINE_MODULES = {"text": "ddddocr", "slide": "ddddocr", "detect": "ddddocr", "easyocr": "easyocr"}
+
+
+class _Slot:
+    def __init__(self, size: int):
+        self.size = size
+        self.idle: List[Any] = []
+        self.created = 0
+
+
+class OCREnginePool:
+    """进程级 OCR 引擎池"""
+
+    def __init__(self, size: Optional[int] = None, factories: Optional[Dict[str, Callable[[], Any]]] = None):
+        self.size = max(1, size or int(os.getenv("OCR_POOL_SIZE", "1")))
+        self.factories = dict(factories if factories is not None else ENGINE_FACTORIES)
+        self._cond = threading.Condition()
+        self._slots: Dict[str, _Slot] = {}
+        self._available: Dict[str, bool] = {}
+
+    def available(self, kind: str) -> bool:
+        """引擎依赖是否已安装（不加载模型）"""
+        if kind not in self._available:
+            # 仅内置工厂按依赖模块检查；自定义工厂视为可用
+            custom = self.factories.get(kind) is not ENGINE_FACTORIES.get(kind)
+            module = None if custom else _ENGINE_MODULES.get(kind)
+            if module is None:
+                self._available[kind] = kind in self.factories
+            else:
+                import importlib.util
+                self._available[kind] = importlib.util.find_spec(module) is not None
+        return self._available[kind]
+
+    def _slot(self, kind: str) -> _Slot:
+        if kind not in self.factories:
+            raise KeyError(f"未知的OCR引擎: {kind}")
+        slot = self._slots.get(kind)
+        if slot is None:
+            slot = self._slots[kind] = _Slot(self.size)
+        return slot
+
+    def acquire(self, kind: str, timeout: Optional[float] = None) -> Any:
+        """借出 kind 引擎；池中无空闲且已达上限时等待归还"""
+        with self._cond:
+            slot = self._slot(kind)
+            if not self._cond.wait_for(lambda: slot.idle or slot.created < slot.size, timeout):
+                raise TimeoutError(f"等待OCR引擎超时: {kind}")
+            if slot.idle:
+                return slot.idle.pop()
+            slot.created += 1
+        # 加载模型较慢，不持锁，其他种类的借还不受影响
+        try:
+            engine = self.factories[kind]()
+        except BaseException:
+            with self._cond:
+                slot.created -= 1
+                self._cond.notify()
+            raise
+        logger.info(f"OCR引擎加载完成: {kind}")
+        return engine
+
+    def release(self, kind: str, engine: Any):
+        with self._cond:
+            self._slot(kind).idle.append(engine)
+            self._cond.notify()
+
+    @contextmanager
+    def checkout(self, kind: str, timeout: Optional[float] = None):
+        engine = self.acquire(kind, timeout)
+        try:
+            yield engine
+        finally:
+            self.release(kind, engine)
+
+    def warmup(self, kinds: Optional[Iterable[str]] = None) -> List[str]:
+        """预加载引擎（每种一个），返回成功加载的种类；依赖未安装的种类跳过"""
+        loaded = []
+        for kind in kinds or ("text", "slide", "detect"):
+            if not self.available(kind):
+                logger.warning(f"OCR引擎依赖未安装，跳过预加载: {kind}")
+                continue
+            try:
+                self.release(kind, self.acquire(kind))
+                loaded.append(kind)
+            except Exception as e:
+                logger.error(f"OCR引擎预加载失败: {kind} | {e}")
+        return loaded
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._cond:
+            return {kind: {"size": s.size, "created": s.created, "idle": len(s.idle)}
+                    for kind, s in self._slots.items()}
+
+
+ocr_pool = OCREnginePool()
+
+
+def run_ocr(kind: str, method: str, *args):
+    """进程池 / 线程池入口：借出 kind 引擎执行 <method>(*args)"""
+    with ocr_pool.checkout(kind) as engine:
+        return getattr(engine, method)(*args)
+
+
+def warmup_from_env(pools=None) -> List[str]:
+    """按 OCR_WARMUP（逗号分隔的引擎种类，如 text,slide,detect）在推理所在进程预加载
+
+    ocr 路由为进程池时注册为工作进程初始化函数并返回 []（master 不加载，避免模型内存翻倍），
+    否则在当前进程加载并返回成功加载的种类
+    """
+    kinds = [k.strip() for k in os.getenv("OCR_WARMUP", "").split(",") if k.strip()]
+    if not kinds:
+        return []
+    if pools is None:
+        from backend.core.executors import executor_pools as pools
+    if pools.is_process("ocr"):
+        pools.add_initializer(pools.pool_for("ocr"), _warmup_worker, tuple(kinds))
+        logger.info(f"OCR引擎将在执行池 {pools.pool_for('ocr')} 的工作进程内预加载: {','.join(kinds)}")
+        return []
+    return ocr_pool.warmup(kinds)
+
+
+def _warmup_worker(kinds: tuple):
+    """进程池工作进程初始化函数"""
+    ocr_pool.warmup(kinds)
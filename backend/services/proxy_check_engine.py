@@ -0,0 +1,204 @@
+"""
+代理检测引擎
+
+ProxyChecker 原先每个代理、每次重试都新建 TCPConnector + ClientSession，检测 2 万个代理即 2 万多次
+会话创建与 DNS 解析。ProxyCheckEngine 为长生命周期的检测引擎：
+
+- 共享一个 ClientSession 与连接池（DNS 缓存、keep-alive 复用；同一代理重试复用连接）；
+  会话绑定事件循环，循环变化时自动重建，旧会话回到其所属循环上关闭；
+  所属循环由 asyncio.run 结束（阻塞脚本 / 进程池路径）时，由该循环上的守护任务关闭会话，不遗留连接
+- iter_results 流式产出检测结果（按完成顺序），调用方无需等整批结束即可入池
+- 每个代理有总超时（覆盖全部重试），超时记为失败
+- AdaptiveLimit 自适应并发：成功检测的延迟相对基线明显升高（本机/出口拥塞）时乘性收缩，
+  出现本地资源错误（文件描述符 / 缓冲区耗尽）时减半，其余情况加性增长；
+  代理本身不可用导致的失败不影响并发上限
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional
+
+import aiohttp
+
+LOCAL_OVERLOAD = "local_overload"
+
+
+class AdaptiveLimit:
+    """AIMD 自适应并发上限"""
+
+    def __init__(self, initial: int = 50, minimum: int = 4, maximum: int = 500, tolerance: float = 3.0):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(self.maximum, max(self.minimum, initial)))
+        self.tolerance = tolerance
+        self.inflight = 0
+        self.baseline: Optional[float] = None
+        self.latency: Optional[float] = None
+        self._waiters: deque = deque()
+
+    async def acquire(self):
+        while self.inflight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.inflight += 1
+
+    def release(self, ok: bool, latency: Optional[float] = None, overloaded: bool = False):
+        """同步释放（可在 finally / 取消路径中调用），并唤醒可用名额数量的等待者"""
+        self.inflight -= 1
+        self._adjust(ok, latency, overloaded)
+        free = int(self.limit) - self.inflight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def _adjust(self, ok: bool, latency: Optional[float], overloaded: bool):
+        if overloaded:
+            self.limit = max(self.minimum, self.limit / 2)
+            return
+        if not ok or not latency or latency <= 0:
+            return
+        # 基线取最小延迟并缓慢上浮，避免一次偶然的极小值永久压低基线
+        self.baseline = latency if self.baseline is None else min(latency, self.baseline * 1.01)
+        self.latency = latency if self.latency is None else 0.9 * self.latency + 0.1 * latency
+        if self.latency > self.baseline * self.tolerance:
+            self.limit = max(self.minimum, self.limit * 0.9)
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+
+class ProxyCheckEngine:
+    """共享会话 + 自适应并发的代理检测引擎"""
+
+    def __init__(self, max_concurrency: int = 200, min_concurrency: int = 8, initial_concurrency: int = 50,
+                 keepalive_timeout: float = 15, dns_ttl: int = 300):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.initial_concurrency = initial_concurrency
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_ttl = dns_ttl
+        self.sessions_created = 0
+        self.limiter: Optional[AdaptiveLimit] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._guard: Optional[asyncio.Task] = None
+
+    async def session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            stale = self._release()
+            if stale is not None:
+                await stale.close()
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency,
+                ttl_dns_cache=self.dns_ttl,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._loop = loop
+            self._guard = loop.create_task(self._close_on_shutdown(self._session))
+            self.limiter = None
+            self.sessions_created += 1
+        return self._session
+
+    @staticmethod
+    async def _close_on_shutdown(session: aiohttp.ClientSession):
+        """守护任务：在会话所属循环上等待取消后关闭会话（asyncio.run 结束前会取消残留任务）"""
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            if not session.closed:
+                await session.close()
+
+    def _release(self) -> Optional[aiohttp.ClientSession]:
+        """放弃当前会话：其他循环上的会话交由所属循环关闭（连接只能在原循环上关闭），
+        当前循环上的会话返回给调用方 await 关闭"""
+        session, guard, loop = self._session, self._guard, self._loop
+        self._session = self._guard = None
+        if session is None or session.closed or loop is None or loop.is_closed():
+            return None
+        if loop is asyncio.get_running_loop():
+            guard.cancel()
+            return session
+        loop.call_soon_threadsafe(guard.cancel)
+        asyncio.run_coroutine_threadsafe(session.close(), loop)
+        return None
+
+    def _limiter(self, max_concurrency: Optional[int]) -> AdaptiveLimit:
+        maximum = min(self.max_concurrency, max_concurrency or self.max_concurrency)
+        if self.limiter is None or self.limiter.maximum != maximum:
+            self.limiter = AdaptiveLimit(
+                initial=min(self.initial_concurrency, maximum),
+                minimum=min(self.min_concurrency, maximum),
+                maximum=maximum,
+            )
+        return self.limiter
+
+    async def iter_results(self, proxies: Iterable[Dict[str, Any]],
+                           check: Callable[[aiohttp.ClientSession, Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                           on_error: Callable[[Dict[str, Any], str], Dict[str, Any]],
+                           timeout: Optional[float] = None,
+                           max_concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """按完成顺序流式产出 check(session, proxy) 的结果；timeout 为单个代理的总超时"""
+        proxies = list(proxies)
+        session = await self.session()
+        limiter = self._limiter(max_concurrency)
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks = set()
+
+        async def one(proxy: Dict[str, Any]):
+            started = time.monotonic()
+            try:
+                if timeout:
+                    result = await asyncio.wait_for(check(session, proxy), timeout)
+                else:
+                    result = await check(session, proxy)
+            except asyncio.TimeoutError:
+                result = on_error(proxy, "timeout")
+            except Exception as e:
+                result = on_error(proxy, f"unknown_error: {e}")
+            working = bool(result.get('working'))
+            latency = result.get('response_time') if working else time.monotonic() - started
+            limiter.release(working, latency, result.get('error') == LOCAL_OVERLOAD)
+            queue.put_nowait(result)
+
+        def done(task: asyncio.Task):
+            tasks.discard(task)
+            if task.cancelled():
+                # 调用方提前结束迭代：被取消的检测只归还名额
+                limiter.release(False)
+
+        async def feed():
+            for proxy in proxies:
+                await limiter.acquire()
+                task = asyncio.create_task(one(proxy))
+                tasks.add(task)
+                task.add_done_callback(done)
+
+        feeder = asyncio.create_task(feed())
+        try:
+            for _ in range(len(proxies)):
+                yield await queue.get()
+        finally:
+            feeder.cancel()
+            for task in list(tasks):
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        limiter = self.limiter
+        return {
+            "sessions_created": self.sessions_created,
+            "concurrency_limit": int(limiter.limit) if limiter else None,
+            "inflight": limiter.inflight if limiter else 0,
+        }
+
+    async def close(self):
+        session = self._release()
+        if session is not None:
+            await session.close()
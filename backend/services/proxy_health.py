@@ -0,0 +1,165 @@
+"""
+代理健康评分
+
+ProxyManager 原先的评分只看连续失败次数与最近一次响应时间：偶发一次快响应即可掩盖长期偏慢，
+「能连通但很慢」的代理不会被降级；全局响应时间用列表 + pop(0) 维护最近 100 条记录。
+本模块为每个代理维护常数大小的滚动统计：
+
+- ProxyHealth：按时间衰减（半衰期）的成功率与 LatencySketch，内存与观测次数无关
+- LatencySketch：对数分桶的衰减直方图，估算 p50 / p95 与均值（相对误差约半个桶宽）
+- ProxyHealthScorer：由成功率、延迟分位数、连续失败、使用次数与年龄计算评分；
+  p50 / p95 明显高于目标延迟的代理会被扣分直至低于 min_score，从而不再被选中
+
+样本少时成功率向 0.5 收缩、延迟扣分按置信度缩放，避免少量观测造成评分剧烈波动。
+"""
+import math
+import os
+import time
+from array import array
+from typing import Any, Dict, Optional
+
+# 对数分桶：首桶上界 10ms，每桶 ×1.5，最后一桶为 >~170s 的溢出桶
+_FIRST_BOUND = 0.01
+_GROWTH = 1.5
+_BUCKETS = 25
+_LOG_GROWTH = math.log(_GROWTH)
+
+
+def _bucket_of(latency: float) -> int:
+    if latency <= _FIRST_BOUND:
+        return 0
+    return min(_BUCKETS - 1, 1 + int(math.log(latency / _FIRST_BOUND) / _LOG_GROWTH))
+
+
+def _bucket_bounds(i: int):
+    if i == 0:
+        return 0.0, _FIRST_BOUND
+    return _FIRST_BOUND * _GROWTH ** (i - 1), _FIRST_BOUND * _GROWTH ** i
+
+
+class LatencySketch:
+    """衰减对数直方图：固定 25 个桶，decay(factor) 将全部历史权重按比例缩小"""
+
+    __slots__ = ("counts", "weight", "total")
+
+    def __init__(self):
+        self.counts = array('d', bytes(8 * _BUCKETS))
+        self.weight = 0.0
+        self.total = 0.0
+
+    def decay(self, factor: float):
+        if factor >= 1 or self.weight == 0:
+            return
+        counts = self.counts
+        for i in range(_BUCKETS):
+            counts[i] *= factor
+        self.weight *= factor
+        self.total *= factor
+
+    def add(self, latency: float, weight: float = 1.0):
+        self.counts[_bucket_of(latency)] += weight
+        self.weight += weight
+        self.total += latency * weight
+
+    def quantile(self, q: float) -> Optional[float]:
+        """分位数估计：定位所在桶后在桶内按对数插值"""
+        if self.weight <= 0:
+            return None
+        target = q * self.weight
+        seen = 0.0
+        for i, count in enumerate(self.counts):
+            if count <= 0:
+                continue
+            if seen + count >= target:
+                low, high = _bucket_bounds(i)
+                frac = (target - seen) / count
+                if i == 0:
+                    return high * frac
+                return low * (high / low) ** frac
+            seen += count
+        return _bucket_bounds(_BUCKETS - 1)[1]
+
+    def mean(self) -> Optional[float]:
+        return self.total / self.weight if self.weight > 0 else None
+
+
+class ProxyHealth:
+    """单个代理的时间衰减统计"""
+
+    __slots__ = ("successes", "weight", "latency", "updated_at")
+
+    def __init__(self):
+        self.successes = 0.0
+        self.weight = 0.0
+        self.latency = LatencySketch()
+        self.updated_at = 0.0
+
+    def decay_to(self, now: float, half_life: float):
+        if self.updated_at and now > self.updated_at and half_life > 0:
+            factor = 0.5 ** ((now - self.updated_at) / half_life)
+            self.successes *= factor
+            self.weight *= factor
+            self.latency.decay(factor)
+        self.updated_at = max(self.updated_at, now)
+
+    def observe(self, success: bool, latency: Optional[float], now: float, half_life: float):
+        self.decay_to(now, half_life)
+        self.weight += 1
+        if success:
+            self.successes += 1
+            if latency and latency > 0:
+                self.latency.add(latency)
+
+    def success_rate(self, prior: float = 0.5, prior_weight: float = 2.0) -> float:
+        """收缩到先验的成功率：无观测时为 prior"""
+        return (self.successes + prior * prior_weight) / (self.weight + prior_weight)
+
+    def p50(self) -> Optional[float]:
+        return self.latency.quantile(0.5)
+
+    def p95(self) -> Optional[float]:
+        return self.latency.quantile(0.95)
+
+
+class ProxyHealthScorer:
+    """代理评分引擎"""
+
+    def __init__(self, half_life: Optional[float] = None, latency_target: Optional[float] = None,
+                 max_latency_penalty: float = 60):
+        self.half_life = half_life if half_life is not None else float(os.getenv("PROXY_HEALTH_HALF_LIFE", "600"))
+        self.latency_target = (latency_target if latency_target is not None
+                               else float(os.getenv("PROXY_LATENCY_TARGET", "1.0")))
+        self.max_latency_penalty = max_latency_penalty
+
+    def observe(self, health: ProxyHealth, success: bool, latency: Optional[float] = None,
+                now: Optional[float] = None):
+        health.observe(success, latency, time.time() if now is None else now, self.half_life)
+
+    def breakdown(self, record: Any, now: Optional[float] = None) -> Dict[str, float]:
+        """评分各组成部分；record 需有 proxy / health / consecutive_failures / use_count / created_at"""
+        now = time.time() if now is None else now
+        health: ProxyHealth = record.health
+        confidence = health.weight / (health.weight + 2)
+
+        latency_penalty = 0.0
+        p50, p95 = health.p50(), health.p95()
+        if p50 is not None and self.latency_target > 0:
+            # p50 相对目标每翻一倍扣 15 分，p95 相对两倍目标每翻一倍扣 10 分
+            latency_penalty = (15 * max(0.0, math.log2(p50 / self.latency_target))
+                               + 10 * max(0.0, math.log2(p95 / (2 * self.latency_target))))
+            latency_penalty = min(self.max_latency_penalty, latency_penalty) * confidence
+
+        return {
+            "base_score": record.proxy.get('score', 50),
+            "success_bonus": (health.success_rate() - 0.5) * 20,  # 50% 为基准
+            "failure_penalty": record.consecutive_failures * 10,
+            "latency_penalty": latency_penalty,
+            "usage_bonus": min(record.use_count * 0.1, 10),
+            "age_penalty": (now - record.created_at) / 3600 * 0.5,
+        }
+
+    def score(self, record: Any, now: Optional[float] = None) -> float:
+        parts = self.breakdown(record, now)
+        value = (parts["base_score"] + parts["success_bonus"] - parts["failure_penalty"]
+                 - parts["latency_penalty"] + parts["usage_bonus"] - parts["age_penalty"])
+        return max(0, min(100, round(value, 2)))
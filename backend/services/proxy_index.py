@@ -0,0 +1,233 @@
+"""
+代理池选择索引
+
+ProxyManager 原先每次取代理都全量扫描代理池过滤可用代理，再对结果做一次 max/min，
+5 万代理、每秒数千次选择时成为爬取瓶颈。ProxyIndex 在代理状态变化时增量维护索引，
+选择成本与池大小基本无关：
+
+- 每个国家一个桶，另有一个全部可用代理的桶（无地理过滤时使用）
+- score_based / least_used / fastest：懒删除堆，O(log n) 更新，摊还 O(log n) 取堆顶
+- random：数组 + 位置表，O(1) 增删与随机取
+- round_robin：按加入顺序的有序序号表，二分查找下一个
+
+与原实现一致：同分时取先加入的代理；可用性（状态、评分阈值、年龄）由调用方判定后通过
+update(key, record, eligible) 告知索引，年龄等随时间变化的条件在选中时经 is_valid 复核。
+"""
+import heapq
+import random
+from bisect import bisect_right, insort
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+ALL = None
+
+# 策略 -> 堆名
+_HEAP_STRATEGIES = {"score_based": "score", "least_used": "used", "fastest": "fastest"}
+
+
+def _sort_keys(record: Any) -> Dict[str, float]:
+    response_time = record.proxy.get('response_time')
+    return {
+        "score": -record.score,
+        "used": record.use_count,
+        "fastest": float('inf') if response_time is None else response_time,
+    }
+
+
+class _Heap:
+    """懒删除最小堆：current 记录每个键的有效 (值, 序号)，堆中不一致的条目在出堆顶时丢弃"""
+
+    __slots__ = ("heap", "current")
+
+    def __init__(self):
+        self.heap: List[Tuple[float, int, str]] = []
+        self.current: Dict[str, Tuple[float, int]] = {}
+
+    def push(self, key: str, value: float, seq: int):
+        entry = (value, seq)
+        if self.current.get(key) == entry:
+            return
+        self.current[key] = entry
+        heapq.heappush(self.heap, (value, seq, key))
+        self._maybe_compact()
+
+    def discard(self, key: str):
+        if self.current.pop(key, None) is not None:
+            self._maybe_compact()
+
+    def peek(self) -> Optional[Tuple[float, int, str]]:
+        heap = self.heap
+        while heap:
+            value, seq, key = heap[0]
+            if self.current.get(key) == (value, seq):
+                return heap[0]
+            heapq.heappop(heap)
+        return None
+
+    def _maybe_compact(self):
+        # 过期条目过多时重建，保证堆大小与有效条目同量级
+        if len(self.heap) > 2 * len(self.current) + 64:
+            self.heap = [(value, seq, key) for key, (value, seq) in self.current.items()]
+            heapq.heapify(self.heap)
+
+
+class _Bucket:
+    __slots__ = ("heaps", "members", "positions", "seqs")
+
+    def __init__(self):
+        self.heaps = {name: _Heap() for name in _HEAP_STRATEGIES.values()}
+        self.members: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.seqs: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def upsert(self, key: str, seq: int, sort_keys: Dict[str, float]):
+        for name, value in sort_keys.items():
+            self.heaps[name].push(key, value, seq)
+        if key not in self.positions:
+            self.positions[key] = len(self.members)
+            self.members.append(key)
+            if not self.seqs or seq > self.seqs[-1]:
+                self.seqs.append(seq)
+            else:
+                insort(self.seqs, seq)
+
+    def remove(self, key: str, seq: int):
+        pos = self.positions.pop(key, None)
+        if pos is None:
+            return
+        last = self.members.pop()
+        if last != key:
+            self.members[pos] = last
+            self.positions[last] = pos
+        for heap in self.heaps.values():
+            heap.discard(key)
+        i = bisect_right(self.seqs, seq) - 1
+        if i >= 0 and self.seqs[i] == seq:
+            del self.seqs[i]
+
+
+class ProxyIndex:
+    """按策略与国家维护的可用代理索引"""
+
+    def __init__(self):
+        self._buckets: Dict[Optional[str], _Bucket] = {ALL: _Bucket()}
+        self._seq: Dict[str, int] = {}
+        self._keys_by_seq: Dict[int, str] = {}
+        self._next_seq = 0
+        self._records: Dict[str, Any] = {}
+        self._country: Dict[str, str] = {}
+        self._status: Dict[str, Any] = {}
+        self.status_counts: Counter = Counter()
+        self._rr_cursor = -1
+
+    def __len__(self) -> int:
+        return len(self._buckets[ALL])
+
+    def clear(self):
+        self.__init__()
+
+    def update(self, key: str, record: Any, eligible: bool):
+        """记录新增或变化后调用；eligible 为调用方判定的当前可用性"""
+        status = record.status
+        old_status = self._status.get(key)
+        if old_status != status:
+            if old_status is not None:
+                self.status_counts[old_status] -= 1
+            self.status_counts[status] += 1
+            self._status[key] = status
+        if key not in self._seq:
+            self._seq[key] = self._next_seq
+            self._keys_by_seq[self._next_seq] = key
+            self._next_seq += 1
+        self._records[key] = record
+
+        country = str(record.proxy.get('country') or '').lower()
+        old_country = self._country.get(key)
+        if not eligible:
+            self._unindex(key)
+            return
+        if old_country is not None and old_country != country:
+            self._buckets[old_country].remove(key, self._seq[key])
+        self._country[key] = country
+        seq = self._seq[key]
+        sort_keys = _sort_keys(record)
+        self._buckets[ALL].upsert(key, seq, sort_keys)
+        bucket = self._buckets.get(country)
+        if bucket is None:
+            bucket = self._buckets[country] = _Bucket()
+        bucket.upsert(key, seq, sort_keys)
+
+    def remove(self, key: str):
+        """代理移出代理池"""
+        if key not in self._seq:
+            return
+        self._unindex(key)
+        self.status_counts[self._status.pop(key)] -= 1
+        self._records.pop(key, None)
+        self._keys_by_seq.pop(self._seq.pop(key), None)
+
+    def select(self, strategy: str, countries: Optional[Iterable[str]] = None,
+               is_valid: Optional[Callable[[Any], bool]] = None) -> Optional[str]:
+        """按策略选出代理键；countries 为小写国家过滤（None 表示不过滤）；
+        is_valid 复核随时间变化的条件，不通过的代理移出索引后继续选择"""
+        if countries is None:
+            buckets = [self._buckets[ALL]]
+        else:
+            buckets = [b for b in (self._buckets.get(c) for c in dict.fromkeys(countries)) if b]
+        while True:
+            key = self._pick(strategy, buckets)
+            if key is None:
+                return None
+            record = self._records[key]
+            if is_valid is None or is_valid(record):
+                return key
+            self._unindex(key)
+
+    # --- 内部方法 ---
+    def _unindex(self, key: str):
+        country = self._country.pop(key, None)
+        if country is None:
+            return
+        seq = self._seq[key]
+        self._buckets[ALL].remove(key, seq)
+        self._buckets[country].remove(key, seq)
+
+    def _pick(self, strategy: str, buckets: List[_Bucket]) -> Optional[str]:
+        heap_name = _HEAP_STRATEGIES.get(strategy)
+        if heap_name is not None:
+            tops = [top for top in (b.heaps[heap_name].peek() for b in buckets) if top]
+            return min(tops)[2] if tops else None
+        if strategy == "round_robin":
+            return self._pick_round_robin(buckets)
+        return self._pick_random(buckets)
+
+    def _pick_random(self, buckets: List[_Bucket]) -> Optional[str]:
+        total = sum(len(b) for b in buckets)
+        if not total:
+            return None
+        i = random.randrange(total)
+        for bucket in buckets:
+            if i < len(bucket):
+                return bucket.members[i]
+            i -= len(bucket)
+        return None
+
+    def _pick_round_robin(self, buckets: List[_Bucket]) -> Optional[str]:
+        best = None
+        first = None
+        for bucket in buckets:
+            if not bucket.seqs:
+                continue
+            i = bisect_right(bucket.seqs, self._rr_cursor)
+            if i < len(bucket.seqs) and (best is None or bucket.seqs[i] < best):
+                best = bucket.seqs[i]
+            if first is None or bucket.seqs[0] < first:
+                first = bucket.seqs[0]
+        seq = best if best is not None else first
+        if seq is None:
+            return None
+        self._rr_cursor = seq
+        return self._keys_by_seq[seq]
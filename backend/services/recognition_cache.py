@@ -0,0 +1,230 @@
+"""
+识别结果缓存
+
+站点大量复用验证码图片，同一张图重复推理是纯浪费。RecognitionCache 以图片哈希为键缓存识别结果：
+
+- 精确匹配：图片字节（及附加字节，如滑块目标图）的 MD5
+- 近似匹配（可选）：64 位 dHash 感知哈希，汉明距离不超过 phash_distance 视为同一张图；
+  按 4 段 16 位分桶索引（距离 <=3 时至少一段完全相同），查找无需遍历
+- L1 为进程内 LRUCacheEngine（TTL + 条目数预算），L2 为 cache_service（Redis 可用时跨 worker 共享）
+- 命中/未命中计入 monitoring_service.record_cache_hit / record_cache_miss
+- get / set 为协程接口，L2 经 cache_service 的异步 Redis 客户端读写，供事件循环上的调用方使用；
+  get_sync / set_sync 使用同步客户端，仅供执行池线程内的调用方使用
+
+环境变量：
+  RECOGNITION_CACHE_SIZE            L1 最大条目数，默认 4096
+  RECOGNITION_CACHE_TTL             过期秒数，默认 3600
+  RECOGNITION_CACHE_PHASH_DISTANCE  感知哈希最大汉明距离，0 关闭（默认）；需安装 Pillow
+"""
+import hashlib
+import os
+import threading
+from io import BytesIO
+from typing import Any, Dict, Optional, Set, Tuple
+
+from backend.core.cache import LRUCacheEngine
+from backend.core.logger import logger
+
+_BANDS = 4
+_BAND_BITS = 64 // _BANDS
+
+
+def dhash(image_bytes: bytes) -> Optional[int]:
+    """64 位差值哈希；无法解码或未安装 Pillow 时返回 None"""
+    try:
+        from PIL import Image
+        image = Image.open(BytesIO(image_bytes)).convert("L").resize((9, 8))
+    except Exception:
+        return None
+    pixels = list(image.getdata())
+    bits = 0
+    for row in range(8):
+        for col in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return bits
+
+
+def _bands(value: int):
+    mask = (1 << _BAND_BITS) - 1
+    return [(i, (value >> (i * _BAND_BITS)) & mask) for i in range(_BANDS)]
+
+
+class RecognitionCache:
+    """按图片哈希缓存识别结果（L1 内存 LRU + L2 cache_service）"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None,
+                 phash_distance: Optional[int] = None, backend: Any = "default", monitor: Any = "default"):
+        self.ttl = float(ttl if ttl is not None else os.getenv("RECOGNITION_CACHE_TTL", "3600"))
+        self.phash_distance = int(phash_distance if phash_distance is not None
+                                  else os.getenv("RECOGNITION_CACHE_PHASH_DISTANCE", "0"))
+        self._l1 = LRUCacheEngine(
+            max_entries=max_entries or int(os.getenv("RECOGNITION_CACHE_SIZE", "4096")),
+            max_bytes=64 * 1024 * 1024,
+            default_ttl=self.ttl,
+            name="recognition",
+        )
+        self._backend = backend
+        self._monitor = monitor
+        # 感知哈希索引：(namespace, 段号, 段值) -> {phash}；phash -> 精确键
+        self._lock = threading.Lock()
+        self._bands: Dict[Tuple[str, int, int], Set[int]] = {}
+        self._phash_keys: Dict[Tuple[str, int], str] = {}
+
+    @property
+    def backend(self):
+        if self._backend == "default":
+            from backend.services.cache_service import cache_service
+            self._backend = cache_service
+        # cache_service 无 Redis 时只有进程内 L1，与本地 L1 重复，不作为 L2
+        return self._backend if getattr(self._backend, "redis_client", True) else None
+
+    @property
+    def monitor(self):
+        if self._monitor == "default":
+            try:
+                from backend.services.monitoring_service import monitoring_service
+                self._monitor = monitoring_service
+            except Exception as e:
+                logger.warning(f"识别缓存未接入监控服务: {e}")
+                self._monitor = None
+        return self._monitor
+
+    @staticmethod
+    def key(namespace: str, image: bytes, *extra: bytes) -> str:
+        digest = hashlib.md5(image)
+        for part in extra:
+            digest.update(b"\0")
+            digest.update(part)
+        return f"recognition:{namespace}:{digest.hexdigest()}"
+
+    async def get(self, namespace: str, image: bytes, *extra: bytes) -> Optional[Any]:
+        """查找缓存结果；extra 为参与精确哈希的附加字节（有 extra 时不做近似匹配）"""
+        key = self.key(namespace, image, *extra)
+        value = await self._lookup(key)
+        if value is None and self.phash_distance > 0 and not extra:
+            near = self._near_key(namespace, image)
+            if near is not None:
+                value = await self._lookup(near)
+        self._record(value is not None)
+        return value
+
+    async def set(self, namespace: str, image: bytes, result: Any, *extra: bytes) -> None:
+        key = self._set_local(namespace, image, result, extra)
+        backend = self.backend
+        if backend is not None:
+            try:
+                await backend.set(key, {"result": result}, ttl=int(self.ttl))
+            except Exception as e:
+                logger.warning(f"识别缓存写入 L2 失败: {e}")
+
+    def get_sync(self, namespace: str, image: bytes, *extra: bytes) -> Optional[Any]:
+        """同 get，L2 走同步客户端（执行池线程内调用）"""
+        key = self.key(namespace, image, *extra)
+        value = self._lookup_sync(key)
+        if value is None and self.phash_distance > 0 and not extra:
+            near = self._near_key(namespace, image)
+            if near is not None:
+                value = self._lookup_sync(near)
+        self._record(value is not None)
+        return value
+
+    def set_sync(self, namespace: str, image: bytes, result: Any, *extra: bytes) -> None:
+        """同 set，L2 走同步客户端（执行池线程内调用）"""
+        key = self._set_local(namespace, image, result, extra)
+        backend = self.backend
+        if backend is not None:
+            try:
+                backend.set_sync(key, {"result": result}, ttl=int(self.ttl))
+            except Exception as e:
+                logger.warning(f"识别缓存写入 L2 失败: {e}")
+
+    def clear(self) -> None:
+        self._l1.clear()
+        with self._lock:
+            self._bands.clear()
+            self._phash_keys.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._l1.stats()
+
+    # --- 内部方法 ---
+    def _set_local(self, namespace: str, image: bytes, result: Any, extra: tuple) -> str:
+        """写入 L1 与感知哈希索引，返回精确键"""
+        key = self.key(namespace, image, *extra)
+        self._l1.set(key, result)
+        if self.phash_distance > 0 and not extra:
+            phash = dhash(image)
+            if phash is not None:
+                self._index(namespace, phash, key)
+        return key
+
+    def _fill(self, key: str, stored: Any) -> Optional[Any]:
+        """L2 命中时回填 L1"""
+        if isinstance(stored, dict) and "result" in stored:
+            self._l1.set(key, stored["result"])
+            return stored["result"]
+        return None
+
+    async def _lookup(self, key: str) -> Optional[Any]:
+        value = self._l1.get(key)
+        if value is not None:
+            return value
+        backend = self.backend
+        if backend is None:
+            return None
+        try:
+            stored = await backend.get(key)
+        except Exception:
+            return None
+        return self._fill(key, stored)
+
+    def _lookup_sync(self, key: str) -> Optional[Any]:
+        value = self._l1.get(key)
+        if value is not None:
+            return value
+        backend = self.backend
+        if backend is None:
+            return None
+        try:
+            stored = backend.get_sync(key)
+        except Exception:
+            return None
+        return self._fill(key, stored)
+
+    def _near_key(self, namespace: str, image: bytes) -> Optional[str]:
+        phash = dhash(image)
+        if phash is None:
+            return None
+        best = None
+        with self._lock:
+            for band, value in _bands(phash):
+                for candidate in self._bands.get((namespace, band, value), ()):
+                    distance = bin(candidate ^ phash).count("1")
+                    if distance <= self.phash_distance and (best is None or distance < best[0]):
+                        best = (distance, self._phash_keys[(namespace, candidate)])
+        return best[1] if best else None
+
+    def _index(self, namespace: str, phash: int, key: str) -> None:
+        with self._lock:
+            # 索引条目数与 L1 同量级；超出时整体重建，过期键查找 L1 未命中即忽略
+            if len(self._phash_keys) >= 2 * max(1, self._l1.max_entries):
+                self._bands.clear()
+                self._phash_keys.clear()
+            self._phash_keys[(namespace, phash)] = key
+            for band, value in _bands(phash):
+                self._bands.setdefault((namespace, band, value), set()).add(phash)
+
+    def _record(self, hit: bool) -> None:
+        monitor = self.monitor
+        if monitor is None:
+            return
+        try:
+            if hit:
+                monitor.record_cache_hit()
+            else:
+                monitor.record_cache_miss()
+        except Exception:
+            pass
+
+
+recognition_cache = RecognitionCache()
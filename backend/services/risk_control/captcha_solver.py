@@ -8,39 +8,36 @@ import time
 from io import BytesIO
 from typing import Optional, Dict, Any, Tuple
 from pathlib import Path
-import requests
+
+import aiohttp
+
+from backend.core.executors import executor_pools
+from backend.services.ocr_engines import ocr_pool, run_ocr
+from backend.services.recognition_cache import recognition_cache
 
 logger = logging.getLogger(__name__)
 
 class CaptchaSolver:
     """验证码识别和解决器"""
 
+    # 对外引擎名 -> 共享引擎池中的种类
+    ENGINE_KINDS = {'ddddocr': 'text', 'easyocr': 'easyocr'}
+
     def __init__(self):
-        self.engines = {}
+        self.engines: Dict[str, str] = {}
         self._init_engines()
 
     def _init_engines(self):
-        """初始化OCR引擎"""
-        try:
-            # ddddocr - 本地OCR引擎
-            import ddddocr
-            self.engines['ddddocr'] = ddddocr.DdddOcr()
-            logger.info("ddddocr引擎初始化成功")
-        except ImportError:
-            logger.warning("ddddocr未安装，跳过")
-
-        try:
-            # easyocr - 深度学习OCR
-            import easyocr
-            self.engines['easyocr'] = easyocr.Reader(['en', 'ch_sim'])
-            logger.info("easyocr引擎初始化成功")
-        except ImportError:
-            logger.warning("easyocr未安装，跳过")
+        """检查可用OCR引擎；模型由进程级引擎池在首次识别时加载并在实例间共享"""
+        for name, kind in self.ENGINE_KINDS.items():
+            if ocr_pool.available(kind):
+                self.engines[name] = kind
+            else:
+                logger.warning(f"{name}未安装，跳过")
 
-        # 可以添加更多OCR引擎
-        # self.engines['tesseract'] = TesseractEngine()
+        # 可以添加更多OCR引擎（在 backend.services.ocr_engines.ENGINE_FACTORIES 注册）
 
-    def solve_captcha(self, image_data: bytes, engine: str = 'auto') -> Tuple[bool, str]:
+    async def solve_captcha(self, image_data: bytes, engine: str = 'auto') -> Tuple[bool, str]:
         """
         解决验证码
 
@@ -67,15 +64,17 @@ class CaptchaSolver:
         if engine not in self.engines:
             return False, f"引擎 {engine} 不可用"
 
-        try:
-            ocr_engine = self.engines[engine]
+        cached = await recognition_cache.get(f"risk:{engine}", image_data)
+        if cached is not None:
+            return True, cached
 
+        try:
+            # 推理按 ocr 路由提交到执行池（默认 CPU 进程池），不阻塞事件循环
             if engine == 'ddddocr':
-                result = ocr_engine.classification(image_data)
-                confidence = getattr(ocr_engine, 'confidence', 0.5)  # ddddocr可能没有置信度
+                result = await self._ocr(self.engines[engine], 'classification', image_data)
 
             elif engine == 'easyocr':
-                results = ocr_engine.readtext(image_data)
+                results = await self._ocr(self.engines[engine], 'readtext', image_data)
                 if results:
                     # 取置信度最高的识别结果
                     best_result = max(results, key=lambda x: x[2])
@@ -94,12 +93,17 @@ class CaptchaSolver:
                 return False, "识别结果为空"
 
             logger.info(f"验证码识别成功: {result} (引擎: {engine})")
+            await recognition_cache.set(f"risk:{engine}", image_data, result)
             return True, result
 
         except Exception as e:
             logger.error(f"验证码识别失败: {e}")
             return False, f"识别错误: {str(e)}"
 
+    @staticmethod
+    async def _ocr(kind: str, method: str, *args):
+        return await executor_pools.run(executor_pools.pool_for("ocr"), run_ocr, kind, method, *args)
+
     def _clean_result(self, text: str) -> str:
         """清理识别结果"""
         if not text:
@@ -114,7 +118,7 @@ class CaptchaSolver:
 
         return text.upper()
 
-    def solve_from_url(self, image_url: str, engine: str = 'auto') -> Tuple[bool, str]:
+    async def solve_from_url(self, image_url: str, engine: str = 'auto') -> Tuple[bool, str]:
         """
         从URL解决验证码
 
@@ -125,16 +129,18 @@ class CaptchaSolver:
             (成功标志, 识别结果)
         """
         try:
-            response = requests.get(image_url, timeout=10)
-            response.raise_for_status()
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
+                async with session.get(image_url) as response:
+                    response.raise_for_status()
+                    content = await response.read()
 
-            return self.solve_captcha(response.content, engine)
+            return await self.solve_captcha(content, engine)
 
         except Exception as e:
             logger.error(f"下载验证码图片失败: {e}")
             return False, f"下载失败: {str(e)}"
 
-    def solve_from_base64(self, base64_data: str, engine: str = 'auto') -> Tuple[bool, str]:
+    async def solve_from_base64(self, base64_data: str, engine: str = 'auto') -> Tuple[bool, str]:
         """
         从base64数据解决验证码
 
@@ -150,17 +156,16 @@ class CaptchaSolver:
                 base64_data = base64_data.split(',')[1]
 
             image_data = base64.b64decode(base64_data)
-            return self.solve_captcha(image_data, engine)
-
         except Exception as e:
             logger.error(f"base64解码失败: {e}")
             return False, f"解码失败: {str(e)}"
+        return await self.solve_captcha(image_data, engine)
 
     def get_available_engines(self) -> list:
         """获取可用引擎列表"""
         return list(self.engines.keys())
 
-    def run_captcha_solver(self, image: Any, **kwargs) -> Dict[str, Any]:
+    async def run_captcha_solver(self, image: Any, **kwargs) -> Dict[str, Any]:
         """
         运行验证码解决器 (API接口)
 
@@ -179,14 +184,14 @@ class CaptchaSolver:
         try:
             if isinstance(image, str):
                 if image.startswith('http'):
-                    success, result = self.solve_from_url(image, engine)
+                    success, result = await self.solve_from_url(image, engine)
                 elif image.startswith('data:'):
-                    success, result = self.solve_from_base64(image, engine)
+                    success, result = await self.solve_from_base64(image, engine)
                 else:
                     # 假设是base64
-                    success, result = self.solve_from_base64(image, engine)
+                    success, result = await self.solve_from_base64(image, engine)
             elif isinstance(image, bytes):
-                success, result = self.solve_captcha(image, engine)
+                success, result = await self.solve_captcha(image, engine)
             else:
                 return {
                     "success": False,
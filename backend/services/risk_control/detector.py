@@ -2,11 +2,12 @@
 风控检测器 - 自动识别风控类型
 """
 
-import re
 import logging
 from typing import Dict, Any, Optional, Tuple
 from enum import Enum
 
+from .matcher import PatternMatcher, fold
+
 logger = logging.getLogger(__name__)
 
 class RiskType(Enum):
@@ -69,6 +70,28 @@ class RiskDetector:
             r'ddos.*protection'
         ]
 
+        self.bot_detection_indicators = [
+            'robot', 'bot', 'crawler', 'spider',
+            'automated', 'suspicious', 'unusual'
+        ]
+
+        # 按检测优先级预编译的匹配器（内容特征需经 fold，反爬虫特征为原样子串匹配）
+        self._confidence = {
+            RiskType.CAPTCHA: 0.9,
+            RiskType.RATE_LIMIT: 0.8,
+            RiskType.IP_BLOCK: 0.8,
+            RiskType.ACCOUNT_BLOCK: 0.7,
+            RiskType.JS_CHALLENGE: 0.8,
+        }
+        self._content_matcher = PatternMatcher([
+            (RiskType.CAPTCHA, self.captcha_patterns),
+            (RiskType.RATE_LIMIT, self.rate_limit_patterns),
+            (RiskType.IP_BLOCK, self.ip_block_patterns),
+            (RiskType.ACCOUNT_BLOCK, self.account_block_patterns),
+            (RiskType.JS_CHALLENGE, self.js_challenge_patterns),
+        ])
+        self._bot_matcher = PatternMatcher([(RiskType.BOT_DETECTION, self.bot_detection_indicators)])
+
     def detect_risk_type(self, html: str, headers: Dict[str, Any] = None,
                          status_code: int = 200) -> Tuple[RiskType, Dict[str, Any]]:
         """
@@ -93,45 +116,14 @@ class RiskDetector:
         elif status_code == 503:
             return RiskType.JS_CHALLENGE, {"reason": "HTTP 503 Service Unavailable"}
 
-        # 检查验证码
-        for pattern in self.captcha_patterns:
-            if re.search(pattern, html_lower, re.IGNORECASE):
-                return RiskType.CAPTCHA, {
-                    "pattern": pattern,
-                    "confidence": 0.9
-                }
-
-        # 检查频率限制
-        for pattern in self.rate_limit_patterns:
-            if re.search(pattern, html_lower, re.IGNORECASE):
-                return RiskType.RATE_LIMIT, {
-                    "pattern": pattern,
-                    "confidence": 0.8
-                }
-
-        # 检查IP封禁
-        for pattern in self.ip_block_patterns:
-            if re.search(pattern, html_lower, re.IGNORECASE):
-                return RiskType.IP_BLOCK, {
-                    "pattern": pattern,
-                    "confidence": 0.8
-                }
-
-        # 检查账户封禁
-        for pattern in self.account_block_patterns:
-            if re.search(pattern, html_lower, re.IGNORECASE):
-                return RiskType.ACCOUNT_BLOCK, {
-                    "pattern": pattern,
-                    "confidence": 0.7
-                }
-
-        # 检查JS挑战
-        for pattern in self.js_challenge_patterns:
-            if re.search(pattern, html_lower, re.IGNORECASE):
-                return RiskType.JS_CHALLENGE, {
-                    "pattern": pattern,
-                    "confidence": 0.8
-                }
+        # 按优先级检查验证码 / 频率限制 / IP封禁 / 账户封禁 / JS挑战，命中即返回
+        hit = self._content_matcher.first(fold(html_lower))
+        if hit:
+            risk_type, pattern = hit
+            return risk_type, {
+                "pattern": pattern,
+                "confidence": self._confidence[risk_type]
+            }
 
         # 检查响应头
         server = headers.get('server', '').lower()
@@ -142,17 +134,12 @@ class RiskDetector:
             }
 
         # 检查是否包含反爬虫特征
-        bot_detection_indicators = [
-            'robot', 'bot', 'crawler', 'spider',
-            'automated', 'suspicious', 'unusual'
-        ]
-
-        for indicator in bot_detection_indicators:
-            if indicator in html_lower:
-                return RiskType.BOT_DETECTION, {
-                    "indicator": indicator,
-                    "confidence": 0.6
-                }
+        hit = self._bot_matcher.first(html_lower)
+        if hit:
+            return RiskType.BOT_DETECTION, {
+                "indicator": hit[1],
+                "confidence": 0.6
+            }
 
         return RiskType.NONE, {"confidence": 1.0}
 
@@ -0,0 +1,94 @@
+"""
+风控特征多模式匹配器
+
+RiskDetector / RiskAnalyzer 的特征模式在构造时预编译一次：
+- 纯字面量模式直接用子串查找（memchr 级别，远快于 re.search）
+- 含 .* / .? / . 的模式先检查其必需字面量片段均出现，再执行预编译正则；
+  同一次匹配中各模式共享片段查找结果
+- 文本只小写一次；原实现对已小写文本再加 re.IGNORECASE，会使 sre 放弃字面量前缀加速，
+  这里改为无 IGNORECASE 匹配，并把 IGNORECASE 下额外等价的 'ı'/'ſ' 折叠为 'i'/'s'，结果与原实现一致
+- 按优先级顺序求值，命中最高优先级后立即返回
+
+注：Python re 的组合交替（a|b|c）无法利用字面量前缀加速，在 MB 级页面上反而比逐个查找慢数倍，
+因此未采用单一组合正则。
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# re.IGNORECASE 下与 ASCII 小写字母等价、但 str.lower() 不会转换的字符
+_FOLD = str.maketrans({"ı": "i", "ſ": "s"})
+_META = re.compile(r"[\\.^$*+?{}\[\]|()]")
+_GAP = re.compile(r"\.\*|\.\?|\.")
+
+
+def fold(lower: str) -> str:
+    """折叠已小写文本中 IGNORECASE 等价字符（模拟原 re.IGNORECASE 语义）"""
+    if "ı" in lower or "ſ" in lower:
+        return lower.translate(_FOLD)
+    return lower
+
+
+def normalize(text: Optional[str]) -> str:
+    """小写并折叠 IGNORECASE 等价字符，供 PatternMatcher 匹配"""
+    return fold(text.lower()) if text else ""
+
+
+def _required_literals(pattern: str) -> Optional[List[str]]:
+    """仅由字面量与 .* / .? / . / \\. 组成的模式返回其必需片段；其他模式返回 None（不做预筛）"""
+    body = pattern.replace(r"\.", "\0")
+    pieces = _GAP.split(body)
+    if any(_META.search(p) for p in pieces):
+        return None
+    return [p.replace("\0", ".") for p in pieces if p]
+
+
+class _Pattern:
+    __slots__ = ("label", "pattern", "gates", "regex")
+
+    def __init__(self, label: str, pattern: str):
+        self.label = label
+        self.pattern = pattern
+        pieces = _required_literals(pattern)
+        is_literal = pieces is not None and len(pieces) == 1 and not _GAP.search(pattern.replace(r"\.", ""))
+        self.gates = pieces or []
+        # 纯字面量模式只需子串查找，无需正则
+        self.regex = None if is_literal else re.compile(pattern.lower())
+
+    def search(self, text: str, seen: Dict[str, bool]) -> bool:
+        """seen 缓存本次匹配中字面量片段是否出现，多个模式共享同一片段时只查找一次"""
+        for piece in self.gates:
+            found = seen.get(piece)
+            if found is None:
+                found = seen[piece] = piece in text
+            if not found:
+                return False
+        return self.regex is None or self.regex.search(text) is not None
+
+
+class PatternMatcher:
+    """按优先级有序的预编译多模式匹配器（输入需先经 normalize）"""
+
+    def __init__(self, groups: Iterable[Tuple[str, Sequence[str]]]):
+        self._groups: List[Tuple[str, List[_Pattern]]] = [
+            (label, [_Pattern(label, p) for p in patterns]) for label, patterns in groups
+        ]
+
+    def first(self, text: str) -> Optional[Tuple[str, str]]:
+        """返回最高优先级命中的 (label, pattern)，无命中返回 None"""
+        seen: Dict[str, bool] = {}
+        for label, patterns in self._groups:
+            for p in patterns:
+                if p.search(text, seen):
+                    return label, p.pattern
+        return None
+
+    def all(self, text: str) -> List[Tuple[str, str]]:
+        """按顺序返回每个命中分组的首个命中模式 (label, pattern)"""
+        hits, seen = [], {}
+        for label, patterns in self._groups:
+            for p in patterns:
+                if p.search(text, seen):
+                    hits.append((label, p.pattern))
+                    break
+        return hits
@@ -4,14 +4,21 @@ import hashlib
 from pathlib import Path
 from datetime import datetime
 
+from backend.core.codec import Serializer, get_serializer
+
+# 快照文件经 backend/core/codec.py 编码；旧版 .json 快照仍可列出与读取
+SUFFIX = ".snap"
+LEGACY_SUFFIX = ".json"
+
 def _hash_str(s: str) -> str:
     return hashlib.sha256(s.encode('utf-8')).hexdigest()[:16]
 
 class SnapshotStore:
-    def __init__(self, base_dir: str | Path | None = None):
+    def __init__(self, base_dir: str | Path | None = None, serializer: Serializer | None = None):
         base = base_dir or os.getenv("SNAPSHOT_DIR", "./logs/snapshots")
         self.base = Path(base).resolve()
         self.base.mkdir(parents=True, exist_ok=True)
+        self.serializer = serializer or get_serializer()
 
     def save(self, kind: str, payload: dict) -> dict:
         ts = datetime.utcnow().strftime('%Y%m%dT%H%M%S.%fZ')
@@ -24,17 +31,22 @@ class SnapshotStore:
             "ts": ts,
             "payload": payload,
         }
-        fp = self.base / f"{snap_id}.json"
-        with fp.open('w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        fp = self.base / f"{snap_id}{SUFFIX}"
+        fp.write_bytes(self.serializer.dumps(data))
         return data
 
+    def _read(self, fp: Path) -> dict:
+        if fp.suffix == LEGACY_SUFFIX:
+            with fp.open('r', encoding='utf-8') as f:
+                return json.load(f)
+        return self.serializer.loads(fp.read_bytes())
+
     def list(self, limit: int = 50) -> list[dict]:
         items = []
-        for p in sorted(self.base.glob('*.json'), reverse=True):
+        files = [*self.base.glob(f'*{SUFFIX}'), *self.base.glob(f'*{LEGACY_SUFFIX}')]
+        for p in sorted(files, key=lambda p: p.stem, reverse=True):
             try:
-                with p.open('r', encoding='utf-8') as f:
-                    items.append(json.load(f))
+                items.append(self._read(p))
             except Exception:
                 continue
             if len(items) >= limit:
@@ -42,13 +54,13 @@ class SnapshotStore:
         return items
 
     def get(self, snap_id: str) -> dict | None:
-        fp = self.base / f"{snap_id}.json"
-        if not fp.exists():
-            return None
-        try:
-            with fp.open('r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            return None
+        for suffix in (SUFFIX, LEGACY_SUFFIX):
+            fp = self.base / f"{snap_id}{suffix}"
+            if fp.exists():
+                try:
+                    return self._read(fp)
+                except Exception:
+                    return None
+        return None
 
 store = SnapshotStore()
@@ -0,0 +1,244 @@
+"""
+SQLite 连接池与写后（write-behind）队列
+
+DatabaseService 原先每次调用都新建 sqlite3 连接，每条遥测记录单独提交（一次 fsync），
+且在事件循环上同步执行，API 请求路径上直接承担数据库延迟。
+
+- SQLitePool：固定数量的持久连接（WAL、synchronous=NORMAL、busy_timeout），连接在
+  线程间借还（同一时刻只被一个线程使用），并开启 sqlite3 语句缓存，相同 SQL 只预编译一次
+- WriteBehindQueue：后台写线程独占一个连接，从有界队列取写入请求，攒满 batch_size 行或
+  距本批首行 interval 秒后在一个事务内提交；连续的同一 SQL 合并为 executemany。
+  submit() 只入队（非阻塞），队列满时丢弃并计数，不会反压到请求路径；
+  可选的 tick 回调由写线程每 tick_interval 秒调用一次（空闲时同样按时触发），
+  其返回的写入随后入队，用于把进程内累积的增量（如 API 汇总）定时落盘
+"""
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from backend.core.logger import logger
+
+try:
+    from backend.core.metrics import DB_WRITE_QUEUE, DB_WRITE_BATCH_ROWS, DB_WRITE_DROPPED  # type: ignore
+except Exception:
+    class _No:
+        def labels(self, *_, **__):
+            return self
+        def inc(self, *_):
+            pass
+        def observe(self, *_):
+            pass
+        def set(self, *_):
+            pass
+    DB_WRITE_QUEUE = DB_WRITE_BATCH_ROWS = DB_WRITE_DROPPED = _No()
+
+_STOP = object()
+
+
+class SQLitePool:
+    """持久 SQLite 连接池"""
+
+    def __init__(self, path: str, size: int = 4, busy_timeout_ms: int = 5000, cached_statements: int = 256):
+        self.path = path
+        self.size = max(1, size)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    def connect(self) -> sqlite3.Connection:
+        """新建一个已设置 PRAGMA 的连接（写线程等独占连接也走这里）"""
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._borrow()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def _borrow(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.size:
+                conn = self.connect()
+                self._all.append(conn)
+                return conn
+        return self._idle.get()
+
+    def close(self):
+        with self._lock:
+            conns, self._all = self._all, []
+        for conn in conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._idle = queue.LifoQueue()
+
+
+class WriteBehindQueue:
+    """后台批量写入队列"""
+
+    def __init__(self, connect: Callable[[], sqlite3.Connection], batch_size: int = 500,
+                 interval: float = 0.05, max_pending: int = 100000,
+                 tick: Optional[Callable[[], Sequence[Tuple[str, tuple]]]] = None, tick_interval: float = 5.0):
+        self.connect = connect
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.tick = tick
+        self.tick_interval = max(0.01, tick_interval)
+        self._next_tick = time.monotonic() + self.tick_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def submit(self, sql: str, params: Sequence[Any] = ()) -> bool:
+        """入队一条写入；队列满返回 False（计入 dropped）"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((sql, tuple(params)))
+        except queue.Full:
+            self.dropped += 1
+            DB_WRITE_DROPPED.inc()
+            return False
+        return True
+
+    @property
+    def pending(self) -> int:
+        return self._queue.unfinished_tasks
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """阻塞等待已入队的写入全部提交；超时返回 False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = 10):
+        """提交剩余写入后停止写线程"""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pending": self.pending, "written": self.written, "dropped": self.dropped,
+                "failed": self.failed, "batches": self.batches}
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        conn = self.connect()
+        try:
+            while True:
+                batch, stop = self._collect()
+                if batch:
+                    self._write(conn, batch)
+                if stop:
+                    return
+                if self.tick is not None and time.monotonic() >= self._next_tick:
+                    self._run_tick()
+        finally:
+            conn.close()
+
+    def _run_tick(self):
+        """调用 tick 回调并把返回的写入入队（写线程内执行）"""
+        self._next_tick = time.monotonic() + self.tick_interval
+        try:
+            for sql, params in self.tick():
+                self.submit(sql, params)
+        except Exception as e:
+            logger.error(f"写后队列定时回调失败: {e}")
+
+    def _next(self) -> Any:
+        """取下一条写入；配置了 tick 时等待不超过下次 tick，空闲超时即执行 tick"""
+        while True:
+            if self.tick is None:
+                return self._queue.get()
+            try:
+                return self._queue.get(timeout=max(0.0, self._next_tick - time.monotonic()))
+            except queue.Empty:
+                self._run_tick()
+
+    def _collect(self) -> Tuple[List[Tuple[str, tuple]], bool]:
+        item = self._next()
+        if item is _STOP:
+            self._queue.task_done()
+            return [], True
+        batch = [item]
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.task_done()
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write(self, conn: sqlite3.Connection, batch: List[Tuple[str, tuple]]):
+        try:
+            with conn:
+                # 连续的同一 SQL 合并为 executemany，保持整体写入顺序
+                start = 0
+                for i in range(1, len(batch) + 1):
+                    if i == len(batch) or batch[i][0] != batch[start][0]:
+                        conn.executemany(batch[start][0], [params for _, params in batch[start:i]])
+                        start = i
+            self.written += len(batch)
+            self.batches += 1
+            DB_WRITE_BATCH_ROWS.observe(len(batch))
+        except Exception as e:
+            # 整批回滚后逐行重试，单条坏数据不连累同批其他记录
+            logger.error(f"批量写入失败（{len(batch)} 行），逐行重试: {e}")
+            for sql, params in batch:
+                try:
+                    with conn:
+                        conn.execute(sql, params)
+                    self.written += 1
+                except Exception:
+                    self.failed += 1
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+            DB_WRITE_QUEUE.set(self._queue.qsize())
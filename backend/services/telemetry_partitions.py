@@ -0,0 +1,202 @@
+"""
+遥测表按天分区与分钟 / 小时汇总
+
+api_stats / script_runs / user_logs 原为单表，除主键外无索引：最近记录查询要全表排序，
+按时间清理是无索引的范围 DELETE，看板统计 30 天数据需要扫描全部原始行。
+
+- DailyPartitions：每天一张表（<base>_YYYYMMDD，按 UTC 日期），建表时附带时间 / 维度索引。
+  新分区的 DDL 与数据写入走同一写后队列，保证建表先于插入；保留期清理直接 DROP 整个分区。
+  旧库中的未分区表（<base>）保留为只读的历史分区
+- ApiRollup：进程内累积 API 调用的分钟增量，定期合并为 UPSERT 写入 api_rollup_1m /
+  api_rollup_1h（计数、错误数、耗时总和 / 最大值、缓存命中、字节数），看板只读汇总表
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+DAY = 86400
+
+
+def day_key(ts: float) -> str:
+    """时间戳所在的 UTC 日期（YYYYMMDD）"""
+    return time.strftime('%Y%m%d', time.gmtime(ts))
+
+
+def sql_timestamp(ts: float) -> str:
+    """与 SQLite CURRENT_TIMESTAMP 相同格式的 UTC 时间文本"""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(ts))
+
+
+class DailyPartitions:
+    """按天分区的表族"""
+
+    def __init__(self, base: str, columns: Sequence[str], indexes: Sequence[str] = ('timestamp',)):
+        self.base = base
+        self.columns = list(columns)
+        self.indexes = list(indexes)
+        self.names = [c.split()[0] for c in self.columns]
+        self._insert = (
+            f"INSERT INTO {{table}} (timestamp, {', '.join(self.names)}) "
+            f"VALUES (?{', ?' * len(self.names)})"
+        )
+        self._known: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def table(self, ts: float) -> str:
+        return f"{self.base}_{day_key(ts)}"
+
+    def ddl(self, table: str) -> List[str]:
+        statements = [
+            f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            f"{', '.join(self.columns)}, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)"
+        ]
+        for i, cols in enumerate(self.indexes):
+            statements.append(f"CREATE INDEX IF NOT EXISTS idx_{table}_{i} ON {table} ({cols})")
+        return statements
+
+    def insert_sql(self, table: str) -> str:
+        return self._insert.format(table=table)
+
+    def ensure(self, ts: float, submit: Callable[..., bool]) -> Optional[str]:
+        """返回 ts 所在分区表名；首次遇到时把建表 / 建索引语句排入写队列，入队失败返回 None"""
+        table = self.table(ts)
+        if table not in self._known:
+            with self._lock:
+                if table not in self._known:
+                    if not all(submit(stmt) for stmt in self.ddl(table)):
+                        return None
+                    self._known.add(table)
+        return table
+
+    def load(self, conn) -> None:
+        """加载已有分区，并为旧版未分区表补建索引"""
+        self._known = set(self._partitions(conn))
+        if self._legacy_exists(conn):
+            for i, cols in enumerate(self.indexes):
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.base}_{i} ON {self.base} ({cols})")
+
+    def tables(self, conn, since: Optional[float] = None) -> List[str]:
+        """分区表名（新到旧）；旧版未分区表排在最后"""
+        tables = sorted(self._partitions(conn), reverse=True)
+        if since is not None:
+            oldest = self.table(since)
+            tables = [t for t in tables if t >= oldest]
+        if self._legacy_exists(conn):
+            tables.append(self.base)
+        return tables
+
+    def drop_before(self, conn, cutoff: float) -> int:
+        """删除早于 cutoff 所在日期的整个分区；旧版未分区表按时间索引删除"""
+        oldest = self.table(cutoff)
+        dropped = 0
+        for table in self._partitions(conn):
+            if table < oldest:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+                self._known.discard(table)
+                dropped += 1
+        if self._legacy_exists(conn):
+            conn.execute(f"DELETE FROM {self.base} WHERE timestamp < ?", (sql_timestamp(cutoff),))
+        return dropped
+
+    def _partitions(self, conn) -> List[str]:
+        rows = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB ?",
+            (f"{self.base}_[0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9]",),
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    def _legacy_exists(self, conn) -> bool:
+        return conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (self.base,)
+        ).fetchone() is not None
+
+
+ROLLUP_TABLES: Tuple[Tuple[str, int], ...] = (("api_rollup_1m", 60), ("api_rollup_1h", 3600))
+# requests, timed, client_errors, server_errors, total_time, max_time, cache_hits, bytes
+_FIELDS = 8
+
+
+def rollup_ddl(table: str) -> List[str]:
+    return [
+        f"CREATE TABLE IF NOT EXISTS {table} ("
+        "bucket INTEGER NOT NULL, endpoint TEXT NOT NULL, method TEXT NOT NULL, "
+        "requests INTEGER NOT NULL DEFAULT 0, timed INTEGER NOT NULL DEFAULT 0, "
+        "client_errors INTEGER NOT NULL DEFAULT 0, server_errors INTEGER NOT NULL DEFAULT 0, "
+        "total_time REAL NOT NULL DEFAULT 0, max_time REAL, "
+        "cache_hits INTEGER NOT NULL DEFAULT 0, bytes INTEGER NOT NULL DEFAULT 0, "
+        "PRIMARY KEY (bucket, endpoint, method)) WITHOUT ROWID",
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_endpoint ON {table} (endpoint, bucket)",
+    ]
+
+
+def _rollup_upsert(table: str) -> str:
+    return (
+        f"INSERT INTO {table} (bucket, endpoint, method, requests, timed, client_errors, server_errors, "
+        "total_time, max_time, cache_hits, bytes) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (bucket, endpoint, method) DO UPDATE SET "
+        "requests = requests + excluded.requests, timed = timed + excluded.timed, "
+        "client_errors = client_errors + excluded.client_errors, "
+        "server_errors = server_errors + excluded.server_errors, "
+        "total_time = total_time + excluded.total_time, "
+        "max_time = MAX(COALESCE(max_time, excluded.max_time), COALESCE(excluded.max_time, max_time)), "
+        "cache_hits = cache_hits + excluded.cache_hits, bytes = bytes + excluded.bytes"
+    )
+
+
+class ApiRollup:
+    """API 调用分钟 / 小时汇总的进程内增量"""
+
+    def __init__(self, interval: float = 5.0, max_keys: int = 5000):
+        self.interval = interval
+        self.max_keys = max_keys
+        self._deltas: Dict[Tuple[int, str, str], List[Any]] = {}
+        self._last_drain = time.monotonic()
+        self._lock = threading.Lock()
+        self._upserts = [(_rollup_upsert(table), step) for table, step in ROLLUP_TABLES]
+
+    def add(self, ts: float, endpoint: str, method: str, status_code: Optional[int],
+            response_time: Optional[float] = None, cache_hit: Optional[bool] = None,
+            response_size: Optional[int] = None) -> bool:
+        """累积一次调用；返回 True 表示到了合并写入的时机"""
+        key = (int(ts) // 60 * 60, endpoint, method)
+        with self._lock:
+            d = self._deltas.get(key)
+            if d is None:
+                d = self._deltas[key] = [0, 0, 0, 0, 0.0, None, 0, 0]
+            d[0] += 1
+            if response_time is not None:
+                d[1] += 1
+                d[4] += response_time
+                d[5] = response_time if d[5] is None else max(d[5], response_time)
+            if status_code is None or status_code >= 500:
+                d[3] += 1
+            elif status_code >= 400:
+                d[2] += 1
+            if cache_hit:
+                d[6] += 1
+            if response_size:
+                d[7] += response_size
+            return len(self._deltas) >= self.max_keys or time.monotonic() - self._last_drain >= self.interval
+
+    def drain(self) -> List[Tuple[str, tuple]]:
+        """取出累积增量，转换为各汇总表的 UPSERT（小时表由分钟增量再次合并）"""
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+            self._last_drain = time.monotonic()
+        writes: List[Tuple[str, tuple]] = []
+        for sql, step in self._upserts:
+            merged: Dict[Tuple[int, str, str], List[Any]] = {}
+            for (bucket, endpoint, method), d in deltas.items():
+                key = (bucket // step * step, endpoint, method)
+                m = merged.get(key)
+                if m is None:
+                    merged[key] = list(d)
+                    continue
+                for i in range(_FIELDS):
+                    if i == 5:
+                        if d[5] is not None:
+                            m[5] = d[5] if m[5] is None else max(m[5], d[5])
+                    else:
+                        m[i] += d[i]
+            writes.extend((sql, key + tuple(m)) for key, m in merged.items())
+        return writes
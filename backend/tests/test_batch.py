@@ -0,0 +1,73 @@
+"""
+批量执行工具测试
+"""
+import asyncio
+
+from backend.core.batch import iter_batch, run_batch
+
+
+class TestBatch:
+    """有界并发、顺序流式产出与单条超时测试"""
+
+    async def test_order_and_concurrency_bound(self):
+        """测试结果顺序与输入一致，且同时执行数不超过上限"""
+        running = peak = 0
+
+        async def work(x):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01 * (5 - x % 5))
+            running -= 1
+            return x * 2
+
+        assert await run_batch(range(20), work, concurrency=4) == [x * 2 for x in range(20)]
+        assert peak == 4
+
+    async def test_timeout_and_error_isolated(self):
+        """测试单条超时/异常转为错误结果，不影响其他条目"""
+        async def work(x):
+            if x == 1:
+                await asyncio.sleep(1)
+            if x == 2:
+                raise ValueError("bad")
+            return x
+
+        results = await run_batch([0, 1, 2, 3], work, timeout=0.05,
+                                  on_error=lambda item, e: {"status": "error", "item": item, "error": str(e)})
+        assert results[0] == 0 and results[3] == 3
+        assert results[1]["item"] == 1 and "超时" in results[1]["error"]
+        assert results[2] == {"status": "error", "item": 2, "error": "bad"}
+
+    async def test_streams_prefix_before_batch_done(self):
+        """测试前缀完成即产出，无需等待整批结束"""
+        release = asyncio.Event()
+
+        async def work(x):
+            if x == 2:
+                await release.wait()
+            return x
+
+        stream = iter_batch(range(3), work, concurrency=3)
+        assert await asyncio.wait_for(stream.__anext__(), 1) == (0, 0)
+        assert await asyncio.wait_for(stream.__anext__(), 1) == (1, 1)
+        release.set()
+        assert await stream.__anext__() == (2, 2)
+
+    async def test_unordered_and_early_close(self):
+        """测试按完成顺序产出，提前结束迭代时取消剩余条目"""
+        cancelled = []
+
+        async def work(x):
+            try:
+                await asyncio.sleep(0.01 if x == 1 else 1)
+            except asyncio.CancelledError:
+                cancelled.append(x)
+                raise
+            return x
+
+        stream = iter_batch([0, 1, 2], work, concurrency=3, ordered=False)
+        assert await stream.__anext__() == (1, 1)
+        await stream.aclose()
+        await asyncio.sleep(0)
+        assert sorted(cancelled) == [0, 2]
@@ -0,0 +1,77 @@
+"""
+缓存引擎测试
+"""
+import time
+
+from backend.core.cache import LRUCacheEngine, approx_size
+from backend.core.kernel import Kernel
+
+
+class TestLRUCacheEngine:
+    """LRU + TTL 结果缓存测试"""
+
+    def test_lru_eviction_by_entries(self):
+        """测试条目数超限时淘汰最久未使用的条目"""
+        cache = LRUCacheEngine(max_entries=2, max_bytes=0, default_ttl=0)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1  # a 变为最近使用
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_eviction_by_bytes(self):
+        """测试字节预算超限时淘汰"""
+        payload = "x" * 1000
+        budget = approx_size(payload) * 2
+        cache = LRUCacheEngine(max_entries=0, max_bytes=budget, default_ttl=0)
+        for key in ("a", "b", "c"):
+            cache.set(key, payload)
+
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["bytes"] <= budget
+        assert cache.get("a") is None
+
+    def test_oversized_value_not_cached(self):
+        """测试单条超过字节预算时不缓存"""
+        cache = LRUCacheEngine(max_entries=0, max_bytes=100, default_ttl=0)
+        cache.set("big", "x" * 1000)
+        assert cache.get("big") is None
+        assert cache.stats()["bytes"] == 0
+
+    def test_script_ttl(self):
+        """测试按脚本 TTL 过期"""
+        cache = LRUCacheEngine(default_ttl=0, script_ttl={"spider": 0.01})
+        cache.set("k1", {"v": 1}, script="spider")
+        cache.set("k2", {"v": 2}, script="demo_run")
+        time.sleep(0.02)
+
+        assert cache.get("k1", script="spider") is None
+        assert cache.get("k2", script="demo_run") == {"v": 2}
+
+    def test_hit_miss_counters(self):
+        """测试命中/未命中计数"""
+        cache = LRUCacheEngine()
+        cache.get("missing")
+        cache.set("k", "v")
+        cache.get("k")
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+
+class TestKernelCache:
+    """Kernel.try_cache / save_cache 测试"""
+
+    def test_roundtrip_and_disable(self):
+        """测试缓存读写与 _cache=False 关闭"""
+        kernel = Kernel(cache=LRUCacheEngine(max_entries=4))
+        kernel.save_cache("demo_run", {"message": "hi"}, {"echo": "hi"})
+
+        assert kernel.try_cache("demo_run", {"message": "hi"}) == {"echo": "hi"}
+        assert kernel.try_cache("demo_run", {"message": "hi", "_cache": False}) is None
+        assert kernel.cache_stats()["entries"] == 1
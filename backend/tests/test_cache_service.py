@@ -0,0 +1,301 @@
+"""
+两级缓存服务测试（本地假 Redis）
+"""
+import asyncio
+import fnmatch
+import re
+import time
+import zlib
+
+import pytest
+
+from backend.core import codec
+from backend.core.codec import Serializer
+from backend.services.cache_service import CacheService
+
+
+class FakeRedis:
+    """redis.asyncio 客户端替身：内存字典 + TTL，记录调用次数，可模拟故障"""
+
+    def __init__(self):
+        self.data = {}
+        self.calls = {"get": 0, "set": 0, "delete": 0, "mget": 0, "scan": 0, "unlink": 0, "execute": 0}
+        self.down = False
+
+    def _check(self, op):
+        if op in self.calls:
+            self.calls[op] += 1
+        if self.down:
+            raise ConnectionError("redis down")
+
+    async def ping(self):
+        self._check("ping")
+        return True
+
+    async def get(self, key):
+        self._check("get")
+        value, expires = self.data.get(key, (None, 0))
+        if value is not None and expires <= time.time():
+            del self.data[key]
+            return None
+        return value
+
+    async def set(self, key, value, ex=None):
+        self._check("set")
+        self.data[key] = (value, time.time() + ex if ex else float("inf"))
+        return True
+
+    async def delete(self, *keys):
+        self._check("delete")
+        return sum(self.data.pop(k, None) is not None for k in keys)
+
+    async def keys(self, pattern):
+        self._check("keys")
+        return [k for k in self.data if fnmatch.fnmatch(k, pattern)]
+
+    async def mget(self, keys):
+        self._check("mget")
+        return [self.data[k][0] if k in self.data and self.data[k][1] > time.time() else None
+                for k in keys]
+
+    async def scan(self, cursor=0, match=None, count=10):
+        """游标为下一个键的 crc32 + 1：与真实 SCAN 一样，遍历期间删除键不影响后续分页"""
+        self._check("scan")
+        keys = sorted((zlib.crc32(k.encode()), k) for k in self.data)
+        rest = [(h, k) for h, k in keys if h >= cursor - 1] if cursor else keys
+        page, nxt = rest[:count], rest[count][0] + 1 if len(rest) > count else 0
+        if match is not None:
+            match = re.sub(r"\\(.)", r"[\1]", match)  # Redis 的 \x 转义 -> fnmatch 的 [x]
+        return nxt, [k for _, k in page if match is None or fnmatch.fnmatchcase(k, match)]
+
+    async def unlink(self, *keys):
+        self._check("unlink")
+        return sum(self.data.pop(k, None) is not None for k in keys)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def aclose(self):
+        pass
+
+
+class FakePipeline:
+    """只缓冲 SET，execute 时一次执行"""
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value, ex))
+        return self
+
+    async def execute(self):
+        self.redis._check("execute")
+        for key, value, ex in self.commands:
+            self.redis.data[key] = (value, time.time() + ex if ex else float("inf"))
+        return [True] * len(self.commands)
+
+
+@pytest.fixture
+def redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def cache(redis):
+    return CacheService(client=redis, l1_size=100, l1_ttl=60, negative_ttl=30)
+
+
+class TestTwoTierCache:
+    """L1 / L2 读写测试"""
+
+    async def test_l1_absorbs_repeat_reads(self, cache, redis):
+        """测试写入后 L1 命中不访问 L2，L2 命中回填 L1"""
+        assert await cache.set("a", {"x": 1}, ttl=100)
+        for _ in range(5):
+            assert await cache.get("a") == {"x": 1}
+        assert redis.calls["get"] == 0
+
+        other = CacheService(client=redis, l1_size=100)  # 另一个 worker
+        assert await other.get("a") == {"x": 1}
+        assert await other.get("a") == {"x": 1}
+        assert redis.calls["get"] == 1
+
+        await cache.delete("a")
+        assert await cache.get("a") is None
+        assert not await cache.exists("a")
+
+    async def test_l1_is_bounded_and_l2_failure_degrades(self, redis):
+        """测试 L1 条目上限；L2 故障时退化为只用 L1 并计数"""
+        cache = CacheService(client=redis, l1_size=10)
+        for i in range(50):
+            await cache.set(f"k{i}", i)
+        assert len(cache.memory_cache) == 10
+        assert await cache.get("k0") == 0  # 从 L2 取回
+
+        redis.down = True
+        assert await cache.set("b", "v")
+        assert await cache.get("b") == "v"
+        assert cache.health_check()["l2_errors"] >= 1
+        assert await cache.clear() is False and len(cache.memory_cache) == 0
+
+    async def test_l2_values_keep_types(self, redis):
+        """测试经 msgpack 编码的 L2 值跨 worker 读取时保留 tuple / bytes 类型"""
+        if "msgpack" not in codec._CODECS:
+            pytest.skip("msgpack 未安装")
+        serializer = Serializer("msgpack", "none")
+        await CacheService(client=redis, serializer=serializer).set("typed", {"t": (1, 2), "b": b"\x00"})
+        other = CacheService(client=redis, serializer=serializer)
+        assert await other.get("typed") == {"t": (1, 2), "b": b"\x00"}
+
+    async def test_legacy_l2_values(self, cache, redis):
+        """测试兼容旧版直接写入 L2 的纯字符串值"""
+        redis.data["ylai:old"] = ("plain text", time.time() + 60)
+        assert await cache.get("old") == "plain text"
+
+
+class TestBulkOps:
+    """批量读写与 SCAN 前缀删除测试"""
+
+    async def test_mget_mset_batches(self, redis):
+        """测试 mset 按批 pipeline 写入；mget 先查 L1，其余按批一次 MGET 并回填"""
+        cache = CacheService(client=redis, l1_size=1000)
+        cache.batch_size = 10
+        assert await cache.mset({f"k{i}": {"i": i} for i in range(25)}, ttl=100)
+        assert redis.calls["execute"] == 3 and redis.calls["set"] == 0
+
+        other = CacheService(client=redis, l1_size=1000)
+        other.batch_size = 10
+        await other.get("k0")
+        result = await other.mget([f"k{i}" for i in range(25)] + ["nope"])
+        assert list(result) == [f"k{i}" for i in range(25)] + ["nope"]
+        assert result["k3"] == {"i": 3} and result["nope"] is None
+        assert redis.calls["mget"] == 3  # 25 个未命中 L1 的键，每批 10 个
+        await other.mget([f"k{i}" for i in range(25)])
+        assert redis.calls["mget"] == 3  # 已全部回填 L1
+
+        redis.down = True
+        assert (await CacheService(client=redis).mget(["k1"])) == {"k1": None}
+
+    async def test_delete_prefix_and_clear_use_scan(self, cache, redis):
+        """测试前缀删除与清空走 SCAN 分页 + UNLINK，不调用 KEYS，也不误删其他前缀"""
+        cache.batch_size = 7
+        await cache.mset({f"user:{i}": i for i in range(30)})
+        await cache.mset({f"order:{i}": i for i in range(5)})
+        redis.data["other:x"] = ("1", float("inf"))
+        redis.data["ylai:us*er"] = ("1", float("inf"))
+
+        assert await cache.delete_prefix("user:") == 30
+        assert await cache.get("user:1") is None and await cache.get("order:1") == 1
+        assert redis.calls["scan"] > 1 and redis.calls["unlink"] >= 1
+        assert await cache.delete_prefix("us*") == 1  # 通配符按字面匹配
+
+        assert await cache.clear()
+        assert list(redis.data) == ["other:x"]
+        assert "keys" not in redis.calls
+
+
+class TestGetOrSet:
+    """single-flight、空结果缓存与 stale-while-revalidate 测试"""
+
+    async def test_single_flight(self, cache):
+        """测试并发未命中只加载一次，异常共享且不缓存"""
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"v": calls}
+
+        results = await asyncio.gather(*(cache.get_or_set("hot", load) for _ in range(50)))
+        assert calls == 1 and all(r == {"v": 1} for r in results)
+        assert not cache._inflight
+
+        async def boom():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream")
+
+        outcomes = await asyncio.gather(*(cache.get_or_set("bad", boom) for _ in range(10)),
+                                        return_exceptions=True)
+        assert calls == 2 and all(isinstance(o, RuntimeError) for o in outcomes)
+        assert await cache.get_or_set("bad", lambda: "ok") == "ok"
+
+    async def test_leader_cancel_keeps_waiters(self, cache):
+        """测试发起加载的调用方被取消时，合并等待的调用方仍拿到结果，加载结果照常缓存"""
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "v"
+
+        leader = asyncio.ensure_future(cache.get_or_set("k", load))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(cache.get_or_set("k", load)) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        assert await asyncio.gather(*waiters) == ["v"] * 5
+        assert leader.cancelled() and calls == 1
+        assert await cache.get_or_set("k", load) == "v" and calls == 1
+
+    async def test_negative_caching(self, cache, redis):
+        """测试加载结果为 None 时缓存空结果（含跨 worker），过期后重新加载"""
+        calls = 0
+
+        def missing():
+            nonlocal calls
+            calls += 1
+            return None
+
+        for _ in range(3):
+            assert await cache.get_or_set("ghost", missing) is None
+        assert calls == 1
+        other = CacheService(client=redis)
+        assert await other.get_or_set("ghost", missing) is None
+        assert calls == 1
+
+        cache.memory_cache.clear()
+        redis.data.clear()
+        assert await cache.get_or_set("ghost", missing, negative_ttl=0) is None
+        assert await cache.get_or_set("ghost", missing) is None
+        assert calls == 3
+
+    async def test_stale_while_revalidate(self, cache):
+        """测试过期后在陈旧窗口内立即返回旧值并后台刷新，窗口外同步重新加载"""
+        version = 0
+
+        async def load():
+            nonlocal version
+            version += 1
+            await asyncio.sleep(0.02)
+            return version
+
+        assert await cache.get_or_set("swr", load, ttl=1, stale_ttl=60) == 1
+        key = cache._make_key("swr")
+        value, fresh_until, stale_until = cache.memory_cache.get(key)
+        cache.memory_cache.set(key, (value, time.time() - 1, stale_until))  # 模拟已过新鲜期
+
+        assert await cache.get_or_set("swr", load, ttl=1, stale_ttl=60) == 1
+        await asyncio.gather(*cache._refreshing)
+        assert await cache.get_or_set("swr", load, ttl=1, stale_ttl=60) == 2
+
+        value, fresh_until, stale_until = cache.memory_cache.get(key)
+        cache.memory_cache.set(key, (value, time.time() - 2, time.time() - 1))  # 超出陈旧窗口
+        assert await cache.get_or_set("swr", load, ttl=1, stale_ttl=60) == 3
+
+
+class TestSyncFacade:
+    """线程侧同步接口测试"""
+
+    def test_sync_roundtrip(self):
+        """测试 get_sync / set_sync 与异步接口共用 L1"""
+        cache = CacheService()
+        cache.redis_client = None
+        assert cache.set_sync("s", [1, 2], ttl=10)
+        assert cache.get_sync("s") == [1, 2]
+        assert asyncio.run(cache.get("s")) == [1, 2]
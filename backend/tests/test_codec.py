@@ -0,0 +1,81 @@
+"""
+序列化编解码层测试
+"""
+import datetime
+import decimal
+import json
+
+import pytest
+
+from backend.core import codec
+from backend.core.codec import CodecError, Serializer, fingerprint
+from backend.services.snapshot import SnapshotStore
+
+SAMPLE = {"name": "任务", "n": 3, "ratio": 0.5, "ok": True, "none": None, "items": [1, "a", {"x": []}]}
+
+
+class TestSerializer:
+    """编码、压缩与帧头测试"""
+
+    @pytest.mark.parametrize("name", ["json", "msgpack"])
+    def test_roundtrip_and_compression(self, name):
+        """测试往返一致；达到阈值才压缩，帧头记录实际使用的编解码器与压缩算法"""
+        if name not in codec._CODECS:
+            pytest.skip(f"{name} 未安装")
+        s = Serializer(name, "zlib", compress_min_bytes=256)
+        small = s.dumps(SAMPLE)
+        assert small[:2] == codec.MAGIC and small[3:4] == b"0"
+        assert s.loads(small) == SAMPLE
+
+        big = {"html": "<div>row</div>" * 500}
+        data = s.dumps(big)
+        assert data[3:4] == b"d" and len(data) < 1000
+        assert s.loads(data) == big
+        # 解码只看帧头，与读取方的配置无关
+        assert Serializer("json", "none").loads(data) == big
+
+    def test_msgpack_preserves_types(self):
+        """测试 msgpack 保留 bytes / tuple / set / datetime / Decimal 与非字符串键"""
+        if "msgpack" not in codec._CODECS:
+            pytest.skip("msgpack 未安装")
+        s = Serializer("msgpack", "none")
+        value = {"b": b"\x00\xff", "t": (1, (2, 3)), "s": {1, 2}, 7: "int key",
+                 "dt": datetime.datetime(2024, 1, 2, 3, 4, 5), "d": datetime.date(2024, 1, 2),
+                 "dec": decimal.Decimal("1.10")}
+        assert s.loads(s.dumps(value)) == value
+        # 超出 msgpack 表示范围的值整体改用 json 编码
+        data = s.dumps({"big": 2 ** 70})
+        assert data[2:3] == b"j" and s.loads(data) == {"big": 2 ** 70}
+
+    def test_legacy_and_invalid_input(self):
+        """测试无帧头的旧版 JSON 文本可读；未知帧标记抛出 CodecError"""
+        s = Serializer("json", "none")
+        assert s.loads(json.dumps(SAMPLE)) == SAMPLE
+        assert s.loads(json.dumps(SAMPLE).encode()) == SAMPLE
+        with pytest.raises(ValueError):
+            s.loads(b"plain text")
+        with pytest.raises(CodecError):
+            s.loads(codec.MAGIC + b"?0abc")
+
+    def test_fingerprint_ignores_key_order(self):
+        """测试指纹与 dict 键顺序无关，与取值相关"""
+        assert fingerprint({"a": 1, "b": [1, 2]}) == fingerprint({"b": [1, 2], "a": 1})
+        assert fingerprint({"a": 1}) != fingerprint({"a": 2})
+
+
+class TestSnapshotStore:
+    """快照存储测试"""
+
+    def test_binary_and_legacy_snapshots(self, tmp_path):
+        """测试新快照以编码文件保存，旧版 .json 快照仍可列出与读取"""
+        legacy = {"id": "a-20200101T000000.000000Z", "kind": "a", "ts": "20200101T000000.000000Z",
+                  "payload": {"x": 1}}
+        (tmp_path / f"{legacy['id']}.json").write_text(json.dumps(legacy), encoding="utf-8")
+        store = SnapshotStore(tmp_path, serializer=Serializer("json", "zlib", compress_min_bytes=64))
+
+        info = store.save("b", {"script_version": "v1", "rows": ["r"] * 100})
+        assert (tmp_path / f"{info['id']}.snap").exists()
+        assert store.get(info["id"])["payload"]["rows"] == ["r"] * 100
+        assert store.get(legacy["id"]) == legacy
+        assert [i["id"] for i in store.list()] == [info["id"], legacy["id"]]
+        assert store.get("missing") is None
@@ -0,0 +1,167 @@
+"""
+数据库服务（连接池 + 写后队列）测试
+"""
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from backend.services.database_service import DatabaseService
+from backend.services.sqlite_engine import SQLitePool, WriteBehindQueue
+from backend.services.telemetry_partitions import DAY
+
+
+@pytest.fixture
+async def db(tmp_path):
+    service = DatabaseService(db_path=str(tmp_path / "app.db"))
+    assert await service.initialize()
+    yield service
+    service.close()
+
+
+class TestDatabaseService:
+    """遥测写入与连接池测试"""
+
+    async def test_telemetry_is_batched(self, db):
+        """测试遥测写入只入队，由后台批量提交"""
+        for i in range(1200):
+            assert await db.log_api_call("/api/x", "GET", 200, response_time=0.01 * i,
+                                         response_size=10, cache_hit=i % 2 == 0)
+        await db.log_user_action("u1", "login", details={"ok": True})
+        await db.log_script_run("spider", parameters={"a": 1}, result={"n": 2})
+        assert await db.flush(timeout=10)
+
+        stats = db.writer.stats()
+        assert stats["written"] >= 1202 and stats["failed"] == 0
+        assert stats["batches"] < 50
+        api_table, log_table = db.api_stats.table(time.time()), db.user_logs.table(time.time())
+        with db.get_connection() as conn:
+            assert conn.execute(f"SELECT COUNT(*) FROM {api_table}").fetchone()[0] == 1200
+            assert conn.execute(f"SELECT SUM(cache_hit) FROM {api_table}").fetchone()[0] == 600
+            assert conn.execute(f"SELECT COUNT(*) FROM {log_table}").fetchone()[0] == 1
+        assert len(db.get_api_stats(limit=5)) == 5
+
+    async def test_write_order_and_phone_cache(self, db):
+        """测试写后队列保持入队顺序（先插入后更新），号码缓存可读回"""
+        await db.log_pipeline_run("7", user_id="u1", nodes_count=3)
+        await db.update_pipeline_status("7", "completed")
+        await db.cache_phone_analysis("13800000000", {"status": "success", "data": {"carrier": "移动"}})
+        await db.flush(timeout=10)
+
+        rows = await db.run(lambda conn: conn.execute(
+            "SELECT status FROM pipeline_runs WHERE task_id = '7'").fetchall())
+        assert [r["status"] for r in rows] == ["completed"]
+        assert (await db.get_phone_cache("13800000000"))["carrier"] == "移动"
+        assert await db.get_phone_cache("13900000000") is None
+
+    async def test_pool_and_health(self, db):
+        """测试连接复用、WAL 模式与健康检查"""
+        with db.get_connection() as first:
+            assert first.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        with db.get_connection() as second:
+            assert second is first
+        health = db.health_check()
+        assert health["available"] is True
+
+
+class TestTelemetryPartitions:
+    """按天分区与汇总表测试"""
+
+    async def test_partitions_rollups_and_retention(self, db):
+        """测试按天落入分区、汇总与原始数据一致、保留期按分区删除"""
+        now = time.time() // DAY * DAY + DAY / 2  # 取当天正午，避免跨零点分区数变化
+        for day in range(5):
+            for i in range(30):
+                await db.log_api_call(f"/api/{i % 3}", "GET", 500 if i % 10 == 0 else 200,
+                                      response_time=0.1 * (i % 4), cache_hit=i % 2 == 0,
+                                      timestamp=now - day * DAY - i * 60)
+        await db.flush(timeout=10)
+
+        with db.get_connection() as conn:
+            tables = db.api_stats.tables(conn)
+            assert len(tables) == 5 and tables == sorted(tables, reverse=True)
+            plan = " ".join(r[-1] for r in conn.execute(
+                f"EXPLAIN QUERY PLAN SELECT * FROM {tables[0]} ORDER BY timestamp DESC LIMIT 5"))
+            assert "USING INDEX" in plan
+
+        recent = db.get_api_stats(limit=40)
+        assert len(recent) == 40
+        assert [r["timestamp"] for r in recent] == sorted((r["timestamp"] for r in recent), reverse=True)
+
+        series = db.get_api_timeseries(hours=24 * 7, resolution="1h")
+        assert sum(r["requests"] for r in series) == 150
+        assert sum(r["server_errors"] for r in series) == 15
+        minute = db.get_api_timeseries(hours=24 * 7, resolution="1m", endpoint="/api/0")
+        assert sum(r["requests"] for r in minute) == 50
+        summary = {r["endpoint"]: r for r in db.get_endpoint_summary(hours=24 * 7)}
+        assert summary["/api/1"]["requests"] == 50
+        assert summary["/api/1"]["max_time"] == pytest.approx(0.3)
+
+        dropped = db.cleanup_old_data(days=2)
+        assert dropped["api_stats"] in (2, 3)
+        with db.get_connection() as conn:
+            assert len(db.api_stats.tables(conn)) == 5 - dropped["api_stats"]
+
+    async def test_rollups_drained_when_idle(self, db):
+        """测试流量停止后汇总增量由写线程定时落盘，无需后续 log_api_call 触发"""
+        db.api_rollup.interval = 0.05
+        db._writer = None  # 以新的汇总间隔重建写后队列
+        await db.log_api_call("/api/idle", "GET", 200, response_time=0.2)
+        await db.log_api_call("/api/idle", "GET", 503)
+
+        def rollup(conn):
+            return conn.execute("SELECT requests, server_errors FROM api_rollup_1m "
+                                "WHERE endpoint = '/api/idle'").fetchone()
+
+        deadline = time.time() + 5
+        row = None
+        while row is None and time.time() < deadline:
+            await asyncio.sleep(0.02)
+            row = await db.run(rollup)
+        assert tuple(row) == (2, 1)
+
+    async def test_legacy_table_is_read(self, tmp_path):
+        """测试旧版未分区表保留为历史分区，补建时间索引"""
+        path = tmp_path / "legacy.db"
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE api_stats (id INTEGER PRIMARY KEY, endpoint TEXT, method TEXT, "
+                         "status_code INTEGER, response_time REAL, user_id TEXT, ip_address TEXT, "
+                         "timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)")
+            conn.execute("INSERT INTO api_stats (endpoint, method, timestamp) VALUES ('/old', 'GET', '2020-01-01 00:00:00')")
+        service = DatabaseService(db_path=str(path))
+        assert await service.initialize()
+        await service.log_api_call("/new", "GET", 200)
+        await service.flush(timeout=10)
+        assert [r["endpoint"] for r in service.get_api_stats()] == ["/new", "/old"]
+        with service.get_connection() as conn:
+            assert conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'idx_api_stats_0'").fetchone()
+        service.cleanup_old_data(days=30)
+        assert [r["endpoint"] for r in service.get_api_stats()] == ["/new"]
+        service.close()
+
+
+class TestWriteBehindQueue:
+    """写后队列边界测试"""
+
+    def test_bad_row_does_not_sink_batch(self, tmp_path):
+        """测试单条坏数据只影响自身，队列满时丢弃计数"""
+        pool = SQLitePool(str(tmp_path / "q.db"))
+        with pool.connection() as conn:
+            conn.execute("CREATE TABLE t (v INTEGER NOT NULL)")
+            conn.commit()
+        writer = WriteBehindQueue(pool.connect, batch_size=100, interval=0.01, max_pending=1000)
+        for v in (1, 2, None, 4):
+            writer.submit("INSERT INTO t (v) VALUES (?)", (v,))
+        assert writer.flush(timeout=5)
+        writer.close()
+        assert writer.stats()["written"] == 3 and writer.stats()["failed"] == 1
+        with pool.connection() as conn:
+            assert [r[0] for r in conn.execute("SELECT v FROM t ORDER BY v")] == [1, 2, 4]
+        pool.close()
+
+        full = WriteBehindQueue(lambda: sqlite3.connect(":memory:"), max_pending=1)
+        full._ensure_started = lambda: None
+        assert full.submit("SELECT 1")
+        assert not full.submit("SELECT 1")
+        assert full.stats()["dropped"] == 1
@@ -0,0 +1,181 @@
+"""
+命名执行池测试
+"""
+import asyncio
+import math
+import os
+import threading
+
+import pytest
+
+from backend.core.executors import ExecutorPools
+
+
+def _config():
+    return {
+        "pools": {"default": {"workers": 2}, "slow": {"workers": 1}, "probe": {"workers": 1},
+                  "cpu": {"workers": 1, "kind": "process"}},
+        "routes": {"spider": "slow", "page_probe": "probe", "ghost": "missing"},
+    }
+
+
+class TestExecutorPools:
+    """执行池路由与隔离测试"""
+
+    def test_routes(self):
+        """测试路由表与未知池回退到 default"""
+        pools = ExecutorPools(_config())
+        assert pools.pool_for("spider") == "slow"
+        assert pools.pool_for("page_probe") == "probe"
+        assert pools.pool_for("ghost") == "default"
+        assert pools.pool_for("unknown") == "default"
+
+    def test_single_offload_level(self):
+        """测试默认策略：识别类协程脚本留在事件循环，仅其 CPU 计算核进入进程池"""
+        from backend.core.policy import GlobalPolicy
+
+        pools = ExecutorPools(GlobalPolicy.executors())
+        for script in ("captcha_solver", "ai_recognizer", "risk_analyzer"):
+            assert not pools.is_process(script)
+        assert pools.is_process("ocr") and pools.is_process("html_analysis")
+
+    async def test_slow_pool_does_not_starve_probe(self):
+        """测试慢池占满时其他池仍可立即执行"""
+        pools = ExecutorPools(_config())
+        release = threading.Event()
+        slow = [asyncio.create_task(pools.run("slow", release.wait, 5)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert pools.stats()["slow"]["queued"] == 2
+
+        assert await asyncio.wait_for(pools.run("probe", lambda: "ok"), timeout=1) == "ok"
+        release.set()
+        await asyncio.gather(*slow)
+        assert pools.stats()["slow"]["running"] == 0
+        pools.shutdown()
+
+    async def test_process_lane(self):
+        """测试进程池执行"""
+        pools = ExecutorPools(_config())
+        assert await pools.run("cpu", math.factorial, 20) == math.factorial(20)
+        pools.shutdown(wait=True)
+
+    async def test_process_initializer(self, tmp_path):
+        """测试 add_initializer 注册的函数在进程池工作进程内执行，线程池忽略"""
+        pools = ExecutorPools(_config())
+        pools.add_initializer("cpu", os.chdir, str(tmp_path))
+        pools.add_initializer("slow", os.chdir, str(tmp_path))
+        assert await pools.run("cpu", os.getcwd) == str(tmp_path)
+        assert os.getcwd() != str(tmp_path) and not pools.pools["slow"].initializers
+        pools.shutdown(wait=True)
+
+
+class TestKernelRunAsync:
+    """Kernel.run_async 原生协程执行测试"""
+
+    @staticmethod
+    def _kernel():
+        from backend.core.base import BaseScript
+        from backend.core.cache import LRUCacheEngine
+        from backend.core.kernel import Kernel
+        from backend.core.registry import ScriptRegistry
+
+        reg = ScriptRegistry()
+
+        @reg.register("async_echo")
+        class _AsyncEcho(BaseScript):
+            timeout = 0.2
+
+            async def run(self, **kwargs):
+                await asyncio.sleep(kwargs.get("sleep", 0))
+                return {"thread": threading.current_thread().name, "value": kwargs.get("value")}
+
+        @reg.register("blocking_echo")
+        class _BlockingEcho(BaseScript):
+            blocking = True
+
+            async def run(self, **kwargs):
+                return {"thread": threading.current_thread().name}
+
+        @reg.register("flaky")
+        class _Flaky(BaseScript):
+            async def run(self, **kwargs):
+                raise ConnectionError("upstream reset")
+
+        @reg.register("soft_fail")
+        class _SoftFail(BaseScript):
+            async def run(self, **kwargs):
+                return {"success": False, "error": "not found"}
+
+        @reg.register("timed")
+        class _Timed(BaseScript):
+            async def run(self, **kwargs):
+                self.resources.append(kwargs["value"])
+                started = self.start_time
+                await asyncio.sleep(kwargs["sleep"])
+                return {"started": started, "same_start": self.start_time == started,
+                        "resources": list(self.resources)}
+
+        @reg.register("sync_echo")
+        class _SyncEcho:
+            def run(self, **kwargs):
+                return {"thread": threading.current_thread().name}
+
+        kernel = Kernel(cache=LRUCacheEngine())
+        kernel.registry = reg
+        return kernel
+
+    async def test_coroutine_script_on_loop(self):
+        """测试协程脚本直接在事件循环线程执行"""
+        kernel = self._kernel()
+        res = await kernel.run_async("async_echo", value=1)
+        assert res == {"thread": threading.current_thread().name, "value": 1}
+
+    async def test_timeout_enforced(self):
+        """测试经 BaseScript.invoke 套用脚本超时，超时抛出 TimeoutError"""
+        with pytest.raises(TimeoutError):
+            await self._kernel().run_async("async_echo", sleep=1)
+
+    async def test_errors_propagate(self):
+        """测试脚本异常原样抛出（供 DAG 记为失败并按 is_retryable_error 重试）；直接调用 execute 仍返回失败结果"""
+        kernel = self._kernel()
+        with pytest.raises(ConnectionError):
+            await kernel.run_async("flaky")
+        res = await kernel.registry.get("flaky").execute()
+        assert res == {"success": False, "error": "upstream reset"}
+
+    async def test_failed_result_not_cached(self):
+        """测试 success 为 False 的结果不写入缓存"""
+        kernel = self._kernel()
+        res = await kernel.run_async("soft_fail")
+        kernel.save_cache("soft_fail", {}, res)
+        assert kernel.try_cache("soft_fail", {}) is None
+        kernel.save_cache("soft_fail", {}, {"success": True})
+        assert kernel.try_cache("soft_fail", {}) == {"success": True}
+
+    async def test_call_state_isolated(self):
+        """测试同一脚本实例被并发调用时 start_time / resources 互不覆盖"""
+        kernel = self._kernel()
+        first, second = await asyncio.gather(kernel.run_async("timed", value="a", sleep=0.05),
+                                             kernel.run_async("timed", value="b", sleep=0.01))
+        assert first["same_start"] and second["same_start"]
+        assert first["started"] < second["started"]
+        assert first["resources"] == ["a"] and second["resources"] == ["b"]
+
+    async def test_sync_script_in_pool(self):
+        """测试同步脚本进入执行池线程"""
+        res = await self._kernel().run_async("sync_echo")
+        assert res["thread"].startswith("pool-default")
+
+    async def test_blocking_coroutine_script_in_pool(self):
+        """测试声明 blocking 的协程脚本在执行池线程内运行"""
+        res = await self._kernel().run_async("blocking_echo")
+        assert res["thread"].startswith("pool-default")
+
+    async def test_many_concurrent_io_nodes(self):
+        """测试大量 I/O 型协程节点并发执行不占用线程"""
+        kernel = self._kernel()
+        kernel.registry.get("async_echo").timeout = 10
+        before = threading.active_count()
+        res = await asyncio.gather(*(kernel.run_async("async_echo", sleep=0.05, value=i) for i in range(2000)))
+        assert [r["value"] for r in res] == list(range(2000))
+        assert threading.active_count() <= before + 1
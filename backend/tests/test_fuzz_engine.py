@@ -0,0 +1,78 @@
+"""
+异步 Fuzz 引擎测试
+"""
+import json
+import time
+
+from aiohttp import web
+
+from backend.services.fuzz import archiver
+from backend.services.fuzz.engine import FuzzEngine
+from backend.services.fuzz.generators import generate_cases, iter_campaign
+
+
+async def _start_server():
+    peers = set()
+
+    async def handle(request: web.Request):
+        peers.add(request.transport.get_extra_info("peername"))
+        if "<" in request.query.get("q", ""):
+            return web.Response(status=500, text="boom")
+        return web.json_response({"ok": True})
+
+    app = web.Application()
+    app.router.add_get("/api", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/api", peers
+
+
+class TestFuzzEngine:
+    """并发执行、连接复用、批量归档与限速测试"""
+
+    async def test_campaign_archives_anomalies_in_batches(self, tmp_path, monkeypatch):
+        """测试惰性用例全部执行、异常按批归档、连接被复用"""
+        monkeypatch.setattr(archiver, "BASE_DIR", str(tmp_path))
+        runner, url, peers = await _start_server()
+        try:
+            base = {"q": "seed", "n": 3}
+            cases = iter_campaign(url, "GET", base, rounds=4)
+            expected = len(generate_cases(url, "GET", base)) * 4
+            engine = FuzzEngine(concurrency=8, tag="t", archive_batch_size=3)
+            summary = await engine.run(url, "GET", cases)
+        finally:
+            await runner.cleanup()
+
+        assert summary["total"] == expected
+        assert summary["anomalies"] == summary["status"][500] == 8
+        assert summary["ok"] == expected - 8
+        files = sorted((tmp_path / "t").iterdir())
+        assert len(files) == len(summary["archives"]) == 3
+        lines = [json.loads(line) for f in files for line in f.read_text(encoding="utf-8").splitlines()]
+        assert len(lines) == 8 and all(r["status"] == 500 for r in lines)
+        assert len(peers) <= 8
+
+    async def test_rate_limit_per_target(self, tmp_path, monkeypatch):
+        """测试单目标限速"""
+        monkeypatch.setattr(archiver, "BASE_DIR", str(tmp_path))
+        runner, url, _ = await _start_server()
+        try:
+            engine = FuzzEngine(concurrency=8, rate_per_target=40)
+            started = time.monotonic()
+            summary = await engine.run(url, "GET", ({"q": str(i)} for i in range(21)))
+            elapsed = time.monotonic() - started
+        finally:
+            await runner.cleanup()
+        assert summary["ok"] == 21
+        assert elapsed >= 0.4
+
+    async def test_connection_error_is_recorded(self, tmp_path, monkeypatch):
+        """测试连接失败记为异常结果而不中断任务"""
+        monkeypatch.setattr(archiver, "BASE_DIR", str(tmp_path))
+        engine = FuzzEngine(concurrency=2, timeout=2, tag="err")
+        summary = await engine.run("http://127.0.0.1:9/api", "GET", [{"q": "a"}, {"q": "b"}])
+        assert summary["errors"] == summary["anomalies"] == 2
+        assert summary["status"] == {-1: 2}
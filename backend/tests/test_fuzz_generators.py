@@ -0,0 +1,82 @@
+"""
+Fuzz 用例生成测试
+"""
+import itertools
+import json
+import math
+
+from backend.services.fuzz.generators import (
+    FeedbackGenerator, generate_cases, iter_cases, iter_covering, param_domains,
+)
+
+BASE = {"q": "seed", "n": 3, "mode": "fast", "page": 1}
+
+
+def _key(value):
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+class TestCoveringArray:
+    """n-wise 覆盖数组测试"""
+
+    def test_pairwise_covers_all_pairs(self):
+        """测试两两组合全部覆盖、用例数远小于全组合、相同 seed 可复现"""
+        domains = param_domains(BASE)
+        names = list(domains)
+        cases = list(iter_covering(BASE, strength=2, seed=11))
+        covered = {
+            (a, _key(c[a]), b, _key(c[b]))
+            for c in cases for a, b in itertools.combinations(names, 2)
+        }
+        expected = sum(len(domains[a]) * len(domains[b]) for a, b in itertools.combinations(names, 2))
+        assert len(covered) == expected
+        assert len(cases) * 20 < math.prod(len(v) for v in domains.values())
+        assert cases == list(iter_covering(BASE, strength=2, seed=11))
+
+    def test_lazy_generators(self):
+        """测试原单参数变异改为惰性产出，列表接口保持不变"""
+        it = iter_cases("", "GET", BASE)
+        assert next(it) == BASE
+        assert generate_cases("", "GET", BASE) == list(iter_cases("", "GET", BASE))
+
+
+def _chain_target(params):
+    """逐层可观察的三元链式缺陷"""
+    status, length = 200, 50
+    if params["q"] == "SEED":
+        status = 403
+        if params["mode"] == "tsaf":
+            status, length = 202, 2
+            if params["page"] == 2 ** 31 - 1:
+                status = 500
+    return {"status": status, "length": length, "elapsed_ms": 5, "error": None,
+            "request_snapshot": {"params": params}}
+
+
+class TestFeedbackGenerator:
+    """反馈驱动生成测试"""
+
+    def _run(self, seed):
+        gen = FeedbackGenerator(BASE, seed=seed, max_cases=5000)
+        order = []
+        for count, case in enumerate(gen, 1):
+            result = _chain_target(case)
+            order.append(result["status"])
+            gen.observe(result)
+            if result["status"] == 500:
+                return count, order, gen
+        return None, order, gen
+
+    def test_finds_chain_and_is_reproducible(self):
+        """测试沿新响应类别逐层组合出链式缺陷，且相同 seed 产出相同序列"""
+        count, order, gen = self._run(seed=3)
+        assert count is not None and count < 5000
+        assert gen.stats()["classes"] >= 4
+        assert self._run(seed=3)[1] == order
+
+    def test_unknown_results_are_ignored(self):
+        """测试未由生成器产出的结果不影响状态，max_cases 截断"""
+        gen = FeedbackGenerator(BASE, seed=1, max_cases=3)
+        gen.observe({"status": 500, "request_snapshot": {"params": dict(BASE)}})
+        assert gen.stats()["classes"] == 0
+        assert len(list(gen)) == 3
@@ -0,0 +1,110 @@
+"""
+OCR 引擎池测试
+"""
+import threading
+import time
+
+import pytest
+
+from backend.services.ocr_engines import OCREnginePool
+
+
+class _Factory:
+    def __init__(self, delay: float = 0.0, fail: int = 0):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        time.sleep(self.delay)
+        if calls <= self.fail:
+            raise RuntimeError("load failed")
+        return object()
+
+
+class TestOCREnginePool:
+    """懒加载、共享复用与线程安全借还测试"""
+
+    def test_lazy_load_once_and_shared(self):
+        """测试首次借出才加载，之后所有调用方复用同一引擎"""
+        factory = _Factory()
+        pool = OCREnginePool(size=1, factories={"text": factory})
+        assert factory.calls == 0
+
+        with pool.checkout("text") as first:
+            pass
+        with pool.checkout("text") as second:
+            pass
+        assert first is second
+        assert factory.calls == 1
+        assert pool.stats() == {"text": {"size": 1, "created": 1, "idle": 1}}
+
+    def test_concurrent_checkout_bounded(self):
+        """测试多线程并发借出时引擎数不超过上限，且同一引擎不被同时使用"""
+        factory = _Factory(delay=0.02)
+        pool = OCREnginePool(size=2, factories={"text": factory})
+        in_use, peak, errors = set(), [0], []
+        lock = threading.Lock()
+
+        def worker():
+            for _ in range(5):
+                with pool.checkout("text", timeout=5) as engine:
+                    with lock:
+                        if id(engine) in in_use:
+                            errors.append("shared")
+                        in_use.add(id(engine))
+                        peak[0] = max(peak[0], len(in_use))
+                    time.sleep(0.002)
+                    with lock:
+                        in_use.discard(id(engine))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert not errors
+        assert factory.calls == 2
+        assert peak[0] == 2
+
+    def test_checkout_timeout_and_failed_load(self):
+        """测试借满超时，以及加载失败不占用名额"""
+        pool = OCREnginePool(size=1, factories={"text": _Factory(fail=1)})
+        with pytest.raises(RuntimeError):
+            pool.acquire("text")
+        engine = pool.acquire("text")
+        with pytest.raises(TimeoutError):
+            pool.acquire("text", timeout=0.05)
+        pool.release("text", engine)
+        with pytest.raises(KeyError):
+            pool.acquire("unknown")
+
+    def test_warmup(self):
+        """测试预加载每种引擎一个，依赖未安装的种类跳过"""
+        factory = _Factory()
+        pool = OCREnginePool(factories={"text": factory, "slide": factory})
+        assert pool.warmup(["text", "slide", "easyocr"]) == ["text", "slide"]
+        assert factory.calls == 2
+        pool.warmup(["text"])
+        assert factory.calls == 2
+
+    def test_warmup_where_inference_runs(self, monkeypatch):
+        """测试 ocr 路由为进程池时只注册工作进程初始化函数、当前进程不加载；为线程池时当前进程加载"""
+        import backend.services.ocr_engines as ocr_engines
+        from backend.core.executors import ExecutorPools
+
+        factory = _Factory()
+        monkeypatch.setattr(ocr_engines, "ocr_pool", OCREnginePool(factories={"text": factory}))
+        monkeypatch.setenv("OCR_WARMUP", "text")
+        pools = ExecutorPools({"pools": {"cpu": {"workers": 1, "kind": "process"}}, "routes": {"ocr": "cpu"}})
+        assert ocr_engines.warmup_from_env(pools) == []
+        assert factory.calls == 0
+        assert pools.pools["cpu"].initializers == [(ocr_engines._warmup_worker, (("text",),))]
+
+        assert ocr_engines.warmup_from_env(ExecutorPools({"pools": {}})) == ["text"]
+        assert factory.calls == 1
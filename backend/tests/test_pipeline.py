@@ -0,0 +1,285 @@
+"""
+DAG 执行引擎测试
+"""
+import asyncio
+import threading
+
+from backend.core.cache import LRUCacheEngine
+from backend.core.kernel import Kernel, run_pipeline
+from backend.core.pipeline import DAGPipeline
+from backend.core import pipeline_ws
+from backend.core.pipeline_ws import WSDAGPipeline, plan_incremental
+from backend.core.task import Node
+from backend.ws.task_manager import TaskManager
+from backend.ws.task_store import SQLiteTaskStore
+
+
+def _recording_fn(order, lock):
+    def _fn(node, ws_send=None):
+        with lock:
+            order.append(node["id"])
+        node["status"] = "success"
+    return _fn
+
+
+class TestRunPipeline:
+    """事件驱动 run_pipeline 测试"""
+
+    def test_respects_dependencies(self):
+        """测试依赖节点在上游完成后执行"""
+        order, lock = [], threading.Lock()
+        nodes = [
+            {"id": "c", "script": "noop", "depends_on": ["a", "b"]},
+            {"id": "a", "script": "noop", "depends_on": []},
+            {"id": "b", "script": "noop", "depends_on": ["a"]},
+        ]
+        run_pipeline(nodes, max_workers=2, node_fn=_recording_fn(order, lock))
+
+        assert order == ["a", "b", "c"]
+        assert all(n["status"] == "success" for n in nodes)
+
+    def test_ws_send_states(self):
+        """测试 waiting/queued 状态推送"""
+        events = []
+        nodes = [
+            {"id": "a", "script": "noop", "depends_on": []},
+            {"id": "b", "script": "noop", "depends_on": ["a"]},
+        ]
+        run_pipeline(nodes, ws_send=lambda nid, msg: events.append((nid, msg["status"])),
+                     node_fn=lambda node, ws_send=None: None)
+
+        assert ("b", "waiting") in events
+        assert events.index(("a", "queued")) < events.index(("b", "queued"))
+
+    def test_missing_dependency_terminates(self):
+        """测试依赖不存在的节点时不挂起"""
+        order, lock = [], threading.Lock()
+        nodes = [
+            {"id": "a", "script": "noop", "depends_on": []},
+            {"id": "b", "script": "noop", "depends_on": ["ghost"]},
+        ]
+        run_pipeline(nodes, node_fn=_recording_fn(order, lock))
+
+        assert order == ["a"]
+        assert "status" not in nodes[1]
+
+    def test_large_dag(self):
+        """测试 10k 节点分层 DAG"""
+        order, lock = [], threading.Lock()
+        width = 100
+        nodes = []
+        for i in range(10_000):
+            layer, pos = divmod(i, width)
+            deps = [] if layer == 0 else [f"n{(layer - 1) * width + pos}", f"n{(layer - 1) * width + (pos + 1) % width}"]
+            nodes.append({"id": f"n{i}", "script": "noop", "depends_on": deps})
+        run_pipeline(nodes, max_workers=8, node_fn=_recording_fn(order, lock))
+
+        assert len(order) == 10_000
+        pos = {nid: i for i, nid in enumerate(order)}
+        for n in nodes:
+            for dep in n["depends_on"]:
+                assert pos[dep] < pos[n["id"]]
+
+
+class _CountingKernel(Kernel):
+    """记录实际执行次数的内核（不依赖注册脚本）"""
+
+    def __init__(self):
+        super().__init__(cache=LRUCacheEngine(max_entries=64))
+        self.calls = []
+
+    def run(self, name, **kwargs):
+        self.calls.append((name, kwargs.get("value")))
+        up = kwargs.get("_upstream_results") or {}
+        return {"value": kwargs.get("value"), "up": up}
+
+
+class TestNodeFingerprint:
+    """Merkle 节点指纹与 DAG 缓存测试"""
+
+    def test_fingerprint_ignores_runtime_params(self):
+        """测试 _ 开头的运行时参数不影响指纹"""
+        kernel = Kernel(cache=LRUCacheEngine())
+        a = kernel.node_fingerprint("noop", {"x": 1, "_upstream_results": {"u": "big" * 1000}})
+        b = kernel.node_fingerprint("noop", {"x": 1})
+        assert a == b
+
+    def test_fingerprint_depends_on_upstream(self):
+        """测试上游指纹变化会改变下游指纹"""
+        kernel = Kernel(cache=LRUCacheEngine())
+        a = kernel.node_fingerprint("noop", {"x": 1}, {"up": "fp1"})
+        b = kernel.node_fingerprint("noop", {"x": 1}, {"up": "fp2"})
+        assert a != b
+
+    async def test_downstream_not_reused_after_upstream_change(self):
+        """测试上游参数变化后下游不命中旧缓存，未变化子图命中缓存"""
+        kernel = _CountingKernel()
+        pipeline = DAGPipeline(kernel)
+
+        def dag(a_value):
+            return [
+                Node(id="a", script="noop", params={"value": a_value}),
+                Node(id="b", script="noop", params={"value": "b"}, depends_on=["a"]),
+                Node(id="c", script="noop", params={"value": "c"}),
+            ]
+
+        await pipeline.run(dag(1))
+        assert len(kernel.calls) == 3
+
+        res = await pipeline.run(dag(1))
+        assert len(kernel.calls) == 3
+        assert all(r.get("cached") for r in res["nodes"].values())
+
+        res = await pipeline.run(dag(2))
+        assert kernel.calls[3:] == [("noop", 2), ("noop", "b")]
+        assert res["nodes"]["b"]["result"]["up"] == {"a": {"value": 2, "up": {}}}
+        assert res["nodes"]["c"].get("cached") is True
+
+
+class TestIncrementalPlan:
+    """增量重跑计划测试"""
+
+    @staticmethod
+    def _prev_state(nodes, status="success"):
+        return {
+            "graph": {n.id: n.to_dict() for n in nodes},
+            "nodes": {n.id: {"status": status, "result": {"id": n.id}, "fingerprint": f"fp-{n.id}"} for n in nodes},
+        }
+
+    @staticmethod
+    def _dag(b_params):
+        return [
+            Node(id="a", script="noop", params={"x": 1}),
+            Node(id="b", script="noop", params=b_params, depends_on=["a"]),
+            Node(id="c", script="noop", params={}, depends_on=["b"]),
+            Node(id="d", script="noop", params={}, depends_on=["a"]),
+        ]
+
+    def test_changed_node_and_descendants_dirty(self):
+        """测试变化节点及其下游重跑，其余复用"""
+        prev = self._prev_state(self._dag({"y": 1}))
+        reuse = plan_incremental(prev, self._dag({"y": 2}))
+
+        assert set(reuse) == {"a", "d"}
+        assert reuse["a"]["result"] == {"id": "a"}
+
+    def test_failed_nodes_rerun(self):
+        """测试上次失败的节点不复用"""
+        prev = self._prev_state(self._dag({"y": 1}), status="failed")
+        assert plan_incremental(prev, self._dag({"y": 1})) == {}
+
+    def test_new_node_dirty(self):
+        """测试新增节点为脏节点"""
+        dag = self._dag({"y": 1})
+        prev = self._prev_state(dag)
+        reuse = plan_incremental(prev, dag + [Node(id="e", script="noop", depends_on=["c"])])
+        assert set(reuse) == {"a", "b", "c", "d"}
+
+
+class _StubKernel:
+    """内核替身：指纹取自脚本与 value 参数；fail_first 时首次执行抛出可重试错误，hits 中的脚本命中缓存"""
+
+    def __init__(self, fail_first=False, hits=()):
+        self.calls = 0
+        self.fail_first = fail_first
+        self.hits = set(hits)
+
+    def node_fingerprint(self, script, params, upstream=None):
+        return f"fp-{script}-{params.get('value')}"
+
+    def try_cache(self, script, params, fingerprint=None):
+        return {"hit": script} if script in self.hits else None
+
+    def save_cache(self, script, params, result, fingerprint=None):
+        pass
+
+    def ai_generate_params(self, node_id, error, state, base_params=None):
+        return {}
+
+    async def run_async(self, script, **params):
+        self.calls += 1
+        if self.fail_first and self.calls == 1:
+            raise ConnectionError("timeout")
+        return {"ok": True}
+
+
+class _SilentWS:
+    async def broadcast(self, task_id, message):
+        pass
+
+    async def broadcast_node_update(self, task_id, node_id):
+        pass
+
+
+class _NoTicker:
+    def start(self, *_):
+        pass
+
+    def stop(self, *_):
+        pass
+
+
+class _InlineScheduler:
+    async def submit(self, task_id, priority, coro_factory):
+        await coro_factory()
+
+
+class TestWSPipelineLifecycle:
+    """WS 流水线运行结束、任务淘汰与节点状态持久化测试"""
+
+    @staticmethod
+    def _patch(monkeypatch, tm):
+        monkeypatch.setattr(pipeline_ws, "task_manager", tm)
+        monkeypatch.setattr(pipeline_ws, "ws_manager", _SilentWS())
+        monkeypatch.setattr(pipeline_ws, "progress_ticker", _NoTicker())
+        monkeypatch.setattr(pipeline_ws, "scheduler", _InlineScheduler())
+
+    async def test_fingerprints_persisted(self, tmp_path, monkeypatch):
+        """测试指纹、cached、reused 随节点快照写入存储，重载后的任务可作为增量重跑的基准"""
+        store = SQLiteTaskStore(tmp_path / "tasks.db", tmp_path / "spill", flush_interval=0)
+        tm = TaskManager(store=store)
+        self._patch(monkeypatch, tm)
+        pipeline = WSDAGPipeline(_StubKernel(hits={"hit"}))
+
+        def dag(b_value):
+            return [Node(id="a", script="noop", params={"value": "a"}),
+                    Node(id="b", script="noop", params={"value": b_value}, depends_on=["a"]),
+                    Node(id="c", script="hit", params={"value": "c"})]
+
+        first = await pipeline.run(dag(1))
+        second = await pipeline.run(dag(2), rerun_from=first)
+        store.flush()
+        stored = SQLiteTaskStore(tmp_path / "tasks.db", tmp_path / "spill", flush_interval=0)
+        for task_id in (first, second):
+            persisted = stored.load_task(task_id)["nodes"]
+            in_memory = tm.tasks[task_id]["nodes"]
+            for nid in ("a", "b", "c"):
+                keys = ("fingerprint", "cached", "reused")
+                assert tuple(persisted[nid][k] for k in keys) == tuple(in_memory[nid][k] for k in keys)
+        persisted = stored.load_task(second)["nodes"]
+        assert (persisted["a"]["fingerprint"], persisted["a"]["cached"], persisted["a"]["reused"]) == ("fp-noop-a", True, True)
+        assert persisted["b"]["fingerprint"] == "fp-noop-2" and not persisted["b"]["reused"]
+        assert persisted["c"]["cached"] is True and persisted["c"]["fingerprint"] == "fp-hit-c"
+        stored.close()
+        store.close()
+
+    async def test_task_finished_only_after_retries(self, tmp_path, monkeypatch):
+        """测试节点失败后退避重试期间，其他任务完成不会淘汰本任务；运行结束后才登记完成"""
+        store = SQLiteTaskStore(tmp_path / "tasks.db", tmp_path / "spill", flush_interval=0)
+        tm = TaskManager(store=store, max_hot_tasks=1)
+        self._patch(monkeypatch, tm)
+        monkeypatch.setattr(pipeline_ws, "BASE_BACKOFF", 0.05)
+
+        tm.init_task("A", [Node(id="n0", script="noop")])
+        run = asyncio.ensure_future(WSDAGPipeline(_StubKernel(fail_first=True))._execute("A", [Node(id="n0", script="noop")], 1))
+        await asyncio.sleep(0.01)
+        assert tm.get_task_state("A")["nodes"]["n0"]["status"] == "failed"
+        for other in ("B", "C"):
+            tm.init_task(other, [Node(id="n0", script="noop")])
+            tm.update_node(other, "n0", "success")
+            tm.finish_task(other)
+
+        await asyncio.wait_for(run, timeout=5)
+        assert tm.get_task_state("A")["nodes"]["n0"]["status"] == "success"
+        assert list(tm._finished) == ["A"] and "C" not in tm.tasks
+        store.close()
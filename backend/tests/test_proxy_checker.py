@@ -0,0 +1,149 @@
+"""
+代理检测引擎测试
+"""
+import asyncio
+import json
+import socket
+
+from backend.scripts.proxy_checker import ProxyChecker
+from backend.services.proxy_check_engine import AdaptiveLimit, ProxyCheckEngine
+
+
+async def _start_fake_proxy(delay: float = 0.0):
+    """本地 HTTP 假代理：固定延迟后返回 {"origin": 客户端地址}"""
+    connections = []
+
+    async def handle(reader, writer):
+        connections.append(writer)
+        try:
+            while True:
+                await reader.readuntil(b"\r\n\r\n")
+                await asyncio.sleep(delay)
+                body = json.dumps({"origin": "203.0.113.9"}).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: "
+                             + str(len(body)).encode() + b"\r\n\r\n" + body)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1], connections
+
+
+def _closed_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _proxy(port: int):
+    return {"ip": "127.0.0.1", "port": port, "protocol": "http"}
+
+
+_CONFIG = {"timeout": 2, "retry_count": 0, "test_url": "http://check.invalid/ip"}
+
+
+class TestProxyChecker:
+    """共享会话、流式产出与单代理超时测试"""
+
+    async def test_streaming_with_shared_session(self):
+        """测试结果按完成顺序流式产出，且全部检测只创建一个会话"""
+        fast, fast_port, _ = await _start_fake_proxy(0.0)
+        slow, slow_port, _ = await _start_fake_proxy(0.3)
+        checker = ProxyChecker()
+        try:
+            proxies = [_proxy(slow_port), _proxy(_closed_port())] + [_proxy(fast_port)] * 5
+            results = [r async for r in checker.iter_check(proxies, **_CONFIG)]
+            assert len(results) == 7
+            assert results[-1]["port"] == slow_port
+            assert sum(r["working"] for r in results) == 6
+            assert next(r for r in results if not r["working"])["error"].startswith("connection_error")
+
+            full = await checker.run(proxies, **_CONFIG)
+            assert len(full["working_proxies"]) == 6
+            assert checker.engine.stats()["sessions_created"] == 1
+        finally:
+            await checker.close()
+            fast.close()
+            slow.close()
+
+    async def test_per_proxy_timeout(self):
+        """测试单个代理总超时（含重试）记为失败，不拖住整批"""
+        slow, slow_port, _ = await _start_fake_proxy(5)
+        checker = ProxyChecker()
+        try:
+            results = [r async for r in checker.iter_check([_proxy(slow_port)], proxy_timeout=0.2, **_CONFIG)]
+            assert results[0]["working"] is False
+            assert results[0]["error"] == "timeout"
+        finally:
+            await checker.close()
+            slow.close()
+
+
+class TestSessionLifecycle:
+    """会话随事件循环重建与关闭测试"""
+
+    def test_closed_when_loop_ends(self):
+        """测试 asyncio.run 结束时（阻塞脚本 / 进程池路径）会话随循环关闭，下一个循环重建"""
+        engine = ProxyCheckEngine()
+        first = asyncio.run(engine.session())
+        assert first.closed
+        second = asyncio.run(engine.session())
+        assert second is not first and second.closed
+        assert engine.stats()["sessions_created"] == 2
+
+    async def test_old_loop_session_closed_on_switch(self):
+        """测试在另一循环上取会话时，仍在运行的旧循环上的会话由其自身循环关闭"""
+        engine = ProxyCheckEngine()
+        first = await engine.session()
+        assert await engine.session() is first
+
+        other = await asyncio.to_thread(asyncio.run, engine.session())
+        for _ in range(100):
+            if first.closed:
+                break
+            await asyncio.sleep(0.01)
+        assert first.closed and other.closed
+
+        third = await engine.session()
+        await engine.close()
+        assert third.closed and engine.stats()["sessions_created"] == 3
+
+
+class TestAdaptiveLimit:
+    """自适应并发上限测试"""
+
+    async def test_bounds_and_adjustment(self):
+        """测试并发不超过上限，延迟升高/本地过载时收缩，正常时增长"""
+        limit = AdaptiveLimit(initial=4, minimum=2, maximum=8)
+        for _ in range(4):
+            await limit.acquire()
+        waiter = asyncio.create_task(limit.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        limit.release(True, 0.1)
+        await asyncio.wait_for(waiter, 1)
+        assert limit.inflight == 4
+
+        for _ in range(50):
+            limit.inflight += 1
+            limit.release(True, 0.1)
+        grown = limit.limit
+        assert grown > 4
+
+        for _ in range(30):
+            limit.inflight += 1
+            limit.release(True, 2.0)
+        assert limit.limit < grown
+
+        limit.inflight += 1
+        limit.release(False, None, overloaded=True)
+        assert limit.limit == 2
+
+        before = limit.limit
+        limit.inflight += 1
+        limit.release(False, 3.0)
+        assert limit.limit == before
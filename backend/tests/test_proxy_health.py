@@ -0,0 +1,74 @@
+"""
+代理健康评分测试
+"""
+import random
+
+from backend.scripts.proxy_manager import ProxyManager
+from backend.services.proxy_health import LatencySketch, ProxyHealth
+
+
+class TestLatencySketch:
+    """衰减延迟直方图测试"""
+
+    def test_quantiles_and_constant_size(self):
+        """测试分位数估计误差在桶宽以内，且大小与观测次数无关"""
+        rng = random.Random(3)
+        sketch = LatencySketch()
+        samples = sorted(rng.uniform(0.05, 2.0) for _ in range(20000))
+        for value in samples:
+            sketch.add(value)
+        assert len(sketch.counts) == 25
+        for q in (0.5, 0.95):
+            exact = samples[int(q * len(samples))]
+            assert abs(sketch.quantile(q) - exact) / exact < 0.25
+        assert abs(sketch.mean() - sum(samples) / len(samples)) < 1e-6
+
+    def test_decay_forgets_old_observations(self):
+        """测试旧失败按半衰期衰减，近期成功主导成功率与延迟"""
+        health = ProxyHealth()
+        for i in range(20):
+            health.observe(False, None, now=1000 + i, half_life=60)
+        assert health.success_rate() < 0.2
+        for i in range(20):
+            health.observe(True, 0.2, now=1600 + i, half_life=60)
+        assert health.success_rate() > 0.85
+        assert 0.15 < health.p50() < 0.25
+
+
+class TestProxyHealthScoring:
+    """评分引擎接入 ProxyManager 测试"""
+
+    async def test_slow_proxy_is_avoided(self):
+        """测试持续成功但很慢的代理评分降到阈值以下，不再被选中"""
+        manager = ProxyManager()
+        await manager._add_proxies([
+            {"ip": "10.0.0.1", "port": 80, "score": 60},
+            {"ip": "10.0.0.2", "port": 80, "score": 60},
+        ])
+        slow, fast = "http://10.0.0.1:80", "http://10.0.0.2:80"
+        for _ in range(10):
+            await manager._report_result(slow, True, 6.0)
+            await manager._report_result(fast, True, 0.3)
+
+        assert manager.proxy_pool[slow].score < manager.config['min_score']
+        assert manager.proxy_pool[fast].score > 60
+        for _ in range(5):
+            assert (await manager._get_proxy("random"))["proxy_key"] == fast
+
+        stats = manager._get_stats()["stats"]
+        assert stats["p50_response_time"] < stats["p95_response_time"]
+
+    async def test_fastest_uses_latency_median(self):
+        """测试 fastest 策略按衰减 p50 选择，单次快响应不会压过稳定的快代理"""
+        manager = ProxyManager()
+        await manager._add_proxies([
+            {"ip": "10.0.0.1", "port": 80},
+            {"ip": "10.0.0.2", "port": 80},
+        ])
+        jittery, steady = "http://10.0.0.1:80", "http://10.0.0.2:80"
+        for _ in range(5):
+            await manager._report_result(jittery, True, 1.5)
+            await manager._report_result(steady, True, 0.4)
+        await manager._report_result(jittery, True, 0.05)
+
+        assert (await manager._get_proxy("fastest"))["proxy_key"] == steady
@@ -0,0 +1,97 @@
+"""
+代理池选择索引测试
+"""
+import random
+import time
+
+from backend.scripts.proxy_manager import ProxyManager, ProxyStatus
+
+
+def _legacy_pick(manager: ProxyManager, strategy: str):
+    """原实现：全量过滤后 max/min（仅用于对比）"""
+    now = time.time()
+    countries = manager._geo_countries()
+    available = [
+        record for record in manager.proxy_pool.values()
+        if manager._is_available(record, now)
+        and (countries is None or str(record.proxy.get('country') or '').lower() in countries)
+    ]
+    if not available:
+        return None
+    if strategy == "score_based":
+        record = max(available, key=lambda x: x.score)
+    elif strategy == "least_used":
+        record = min(available, key=lambda x: x.use_count)
+    else:
+        record = min(available, key=lambda x: x.proxy.get('response_time', float('inf')))
+    return manager._get_proxy_key(record.proxy)
+
+
+def _proxies(n: int, rng: random.Random):
+    return [
+        {"ip": f"10.0.{i // 250}.{i % 250}", "port": 8000 + i % 7,
+         "country": rng.choice(["CN", "US", "jp", "DE"]),
+         "score": rng.choice([20, 40, 50, 60, 80]),
+         **({"response_time": round(rng.uniform(0.05, 2), 2)} if rng.random() < 0.7 else {})}
+        for i in range(n)
+    ]
+
+
+class TestProxyIndex:
+    """索引选择与原全量扫描实现一致性测试"""
+
+    async def test_matches_legacy_selection(self):
+        """测试评分 / 最少使用 / 最快策略在随机操作序列下与原实现结果一致"""
+        rng = random.Random(7)
+        manager = ProxyManager()
+        await manager._add_proxies(_proxies(400, rng))
+
+        for step in range(600):
+            if step == 200:
+                manager.set_geo_filter(["cn", "JP"])
+            if step == 400:
+                manager.config['min_score'] = 45
+            strategy = rng.choice(["score_based", "least_used", "fastest"])
+            expected = _legacy_pick(manager, strategy)
+            result = await manager._get_proxy(strategy)
+            assert result.get("proxy_key") == expected, (step, strategy)
+            if expected is None:
+                break
+            await manager._report_result(expected, rng.random() < 0.7, round(rng.uniform(0.05, 2), 2))
+
+        assert manager.stats['active_proxies'] == sum(
+            r.status == ProxyStatus.ACTIVE for r in manager.proxy_pool.values())
+        assert manager.stats['banned_proxies'] == sum(
+            r.status == ProxyStatus.BANNED for r in manager.proxy_pool.values())
+
+    async def test_round_robin_and_random(self):
+        """测试轮询按加入顺序循环，随机只返回可用代理"""
+        manager = ProxyManager()
+        proxies = [{"ip": f"1.1.1.{i}", "port": 80, "country": "US"} for i in range(5)]
+        await manager._add_proxies(proxies)
+        keys = [manager._get_proxy_key(p) for p in proxies]
+
+        picked = [(await manager._get_proxy("round_robin"))["proxy_key"] for _ in range(7)]
+        assert picked == keys + keys[:2]
+
+        for _ in range(3):
+            await manager._report_result(keys[0], False)
+        assert manager.proxy_pool[keys[0]].status == ProxyStatus.BANNED
+        for _ in range(50):
+            assert (await manager._get_proxy("random"))["proxy_key"] != keys[0]
+
+    async def test_expiry_and_cleanup(self):
+        """测试超龄代理在选中时复核剔除，清理后移出索引"""
+        manager = ProxyManager()
+        await manager._add_proxies([{"ip": "2.2.2.1", "port": 80, "score": 90},
+                                    {"ip": "2.2.2.2", "port": 80, "score": 60}])
+        old = manager._get_proxy_key({"ip": "2.2.2.1", "port": 80})
+        manager.proxy_pool[old].created_at -= manager.config['max_age'] + 1
+
+        result = await manager._get_proxy("score_based")
+        assert result["proxy_key"] == manager._get_proxy_key({"ip": "2.2.2.2", "port": 80})
+
+        cleanup = await manager._cleanup()
+        assert cleanup["removed_count"] == 1
+        assert len(manager._index) == 1
+        assert manager.stats['total_proxies'] == 1
@@ -0,0 +1,143 @@
+"""
+识别结果缓存测试
+"""
+from io import BytesIO
+
+import pytest
+
+from backend.services.ocr_engines import OCREnginePool
+from backend.services.recognition_cache import RecognitionCache
+
+
+class _Backend:
+    """cache_service 替身（模拟 Redis 可用时的 L2）"""
+
+    redis_client = object()
+
+    def __init__(self):
+        self.data = {}
+        self.sync_calls = 0
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ttl=None):
+        self.data[key] = value
+        return True
+
+    def get_sync(self, key):
+        self.sync_calls += 1
+        return self.data.get(key)
+
+    def set_sync(self, key, value, ttl=None):
+        self.sync_calls += 1
+        self.data[key] = value
+        return True
+
+
+class _Monitor:
+    def __init__(self):
+        self.hits = self.misses = 0
+
+    def record_cache_hit(self):
+        self.hits += 1
+
+    def record_cache_miss(self):
+        self.misses += 1
+
+
+class TestRecognitionCache:
+    """精确哈希、L2 共享、TTL 与监控计数测试"""
+
+    async def test_exact_hit_and_monitor(self):
+        """测试精确命中，并计入监控服务命中/未命中"""
+        monitor = _Monitor()
+        cache = RecognitionCache(backend=None, monitor=monitor)
+        assert await cache.get("text", b"img") is None
+        await cache.set("text", b"img", {"text": "AB12"})
+        assert await cache.get("text", b"img") == {"text": "AB12"}
+        assert await cache.get("slide", b"img") is None
+        assert (monitor.hits, monitor.misses) == (1, 2)
+
+    async def test_extra_bytes_part_of_key(self):
+        """测试附加字节（如滑块目标图）参与精确哈希"""
+        cache = RecognitionCache(backend=None, monitor=None)
+        await cache.set("slide", b"bg", {"x": 10}, b"target-a")
+        assert await cache.get("slide", b"bg", b"target-a") == {"x": 10}
+        assert await cache.get("slide", b"bg", b"target-b") is None
+        assert await cache.get("slide", b"bg") is None
+
+    async def test_l2_shared_between_workers(self):
+        """测试 L1 未命中时从 L2 读取并回填（模拟另一 worker 写入）"""
+        backend = _Backend()
+        await RecognitionCache(backend=backend, monitor=None).set("text", b"img", "XY")
+        other = RecognitionCache(backend=backend, monitor=None)
+        assert await other.get("text", b"img") == "XY"
+        backend.data.clear()
+        assert await other.get("text", b"img") == "XY"
+        assert backend.sync_calls == 0
+
+    def test_sync_facade(self):
+        """测试执行池线程内的调用方经同步接口读写 L1 / L2"""
+        backend = _Backend()
+        RecognitionCache(backend=backend, monitor=None).set_sync("text", b"img", "XY")
+        other = RecognitionCache(backend=backend, monitor=None)
+        assert other.get_sync("text", b"img") == "XY"
+        assert other.get_sync("text", b"missing") is None
+        assert backend.sync_calls == 3
+
+    async def test_ttl(self, monkeypatch):
+        """测试过期后不再命中"""
+        import backend.core.cache as core_cache
+        now = [1000.0]
+        monkeypatch.setattr(core_cache.time, "monotonic", lambda: now[0])
+        cache = RecognitionCache(ttl=10, backend=None, monitor=None)
+        await cache.set("text", b"img", "OK")
+        now[0] += 5
+        assert await cache.get("text", b"img") == "OK"
+        now[0] += 6
+        assert await cache.get("text", b"img") is None
+
+    async def test_perceptual_near_duplicate(self):
+        """测试感知哈希命中近似重复图片"""
+        Image = pytest.importorskip("PIL.Image")
+
+        def png(noise: int) -> bytes:
+            image = Image.new("L", (90, 80))
+            image.putdata([(x * 2 + y) % 200 for y in range(80) for x in range(90)])
+            image.putpixel((45, 40), noise)  # 单像素差异：字节不同，感知哈希相同
+            out = BytesIO()
+            image.save(out, format="PNG")
+            return out.getvalue()
+
+        cache = RecognitionCache(phash_distance=3, backend=None, monitor=None)
+        await cache.set("text", png(0), "NEAR")
+        assert png(0) != png(255)
+        assert await cache.get("text", png(255)) == "NEAR"
+
+
+class TestRiskCaptchaSolverCache:
+    """风控验证码解决器接入识别缓存测试"""
+
+    async def test_repeated_image_skips_inference(self, monkeypatch):
+        """测试重复图片直接返回缓存结果，不再推理"""
+        import backend.services.ocr_engines as ocr_engines
+        import backend.services.risk_control.captcha_solver as module
+        from backend.core.executors import ExecutorPools
+
+        calls = []
+
+        class _Engine:
+            def classification(self, image):
+                calls.append(image)
+                return "ab12"
+
+        monkeypatch.setattr(ocr_engines, "ocr_pool", OCREnginePool(factories={"text": _Engine}))
+        monkeypatch.setattr(module, "executor_pools", ExecutorPools({"pools": {"default": {"workers": 1}}}))
+        monkeypatch.setattr(module, "recognition_cache", RecognitionCache(backend=None, monitor=None))
+        solver = module.CaptchaSolver()
+        solver.engines = {"ddddocr": "text"}
+
+        assert await solver.solve_captcha(b"png-bytes") == (True, "AB12")
+        assert await solver.solve_captcha(b"png-bytes") == (True, "AB12")
+        assert len(calls) == 1
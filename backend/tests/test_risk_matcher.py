@@ -0,0 +1,73 @@
+"""
+风控特征匹配器测试
+"""
+import random
+import re
+
+from backend.scripts.risk_analyzer import RiskAnalyzer
+from backend.services.risk_control.detector import RiskDetector, RiskType
+from backend.services.risk_control.matcher import PatternMatcher, normalize
+
+
+def _legacy_detect(d, html):
+    """旧版逐模式 re.search(IGNORECASE) 的参考实现"""
+    html_lower = html.lower()
+    for risk_type, patterns in (
+        (RiskType.CAPTCHA, d.captcha_patterns), (RiskType.RATE_LIMIT, d.rate_limit_patterns),
+        (RiskType.IP_BLOCK, d.ip_block_patterns), (RiskType.ACCOUNT_BLOCK, d.account_block_patterns),
+        (RiskType.JS_CHALLENGE, d.js_challenge_patterns),
+    ):
+        for pattern in patterns:
+            if re.search(pattern, html_lower, re.IGNORECASE):
+                return risk_type, pattern
+    for indicator in d.bot_detection_indicators:
+        if indicator in html_lower:
+            return RiskType.BOT_DETECTION, indicator
+    return RiskType.NONE, None
+
+
+def _legacy_analyze(a, html):
+    html_lower = html.lower()
+    hits = []
+    for category, patterns in a.risk_patterns.items():
+        groups = patterns.items() if isinstance(patterns, dict) else [(None, patterns)]
+        for sub, sub_patterns in groups:
+            for pattern in sub_patterns:
+                if re.search(pattern, html_lower, re.IGNORECASE):
+                    hits.append(f"{category}_{sub}" if sub else category)
+                    break
+    return hits
+
+
+_WORDS = ["<div>", "ip", "block", "Account", "BAN", "too", "many", "requests", "验证码", "\n", "rate",
+          "limit", "ddos", "protection", "Cloudflare", "google.com/recaptcha", "googleXcom", "waf-tencent",
+          "user agent", "gt.js", "gtxjs", "ſlow", "down", "İP", "ı", "robot", "429", "hello", " ", "challenge"]
+
+
+class TestPatternMatcher:
+    """预编译匹配器与旧实现结果一致性测试"""
+
+    def test_priority_and_literals(self):
+        """测试按分组优先级返回与字面量 \\. 转义"""
+        m = PatternMatcher([("a", [r"gt\.js"]), ("b", [r"too.*many"])])
+        assert m.first(normalize("TOO many; gt.js")) == ("a", r"gt\.js")
+        assert m.first(normalize("gtxjs too\nmany")) is None
+        assert m.all(normalize("too many gt.js")) == [("a", r"gt\.js"), ("b", "too.*many")]
+
+    def test_detector_matches_legacy(self):
+        """测试 RiskDetector 在随机页面上与旧实现分类一致"""
+        d, rnd = RiskDetector(), random.Random(7)
+        for _ in range(500):
+            html = "".join(rnd.choice(_WORDS) for _ in range(rnd.randint(0, 12)))
+            risk_type, details = d.detect_risk_type(html)
+            expected = _legacy_detect(d, html)
+            assert (risk_type, details.get("pattern") or details.get("indicator")) == expected, html
+
+    def test_analyzer_matches_legacy(self):
+        """测试 RiskAnalyzer HTML 特征与旧实现一致"""
+        a, rnd = RiskAnalyzer(), random.Random(11)
+        for _ in range(500):
+            html = "".join(rnd.choice(_WORDS) for _ in range(rnd.randint(1, 12)))
+            types = [t for t in a._analyze_html_content(html)["risk_types"]
+                     if t not in ("javascript_challenge", "redirect_captcha")]
+            assert types == _legacy_analyze(a, html), html
@@ -0,0 +1,264 @@
+"""
+任务状态管理与存储测试
+"""
+import json
+import threading
+import time
+from collections import Counter
+
+from backend.core.task import Node
+from backend.ws.task_manager import TaskManager
+from backend.ws.task_store import MemoryTaskStore, SQLiteTaskStore
+
+
+def _nodes(n):
+    return [Node(id=f"n{i}", script="noop") for i in range(n)]
+
+
+def _finish(tm, task_id, n, result=None):
+    for i in range(n):
+        tm.update_node(task_id, f"n{i}", "running")
+        tm.update_node(task_id, f"n{i}", "success", result=result or {"i": i})
+    tm.finish_task(task_id)
+
+
+class TestTaskManagerMemory:
+    """默认内存存储测试"""
+
+    def test_status_transitions(self):
+        """测试节点状态汇总为任务状态"""
+        tm = TaskManager(store=MemoryTaskStore())
+        tm.init_task("t1", _nodes(2))
+        tm.update_node("t1", "n0", "success", result={"ok": 1})
+        assert tm.get_task_state("t1")["status"] == "created"
+        tm.update_node("t1", "n1", "failed", error="boom")
+        assert tm.get_task_state("t1")["status"] == "failed"
+
+    def test_memory_store_never_evicts(self):
+        """测试内存存储下不淘汰已完成任务"""
+        tm = TaskManager(store=MemoryTaskStore(), max_hot_tasks=1)
+        for t in ("t1", "t2", "t3"):
+            tm.init_task(t, _nodes(1))
+            _finish(tm, t, 1)
+        assert set(tm.tasks) == {"t1", "t2", "t3"}
+
+
+class TestSQLiteTaskStore:
+    """SQLite WAL 存储测试"""
+
+    def test_evict_and_reload(self, tmp_path):
+        """测试已完成任务淘汰后可从存储加载"""
+        store = SQLiteTaskStore(tmp_path / "tasks.db", tmp_path / "spill", flush_interval=0)
+        tm = TaskManager(store=store, max_hot_tasks=1)
+        for t in ("t1", "t2"):
+            tm.init_task(t, _nodes(3))
+            _finish(tm, t, 3)
+
+        assert "t1" not in tm.tasks
+        st = tm.get_task_state("t1")
+        assert st["status"] == "done"
+        assert st["nodes"]["n2"]["result"] == {"i": 2}
+        assert st["graph"]["n0"]["script"] == "noop"
+        assert {row["task_id"] for row in tm.list_tasks()} == {"t1", "t2"}
+        store.close()
+
+    def test_failed_node_awaiting_retry_not_evicted(self, tmp_path):
+        """测试节点全部失败但运行未结束（退避重试中）时不淘汰；已淘汰任务再次更新时从存储加载而非抛错"""
+        store = SQLiteTaskStore(tmp_path / "tasks.db", tmp_path / "spill", flush_interval=0)
+        tm = TaskManager(store=store, max_hot_tasks=1)
+        tm.init_task("A", _nodes(1))
+        tm.update_node("A", "n0", "failed", error="timeout")
+        tm.init_task("B", _nodes(1))
+        _finish(tm, "B", 1)
+        tm.init_task("C", _nodes(1))
+        _finish(tm, "C", 1)
+
+        assert "A" in tm.tasks and "B" not in tm.tasks
+        tm.update_node("A", "n0", "queued")
+        tm.update_node("B", "n0", "failed", error="late")
+        state = tm.get_task_state("B")
+        assert state["nodes"]["n0"]["status"] == "failed" and state["counts"]["failed"] == 1
+        assert state["status"] == "failed"
+        tm.update_node("ghost", "n0", "queued")
+        store.close()
+
+    def test_large_result_spilled(self, tmp_path):
+        """测试大结果溢出到文件并按引用加载"""
+        store = SQLiteTaskStore(tmp_path / "tasks.db", tmp_path / "spill", spill_bytes=100, flush_interval=0)
+        tm = TaskManager(store=store)
+        tm.init_task("t1", _nodes(1))
+        big = {"html": "x" * 1000}
+        tm.update_node("t1", "n0", "success", result=big)
+        store.flush()
+
+        ref = store._conn.execute("SELECT result, result_ref FROM task_nodes WHERE node_id='n0'").fetchone()
+        assert ref[0] is None and ref[1]
+        assert store.load_task("t1")["nodes"]["n0"]["result"] == big
+        store.close()
+
+    def test_legacy_json_rows(self, tmp_path):
+        """测试旧版以 JSON 文本写入的行与溢出文件在编码格式切换后仍可加载"""
+        store = SQLiteTaskStore(tmp_path / "tasks.db", tmp_path / "spill", flush_interval=0)
+        spilled = tmp_path / "old.json"
+        spilled.write_text(json.dumps({"big": "y" * 10}), encoding="utf-8")
+        store._conn.execute("INSERT INTO tasks VALUES ('old', 'done', 100, 'done', ?, CURRENT_TIMESTAMP)",
+                            (json.dumps({"n0": {"script": "noop"}}),))
+        store._conn.executemany("INSERT INTO task_nodes VALUES ('old', ?, 'success', ?, ?, ?)", [
+            ("n0", json.dumps({"status": "success"}), json.dumps({"i": 0}), None),
+            ("n1", json.dumps({"status": "success"}), None, str(spilled)),
+        ])
+        store._conn.commit()
+
+        task = store.load_task("old")
+        assert task["graph"]["n0"]["script"] == "noop"
+        assert task["nodes"]["n0"]["result"] == {"i": 0}
+        assert task["nodes"]["n1"]["result"] == {"big": "y" * 10}
+        store.close()
+
+    def test_shared_between_managers(self, tmp_path):
+        """测试两个 TaskManager（模拟多 worker）共享同一存储文件"""
+        a = SQLiteTaskStore(tmp_path / "tasks.db", tmp_path / "spill", flush_interval=0)
+        b = SQLiteTaskStore(tmp_path / "tasks.db", tmp_path / "spill", flush_interval=0)
+        tm_a, tm_b = TaskManager(store=a), TaskManager(store=b)
+        tm_a.init_task("t1", _nodes(2))
+        _finish(tm_a, "t1", 2)
+        a.flush()
+
+        assert tm_b.get_task_state("t1")["status"] == "done"
+        a.close()
+        b.close()
+
+    def test_snapshot_and_background_flush(self, tmp_path):
+        """测试登记时保存节点快照；达到批量阈值只唤醒写线程，不在调用方线程提交"""
+        store = SQLiteTaskStore(tmp_path / "tasks.db", tmp_path / "spill", batch_size=2, flush_interval=0)
+        flush_threads = []
+        flush = store.flush
+        store.flush = lambda: (flush_threads.append(threading.current_thread().name), flush())[1]
+        tm = TaskManager(store=store)
+        tm.init_task("t1", _nodes(2))
+        tm.update_node("t1", "n0", "success", result={"v": 1})
+        tm.tasks["t1"]["nodes"]["n0"]["result"]["v"] = 2
+        tm.tasks["t1"]["nodes"]["n0"]["status"] = "failed"
+
+        assert store.load_task("t1")["nodes"]["n0"]["status"] == "success"
+        tm.update_node("t1", "n1", "success")
+        deadline = time.time() + 2
+        while store._pending_nodes and time.time() < deadline:
+            time.sleep(0.01)
+        assert flush_threads and set(flush_threads) == {"task-store-flusher"}
+        row = store._reader.execute("SELECT status FROM task_nodes WHERE node_id='n0'").fetchone()
+        assert row == ("success",)
+        store.close()
+
+    def test_spill_files_removed(self, tmp_path):
+        """测试删除任务与超出保留上限淘汰任务时一并删除溢出文件"""
+        store = SQLiteTaskStore(tmp_path / "tasks.db", tmp_path / "spill", spill_bytes=100, flush_interval=0,
+                                max_tasks=1)
+        tm = TaskManager(store=store)
+        for t in ("t1", "t2"):
+            tm.init_task(t, _nodes(1))
+            _finish(tm, t, 1, result={"html": "x" * 1000})
+            store.flush()
+        assert not (tmp_path / "spill" / "t1").exists()
+        assert store.load_task("t1") is None
+        assert (tmp_path / "spill" / "t2").exists()
+
+        tm.remove_task("t2")
+        assert tm.get_task_state("t2") is None
+        store.flush()
+        assert not (tmp_path / "spill" / "t2").exists()
+        assert store.list_tasks() == []
+        store.close()
+
+
+class _CountingNodes(dict):
+    """节点表替身：记录被遍历的次数（按键取值与 len 不计）"""
+
+    scans = 0
+
+    def __iter__(self):
+        self.scans += 1
+        return super().__iter__()
+
+    def values(self):
+        self.scans += 1
+        return super().values()
+
+    def items(self):
+        self.scans += 1
+        return super().items()
+
+
+class TestTaskManagerScaling:
+    """大 DAG 下 update_node 增量计数测试"""
+
+    def test_counts_match_scan(self):
+        """测试增量计数与全量扫描一致"""
+        tm = TaskManager(store=MemoryTaskStore())
+        tm.init_task("t", _nodes(5))
+        for nid, status in [("n0", "running"), ("n0", "success"), ("n1", "failed"), ("n2", "skipped"), ("n3", "running")]:
+            tm.update_node("t", nid, status)
+        counts = tm.get_task_state("t")["counts"]
+        scanned = Counter(n["status"] for n in tm.get_task_state("t")["nodes"].values())
+
+        assert {k: v for k, v in counts.items() if v} == dict(scanned)
+        assert tm.list_tasks()[0]["progress"] == 60
+
+    def test_update_does_not_scan_nodes(self):
+        """测试 2000 节点 DAG 下 update_node 与进度汇总只按键访问节点、维护计数器，从不遍历节点表"""
+        tm = TaskManager(store=MemoryTaskStore())
+        n_nodes = 2000
+        tm.init_task("t", _nodes(n_nodes))
+        task = tm.tasks["t"]
+        task["nodes"] = nodes = _CountingNodes(task["nodes"])
+        for i in range(n_nodes):
+            nid = f"n{i}"
+            for status in ("queued", "running", None, "success" if i % 7 else "failed"):
+                tm.update_node("t", nid, status, elapsed=1.0 if status is None else None)
+            assert sum(task["counts"].values()) == n_nodes
+            assert task["counts"]["pending"] == n_nodes - 1 - i
+        tm.list_tasks()
+        assert nodes.scans == 0
+
+        scanned = Counter(n["status"] for n in dict.values(nodes))
+        assert {k: v for k, v in task["counts"].items() if v} == dict(scanned)
+        assert task["status"] == "failed" and tm.list_tasks()[0]["progress"] == 100
+
+
+class _RecordingWS:
+    def __init__(self):
+        self.frames = []
+
+    async def broadcast(self, task_id, message):
+        self.frames.append((task_id, message))
+
+
+class TestProgressTicker:
+    """共享进度心跳测试"""
+
+    async def test_single_frame_per_task(self, monkeypatch):
+        """测试每次心跳每个任务只推送一帧，已结束节点被移除"""
+        import datetime
+        from backend.ws import progress
+
+        tm, ws = TaskManager(store=MemoryTaskStore()), _RecordingWS()
+        monkeypatch.setattr(progress, "task_manager", tm)
+        monkeypatch.setattr(progress, "ws_manager", ws)
+        tm.init_task("t1", _nodes(3))
+        ticker = progress.ProgressTicker(interval=3600)
+        start = datetime.datetime.now() - datetime.timedelta(seconds=2)
+        for i in range(3):
+            tm.update_node("t1", f"n{i}", "running", start=start)
+            ticker.start("t1", f"n{i}", start)
+        tm.update_node("t1", "n2", "success")
+
+        await ticker.tick()
+
+        assert len(ws.frames) == 1
+        task_id, frame = ws.frames[0]
+        assert frame["type"] == "progress" and task_id == "t1"
+        assert set(frame["elapsed"]) == {"n0", "n1"}
+        assert frame["elapsed"]["n0"] >= 2
+        assert tm.get_task_state("t1")["nodes"]["n0"]["elapsed"] == frame["elapsed"]["n0"]
+        assert set(ticker._running["t1"]) == {"n0", "n1"}
+        ticker._loop_task.cancel()
@@ -0,0 +1,67 @@
+"""
+任务队列清理测试（内存版同步 Redis 替身）
+"""
+import asyncio
+import fnmatch
+import json
+import threading
+import time
+from dataclasses import asdict
+
+from backend.scripts.task_queue import Task, TaskQueue
+
+
+class FakeSyncRedis:
+    """redis.Redis 替身：只实现清理路径用到的命令，并记录调用次数"""
+
+    def __init__(self):
+        self.data = {}
+        self.calls = {"scan": 0, "mget": 0, "unlink": 0, "get": 0, "delete": 0, "keys": 0}
+        self.threads = set()
+
+    def scan_iter(self, match=None, count=None):
+        keys = sorted(self.data)
+        for i in range(0, len(keys), count or 10):
+            self.calls["scan"] += 1
+            self.threads.add(threading.current_thread().name)
+            for key in keys[i:i + (count or 10)]:
+                if match is None or fnmatch.fnmatchcase(key.decode(), match):
+                    yield key
+
+    def mget(self, keys):
+        self.calls["mget"] += 1
+        self.threads.add(threading.current_thread().name)
+        return [self.data.get(k) for k in keys]
+
+    def unlink(self, *keys):
+        self.calls["unlink"] += 1
+        self.threads.add(threading.current_thread().name)
+        return sum(self.data.pop(k, None) is not None for k in keys)
+
+    def keys(self, pattern):
+        self.calls["keys"] += 1
+        return [k for k in self.data if fnmatch.fnmatchcase(k.decode(), pattern)]
+
+
+class TestCleanupCompleted:
+    """已完成任务清理测试"""
+
+    def test_cleanup_is_batched(self):
+        """测试按 SCAN 页批量 MGET / UNLINK，只删除已结束且超过 max_age 的任务；Redis 调用不在事件循环线程"""
+        queue = TaskQueue()
+        queue.redis_client = redis = FakeSyncRedis()
+        old = time.time() - 7200
+        for i in range(120):
+            status = ("completed", "failed", "running")[i % 3]
+            task = Task(task_id=f"t{i}", task_type="crawl", payload={}, status=status,
+                        updated_at=old if i < 90 else time.time())
+            redis.data[f"task:t{i}".encode()] = json.dumps(asdict(task)).encode()
+        redis.data[b"task:broken"] = b"not json"
+        redis.data[b"celery:crawl"] = b"x"
+
+        result = asyncio.run(queue._cleanup_completed(max_age=3600, batch_size=50))
+        assert result["status"] == "success" and result["cleaned_count"] == 60
+        assert len(redis.data) == 62 and b"celery:crawl" in redis.data
+        assert redis.calls["mget"] == 3 and 1 <= redis.calls["unlink"] <= 3  # 121 个键，每页 50
+        assert redis.calls["keys"] == redis.calls["get"] == redis.calls["delete"] == 0
+        assert redis.threads and threading.main_thread().name not in redis.threads
@@ -0,0 +1,169 @@
+"""
+WebSocket 广播测试
+"""
+import asyncio
+
+from backend.core.task import Node
+from backend.ws import manager as ws_module
+from backend.ws.event_bus import InProcessEventBus, RedisEventBus
+from backend.ws.manager import WSManager
+from backend.ws.task_manager import TaskManager
+from backend.ws.task_store import MemoryTaskStore
+
+
+class _FakeWS:
+    def __init__(self, gate: asyncio.Event | None = None):
+        self.sent = []
+        self.gate = gate
+        self.closed_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.sent.append(message)
+
+    async def close(self, code=1000):
+        self.closed_code = code
+
+
+class _FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.channels = set()
+        self.queue = asyncio.Queue()
+
+    async def subscribe(self, *channels):
+        self.channels.update(channels)
+        self.redis.subscribers.append(self)
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=0.0):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def unsubscribe(self, *channels):
+        if self in self.redis.subscribers:
+            self.redis.subscribers.remove(self)
+
+    async def aclose(self):
+        pass
+
+
+class _FakeRedis:
+    """进程内 Redis pub/sub 替身（多个总线实例共享即模拟多 worker）"""
+
+    def __init__(self):
+        self.subscribers = []
+
+    async def publish(self, channel, data):
+        for sub in list(self.subscribers):
+            if channel in sub.channels:
+                sub.queue.put_nowait({"type": "message", "channel": channel.encode(), "data": data})
+
+    def pubsub(self):
+        return _FakePubSub(self)
+
+
+async def _drain():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+class TestWSManager:
+    """合并、增量编码与慢连接隔离测试"""
+
+    async def _setup(self, monkeypatch, max_pending=1024):
+        tm = TaskManager(store=MemoryTaskStore())
+        monkeypatch.setattr(ws_module, "task_manager", tm)
+        tm.init_task("t1", [Node(id="a", script="noop"), Node(id="b", script="noop")])
+        return tm, WSManager(max_pending=max_pending, bus=InProcessEventBus())
+
+    async def test_result_sent_once_then_delta(self, monkeypatch):
+        """测试结果只发送一次，后续帧只带变化字段"""
+        tm, mgr = await self._setup(monkeypatch)
+        ws = _FakeWS()
+        await mgr.connect("t1", ws)
+        tm.update_node("t1", "a", "success", result={"big": "x" * 100}, elapsed=1.0)
+        await mgr.broadcast_node_update("t1", "a")
+        await _drain()
+        tm.update_node("t1", "a", None, elapsed=2.0)
+        await mgr.broadcast_node_update("t1", "a")
+        await _drain()
+
+        assert ws.sent[0]["result"] == {"big": "x" * 100}
+        assert ws.sent[1] == {"type": "node_update", "node_id": "a", "delta": True, "status": "success", "elapsed": 2.0}
+
+    async def test_slow_client_coalesced_and_isolated(self, monkeypatch):
+        """测试慢连接不阻塞其他连接，且同一节点只保留最新状态"""
+        tm, mgr = await self._setup(monkeypatch)
+        gate = asyncio.Event()
+        slow, fast = _FakeWS(gate), _FakeWS()
+        await mgr.connect("t1", slow)
+        await mgr.connect("t1", fast)
+        for status in ("queued", "running", "success"):
+            tm.update_node("t1", "a", status)
+            await mgr.broadcast_node_update("t1", "a")
+            await _drain()
+
+        assert [m["status"] for m in fast.sent] == ["queued", "running", "success"]
+        assert slow.sent == []
+
+        gate.set()
+        await _drain()
+        # 第一帧在发送中被阻塞（queued），其后两次更新合并为最新状态
+        assert [m["status"] for m in slow.sent] == ["queued", "success"]
+
+    async def test_overflow_disconnects(self, monkeypatch):
+        """测试待发送帧超限时断开慢连接"""
+        tm, mgr = await self._setup(monkeypatch, max_pending=2)
+        slow = _FakeWS(asyncio.Event())
+        await mgr.connect("t1", slow)
+        for i in range(4):
+            await mgr.broadcast("t1", {"type": "log", "i": i})
+        await _drain()
+
+        assert "t1" not in mgr.connections
+        assert slow.closed_code == 1013
+
+
+class TestEventBus:
+    """多 worker 事件总线测试"""
+
+    async def test_redis_bus_fans_out_across_workers(self, monkeypatch):
+        """测试 worker A 的广播送达 worker B 的连接，且本地连接不重复收到"""
+        monkeypatch.setattr(ws_module, "task_manager", TaskManager(store=MemoryTaskStore()))
+        redis = _FakeRedis()
+        bus_a, bus_b = RedisEventBus(client=redis), RedisEventBus(client=redis)
+        await bus_a.start()
+        await bus_b.start()
+        await _drain()
+        mgr_a, mgr_b = WSManager(bus=bus_a), WSManager(bus=bus_b)
+        ws_a, ws_b = _FakeWS(), _FakeWS()
+        await mgr_a.connect("t1", ws_a)
+        await mgr_b.connect("t1", ws_b)
+
+        await mgr_a.broadcast("t1", {"type": "pipeline_start", "task_id": "t1"})
+        for _ in range(100):
+            if ws_b.sent:
+                break
+            await asyncio.sleep(0.01)
+        await _drain()
+
+        assert ws_a.sent == [{"type": "pipeline_start", "task_id": "t1"}]
+        assert ws_b.sent == [{"type": "pipeline_start", "task_id": "t1"}]
+        await bus_a.close()
+        await bus_b.close()
+
+    async def test_logs_channel(self):
+        """测试日志频道分发给订阅者"""
+        bus, got = InProcessEventBus(), []
+
+        async def handler(text):
+            got.append(text)
+        bus.subscribe("logs", handler)
+        await bus.publish("logs", "hello")
+        assert got == ["hello"]
@@ -0,0 +1,156 @@
+"""
+WebSocket 事件总线
+
+WSManager.broadcast 与 logger.emit_ws 都先发布到总线，再由每个 worker 向自己持有的连接扇出，
+多 uvicorn worker 部署时任意 worker 上的客户端都能收到其他 worker 上流水线/日志的事件。
+
+- InProcessEventBus：默认实现，直接在本进程内分发（单 worker）
+- RedisEventBus：Redis pub/sub，本地订阅者立即分发，同时发布到 Redis，
+  其他 worker 的监听协程收到后分发给各自的连接（按 origin 跳过自己发布的消息）
+
+通过环境变量选择：
+  EVENT_BUS=memory|redis         默认 memory
+  EVENT_BUS_URL=redis://...      默认取 REDIS_URL
+  EVENT_BUS_PREFIX=ylai:ws:      Redis 频道前缀
+"""
+import asyncio
+import json
+import os
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from backend.core.logger import ws_logger, _deliver_ws
+
+Handler = Callable[[Any], Awaitable[None]]
+
+
+def _json_default(obj: Any):
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    return str(obj)
+
+
+class EventBus(ABC):
+    """事件总线接口：publish 发布到频道，subscribe 注册本 worker 的处理协程"""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+
+    def subscribe(self, channel: str, handler: Handler) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+    async def _dispatch(self, channel: str, message: Any) -> None:
+        for handler in list(self._handlers.get(channel, [])):
+            try:
+                await handler(message)
+            except Exception as e:
+                ws_logger.error("event bus handler failed: channel=%s err=%s", channel, e)
+
+    @abstractmethod
+    async def publish(self, channel: str, message: Any) -> None:
+        """发布消息（需可 JSON 序列化）"""
+
+    async def start(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+class InProcessEventBus(EventBus):
+    """进程内总线（单 worker）"""
+
+    async def publish(self, channel: str, message: Any) -> None:
+        await self._dispatch(channel, message)
+
+
+class RedisEventBus(EventBus):
+    """Redis pub/sub 总线（多 worker）"""
+
+    def __init__(self, url: str | None = None, prefix: str = "ylai:ws:", client: Any = None):
+        super().__init__()
+        self.prefix = prefix
+        self.worker_id = uuid.uuid4().hex
+        if client is None:
+            import redis.asyncio as aioredis  # type: ignore
+            client = aioredis.from_url(url or "redis://127.0.0.1:6379/0")
+        self._client = client
+        self._listener: Optional[asyncio.Task] = None
+        self._closed = False
+
+    def _channel(self, channel: str) -> str:
+        return f"{self.prefix}{channel}"
+
+    async def publish(self, channel: str, message: Any) -> None:
+        # 本 worker 的连接直接分发，不等 Redis 回环
+        await self._dispatch(channel, message)
+        if self._listener is None:
+            await self.start()
+        payload = json.dumps({"origin": self.worker_id, "data": message}, ensure_ascii=False, default=_json_default)
+        try:
+            await self._client.publish(self._channel(channel), payload)
+        except Exception as e:
+            ws_logger.error("event bus publish failed: channel=%s err=%s", channel, e)
+
+    async def start(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._closed = False
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        channels = {self._channel(c): c for c in ("pipeline", "logs")}
+        channels.update({self._channel(c): c for c in self._handlers})
+        while not self._closed:
+            pubsub = self._client.pubsub()
+            try:
+                await pubsub.subscribe(*channels)
+                while not self._closed:
+                    msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if not msg or msg.get("type") != "message":
+                        continue
+                    name = msg["channel"]
+                    name = name.decode() if isinstance(name, bytes) else name
+                    envelope = json.loads(msg["data"])
+                    if envelope.get("origin") == self.worker_id:
+                        continue
+                    await self._dispatch(channels.get(name, name[len(self.prefix):]), envelope.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                ws_logger.error("event bus listener error, retrying: %s", e)
+                await asyncio.sleep(1.0)
+            finally:
+                try:
+                    await pubsub.unsubscribe()
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+
+def build_event_bus() -> EventBus:
+    """按环境变量构建事件总线；Redis 不可用时退化为进程内总线"""
+    kind = os.getenv("EVENT_BUS", "memory").lower()
+    if kind == "redis":
+        try:
+            return RedisEventBus(
+                url=os.getenv("EVENT_BUS_URL") or os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0"),
+                prefix=os.getenv("EVENT_BUS_PREFIX", "ylai:ws:"),
+            )
+        except Exception as e:
+            ws_logger.error("redis event bus unavailable, falling back to in-process: %s", e)
+    return InProcessEventBus()
+
+
+event_bus = build_event_bus()
+event_bus.subscribe("logs", _deliver_ws)
@@ -1,42 +1,176 @@
-from typing import Dict, List
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
 from fastapi import WebSocket
+
+from backend.core.logger import ws_logger
+from backend.ws.event_bus import EventBus, event_bus
 from backend.ws.task_manager import task_manager
-import asyncio
+
+try:
+    from backend.core.metrics import WS_FRAMES_COALESCED, WS_SLOW_CLIENT_DISCONNECTS  # type: ignore
+except Exception:
+    class _No:
+        def labels(self, *_, **__):
+            return self
+        def inc(self, *_):
+            pass
+    WS_FRAMES_COALESCED = WS_SLOW_CLIENT_DISCONNECTS = _No()
+
+# node_update 帧中参与增量比较的字段
+NODE_FIELDS = ("status", "result", "error", "elapsed", "cached")
+
+
+class _Connection:
+    """
+    单个 WebSocket 连接的出站队列
+    - 待发送帧按 key 合并：同一节点只保留最新状态，progress 帧合并 elapsed
+    - 独立发送协程，慢连接只阻塞自己
+    - node_update 按连接做增量编码：首帧完整，之后只带变化字段（status 始终携带），result 只发送一次
+    """
+
+    def __init__(self, websocket: WebSocket, max_pending: int):
+        self.websocket = websocket
+        self.max_pending = max_pending
+        self.pending: "OrderedDict[Any, dict]" = OrderedDict()
+        self.sent_nodes: Dict[str, dict] = {}  # node_id -> 已发送给该连接的字段
+        self.wakeup = asyncio.Event()
+        self.closed = False
+        self.sender: Optional[asyncio.Task] = None
+        self._seq = 0
+
+    def enqueue(self, key: Any, message: dict) -> bool:
+        """放入待发送帧；队列溢出返回 False"""
+        if message.get("type") == "node_update":
+            # 节点帧自带 elapsed，从待发送的 progress 帧中去掉该节点，避免旧值覆盖新状态
+            progress = self.pending.get("progress")
+            if progress is not None:
+                progress["elapsed"].pop(message["node_id"], None)
+        if key is not None and key in self.pending:
+            if message.get("type") == "progress":
+                self.pending[key]["elapsed"].update(message["elapsed"])
+            else:
+                self.pending[key] = message  # 保持原排队位置，内容替换为最新
+            WS_FRAMES_COALESCED.labels(type=message.get("type", "")).inc()
+            return True
+        if len(self.pending) >= self.max_pending:
+            return False
+        if key is None:
+            self._seq += 1
+            key = f"msg:{self._seq}"
+        if message.get("type") == "progress":
+            message = dict(message, elapsed=dict(message["elapsed"]))  # 后续合并会修改，需独立副本
+        self.pending[key] = message
+        self.wakeup.set()
+        return True
+
+    def _delta(self, message: dict) -> Optional[dict]:
+        node_id = message["node_id"]
+        sent = self.sent_nodes.get(node_id)
+        if sent is None:
+            self.sent_nodes[node_id] = {k: message.get(k) for k in NODE_FIELDS}
+            return message
+        frame = {"type": "node_update", "node_id": node_id, "delta": True, "status": message.get("status")}
+        changed = False
+        for k in NODE_FIELDS:
+            v, old = message.get(k), sent.get(k)
+            if v is old or v == old:
+                continue
+            frame[k] = v
+            sent[k] = v
+            changed = True
+        return frame if changed else None
+
+    async def run(self):
+        while not self.closed:
+            if not self.pending:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            _, message = self.pending.popitem(last=False)
+            if message.get("type") == "node_update":
+                message = self._delta(message)
+                if message is None:
+                    continue
+            elif message.get("type") == "progress" and not message["elapsed"]:
+                continue
+            await self.websocket.send_json(message)
+
+    def close(self):
+        self.closed = True
+        self.pending.clear()
+        self.wakeup.set()
+        if self.sender is not None and self.sender is not asyncio.current_task():
+            self.sender.cancel()
+
 
 class WSManager:
-    def __init__(self):
-        self.connections: Dict[str, List[WebSocket]] = {}
+    def __init__(self, max_pending: int | None = None, bus: EventBus | None = None):
+        self.connections: Dict[str, List[_Connection]] = {}
+        # 广播经事件总线发布，各 worker 只向自己持有的连接扇出
+        self.bus = bus if bus is not None else event_bus
+        self.bus.subscribe("pipeline", self._deliver)
+        # 单连接待发送帧上限（节点帧已合并，超限说明客户端长期不读），溢出时断开由客户端重连
+        self.max_pending = max_pending if max_pending is not None else int(os.getenv("WS_MAX_PENDING", "1024"))
 
     async def connect(self, task_id: str, websocket: WebSocket):
         await websocket.accept()
-        if task_id not in self.connections:
-            self.connections[task_id] = []
-        self.connections[task_id].append(websocket)
+        conn = _Connection(websocket, self.max_pending)
+        conn.sender = asyncio.create_task(self._run_sender(task_id, conn))
+        self.connections.setdefault(task_id, []).append(conn)
 
     def disconnect(self, task_id: str, websocket: WebSocket):
-        if task_id in self.connections:
-            self.connections[task_id].remove(websocket)
-            if not self.connections[task_id]:
-                del self.connections[task_id]
-
-    async def broadcast(self, task_id: str, message: dict):
-        if task_id not in self.connections:
+        conns = self.connections.get(task_id)
+        if not conns:
             return
-        dead = []
-        for ws in self.connections[task_id]:
+        for conn in [c for c in conns if c.websocket is websocket]:
+            conns.remove(conn)
+            conn.close()
+        if not conns:
+            del self.connections[task_id]
+
+    async def _run_sender(self, task_id: str, conn: _Connection):
+        try:
+            await conn.run()
+        except (asyncio.CancelledError, Exception):
+            pass
+        finally:
+            if not conn.closed:
+                self.disconnect(task_id, conn.websocket)
+
+    def _drop_slow(self, task_id: str, conn: _Connection):
+        WS_SLOW_CLIENT_DISCONNECTS.inc()
+        ws_logger.warning("ws client too slow, disconnecting: task=%s pending=%d", task_id, len(conn.pending))
+        self.disconnect(task_id, conn.websocket)
+
+        async def _close():
             try:
-                await ws.send_json(message)
-            except:
-                dead.append(ws)
-        for ws in dead:
-            self.disconnect(task_id, ws)
+                await conn.websocket.close(code=1013)
+            except Exception:
+                pass
+        asyncio.create_task(_close())
 
-    async def broadcast_node_update(self, task_id: str, node_id: str):
-        state = task_manager.get_task_state(task_id)
-        if not state:
-            return
+    def _enqueue(self, task_id: str, key: Any, message: dict, only: WebSocket | None = None):
+        for conn in list(self.connections.get(task_id, [])):
+            if only is not None and conn.websocket is not only:
+                continue
+            if not conn.enqueue(key, message):
+                self._drop_slow(task_id, conn)
+
+    async def _deliver(self, event: dict):
+        """事件总线回调：向本 worker 上该任务的连接扇出"""
+        self._enqueue(event["task_id"], event.get("key"), event["message"])
+
+    async def broadcast(self, task_id: str, message: dict):
+        key = "progress" if message.get("type") == "progress" else None
+        await self.bus.publish("pipeline", {"task_id": task_id, "key": key, "message": message})
+
+    @staticmethod
+    def _node_message(state: dict, node_id: str) -> dict:
         node_state = state["nodes"][node_id]
-        await self.broadcast(task_id, {
+        return {
             "type": "node_update",
             "node_id": node_id,
             "status": node_state["status"],
@@ -44,6 +178,21 @@ class WSManager:
             "error": node_state["error"],
             "elapsed": node_state["elapsed"],
             "cached": node_state.get("cached", False)
-        })
+        }
+
+    async def broadcast_node_update(self, task_id: str, node_id: str):
+        state = task_manager.get_task_state(task_id)
+        if not state:
+            return
+        await self.bus.publish("pipeline", {"task_id": task_id, "key": f"node:{node_id}",
+                                             "message": self._node_message(state, node_id)})
+
+    async def send_snapshot(self, task_id: str, websocket: WebSocket):
+        """新连接：只向该连接推送全部节点的当前状态"""
+        state = task_manager.get_task_state(task_id)
+        if not state:
+            return
+        for node_id in state["nodes"]:
+            self._enqueue(task_id, f"node:{node_id}", self._node_message(state, node_id), only=websocket)
 
 ws_manager = WSManager()
@@ -0,0 +1,69 @@
+import asyncio
+import datetime
+import os
+from typing import Dict, Optional
+
+from backend.ws.manager import ws_manager
+from backend.ws.task_manager import task_manager
+
+
+class ProgressTicker:
+    """
+    全局进度心跳（所有运行中节点共用一个协程）。
+    - 单个后台协程按固定间隔唤醒，刷新所有运行中节点的 elapsed
+    - 每个任务只广播一帧紧凑的 {"type": "progress", "task_id", "elapsed": {node_id: 秒}}，不携带结果
+    - 没有运行中节点时协程退出，下次 start 时再拉起
+    间隔由 PIPELINE_PROGRESS_INTERVAL（秒）配置，默认 1.0
+    """
+
+    def __init__(self, interval: float | None = None):
+        self.interval = interval if interval is not None else float(os.getenv("PIPELINE_PROGRESS_INTERVAL", "1.0"))
+        self._running: Dict[str, Dict[str, datetime.datetime]] = {}  # task_id -> {node_id: start}
+        self._loop_task: Optional[asyncio.Task] = None
+
+    def start(self, task_id: str, node_id: str, start_time: datetime.datetime):
+        self._running.setdefault(task_id, {})[node_id] = start_time
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._run())
+
+    def stop(self, task_id: str, node_id: str):
+        nodes = self._running.get(task_id)
+        if nodes is None:
+            return
+        nodes.pop(node_id, None)
+        if not nodes:
+            self._running.pop(task_id, None)
+
+    def set_interval(self, interval: float):
+        self.interval = max(0.05, float(interval))
+
+    async def tick(self):
+        """执行一次心跳：刷新 elapsed 并按任务批量广播"""
+        now = datetime.datetime.now()
+        for task_id, nodes in list(self._running.items()):
+            state = task_manager.get_task_state(task_id)
+            if not state:
+                self._running.pop(task_id, None)
+                continue
+            frame: Dict[str, float] = {}
+            for node_id, start_time in list(nodes.items()):
+                if state["nodes"][node_id]["status"] != "running":
+                    self.stop(task_id, node_id)
+                    continue
+                elapsed = round((now - start_time).total_seconds(), 3)
+                task_manager.update_node(task_id, node_id, None, elapsed=elapsed)
+                frame[node_id] = elapsed
+            if frame:
+                await ws_manager.broadcast(task_id, {"type": "progress", "task_id": task_id, "elapsed": frame})
+
+    async def _run(self):
+        while self._running:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.tick()
+            except Exception:
+                # 心跳失败不影响节点执行
+                pass
+
+
+progress_ticker = ProgressTicker()
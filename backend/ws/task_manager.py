@@ -1,20 +1,34 @@
 import datetime
+import os
+from collections import Counter, OrderedDict
 from typing import Dict
 
+from backend.ws.task_store import TaskStore, TERMINAL_STATUSES, build_task_store
+
+
 class TaskManager:
     """管理任务状态和节点执行结果"""
-    def __init__(self):
-        self.tasks: Dict[str, dict] = {}  # task_id -> {nodes, status, priority, queue_status, coro}
+    def __init__(self, store: TaskStore | None = None, max_hot_tasks: int | None = None):
+        self.tasks: Dict[str, dict] = {}  # task_id -> {nodes, graph, status, priority, queue_status, coro}
+        # 持久化后端（默认内存，不落盘）；持久化时已完成任务超过 max_hot_tasks 后从内存淘汰
+        self.store: TaskStore = store if store is not None else build_task_store()
+        self.max_hot_tasks = max_hot_tasks if max_hot_tasks is not None else int(os.getenv("TASK_STORE_HOT_TASKS", "32"))
+        self._finished: "OrderedDict[str, None]" = OrderedDict()
 
     def init_task(self, task_id: str, nodes: list, priority: int = 100):
         self.tasks[task_id] = {
             "nodes": {n.id: {"status": "pending", "result": None, "error": None,
-                             "start": None, "end": None, "elapsed": 0, "param_history": [], "cached": False} for n in nodes},
+                             "start": None, "end": None, "elapsed": 0, "param_history": [], "cached": False,
+                             "fingerprint": None, "reused": False} for n in nodes},
+            "graph": {n.id: n.to_dict() for n in nodes},
+            # 各状态节点计数，随 update_node 增量维护，任务状态与进度 O(1) 计算
+            "counts": Counter({"pending": len(nodes)}),
             "status": "created",
             "priority": priority,
             "queue_status": "queued",
             "coro": None
         }
+        self.store.save_task(task_id, self.tasks[task_id])
 
     def set_task_coro(self, task_id: str, coro_factory):
         if task_id in self.tasks:
@@ -32,10 +46,18 @@ class TaskManager:
         # 当进入运行态时，把总状态置为 running
         if status == "running":
             self.tasks[task_id]["status"] = "running"
+        self.store.save_meta(task_id, self.tasks[task_id])
 
-    def update_node(self, task_id, node_id, status, result=None, error=None, start=None, end=None, elapsed=None):
-        node = self.tasks[task_id]["nodes"][node_id]
-        if status:
+    def update_node(self, task_id, node_id, status, result=None, error=None, start=None, end=None, elapsed=None,
+                    fingerprint=None, cached=None, reused=None):
+        task = self._hot_task(task_id)
+        if task is None:
+            return
+        node = task["nodes"][node_id]
+        if status and status != node["status"]:
+            counts = task["counts"]
+            counts[node["status"]] -= 1
+            counts[status] += 1
             node["status"] = status
         if result is not None:
             node["result"] = result
@@ -47,22 +69,80 @@ class TaskManager:
             node["end"] = end
         if elapsed is not None:
             node["elapsed"] = elapsed
+        # 指纹与复用标记须在登记快照前写入，否则持久化存储中缺失，重载后的增量重跑拿不到上游指纹
+        if fingerprint is not None:
+            node["fingerprint"] = fingerprint
+        if cached is not None:
+            node["cached"] = cached
+        if reused is not None:
+            node["reused"] = reused
+        self.store.record_node(task_id, node_id, node)
+
+        # 仅状态变化时才需重新汇总整体任务状态（进度心跳只更新 elapsed）
+        if not status:
+            return
+        counts, total = task["counts"], len(task["nodes"])
+        prev_status = task["status"]
+        if counts["success"] + counts["skipped"] == total:
+            task["status"] = "done"
+        elif counts["failed"]:
+            task["status"] = "failed"
+        if task["status"] != prev_status:
+            self.store.save_meta(task_id, task)
+
+    def _hot_task(self, task_id: str) -> dict | None:
+        """取内存中的任务；已淘汰的任务从存储加载回内存并重建状态计数，不存在时返回 None"""
+        task = self.tasks.get(task_id)
+        if task is None:
+            task = self.store.load_task(task_id)
+            if task is None:
+                return None
+            task["counts"] = Counter(n.get("status") for n in task.get("nodes", {}).values())
+            self._finished.pop(task_id, None)
+            self.tasks[task_id] = task
+        return task
+
+    @staticmethod
+    def _finished_count(task: dict) -> int:
+        counts = task.get("counts")
+        if counts is None:
+            # 从存储加载的任务没有计数器，退化为扫描
+            return sum(1 for n in task.get("nodes", {}).values() if n.get("status") in TERMINAL_STATUSES)
+        return sum(counts[s] for s in TERMINAL_STATUSES)
 
-        # 更新整体任务状态
-        if all(n["status"] in ["success", "skipped"] for n in self.tasks[task_id]["nodes"].values()):
-            self.tasks[task_id]["status"] = "done"
-        elif any(n["status"] == "failed" for n in self.tasks[task_id]["nodes"].values()):
-            self.tasks[task_id]["status"] = "failed"
+    def finish_task(self, task_id: str):
+        """流水线运行结束后调用：记录已完成任务；持久化存储下超过热任务上限时，最早完成的任务落盘后从内存淘汰
+
+        不能按节点终态判断：失败节点可能仍在退避后等待重试，任务并未结束
+        """
+        if not self.store.persistent or task_id not in self.tasks:
+            return
+        self._finished[task_id] = None
+        self._finished.move_to_end(task_id)
+        while len(self._finished) > self.max_hot_tasks:
+            old_id, _ = self._finished.popitem(last=False)
+            task = self.tasks.pop(old_id, None)
+            if task is not None:
+                self.store.save_task(old_id, task)
+
+    def remove_task(self, task_id: str):
+        """删除任务：内存状态、存储中的记录与溢出的结果文件"""
+        self.tasks.pop(task_id, None)
+        self._finished.pop(task_id, None)
+        self.store.remove_task(task_id)
 
     def get_task_state(self, task_id):
-        return self.tasks.get(task_id)
+        st = self.tasks.get(task_id)
+        if st is None:
+            # 已淘汰或由其他 worker 创建的任务，从存储加载
+            st = self.store.load_task(task_id)
+        return st
 
     def list_tasks(self):
         data = []
         for tid, st in self.tasks.items():
-            nodes = st.get("nodes", {})
-            total = len(nodes)
-            done = sum(1 for n in nodes.values() if n.get("status") in ("success", "skipped", "failed"))
+            total = len(st.get("nodes", {}))
+            done = self._finished_count(st)
             percent = int(done / total * 100) if total else 0
             data.append({
                 "task_id": tid,
@@ -72,6 +152,18 @@ class TaskManager:
                 "progress": percent,
                 "total": total,
             })
+        for row in self.store.list_tasks():
+            if row["task_id"] in self.tasks:
+                continue
+            total, done = row["total"], row["done"]
+            data.append({
+                "task_id": row["task_id"],
+                "status": row["status"],
+                "queue_status": row["queue_status"],
+                "priority": row.get("priority", 100),
+                "progress": int(done / total * 100) if total else 0,
+                "total": total,
+            })
         return sorted(data, key=lambda x: x.get("priority", 100))
 
 task_manager = TaskManager()
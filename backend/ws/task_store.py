@@ -0,0 +1,397 @@
+"""
+任务状态存储
+
+TaskManager 的持久化后端：
+- MemoryTaskStore：默认实现，不落盘（与历史行为一致，任务状态只在进程内）
+- SQLiteTaskStore：SQLite WAL 持久化，节点状态变更按 (task_id, node_id) 合并后由后台线程批量写入
+  （调用方只登记快照并唤醒写线程，不在事件循环上提交或写文件；读取时叠加尚未落盘的快照），
+  大结果溢出到磁盘文件并只在库中保存引用，已完成任务可从内存淘汰后按需加载，
+  删除任务或超出保留上限淘汰任务时一并删除其溢出文件，
+  多个 uvicorn worker 共享同一库文件即可互相查询任务；graph / state / result 经
+  backend/core/codec.py 编码（CODEC / CODEC_COMPRESSION 配置），旧版 JSON 文本行仍可读取
+
+通过环境变量选择：
+  TASK_STORE=memory|sqlite            默认 memory
+  TASK_STORE_PATH=data/tasks.db       SQLite 文件
+  TASK_STORE_SPILL_DIR=data/task_results
+  TASK_STORE_SPILL_BYTES=65536        结果序列化后超过该大小则溢出到文件
+  TASK_STORE_BATCH=200                待写节点数达到该值立即唤醒写线程提交
+  TASK_STORE_FLUSH_MS=200             后台批量提交间隔（0 表示只在唤醒时提交）
+  TASK_STORE_HOT_TASKS=32             内存中保留的已完成任务数
+  TASK_STORE_MAX_TASKS=1000           库中保留的已结束任务数，超出后最早结束的任务连同溢出文件删除（0 不限）
+"""
+import os
+import shutil
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from backend.core.codec import Serializer, get_serializer
+from backend.core.logger import task_logger
+
+TERMINAL_STATUSES = ("success", "skipped", "failed")
+
+
+class TaskStore(ABC):
+    """任务状态存储接口"""
+
+    # 是否真正持久化；为 False 时 TaskManager 不会从内存淘汰任务
+    persistent = False
+
+    @abstractmethod
+    def save_meta(self, task_id: str, task: dict) -> None:
+        """记录任务元信息（status/priority/queue_status/graph），允许批量延迟写入"""
+
+    @abstractmethod
+    def record_node(self, task_id: str, node_id: str, node: dict) -> None:
+        """记录节点状态变更，允许批量延迟写入"""
+
+    @abstractmethod
+    def save_task(self, task_id: str, task: dict) -> None:
+        """完整写入任务（元信息 + 全部节点），用于淘汰前落盘"""
+
+    @abstractmethod
+    def load_task(self, task_id: str) -> Optional[dict]:
+        """加载任务完整状态；不存在返回 None"""
+
+    @abstractmethod
+    def list_tasks(self) -> List[dict]:
+        """任务摘要列表：task_id/status/queue_status/priority/total/done"""
+
+    def remove_task(self, task_id: str) -> None:
+        """删除任务及其结果，允许延迟执行"""
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryTaskStore(TaskStore):
+    """默认存储：不落盘，任务状态全部由 TaskManager 内存持有"""
+
+    persistent = False
+
+    def save_meta(self, task_id: str, task: dict) -> None:
+        pass
+
+    def record_node(self, task_id: str, node_id: str, node: dict) -> None:
+        pass
+
+    def save_task(self, task_id: str, task: dict) -> None:
+        pass
+
+    def load_task(self, task_id: str) -> Optional[dict]:
+        return None
+
+    def list_tasks(self) -> List[dict]:
+        return []
+
+
+class SQLiteTaskStore(TaskStore):
+    """SQLite WAL 任务存储（后台批量写入 + 大结果溢出到文件）"""
+
+    persistent = True
+
+    def __init__(self, path: str | Path = "data/tasks.db", spill_dir: str | Path = "data/task_results",
+                 spill_bytes: int = 64 * 1024, batch_size: int = 200, flush_interval: float = 0.2,
+                 serializer: Optional[Serializer] = None, max_tasks: int = 1000):
+        self.path = Path(path)
+        self.serializer = serializer or get_serializer()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.spill_dir = Path(spill_dir)
+        self.spill_bytes = int(spill_bytes)
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = float(flush_interval)
+        self.max_tasks = max(0, int(max_tasks))
+
+        # 写连接只由 flush 使用（_io_lock 串行化）；读取走独立连接，WAL 下不等待写事务
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_tables()
+        self._io_lock = threading.Lock()
+        self._reader = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._read_lock = threading.Lock()
+
+        # _lock 只保护待写队列，持有期间不做编码与磁盘 I/O
+        self._lock = threading.Lock()
+        self._pending_meta: Dict[str, dict] = {}
+        self._pending_nodes: Dict[Tuple[str, str], dict] = {}
+        self._pending_removals: Set[str] = set()
+        # 正在提交的批次，提交完成前读取仍需叠加
+        self._inflight_meta: Dict[str, dict] = {}
+        self._inflight_nodes: Dict[Tuple[str, str], dict] = {}
+        self._inflight_removals: Set[str] = set()
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="task-store-flusher", daemon=True)
+        self._flusher.start()
+
+    def _init_tables(self):
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS tasks (
+                task_id TEXT PRIMARY KEY,
+                status TEXT,
+                priority INTEGER,
+                queue_status TEXT,
+                graph TEXT,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE IF NOT EXISTS task_nodes (
+                task_id TEXT NOT NULL,
+                node_id TEXT NOT NULL,
+                status TEXT,
+                state TEXT,
+                result TEXT,
+                result_ref TEXT,
+                PRIMARY KEY (task_id, node_id)
+            );
+        ''')
+        self._conn.commit()
+
+    # --- 写入（只登记快照，由写线程提交） ---
+    @staticmethod
+    def _meta_snapshot(task: dict) -> dict:
+        return {k: task.get(k) for k in ("status", "priority", "queue_status", "graph")}
+
+    def save_meta(self, task_id: str, task: dict) -> None:
+        meta = self._meta_snapshot(task)
+        with self._lock:
+            self._pending_meta[task_id] = meta
+
+    def record_node(self, task_id: str, node_id: str, node: dict) -> None:
+        # 浅拷贝：调用方之后对节点 dict 的修改不影响已登记的快照
+        snapshot = dict(node)
+        with self._lock:
+            self._pending_nodes[(task_id, node_id)] = snapshot
+            full = len(self._pending_nodes) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def save_task(self, task_id: str, task: dict) -> None:
+        meta = self._meta_snapshot(task)
+        nodes = {node_id: dict(node) for node_id, node in task.get("nodes", {}).items()}
+        with self._lock:
+            self._pending_meta[task_id] = meta
+            for node_id, node in nodes.items():
+                self._pending_nodes[(task_id, node_id)] = node
+        self._wake.set()
+
+    def remove_task(self, task_id: str) -> None:
+        with self._lock:
+            self._pending_meta.pop(task_id, None)
+            for key in [k for k in self._pending_nodes if k[0] == task_id]:
+                del self._pending_nodes[key]
+            self._pending_removals.add(task_id)
+        self._wake.set()
+
+    def flush(self) -> None:
+        """提交待写队列：由写线程调用，close 时在调用线程上收尾"""
+        with self._io_lock:
+            with self._lock:
+                if not self._pending_meta and not self._pending_nodes and not self._pending_removals:
+                    return
+                metas, self._pending_meta = self._pending_meta, {}
+                nodes, self._pending_nodes = self._pending_nodes, {}
+                removals, self._pending_removals = self._pending_removals, set()
+                self._inflight_meta, self._inflight_nodes, self._inflight_removals = metas, nodes, removals
+            evicted: List[str] = []
+            try:
+                # 先删除再写入：删除后重新登记的同名任务得以保留
+                self._delete_rows(removals)
+                meta_rows = [
+                    (tid, t.get("status"), t.get("priority", 100), t.get("queue_status"), self.serializer.dumps(t.get("graph") or {}))
+                    for tid, t in metas.items()
+                ]
+                node_rows = [self._node_row(tid, nid, node) for (tid, nid), node in nodes.items()]
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO tasks (task_id, status, priority, queue_status, graph, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)", meta_rows)
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO task_nodes (task_id, node_id, status, state, result, result_ref) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", node_rows)
+                if metas and self.max_tasks:
+                    evicted = self._evict_rows()
+                self._conn.commit()
+            except Exception as e:
+                self._conn.rollback()
+                # 放回待写队列，下次批量提交重试（期间的新变更优先）
+                with self._lock:
+                    for k, v in metas.items():
+                        self._pending_meta.setdefault(k, v)
+                    for k, v in nodes.items():
+                        self._pending_nodes.setdefault(k, v)
+                    self._pending_removals |= removals
+                task_logger.error(f"task store flush failed: {e}")
+            else:
+                for task_id in (*removals, *evicted):
+                    shutil.rmtree(self.spill_dir / task_id, ignore_errors=True)
+            finally:
+                with self._lock:
+                    self._inflight_meta, self._inflight_nodes, self._inflight_removals = {}, {}, set()
+
+    def _delete_rows(self, task_ids) -> None:
+        rows = [(tid,) for tid in task_ids]
+        self._conn.executemany("DELETE FROM task_nodes WHERE task_id = ?", rows)
+        self._conn.executemany("DELETE FROM tasks WHERE task_id = ?", rows)
+
+    def _evict_rows(self) -> List[str]:
+        """超出保留上限时删除最早结束的任务行，返回被删除的 task_id"""
+        evicted = [r[0] for r in self._conn.execute(
+            "SELECT task_id FROM tasks WHERE status IN ('done', 'failed') "
+            "ORDER BY updated_at DESC, rowid DESC LIMIT -1 OFFSET ?", (self.max_tasks,)).fetchall()]
+        self._delete_rows(evicted)
+        return evicted
+
+    def _node_row(self, task_id: str, node_id: str, node: dict) -> tuple:
+        state = {k: v for k, v in node.items() if k != "result"}
+        result = node.get("result")
+        result_text, result_ref = None, None
+        if result is not None:
+            result_text = self.serializer.dumps(result)
+            if len(result_text) > self.spill_bytes:
+                path = self._spill_path(task_id, node_id)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(result_text)
+                result_ref = str(path)
+                result_text = None
+        if result_ref is None and (self.spill_dir / task_id).exists():
+            # 结果变小或被清空后删除旧的溢出文件
+            self._spill_path(task_id, node_id).unlink(missing_ok=True)
+        return (task_id, node_id, node.get("status"), self.serializer.dumps(state), result_text, result_ref)
+
+    def _spill_path(self, task_id: str, node_id: str) -> Path:
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in node_id)
+        return self.spill_dir / task_id / f"{safe}.bin"
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval if self.flush_interval > 0 else None)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                task_logger.error(f"task store background flush failed: {e}")
+
+    # --- 读取（库中数据叠加尚未提交的快照） ---
+    def _overlay(self, task_id: Optional[str] = None):
+        """返回 (meta, nodes, removed)：提交中与待写的快照，后者优先；task_id 为 None 时返回全部任务"""
+        with self._lock:
+            metas = {**self._inflight_meta, **self._pending_meta}
+            nodes = {**self._inflight_nodes, **self._pending_nodes}
+            removed = self._inflight_removals | self._pending_removals
+        if task_id is not None:
+            metas = {task_id: metas[task_id]} if task_id in metas else {}
+            nodes = {k: v for k, v in nodes.items() if k[0] == task_id}
+        # 删除之后重新登记的任务以新快照为准
+        removed = {tid for tid in removed if tid not in metas}
+        return metas, nodes, removed
+
+    def _decode_node(self, state, result, result_ref) -> dict:
+        node = self.serializer.loads(state) if state else {}
+        if result_ref:
+            try:
+                node["result"] = self.serializer.loads(Path(result_ref).read_bytes())
+            except Exception as e:
+                task_logger.error(f"load spilled result failed: {result_ref} | {e}")
+                node["result"] = None
+        else:
+            node["result"] = self.serializer.loads(result) if result else None
+        return node
+
+    def load_task(self, task_id: str) -> Optional[dict]:
+        metas, pending_nodes, removed = self._overlay(task_id)
+        if task_id in removed:
+            return None
+        with self._read_lock:
+            row = self._reader.execute(
+                "SELECT status, priority, queue_status, graph FROM tasks WHERE task_id = ?", (task_id,)
+            ).fetchone()
+            node_rows = self._reader.execute(
+                "SELECT node_id, state, result, result_ref FROM task_nodes WHERE task_id = ?", (task_id,)
+            ).fetchall() if row is not None else []
+        meta = metas.get(task_id)
+        if row is None and meta is None:
+            return None
+        nodes = {
+            node_id: self._decode_node(state, result, result_ref)
+            for node_id, state, result, result_ref in node_rows
+            if (task_id, node_id) not in pending_nodes
+        }
+        for (_, node_id), node in pending_nodes.items():
+            nodes[node_id] = dict(node)
+        if meta is None:
+            meta = {"status": row[0], "priority": row[1], "queue_status": row[2],
+                    "graph": self.serializer.loads(row[3]) if row[3] else {}}
+        return {
+            "nodes": nodes,
+            "status": meta["status"],
+            "priority": meta["priority"],
+            "queue_status": meta["queue_status"],
+            "graph": meta["graph"] or {},
+            "coro": None,
+        }
+
+    def list_tasks(self) -> List[dict]:
+        metas, pending_nodes, removed = self._overlay()
+        with self._read_lock:
+            rows = self._reader.execute('''
+                SELECT t.task_id, t.status, t.queue_status, t.priority,
+                       COUNT(n.node_id),
+                       SUM(CASE WHEN n.status IN ('success', 'skipped', 'failed') THEN 1 ELSE 0 END)
+                FROM tasks t LEFT JOIN task_nodes n ON n.task_id = t.task_id
+                GROUP BY t.task_id
+            ''').fetchall()
+            # 有待写节点的任务逐节点合并状态后重新计数
+            statuses = {
+                tid: dict(self._reader.execute(
+                    "SELECT node_id, status FROM task_nodes WHERE task_id = ?", (tid,)).fetchall())
+                for tid in {tid for tid, _ in pending_nodes}
+            }
+        summary = {
+            r[0]: {"task_id": r[0], "status": r[1], "queue_status": r[2], "priority": r[3],
+                   "total": r[4] or 0, "done": r[5] or 0}
+            for r in rows if r[0] not in removed
+        }
+        for tid, meta in metas.items():
+            summary.setdefault(tid, {"task_id": tid, "total": 0, "done": 0}).update(
+                status=meta["status"], queue_status=meta["queue_status"], priority=meta["priority"])
+        for (tid, node_id), node in pending_nodes.items():
+            statuses[tid][node_id] = node.get("status")
+        for tid, nodes in statuses.items():
+            if tid in summary:
+                summary[tid]["total"] = len(nodes)
+                summary[tid]["done"] = sum(1 for st in nodes.values() if st in TERMINAL_STATUSES)
+        return list(summary.values())
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._flusher.join(timeout=2)
+        self.flush()
+        with self._io_lock:
+            self._conn.close()
+        with self._read_lock:
+            self._reader.close()
+
+
+def build_task_store() -> TaskStore:
+    """按环境变量构建任务存储"""
+    kind = os.getenv("TASK_STORE", "memory").lower()
+    if kind == "sqlite":
+        return SQLiteTaskStore(
+            path=os.getenv("TASK_STORE_PATH", "data/tasks.db"),
+            spill_dir=os.getenv("TASK_STORE_SPILL_DIR", "data/task_results"),
+            spill_bytes=int(os.getenv("TASK_STORE_SPILL_BYTES", str(64 * 1024))),
+            batch_size=int(os.getenv("TASK_STORE_BATCH", "200")),
+            flush_interval=int(os.getenv("TASK_STORE_FLUSH_MS", "200")) / 1000.0,
+            max_tasks=int(os.getenv("TASK_STORE_MAX_TASKS", "1000")),
+        )
+    return MemoryTaskStore()
@@ -538,7 +538,9 @@ function connectWS(taskId) {
     const ws = new WebSocket(url); wsConnections[taskId] = ws;
     ws.onopen = () => { appendLog(taskId, 'WS已连接'); try { ws.send(JSON.stringify({ type: 'resume', taskId })); } catch {} retryDelay = 1000; };
     ws.onmessage = (evt) => {
-      const data = JSON.parse(evt.data);
+      let data = JSON.parse(evt.data);
+      if (data.type === 'node_update' && data.delta) { const st = taskState[taskId] || (taskState[taskId] = { nodes: {}, logs: [], progress: 0 }); const full = (st.full = st.full || {}); data = full[data.node_id] = Object.assign(full[data.node_id] || {}, data); } else if (data.type === 'node_update' && taskState[taskId]) { (taskState[taskId].full = taskState[taskId].full || {})[data.node_id] = Object.assign({}, data); }
+      if (data.type === 'progress') { Object.entries(data.elapsed || {}).forEach(([nid, secs]) => { const el = document.getElementById(nid); const prog = el && el.querySelector('.progress'); if (prog) prog.textContent = `⏱ ${secs}s`; }); return; }
       const nodeId = data.node_id || data.nodeId; const status = data.status || (data.type === 'node_update' ? (data.status || '') : ''); const elapsed = data.elapsed || 0;
       if (nodeId && (status || data.type === 'node_update')) { updateNodeState(taskId, nodeId, status, elapsed, { cached: data.cached }); const docNodeEl = document.getElementById(`doc-${nodeId}`); if (docNodeEl) { docNodeEl.innerText = `${status || 'update'} (${elapsed}s)`; } }
       appendLog(taskId, JSON.stringify(data));
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+缓存批量失效基准：在本地假 Redis（scripts/fake_redis_server.py，单线程事件循环，与 Redis 一样
+一条命令执行期间不处理其他客户端）上，对比
+
+- 前缀清空：旧版 KEYS prefix* + 一次 DEL  vs  CacheService.clear（SCAN 分页 + UNLINK 批量删除）
+- 任务清理：旧版 KEYS task:* + 逐键 GET / DELETE  vs  TaskQueue._cleanup_completed（SCAN + MGET + UNLINK）
+- 批量读写：逐键 get / set  vs  CacheService.mget / mset
+
+清理期间另一个客户端（独立线程、独立连接）每 1ms 发一次 GET，记录其延迟分布，观察清理对
+同一 Redis 其他客户端造成的延迟尖峰。
+
+用法：
+  python scripts/bench_cache_invalidation.py
+环境变量：
+  BENCH_KEYS              前缀清空的缓存键数，默认 200000
+  BENCH_TASKS             任务键数（其中一半可清理），默认 20000
+  BENCH_REDIS_LATENCY_MS  假 Redis 每批命令的延迟（毫秒），默认 0.1
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import redis  # noqa: E402
+import redis.asyncio as aioredis  # noqa: E402
+
+from backend.scripts.task_queue import TaskQueue  # noqa: E402
+from backend.services.cache_service import CacheService  # noqa: E402
+from fake_redis_server import start_in_subprocess  # noqa: E402
+
+KEYS = int(os.environ.get("BENCH_KEYS", "200000"))
+TASKS = int(os.environ.get("BENCH_TASKS", "20000"))
+LATENCY_MS = float(os.environ.get("BENCH_REDIS_LATENCY_MS", "0.1"))
+
+
+class Probe(threading.Thread):
+    """其他业务客户端：每 1ms 一次 GET，记录往返延迟（毫秒）"""
+
+    def __init__(self, port: int):
+        super().__init__(daemon=True)
+        self.client = redis.Redis(port=port)
+        self.client.set("probe", "1")
+        self.samples = []
+        self.stop = threading.Event()
+
+    def run(self):
+        while not self.stop.is_set():
+            start = time.perf_counter()
+            self.client.get("probe")
+            self.samples.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.001)
+
+    def report(self):
+        self.stop.set()
+        self.join()
+        s = sorted(self.samples) or [0.0]
+        return s[len(s) // 2], s[int(len(s) * 0.99)], s[-1]
+
+
+def _populate_cache(client, n):
+    pipe = client.pipeline(transaction=False)
+    for i in range(n):
+        pipe.set(f"ylai:bench:{i}", "v" * 64)
+        if i % 5000 == 4999:
+            pipe.execute()
+    pipe.execute()
+
+
+def _populate_tasks(client, n):
+    old, pipe = time.time() - 7200, client.pipeline(transaction=False)
+    for i in range(n):
+        task = {"task_id": f"t{i}", "task_type": "crawl", "payload": {"url": f"https://example.com/{i}"},
+                "status": "completed" if i % 2 else "running", "updated_at": old, "created_at": old}
+        pipe.set(f"task:t{i}", json.dumps(task), ex=86400)
+        if i % 5000 == 4999:
+            pipe.execute()
+    pipe.execute()
+
+
+def legacy_clear(client):
+    keys = client.keys("ylai:*")
+    if keys:
+        client.delete(*keys)
+    return len(keys)
+
+
+def legacy_cleanup(client, max_age=3600):
+    """旧版 TaskQueue._cleanup_completed 的访问模式"""
+    cleaned = 0
+    for task_key in client.keys("task:*"):
+        task_data = client.get(task_key)
+        if task_data:
+            task = json.loads(task_data)
+            if task["status"] in ("completed", "failed", "cancelled") and time.time() - task["updated_at"] > max_age:
+                client.delete(task_key)
+                cleaned += 1
+    return cleaned
+
+
+def _measure(port, populate, n, run):
+    client = redis.Redis(port=port)
+    client.flushdb()
+    populate(client, n)
+    probe = Probe(port)
+    client.scan(0, count=1)  # 预建假 Redis 的 SCAN 索引（真实 Redis 无此开销），不计入测量
+    probe.start()
+    time.sleep(0.05)
+    start = time.perf_counter()
+    removed = run()
+    elapsed = time.perf_counter() - start
+    time.sleep(0.05)
+    p50, p99, worst = probe.report()
+    client.close()
+    return removed, elapsed, p50, p99, worst
+
+
+def main_with(port):
+    sync = redis.Redis(port=port)
+    pool = aioredis.BlockingConnectionPool(port=port, max_connections=8)
+    cache = CacheService(client=aioredis.Redis(connection_pool=pool))
+    queue = TaskQueue()
+    queue.redis_client = sync
+    loop = asyncio.new_event_loop()
+
+    print(f"fake redis latency {LATENCY_MS}ms/batch; probe = other client GET every 1ms")
+    print(f"{'scenario':<34}{'removed':>9}{'seconds':>9}{'probe p50':>11}{'p99':>9}{'max ms':>9}")
+    rows = (
+        ("clear     KEYS + DEL", _populate_cache, KEYS, lambda: legacy_clear(sync)),
+        ("clear     SCAN + UNLINK", _populate_cache, KEYS,
+         lambda: loop.run_until_complete(cache._delete_matching("ylai:"))),
+        ("cleanup   KEYS + per-key GET/DEL", _populate_tasks, TASKS, lambda: legacy_cleanup(sync)),
+        ("cleanup   SCAN + MGET + UNLINK", _populate_tasks, TASKS,
+         lambda: loop.run_until_complete(queue._cleanup_completed(max_age=3600))["cleaned_count"]),
+    )
+    for name, populate, n, run in rows:
+        removed, elapsed, p50, p99, worst = _measure(port, populate, n, run)
+        print(f"{name:<34}{removed:>9}{elapsed:>9.2f}{p50:>11.2f}{p99:>9.2f}{worst:>9.1f}")
+
+    n = 5000
+    values = {f"bulk:{i}": {"i": i} for i in range(n)}
+
+    async def bulk():
+        start = time.perf_counter()
+        for key, value in values.items():
+            await cache.set(key, value)
+        per_key_set = time.perf_counter() - start
+        start = time.perf_counter()
+        await cache.mset(values)
+        batched_set = time.perf_counter() - start
+        cold = CacheService(client=cache.redis_client)
+        start = time.perf_counter()
+        for key in values:
+            await cold.get(key)
+        per_key_get = time.perf_counter() - start
+        cold.memory_cache.clear()
+        start = time.perf_counter()
+        await cold.mget(values)
+        batched_get = time.perf_counter() - start
+        return per_key_set, batched_set, per_key_get, batched_get
+
+    per_key_set, batched_set, per_key_get, batched_get = loop.run_until_complete(bulk())
+    print(f"bulk {n} keys: set {n / per_key_set:.0f}/s -> mset {n / batched_set:.0f}/s; "
+          f"get (L2) {n / per_key_get:.0f}/s -> mget {n / batched_get:.0f}/s")
+    loop.run_until_complete(cache.aclose())
+    loop.close()
+    sync.close()
+
+
+def main():
+    proc, port = start_in_subprocess(latency_ms=LATENCY_MS)
+    try:
+        main_with(port)
+    finally:
+        proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+CacheService 基准：在本地假 Redis（scripts/fake_redis_server.py，真实 redis-py 客户端走 TCP 回环，
+可注入每条命令的服务端延迟模拟网络往返）上，对比旧版同步 redis 客户端实现与两级缓存：
+
+- 热点读：并发处理器反复读取少量热点键的吞吐，以及同期事件循环最大卡顿
+- 冷键读写：各不相同的键 GET + SETEX（L1 无法命中，只比较 L2 访问方式）
+- 击穿：同一冷键并发 get_or_set 时加载函数的调用次数（对比无 single-flight 的「查-算-写」）
+
+用法：
+  python scripts/bench_cache_service.py
+环境变量：
+  BENCH_REDIS_LATENCY_MS  假 Redis 每条命令的延迟（毫秒），默认 0.5
+  BENCH_HANDLERS          并发处理器数，默认 100
+  BENCH_READS             每个处理器的热点读次数，默认 50
+"""
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import redis  # noqa: E402
+import redis.asyncio as aioredis  # noqa: E402
+
+from backend.services.cache_service import CacheService  # noqa: E402
+from fake_redis_server import start_in_subprocess  # noqa: E402
+
+LATENCY_MS = float(os.environ.get("BENCH_REDIS_LATENCY_MS", "0.5"))
+HANDLERS = int(os.environ.get("BENCH_HANDLERS", "100"))
+READS = int(os.environ.get("BENCH_READS", "50"))
+HOT_KEYS = 20
+
+
+class LegacyCache:
+    """旧版 CacheService 的 Redis 路径（同步客户端、无 L1、无 single-flight），仅用于对比。"""
+
+    def __init__(self, port: int):
+        self.redis_client = redis.Redis(port=port, decode_responses=True)
+
+    def get(self, key):
+        value = self.redis_client.get(f"ylai:{key}")
+        return value if value else None
+
+    def set(self, key, value, ttl=3600):
+        return bool(self.redis_client.set(f"ylai:{key}", value, ex=ttl))
+
+
+async def _lag_probe(stop: asyncio.Event, out: list):
+    """每 1ms 醒来一次，记录事件循环最大延迟"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        worst = max(worst, time.perf_counter() - start - 0.001)
+    out.append(worst * 1000)
+
+
+async def _measure(handler):
+    stop, lag = asyncio.Event(), []
+    probe = asyncio.create_task(_lag_probe(stop, lag))
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    await asyncio.gather(*(handler(i) for i in range(HANDLERS)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    return elapsed, lag[0]
+
+
+async def main_async(port: int):
+    legacy = LegacyCache(port)
+    pool = aioredis.BlockingConnectionPool(port=port, max_connections=32, decode_responses=True)
+    cache = CacheService(client=aioredis.Redis(connection_pool=pool))
+    for k in range(HOT_KEYS):
+        legacy.set(f"hot{k}", "v" * 200)
+        await cache.set(f"hot{k}", "v" * 200)
+    total = HANDLERS * READS
+
+    async def legacy_hot(i):
+        for n in range(READS):
+            legacy.get(f"hot{(i + n) % HOT_KEYS}")
+            await asyncio.sleep(0)
+
+    async def tiered_hot(i):
+        for n in range(READS):
+            await cache.get(f"hot{(i + n) % HOT_KEYS}")
+            await asyncio.sleep(0)
+
+    async def legacy_cold(i):
+        for n in range(READS // 5):
+            key = f"cold:l:{i}:{n}"
+            if legacy.get(key) is None:
+                legacy.set(key, "x")
+
+    async def tiered_cold(i):
+        for n in range(READS // 5):
+            key = f"cold:t:{i}:{n}"
+            if await cache.get(key) is None:
+                await cache.set(key, "x")
+
+    print(f"fake redis latency {LATENCY_MS}ms/command, {HANDLERS} concurrent handlers")
+    print(f"{'scenario':<28}{'ops':>7}{'ops/s':>11}{'max loop stall ms':>20}")
+    for name, handler, ops in (("hot reads  legacy sync", legacy_hot, total),
+                               ("hot reads  L1 + async L2", tiered_hot, total),
+                               ("cold r/w   legacy sync", legacy_cold, HANDLERS * (READS // 5)),
+                               ("cold r/w   L1 + async L2", tiered_cold, HANDLERS * (READS // 5))):
+        elapsed, stall = await _measure(handler)
+        print(f"{name:<28}{ops:>7}{ops / elapsed:>11.0f}{stall:>20.1f}")
+
+    loads = {"naive": 0, "single-flight": 0}
+
+    async def loader(kind):
+        loads[kind] += 1
+        await asyncio.sleep(0.05)
+        return {"computed": True}
+
+    client = cache.redis_client
+
+    async def naive(i):
+        value = await client.get("ylai:stampede:naive")
+        if value is None:
+            await loader("naive")
+            await client.set("ylai:stampede:naive", "1", ex=60)
+
+    await asyncio.gather(*(naive(i) for i in range(HANDLERS)))
+    start = time.perf_counter()
+    await asyncio.gather(*(cache.get_or_set("stampede:sf", lambda: loader("single-flight"))
+                           for _ in range(HANDLERS)))
+    sf_ms = (time.perf_counter() - start) * 1000
+    print(f"stampede ({HANDLERS} concurrent misses, 50ms loader): "
+          f"naive check-then-set loads={loads['naive']}, single-flight loads={loads['single-flight']} "
+          f"({sf_ms:.0f}ms)")
+    await cache.aclose()
+    legacy.redis_client.close()
+
+
+def main():
+    proc, port = start_in_subprocess(latency_ms=LATENCY_MS)
+    try:
+        asyncio.run(main_async(port))
+    finally:
+        proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+序列化编解码基准：对比旧版 JSON（json.dumps(default=str)）与 backend/core/codec.py 各组合
+（json / msgpack × 不压缩 / zstd / lz4 / zlib）在三类典型载荷上的编码、解码耗时与体积：
+
+- cache   CacheService 的小值（接口结果 / 号码信息，约 0.5KB）
+- node    TaskManager 持久化的节点状态 + 结构化结果（数百条记录）
+- page    采集结果（仓库内真实页面 frontend/pages/*.html 拼接的 HTML + 元数据）
+
+另外对比 Kernel._hash_params 旧版 json.dumps(sort_keys=True) + sha256 与 codec.fingerprint 的耗时。
+未安装的可选依赖（msgpack / zstandard / lz4 / orjson）对应的组合会被跳过。
+
+用法：
+  python scripts/bench_codec.py
+环境变量：
+  BENCH_REPEAT      每个组合重复次数（取中位数），默认 200
+  BENCH_PAGE_KB     page 载荷的 HTML 大小（KB），默认 256
+"""
+import hashlib
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.core import codec  # noqa: E402
+from backend.core.codec import Serializer, fingerprint  # noqa: E402
+
+REPEAT = int(os.environ.get("BENCH_REPEAT", "200"))
+PAGE_KB = int(os.environ.get("BENCH_PAGE_KB", "256"))
+
+
+class LegacyJson:
+    """旧版 CacheService / 任务存储的 JSON 文本编码，仅用于对比"""
+
+    name = "legacy json"
+
+    def dumps(self, obj):
+        return json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8")
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+def payloads():
+    cache = {"phone": "13800138000", "province": "广东", "city": "深圳", "carrier": "中国移动",
+             "tags": ["快递", "外卖"], "score": 0.87, "updated_at": "2024-05-01T12:00:00",
+             "sources": [{"name": f"source{i}", "hit": i % 2 == 0, "latency_ms": 12.5 * i} for i in range(5)]}
+    node = {"status": "success", "script": "crawler", "started_at": 1714560000.0, "finished_at": 1714560012.3,
+            "attempts": 1, "fingerprint": "ab" * 32,
+            "result": {"items": [{"id": i, "title": f"商品 {i}", "price": 19.9 + i, "url": f"https://example.com/item/{i}",
+                                  "in_stock": i % 3 != 0, "tags": ["new", "sale"][: i % 3]} for i in range(300)]}}
+    files = sorted((ROOT / "frontend" / "pages").glob("*.html"))
+    html, i = "", 0
+    while files and len(html) < PAGE_KB * 1024:
+        html += files[i % len(files)].read_text(encoding="utf-8", errors="replace")
+        i += 1
+    page = {"url": "https://example.com/list?page=1", "status": 200, "headers": {"content-type": "text/html"},
+            "html": html[: PAGE_KB * 1024], "links": [f"https://example.com/p/{n}" for n in range(200)]}
+    return {"cache": cache, "node": node, "page": page}
+
+
+def _median_us(fn, arg):
+    samples = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn(arg)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    serializers = [LegacyJson()]
+    for name in ("json", "msgpack"):
+        if name not in codec._CODECS:
+            print(f"skip {name}: not installed")
+            continue
+        serializers.append(Serializer(name, "none"))
+        for comp in ("zstd", "lz4", "zlib"):
+            if comp in codec._COMPRESSORS:
+                serializers.append(Serializer(name, comp, compress_min_bytes=1024))
+
+    print(f"{'payload':<8}{'format':<16}{'bytes':>10}{'ratio':>8}{'encode us':>12}{'decode us':>12}")
+    for kind, obj in payloads().items():
+        baseline = None
+        for s in serializers:
+            data = s.dumps(obj)
+            assert s.loads(data) == obj
+            baseline = baseline or len(data)
+            print(f"{kind:<8}{s.name:<16}{len(data):>10}{len(data) / baseline:>8.2f}"
+                  f"{_median_us(s.dumps, obj):>12.1f}{_median_us(s.loads, data):>12.1f}")
+        print()
+
+    params = {"url": "https://example.com/search", "keywords": ["手机", "耳机"], "page": 3,
+              "filters": {"price": [100, 500], "brand": ["a", "b", "c"], "sort": "sales"}, "timeout": 30}
+
+    def legacy_hash(p):
+        dump = json.dumps({"script": "crawler", "params": p}, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(dump.encode("utf-8")).hexdigest()
+
+    def new_hash(p):
+        return fingerprint({"script": "crawler", "params": p})
+
+    backend = "orjson" if codec.orjson is not None else "json"
+    print(f"params hash: json.dumps(sort_keys) {_median_us(legacy_hash, params):.2f}us -> "
+          f"fingerprint ({backend}) {_median_us(new_hash, params):.2f}us")
+
+
+if __name__ == "__main__":
+    main()
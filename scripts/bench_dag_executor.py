@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+DAG 执行器基准：对比事件驱动 run_pipeline 与旧版 50ms 轮询循环的阶段切换延迟。
+
+用法：
+  python scripts/bench_dag_executor.py
+环境变量：
+  BENCH_CHAIN_LEN   串行链长度（衡量阶段切换延迟），默认 40
+  BENCH_WIDE_NODES  宽 DAG 节点数（衡量大图调度开销），默认 10000
+  BENCH_WORKERS     线程池大小，默认 4
+"""
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.core.kernel import run_pipeline  # noqa: E402
+
+CHAIN_LEN = int(os.environ.get("BENCH_CHAIN_LEN", "40"))
+WIDE_NODES = int(os.environ.get("BENCH_WIDE_NODES", "10000"))
+WORKERS = int(os.environ.get("BENCH_WORKERS", "4"))
+
+
+def _noop(node, ws_send=None):
+    node["status"] = "success"
+
+
+def _legacy_run_pipeline(nodes, max_workers=4, ws_send=None, node_fn=_noop):
+    """旧版实现（轮询 + 每次完成全量扫描依赖），仅用于对比。"""
+    depends = {n["id"]: set(n.get("depends_on", [])) for n in nodes}
+    node_map = {n["id"]: n for n in nodes}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    in_progress = {}
+    finished = set()
+
+    def submit_ready():
+        for nid, deps in list(depends.items()):
+            if nid in finished or nid in in_progress:
+                continue
+            if not deps:
+                in_progress[nid] = executor.submit(node_fn, node_map[nid], ws_send)
+
+    submit_ready()
+    while len(finished) < len(nodes):
+        done = [nid for nid, fut in in_progress.items() if fut.done()]
+        for nid in done:
+            in_progress.pop(nid)
+            finished.add(nid)
+            for dn in depends.values():
+                dn.discard(nid)
+        if done:
+            submit_ready()
+        else:
+            time.sleep(0.05)
+    executor.shutdown(wait=True)
+    return nodes
+
+
+def chain(n: int) -> list[dict]:
+    return [{"id": f"n{i}", "script": "noop", "depends_on": [f"n{i-1}"] if i else []} for i in range(n)]
+
+
+def wide(n: int, fan_in: int = 4) -> list[dict]:
+    """分层 DAG：每层 100 个节点，每个节点依赖上一层的 fan_in 个节点。"""
+    width = 100
+    nodes = []
+    for i in range(n):
+        layer, pos = divmod(i, width)
+        deps = [] if layer == 0 else [f"n{(layer - 1) * width + (pos + k) % width}" for k in range(fan_in)]
+        nodes.append({"id": f"n{i}", "script": "noop", "depends_on": deps})
+    return nodes
+
+
+def _timed(fn, nodes) -> float:
+    t0 = time.perf_counter()
+    fn(nodes, WORKERS, None, _noop)
+    return time.perf_counter() - t0
+
+
+def main() -> int:
+    legacy_chain = _timed(_legacy_run_pipeline, chain(CHAIN_LEN))
+    event_chain = _timed(run_pipeline, chain(CHAIN_LEN))
+    event_wide = _timed(run_pipeline, wide(WIDE_NODES))
+    out = {
+        "chain_len": CHAIN_LEN,
+        "legacy_stage_ms": round(legacy_chain / CHAIN_LEN * 1000, 3),
+        "event_stage_ms": round(event_chain / CHAIN_LEN * 1000, 3),
+        "speedup": round(legacy_chain / event_chain, 1) if event_chain else None,
+        "wide_nodes": WIDE_NODES,
+        "event_wide_total_s": round(event_wide, 3),
+        "event_wide_per_node_us": round(event_wide / WIDE_NODES * 1e6, 2),
+    }
+    print(json.dumps(out, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
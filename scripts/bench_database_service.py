@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+DatabaseService 写入基准：对比旧版「每次调用新建连接 + 单行提交」与连接池 + 写后队列的
+遥测写入吞吐，以及 API 请求路径上单次 log_api_call 的耗时分布。
+
+用法：
+  python scripts/bench_database_service.py
+环境变量：
+  BENCH_ROWS         写后队列写入行数，默认 50000
+  BENCH_LEGACY_ROWS  旧版写入行数，默认 2000
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.services.database_service import DatabaseService  # noqa: E402
+
+ROWS = int(os.environ.get("BENCH_ROWS", "50000"))
+LEGACY_ROWS = int(os.environ.get("BENCH_LEGACY_ROWS", "2000"))
+
+
+def _legacy_log_api_call(path: str, endpoint, method, status_code, response_time):
+    """旧版 log_api_call：每次新建连接、单行提交，仅用于对比。"""
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(
+            "INSERT INTO api_stats (endpoint, method, status_code, response_time) VALUES (?, ?, ?, ?)",
+            (endpoint, method, status_code, response_time),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _pct(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] * 1e6
+
+
+async def _bench(tmp: Path):
+    db = DatabaseService(db_path=str(tmp / "bench.db"))
+    await db.initialize()
+
+    legacy_path = str(tmp / "legacy.db")
+    with sqlite3.connect(legacy_path) as conn:
+        conn.execute("CREATE TABLE api_stats (id INTEGER PRIMARY KEY, endpoint TEXT, method TEXT, "
+                     "status_code INTEGER, response_time REAL)")
+    lat = []
+    t0 = time.perf_counter()
+    for i in range(LEGACY_ROWS):
+        s = time.perf_counter()
+        _legacy_log_api_call(legacy_path, "/api/phone/analyze", "POST", 200, 0.01)
+        lat.append(time.perf_counter() - s)
+    legacy_s = time.perf_counter() - t0
+    print(f"legacy       rows={LEGACY_ROWS:>6}  {LEGACY_ROWS / legacy_s:>9.0f} rows/s  "
+          f"call p50={_pct(lat, .5):7.1f}us p99={_pct(lat, .99):8.1f}us")
+
+    lat = []
+    t0 = time.perf_counter()
+    for i in range(ROWS):
+        s = time.perf_counter()
+        await db.log_api_call("/api/phone/analyze", "POST", 200, response_time=0.01, cache_hit=i % 3 == 0)
+        lat.append(time.perf_counter() - s)
+    enqueue_s = time.perf_counter() - t0
+    await db.flush()
+    total_s = time.perf_counter() - t0
+    stats = db.writer.stats()
+    print(f"write-behind rows={ROWS:>6}  {ROWS / total_s:>9.0f} rows/s  "
+          f"call p50={_pct(lat, .5):7.1f}us p99={_pct(lat, .99):8.1f}us  "
+          f"(enqueue {enqueue_s:.2f}s, batches={stats['batches']}, "
+          f"avg batch={stats['written'] / max(1, stats['batches']):.0f}, dropped={stats['dropped']})")
+    db.close()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(_bench(Path(tmp)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Fuzz 用例生成基准：在模拟目标上对比各生成策略发现「多参数交互缺陷」所需的请求数。
+
+模拟目标回显参数（响应长度随参数变化），参数校验与分支会改变响应类别（如同真实服务的
+校验器 / 代码分支），并埋入 4 个只在参数组合下触发的缺陷（3 个二元交互、1 个三元交互、1 个每层都有响应差异的四元链式缺陷）。统计每种策略发现全部缺陷（或用尽用例）时的请求数：
+
+- cartesian：全组合空间大小（穷举的上界）
+- random：在全组合空间中均匀随机采样
+- single：原 generate_cases（单参数变异），无法触发交互缺陷
+- covering-2 / covering-3：n-wise 覆盖数组
+- feedback：反馈驱动生成
+
+用法：
+  python scripts/bench_fuzz_generators.py
+环境变量：
+  BENCH_SEEDS        重复的随机种子数（取中位数），默认 5
+  BENCH_MAX_CASES    random / feedback 的用例上限，默认 200000
+"""
+import json
+import math
+import os
+import random
+import statistics
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.services.fuzz.generators import (  # noqa: E402
+    FeedbackGenerator, generate_cases, iter_covering, param_domains,
+)
+
+SEEDS = int(os.environ.get("BENCH_SEEDS", "5"))
+MAX_CASES = int(os.environ.get("BENCH_MAX_CASES", "200000"))
+BASE = {"q": "seed", "n": 3, "filter": {"a": 1, "b": "x"}, "mode": "fast", "page": 1}
+
+
+def target(params):
+    """模拟目标：回显参数。参数校验 / 分支会改变响应（状态码、长度、延迟），
+    缺陷只在多个条件同时满足时触发（返回 500 或超慢响应）"""
+    q, n, flt, mode, page = params["q"], params["n"], params["filter"], params["mode"], params["page"]
+    bugs = []
+    status, elapsed, body = 200, 5.0, json.dumps(params, default=str)
+    if "<" in str(q):
+        # 校验器拒绝；但 FAST 模式跳过校验
+        if mode == "FAST":
+            bugs.append("xss_in_fast_mode")
+        else:
+            status = 400
+    if n == 2 ** 31 - 1:
+        elapsed = 40.0
+        if page == 0:
+            bugs.append("overflow_page0")
+    if isinstance(flt, dict) and flt.get("a") == '"':
+        status = 422
+        if q == "dees":
+            bugs.append("filter_type_confusion")
+    if page == -1:
+        status = 416
+        if n == 0:
+            status, body = 200, "[]"
+            if str(mode).startswith("\n"):
+                bugs.append("three_way_slow_path")
+    if q == "SEED":
+        # 逐层进入的管理分支：每一层都有可观察的响应差异
+        status = 403
+        if mode == "tsaf":
+            status, body = 202, "{}"
+            if page == 2 ** 31 - 1:
+                elapsed = 400.0
+                if n == -2 ** 31:
+                    bugs.append("four_way_admin_chain")
+    if "three_way_slow_path" in bugs:
+        status, elapsed = 200, 3000.0
+    elif bugs:
+        status, body = 500, "Internal Server Error"
+    return {"status": status, "length": len(body), "elapsed_ms": elapsed, "error": None,
+            "request_snapshot": {"params": params}}, bugs
+
+
+def requests_to_find_all(cases, observe=None):
+    expected = 5
+    seen = set()
+    count = 0
+    for params in cases:
+        count += 1
+        result, bugs = target(params)
+        if observe is not None:
+            observe(result)
+        seen.update(bugs)
+        if len(seen) == expected:
+            return count, len(seen)
+        if count >= MAX_CASES:
+            break
+    return count, len(seen)
+
+
+def random_cases(seed):
+    rng = random.Random(seed)
+    domains = param_domains(BASE)
+    while True:
+        yield {k: rng.choice(v) for k, v in domains.items()}
+
+
+def _median(runs):
+    return {"requests": int(statistics.median(r[0] for r in runs)), "bugs_found": min(r[1] for r in runs)}
+
+
+def main() -> int:
+    domains = param_domains(BASE)
+    cartesian = math.prod(len(v) for v in domains.values())
+    out = {"domains": {k: len(v) for k, v in domains.items()}, "cartesian": cartesian,
+           "single": dict(zip(("requests", "bugs_found"), requests_to_find_all(generate_cases("", "GET", BASE))))}
+    out["random"] = _median([requests_to_find_all(random_cases(s)) for s in range(SEEDS)])
+    for strength in (2, 3):
+        out[f"covering-{strength}"] = _median(
+            [requests_to_find_all(iter_covering(BASE, strength=strength, seed=s)) for s in range(SEEDS)])
+    runs = []
+    for s in range(SEEDS):
+        gen = FeedbackGenerator(BASE, seed=s, max_cases=MAX_CASES)
+        runs.append(requests_to_find_all(gen, gen.observe))
+    out["feedback"] = _median(runs)
+    print(json.dumps(out, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
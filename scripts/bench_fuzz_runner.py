@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Fuzz 执行基准：本地测试服务上对比异步 FuzzEngine（惰性用例 + 共享 keep-alive 会话 + 并发 worker）
+与旧版 runner.run_case（逐个 requests 调用、无会话）的吞吐，并观察用例数增长时进程内存是否有界。
+
+测试服务运行在独立进程中（aiohttp），对 q 参数含 "<" 的请求返回 500 以产生异常归档；
+归档目录指向临时目录。
+
+用法：
+  python scripts/bench_fuzz_runner.py
+环境变量：
+  BENCH_CASES         FuzzEngine 用例数，默认 100000
+  BENCH_LEGACY_CASES  旧版 run_case 用例数，默认 500
+  BENCH_CONCURRENCY   FuzzEngine 并发数，默认 64
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.services.fuzz import archiver  # noqa: E402
+from backend.services.fuzz.engine import FuzzEngine  # noqa: E402
+from backend.services.fuzz.generators import iter_campaign  # noqa: E402
+from backend.services.fuzz.runner import run_case  # noqa: E402
+
+CASES = int(os.environ.get("BENCH_CASES", "100000"))
+LEGACY_CASES = int(os.environ.get("BENCH_LEGACY_CASES", "500"))
+CONCURRENCY = int(os.environ.get("BENCH_CONCURRENCY", "64"))
+BASE_PARAMS = {"q": "seed", "n": 3, "filter": {"a": 1, "b": "x"}}
+
+
+def _serve(port: int):
+    from aiohttp import web
+
+    async def handle(request):
+        if "<" in request.query.get("q", ""):
+            return web.Response(status=500, text="boom")
+        return web.json_response({"ok": True, "n": len(request.query)})
+
+    app = web.Application()
+    app.router.add_get("/api", handle)
+    web.run_app(app, host="127.0.0.1", port=port, print=None, access_log=None)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(port: int):
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("test server did not start")
+
+
+def _max_rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def bench_engine(url: str, cases: int) -> dict:
+    engine = FuzzEngine(concurrency=CONCURRENCY, archive_batch_size=500, tag="bench")
+    summary = asyncio.run(engine.run(url, "GET", iter_campaign(url, "GET", BASE_PARAMS, rounds=0, max_cases=cases)))
+    return {"cases": summary["total"], "seconds": summary["elapsed_s"], "rps": summary["rps"],
+            "anomalies": summary["anomalies"], "archive_files": len(summary["archives"]),
+            "max_rss_mb": _max_rss_mb()}
+
+
+def bench_legacy(url: str, cases: int) -> dict:
+    started = time.perf_counter()
+    done = 0
+    for params in iter_campaign(url, "GET", BASE_PARAMS, rounds=0, max_cases=cases):
+        run_case(url, "GET", params)
+        done += 1
+    elapsed = time.perf_counter() - started
+    return {"cases": done, "seconds": round(elapsed, 2), "rps": round(done / elapsed, 1)}
+
+
+def main() -> int:
+    port = _free_port()
+    server = multiprocessing.Process(target=_serve, args=(port,), daemon=True)
+    server.start()
+    try:
+        _wait_ready(port)
+        url = f"http://127.0.0.1:{port}/api"
+        with tempfile.TemporaryDirectory() as tmp:
+            archiver.BASE_DIR = tmp
+            legacy = bench_legacy(url, LEGACY_CASES)
+            warm = bench_engine(url, max(1000, CASES // 10))
+            full = bench_engine(url, CASES)
+    finally:
+        server.terminate()
+        server.join()
+    print(json.dumps({"concurrency": CONCURRENCY, "legacy_run_case": legacy,
+                      "engine_small": warm, "engine": full,
+                      "speedup": round(full["rps"] / legacy["rps"], 1) if legacy["rps"] else None},
+                     ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+代理检测基准：本地假代理上对比 ProxyChecker 共享会话流式检测与旧版
+「每个代理新建 TCPConnector + ClientSession、每批 100 个、批间 sleep 0.1s」实现。
+
+本地启动一个 HTTP 假代理（监听 0.0.0.0，127.x.y.z 各地址视为不同代理），对绝对 URI 请求
+固定延迟后返回 {"origin": 客户端地址}；另有一部分代理指向未监听端口（连接被拒）。
+
+输出：总耗时、首个可用代理产出时间、工作代理数、会话创建次数。
+
+用法：
+  python scripts/bench_proxy_checker.py
+环境变量：
+  BENCH_PROXIES     代理数量，默认 2000
+  BENCH_DEAD_RATIO  不可用代理比例，默认 0.2
+  BENCH_LATENCY_MS  假代理响应延迟（毫秒），默认 50
+"""
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.scripts.proxy_checker import ProxyChecker  # noqa: E402
+
+N = int(os.environ.get("BENCH_PROXIES", "2000"))
+DEAD_RATIO = float(os.environ.get("BENCH_DEAD_RATIO", "0.2"))
+LATENCY = float(os.environ.get("BENCH_LATENCY_MS", "50")) / 1000
+CONFIG = {"timeout": 3, "retry_count": 0, "test_url": "http://bench.invalid/ip"}
+
+
+async def fake_proxy(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """HTTP 假代理：keep-alive 循环处理请求"""
+    peer = writer.get_extra_info("peername")[0]
+    try:
+        while True:
+            head = await reader.readuntil(b"\r\n\r\n")
+            if not head:
+                break
+            await asyncio.sleep(LATENCY)
+            body = json.dumps({"origin": peer}).encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _proxies(live_port: int, dead_port: int):
+    rng = random.Random(1)
+    return [{"ip": f"127.{1 + i // 62500}.{i // 250 % 250}.{1 + i % 250}",
+             "port": dead_port if rng.random() < DEAD_RATIO else live_port,
+             "protocol": "http"} for i in range(N)]
+
+
+async def legacy_check(checker: ProxyChecker, proxies):
+    """旧版检测流程（仅用于对比）"""
+    counters = {"sessions": 0, "first": None}
+    started = time.perf_counter()
+
+    async def one(proxy, sem):
+        async with sem:
+            connector = aiohttp.TCPConnector(limit=1, ttl_dns_cache=30)
+            counters["sessions"] += 1
+            try:
+                async with aiohttp.ClientSession(connector=connector,
+                                                 timeout=aiohttp.ClientTimeout(total=CONFIG["timeout"])) as session:
+                    async with session.get(CONFIG["test_url"], proxy=f"http://{proxy['ip']}:{proxy['port']}") as resp:
+                        await resp.json()
+                        return resp.status == 200
+            except Exception:
+                return False
+
+    working = 0
+    for i in range(0, len(proxies), 100):
+        sem = asyncio.Semaphore(50)
+        results = await asyncio.gather(*(one(p, sem) for p in proxies[i:i + 100]))
+        working += sum(results)
+        if working and counters["first"] is None:
+            counters["first"] = time.perf_counter() - started
+        await asyncio.sleep(0.1)
+    return {"seconds": round(time.perf_counter() - started, 2), "first_working_s": round(counters["first"] or 0, 3),
+            "working": working, "sessions_created": counters["sessions"]}
+
+
+async def streaming_check(checker: ProxyChecker, proxies):
+    started = time.perf_counter()
+    first = None
+    working = 0
+    async for result in checker.iter_check(proxies, **CONFIG):
+        if result.get("working"):
+            working += 1
+            if first is None:
+                first = time.perf_counter() - started
+    stats = checker.engine.stats()
+    await checker.close()
+    return {"seconds": round(time.perf_counter() - started, 2), "first_working_s": round(first or 0, 3),
+            "working": working, "sessions_created": stats["sessions_created"],
+            "final_concurrency_limit": stats["concurrency_limit"]}
+
+
+async def main_async() -> dict:
+    live_port, dead_port = _free_port(), _free_port()
+    server = await asyncio.start_server(fake_proxy, "0.0.0.0", live_port, backlog=4096)
+    proxies = _proxies(live_port, dead_port)
+    checker = ProxyChecker()
+    checker.logger.disabled = True
+    try:
+        new = await streaming_check(checker, proxies)
+        legacy = await legacy_check(checker, proxies)
+    finally:
+        server.close()
+        await server.wait_closed()
+    return {"proxies": N, "dead_ratio": DEAD_RATIO, "latency_ms": LATENCY * 1000,
+            "streaming": new, "legacy": legacy,
+            "speedup": round(legacy["seconds"] / new["seconds"], 1) if new["seconds"] else None}
+
+
+def main() -> int:
+    print(json.dumps(asyncio.run(main_async()), ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+代理池选择基准：对比 ProxyManager 索引选择与旧版全量扫描 + max/min 的单次选择耗时，
+观察池规模增长时选择成本的变化。每次选择后上报一次结果（模拟真实爬取的取用 + 回报循环）。
+
+用法：
+  python scripts/bench_proxy_pool.py
+环境变量：
+  BENCH_POOL_SIZES   逗号分隔的代理池规模，默认 1000,10000,50000
+  BENCH_PICKS        每种策略的索引选择次数，默认 5000
+  BENCH_LEGACY_PICKS 每种策略的旧版选择次数，默认 20
+"""
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.scripts.proxy_manager import ProxyManager  # noqa: E402
+
+SIZES = [int(x) for x in os.environ.get("BENCH_POOL_SIZES", "1000,10000,50000").split(",") if x]
+PICKS = int(os.environ.get("BENCH_PICKS", "5000"))
+LEGACY_PICKS = int(os.environ.get("BENCH_LEGACY_PICKS", "20"))
+STRATEGIES = ["score_based", "least_used", "fastest", "random", "round_robin"]
+
+
+def _legacy_pick(manager: ProxyManager, strategy: str):
+    """旧版 _get_available_proxies + _select_proxy_by_strategy，仅用于对比。"""
+    available = []
+    for record in manager.proxy_pool.values():
+        if record.status.value != "active" or record.score < manager.config['min_score']:
+            continue
+        if time.time() - record.created_at > manager.config['max_age']:
+            continue
+        if manager.config['geo_filter']:
+            filter_countries = [c.lower() for c in manager.config['geo_filter']]
+            if record.proxy.get('country', '').lower() not in filter_countries:
+                continue
+        available.append(record)
+    if strategy == "score_based":
+        return max(available, key=lambda x: x.score)
+    if strategy == "least_used":
+        return min(available, key=lambda x: x.use_count)
+    if strategy == "fastest":
+        return min(available, key=lambda x: x.proxy.get('response_time', float('inf')))
+    return random.choice(available)
+
+
+def _proxies(n: int, rng: random.Random):
+    return [{"ip": f"10.{i // 65536}.{i // 256 % 256}.{i % 256}", "port": 8080,
+             "country": rng.choice(["CN", "US", "JP", "DE", "FR"]), "score": rng.randint(40, 90),
+             "response_time": round(rng.uniform(0.05, 2), 3)} for i in range(n)]
+
+
+async def bench(size: int) -> dict:
+    rng = random.Random(size)
+    manager = ProxyManager()
+    manager.logger.disabled = True
+    await manager._add_proxies(_proxies(size, rng))
+    manager.set_geo_filter(["CN", "US"])
+    await manager._get_proxy()  # 首次选择时建立索引
+
+    out = {}
+    for strategy in STRATEGIES:
+        t0 = time.perf_counter()
+        for _ in range(PICKS):
+            result = await manager._get_proxy(strategy)
+            await manager._report_result(result["proxy_key"], rng.random() < 0.9, rng.uniform(0.05, 2))
+        indexed_us = (time.perf_counter() - t0) / PICKS * 1e6
+
+        t0 = time.perf_counter()
+        for _ in range(LEGACY_PICKS):
+            _legacy_pick(manager, strategy)
+            manager._update_stats()
+        legacy_us = (time.perf_counter() - t0) / LEGACY_PICKS * 1e6
+        out[strategy] = {"indexed_us": round(indexed_us, 1), "legacy_us": round(legacy_us, 1),
+                         "speedup": round(legacy_us / indexed_us, 1)}
+    return out
+
+
+def main() -> int:
+    results = {str(size): asyncio.run(bench(size)) for size in SIZES}
+    print(json.dumps({"picks": PICKS, "pool_sizes": results}, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
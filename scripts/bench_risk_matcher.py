@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+风控特征匹配基准：对比 RiskDetector.detect_risk_type / RiskAnalyzer._analyze_html_content
+的预编译匹配器与旧版逐模式 re.search(IGNORECASE) 实现，并校验分类结果一致。
+
+语料取自仓库内真实页面（frontend/pages/*.html 与 frontend/static/js/pages/*.js），
+去掉会命中特征的行后拼接到目标大小，分三种场景：
+  clean  无风控特征（最坏情况，需扫描全部模式）
+  tail   风控特征位于页面末尾
+  head   风控特征位于页面开头
+
+用法：
+  python scripts/bench_risk_matcher.py
+环境变量：
+  BENCH_PAGE_MB   页面大小（MB），默认 4
+  BENCH_REPEAT    每个场景重复次数，默认 3
+"""
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.scripts.risk_analyzer import RiskAnalyzer  # noqa: E402
+from backend.services.risk_control.detector import RiskDetector  # noqa: E402
+
+PAGE_MB = float(os.environ.get("BENCH_PAGE_MB", "4"))
+REPEAT = int(os.environ.get("BENCH_REPEAT", "3"))
+
+
+def _legacy_detect(d: RiskDetector, html: str):
+    """旧版 detect_risk_type 内容匹配部分（不含状态码/响应头），仅用于对比。"""
+    html_lower = html.lower()
+    for risk_type, patterns in (
+        ("captcha", d.captcha_patterns), ("rate_limit", d.rate_limit_patterns),
+        ("ip_block", d.ip_block_patterns), ("account_block", d.account_block_patterns),
+        ("js_challenge", d.js_challenge_patterns),
+    ):
+        for pattern in patterns:
+            if re.search(pattern, html_lower, re.IGNORECASE):
+                return risk_type, pattern
+    for indicator in d.bot_detection_indicators:
+        if indicator in html_lower:
+            return "bot_detection", indicator
+    return "none", None
+
+
+def _legacy_analyze(a: RiskAnalyzer, html: str):
+    """旧版 _analyze_html_content 的特征分组部分，仅用于对比。"""
+    html_lower = html.lower()
+    hits = []
+    for category, patterns in a.risk_patterns.items():
+        groups = patterns.items() if isinstance(patterns, dict) else [(None, patterns)]
+        for sub, sub_patterns in groups:
+            for pattern in sub_patterns:
+                if re.search(pattern, html_lower, re.IGNORECASE):
+                    hits.append(f"{category}_{sub}" if sub else category)
+                    break
+    return hits
+
+
+def corpus(d: RiskDetector, a: RiskAnalyzer) -> str:
+    files = sorted((ROOT / "frontend" / "pages").glob("*.html")) + sorted((ROOT / "frontend" / "static" / "js" / "pages").glob("*.js"))
+    text = "\n".join(f.read_text(encoding="utf-8", errors="ignore") for f in files)
+    lines = [ln for ln in text.splitlines()
+             if _legacy_detect(d, ln)[0] == "none" and not _legacy_analyze(a, ln)]
+    base = "\n".join(lines)
+    target = int(PAGE_MB * 1024 * 1024)
+    return (base + "\n") * max(1, target // max(1, len(base)))
+
+
+def _best(fn, *args) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> int:
+    d, a = RiskDetector(), RiskAnalyzer()
+    clean = corpus(d, a)
+    marker = "\n<div>Please verify you are human: g-recaptcha, too many requests, Cloudflare</div>\n"
+    scenarios = {"clean": clean, "tail": clean + marker, "head": marker + clean}
+    out = {"page_mb": round(len(clean) / 1024 / 1024, 2), "scenarios": {}}
+    for name, page in scenarios.items():
+        rt, details = d.detect_risk_type(page)
+        legacy = _legacy_detect(d, page)
+        assert (rt.value, details.get("pattern") or details.get("indicator")) == legacy, (rt, details, legacy)
+        html_types = [t for t in a._analyze_html_content(page)["risk_types"]
+                      if t not in ("javascript_challenge", "redirect_captcha")]
+        assert html_types == _legacy_analyze(a, page), (html_types, _legacy_analyze(a, page))
+
+        legacy_d = _best(_legacy_detect, d, page)
+        new_d = _best(d.detect_risk_type, page)
+        legacy_a = _best(_legacy_analyze, a, page)
+        new_a = _best(a._analyze_html_content, page)
+        out["scenarios"][name] = {
+            "result": rt.value,
+            "detector_legacy_ms": round(legacy_d * 1000, 1),
+            "detector_ms": round(new_d * 1000, 1),
+            "detector_speedup": round(legacy_d / new_d, 1) if new_d else None,
+            "analyzer_legacy_ms": round(legacy_a * 1000, 1),
+            "analyzer_ms": round(new_a * 1000, 1),
+            "analyzer_speedup": round(legacy_a / new_a, 1) if new_a else None,
+        }
+    print(json.dumps(out, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
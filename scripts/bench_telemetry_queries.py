@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+遥测查询基准：在 30 天 API 调用数据上，对比旧版单表（无索引）与按天分区 + 分钟 / 小时汇总表的
+看板查询耗时：最近 100 条记录、30 天逐小时趋势、接口排行，以及保留期清理。
+
+用法：
+  python scripts/bench_telemetry_queries.py
+环境变量：
+  BENCH_DAYS          天数，默认 30
+  BENCH_ROWS_PER_DAY  每天调用数，默认 20000
+"""
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from backend.services.database_service import DatabaseService  # noqa: E402
+from backend.services.telemetry_partitions import DAY, sql_timestamp  # noqa: E402
+
+DAYS = int(os.environ.get("BENCH_DAYS", "30"))
+ROWS_PER_DAY = int(os.environ.get("BENCH_ROWS_PER_DAY", "20000"))
+ENDPOINTS = [f"/api/v1/{name}" for name in ("phone/analyze", "captcha/solve", "proxy/check", "pipeline/run",
+                                            "scripts/run", "ocr/recognize", "tasks", "health")]
+
+
+def _calls(now: float):
+    rng = random.Random(7)
+    for day in range(DAYS):
+        for i in range(ROWS_PER_DAY):
+            ts = now - day * DAY - i * DAY / ROWS_PER_DAY
+            status = 500 if rng.random() < 0.02 else 200
+            yield ts, rng.choice(ENDPOINTS), "POST", status, rng.expovariate(20), rng.random() < 0.4
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def _legacy(path: str, now: float):
+    """旧版单表 + 旧版查询，仅用于对比。"""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE api_stats (id INTEGER PRIMARY KEY AUTOINCREMENT, endpoint TEXT NOT NULL, "
+                 "method TEXT NOT NULL, status_code INTEGER, response_time REAL, user_id TEXT, ip_address TEXT, "
+                 "timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)")
+    with conn:
+        conn.executemany("INSERT INTO api_stats (timestamp, endpoint, method, status_code, response_time) "
+                         "VALUES (?, ?, ?, ?, ?)",
+                         ((sql_timestamp(ts), ep, m, st, rt) for ts, ep, m, st, rt, _ in _calls(now)))
+    since = sql_timestamp(now - DAYS * DAY)
+    results = {
+        "recent 100": _timed(lambda: conn.execute(
+            "SELECT endpoint, method, status_code, response_time, user_id, timestamp FROM api_stats "
+            "ORDER BY timestamp DESC LIMIT 100").fetchall()),
+        f"{DAYS}d hourly series": _timed(lambda: conn.execute(
+            "SELECT strftime('%Y-%m-%d %H', timestamp) AS h, COUNT(*), AVG(response_time), "
+            "SUM(status_code >= 500) FROM api_stats WHERE timestamp >= ? GROUP BY h ORDER BY h",
+            (since,)).fetchall()),
+        f"{DAYS}d endpoint top": _timed(lambda: conn.execute(
+            "SELECT endpoint, method, COUNT(*) AS n, AVG(response_time) FROM api_stats WHERE timestamp >= ? "
+            "GROUP BY endpoint, method ORDER BY n DESC LIMIT 20", (since,)).fetchall()),
+    }
+
+    def cleanup():
+        with conn:
+            conn.execute("DELETE FROM api_stats WHERE timestamp < ?", (sql_timestamp(now - (DAYS - 1) * DAY),))
+    results["retention (drop 1 day)"] = _timed(cleanup)
+    conn.close()
+    return results
+
+
+async def _partitioned(path: str, now: float):
+    db = DatabaseService(db_path=path)
+    await db.initialize()
+    t0 = time.perf_counter()
+    for i, (ts, ep, m, st, rt, hit) in enumerate(_calls(now)):
+        await db.log_api_call(ep, m, st, response_time=rt, cache_hit=hit, timestamp=ts)
+        if i % 10000 == 0 and db.writer.pending > 50000:
+            await db.flush()  # 回填速度远超写线程，避免写队列满丢弃
+    await db.flush()
+    assert db.writer.stats()["dropped"] == 0 and db.writer.stats()["failed"] == 0
+    ingest_s = time.perf_counter() - t0
+    db.cleanup_old_data(days=DAYS)  # 首次清理会裁剪超出保留期的分钟汇总，不计入对比
+    hours = DAYS * 24
+    results = {
+        "recent 100": _timed(lambda: db.get_api_stats(limit=100)),
+        f"{DAYS}d hourly series": _timed(lambda: db.get_api_timeseries(hours=hours, resolution="1h")),
+        f"{DAYS}d endpoint top": _timed(lambda: db.get_endpoint_summary(hours=hours)),
+        "retention (drop 1 day)": _timed(lambda: db.cleanup_old_data(days=DAYS - 1)),
+    }
+    db.close()
+    return results, ingest_s
+
+
+def main():
+    now = time.time()
+    total = DAYS * ROWS_PER_DAY
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = _legacy(str(Path(tmp) / "legacy.db"), now)
+        partitioned, ingest_s = asyncio.run(_partitioned(str(Path(tmp) / "partitioned.db"), now))
+    print(f"rows={total}  partitioned ingest {total / ingest_s:.0f} rows/s (incl. indexes + rollups)")
+    print(f"{'query':<24}{'legacy ms':>12}{'partitioned ms':>16}{'speedup':>10}")
+    for name, (legacy_ms, _) in legacy.items():
+        new_ms = partitioned[name][0]
+        print(f"{name:<24}{legacy_ms:>12.1f}{new_ms:>16.2f}{legacy_ms / max(new_ms, 1e-3):>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
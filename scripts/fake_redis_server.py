@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+本地假 Redis 服务（RESP2 / RESP3 协议子集，单进程内存字典 + TTL）
+
+供缓存相关基准在无 Redis 的环境中使用真实 redis-py 客户端（同步 / 异步、连接池、pipeline）
+走 TCP 回环访问。支持：PING GET SET(EX/PX/NX) SETEX MGET MSET DEL UNLINK EXISTS EXPIRE TTL
+KEYS SCAN(MATCH/COUNT) DBSIZE FLUSHDB HELLO；其余命令（如 CLIENT SETINFO）返回 OK。
+
+用法：
+  python scripts/fake_redis_server.py [--port 6390] [--latency-ms 0]
+  或在基准中：from fake_redis_server import start_in_subprocess
+"""
+import argparse
+import bisect
+import asyncio
+import fnmatch
+import multiprocessing
+import re
+import socket
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+
+class Store:
+    def __init__(self):
+        self.data: Dict[bytes, Tuple[bytes, float]] = {}
+        # SCAN 索引：按 crc32 排序的 (槽位, 键)；新增键时置脏、下次 SCAN 重建，删除的键在分页时跳过
+        self._slots: List[Tuple[int, bytes]] = []
+        self._dirty = False
+
+    def put(self, key: bytes, value: bytes, expires_at: float = 0.0):
+        if key not in self.data:
+            self._dirty = True
+        self.data[key] = (value, expires_at)
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        if item[1] and item[1] <= time.time():
+            del self.data[key]
+            return None
+        return item[0]
+
+    def live_keys(self) -> List[bytes]:
+        return [k for k in list(self.data) if self.get(k) is not None]
+
+    def scan(self, slot: int, count: int) -> Tuple[List[bytes], int]:
+        """从槽位 slot 起取 count 个索引项，返回 (键, 下一个游标)"""
+        if self._dirty:
+            self._slots = sorted((zlib.crc32(k), k) for k in self.data)
+            self._dirty = False
+        start = bisect.bisect_left(self._slots, (slot, b""))
+        chunk = self._slots[start:start + count]
+        nxt = self._slots[start + count][0] + 1 if start + count < len(self._slots) else 0
+        return [k for _, k in chunk if k in self.data], nxt
+
+
+def _glob(pattern: str) -> str:
+    """Redis 匹配模式的 \\x 转义 -> fnmatch 的 [x]"""
+    return re.sub(r"\\(.)", r"[\1]", pattern)
+
+
+def _bulk(value: Optional[bytes], resp3: bool = False) -> bytes:
+    if value is None:
+        return b"_\r\n" if resp3 else b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+def _array(items: List[Optional[bytes]], resp3: bool = False) -> bytes:
+    return b"*%d\r\n" % len(items) + b"".join(_bulk(i, resp3) for i in items)
+
+
+def _int(n: int) -> bytes:
+    return b":%d\r\n" % n
+
+
+OK = b"+OK\r\n"
+
+
+def execute(store: Store, args: List[bytes], resp3: bool = False) -> bytes:
+    cmd = args[0].upper()
+    if cmd == b"PING":
+        return b"+PONG\r\n"
+    if cmd == b"HELLO":
+        # redis-py 默认以 RESP3 握手；RESP3 连接的空值回复为 "_"
+        proto = int(args[1]) if len(args) > 1 else 2
+        return b"%2\r\n" + _bulk(b"server") + _bulk(b"redis") + _bulk(b"proto") + _int(proto)
+    if cmd == b"GET":
+        return _bulk(store.get(args[1]), resp3)
+    if cmd in (b"SET", b"SETEX"):
+        if cmd == b"SETEX":
+            key, ttl, value, opts = args[1], float(args[2]), args[3], []
+        else:
+            key, value, opts, ttl = args[1], args[2], [a.upper() for a in args[3:]], 0.0
+            if b"EX" in opts:
+                ttl = float(args[3 + opts.index(b"EX") + 1])
+            if b"PX" in opts:
+                ttl = float(args[3 + opts.index(b"PX") + 1]) / 1000
+            if b"NX" in opts and store.get(key) is not None:
+                return _bulk(None, resp3)
+        store.put(key, value, time.time() + ttl if ttl else 0.0)
+        return OK
+    if cmd == b"MGET":
+        return _array([store.get(k) for k in args[1:]], resp3)
+    if cmd == b"MSET":
+        for i in range(1, len(args), 2):
+            store.put(args[i], args[i + 1])
+        return OK
+    if cmd in (b"DEL", b"UNLINK"):
+        return _int(sum(store.data.pop(k, None) is not None for k in args[1:]))
+    if cmd == b"EXISTS":
+        return _int(sum(store.get(k) is not None for k in args[1:]))
+    if cmd == b"EXPIRE":
+        value = store.get(args[1])
+        if value is None:
+            return _int(0)
+        store.data[args[1]] = (value, time.time() + float(args[2]))
+        return _int(1)
+    if cmd == b"TTL":
+        item = store.data.get(args[1])
+        if item is None or store.get(args[1]) is None:
+            return _int(-2)
+        return _int(int(item[1] - time.time()) if item[1] else -1)
+    if cmd == b"KEYS":
+        pattern = args[1].decode()
+        return _array([k for k in store.live_keys() if fnmatch.fnmatchcase(k.decode(), _glob(pattern))])
+    if cmd == b"SCAN":
+        # 游标为下一个键的 crc32 + 1：与真实 Redis 一样，遍历期间删除键不影响后续分页
+        cursor, pattern, count = int(args[1]), "*", 10
+        opts = [a.upper() for a in args[2:]]
+        if b"MATCH" in opts:
+            pattern = _glob(args[2 + opts.index(b"MATCH") + 1].decode())
+        if b"COUNT" in opts:
+            count = int(args[2 + opts.index(b"COUNT") + 1])
+        chunk, nxt = store.scan(cursor - 1 if cursor else 0, count)
+        matched = [k for k in chunk if store.get(k) is not None and fnmatch.fnmatchcase(k.decode(), pattern)]
+        return b"*2\r\n" + _bulk(str(nxt).encode()) + _array(matched)
+    if cmd == b"DBSIZE":
+        return _int(len(store.live_keys()))
+    if cmd == b"FLUSHDB":
+        store.data.clear()
+        return OK
+    return OK
+
+
+async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b"*"):
+        return line.split()  # inline 命令
+    args = []
+    for _ in range(int(line[1:])):
+        size = int((await reader.readline())[1:])
+        args.append((await reader.readexactly(size + 2))[:-2])
+    return args
+
+
+async def serve(port: int, latency_ms: float = 0.0, ready=None):
+    store = Store()
+
+    async def handle(reader, writer):
+        resp3 = False
+        try:
+            while True:
+                args = await _read_command(reader)
+                if not args:
+                    break
+                batch = [args]
+                # 同一批到达的 pipeline 命令一起执行、一次写回
+                while reader._buffer:  # noqa: SLF001
+                    more = await _read_command(reader)
+                    if not more:
+                        break
+                    batch.append(more)
+                out = []
+                for cmd in batch:
+                    if cmd[0].upper() == b"HELLO":
+                        resp3 = len(cmd) > 1 and cmd[1] == b"3"
+                    out.append(execute(store, cmd, resp3))
+                if latency_ms:
+                    await asyncio.sleep(latency_ms / 1000)
+                writer.write(b"".join(out))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", port)
+    if ready is not None:
+        ready.set()
+    async with server:
+        await server.serve_forever()
+
+
+def _run(port: int, latency_ms: float, ready):
+    asyncio.run(serve(port, latency_ms, ready))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_in_subprocess(latency_ms: float = 0.0) -> Tuple[multiprocessing.Process, int]:
+    """在子进程中启动假 Redis，返回 (进程, 端口)；用完调用 proc.terminate()"""
+    port = free_port()
+    ready = multiprocessing.Event()
+    proc = multiprocessing.Process(target=_run, args=(port, latency_ms, ready), daemon=True)
+    proc.start()
+    ready.wait(10)
+    return proc, port
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=6390)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    cli = parser.parse_args()
+    asyncio.run(serve(cli.port, cli.latency_ms))